@@ -0,0 +1,8 @@
+# audio module init
+from .audio_engine import AudioEngine
+from .backends import AudioBackend, FluidSynthBackend, OfflineRenderBackend, NullBackend, create_backend
+from .midi_recorder import MidiRecorder, read_midi
+from .sample_mixer import MixerBackend, SampleBank
+from .soundfont_loader import SoundfontLoader
+from .soundfont_subset import extract_presets, get_subset_soundfont
+from .voice_manager import VoiceManager
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de audio en hilo propio
+El hilo de audio es el único que llama al sintetizador: visión, juego y
+lecciones solo encolan eventos de nota con su instante programado, así
+ni el lazo de visión espera al audio ni una secuencia detiene la captura.
+Las llamadas con resultado (p. ej. cargar el soundfont) también pasan por
+el hilo de audio con call()
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class AudioEngine:
+    """
+    Despacha eventos de nota al sintetizador desde un hilo dedicado.
+
+    Los productores solo hacen deque.append (atómico en CPython, sin locks)
+    y despiertan al hilo; la agenda (heap por instante) la toca solo el
+    hilo de audio. Acepta las mismas llamadas que fluidsynth.Synth
+    (noteon/noteoff/program_select), así que puede pasarse donde antes se
+    pasaba el sintetizador.
+    """
+
+    NOTE_ON = 0
+    NOTE_OFF = 1
+    CALL = 2
+    CANCEL = 3
+
+    def __init__(self, synth, clock=time.time):
+        """
+        Args:
+            synth: Sintetizador (fluidsynth.Synth o compatible)
+            clock: Reloj de los instantes programados (mismo que la captura)
+        """
+        self.synth = synth
+        self.clock = clock
+
+        self._inbox = deque()          # (instante, evento) de los productores
+        self._schedule = []            # heap (instante, orden, evento), solo hilo de audio
+        self._order = itertools.count()
+        self._sounding = set()         # (chan, key) encendidas por el motor
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+        # Retraso de despacho (instante real - instante programado)
+        self.late_threshold = 0.005    # s
+        self.note_lags = deque(maxlen=4096)  # s por noteon (medición de latencia)
+        self.stats = {
+            'dispatched': 0,
+            'late_events': 0,
+            'max_lag': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # API de productores (cualquier hilo, no bloquea)
+    # ------------------------------------------------------------------
+
+    def noteon(self, chan, key, vel, at=None):
+        """Enciende una nota ahora o en el instante `at` (reloj del motor)."""
+        self._post(at, (self.NOTE_ON, chan, key, vel))
+
+    def noteoff(self, chan, key, at=None):
+        """Apaga una nota ahora o en el instante `at`."""
+        self._post(at, (self.NOTE_OFF, chan, key, 0))
+
+    def program_select(self, chan, sfid, bank, preset):
+        """Cambia el instrumento de un canal (se aplica en el hilo de audio)."""
+        self._post(None, (self.CALL, self.synth.program_select, (chan, sfid, bank, preset), None))
+
+    def call(self, func, *args):
+        """
+        Ejecuta func(*args) en el hilo de audio (p. ej. synth.load_soundfont).
+
+        Returns:
+            concurrent.futures.Future con el resultado; si el motor no está
+            corriendo se ejecuta en el hilo que llama (nadie más usa el synth)
+        """
+        future = Future()
+        if not self._running:
+            future.set_result(func(*args))
+            return future
+        self._post(None, (self.CALL, func, args, future))
+        return future
+
+    def play_note(self, chan, key, vel, duration, at=None):
+        """
+        Nota completa: noteon en `at` y noteoff `duration` segundos después.
+
+        Returns:
+            Instante en que termina la nota
+        """
+        start = self.clock() if at is None else at
+        self.noteon(chan, key, vel, at=start)
+        self.noteoff(chan, key, at=start + duration)
+        return start + duration
+
+    def play_sequence(self, notes, chan=0, start=None):
+        """
+        Programa una secuencia completa sin esperar.
+
+        Args:
+            notes: [(offset_s, key, vel, duration_s), ...] relativos a start
+            chan: Canal MIDI
+            start: Instante de inicio (None = ahora)
+
+        Returns:
+            Instante en que termina la última nota
+        """
+        start = self.clock() if start is None else start
+        end = start
+        for offset, key, vel, duration in notes:
+            end = max(end, self.play_note(chan, key, vel, duration, at=start + offset))
+        return end
+
+    def cancel_scheduled(self):
+        """Descarta lo programado y apaga las notas que siguen sonando."""
+        self._post(None, (self.CANCEL, None, None, None))
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Arranca el hilo de audio."""
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='AudioEngine', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Detiene el hilo y apaga las notas que quedaron sonando."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._cancel_calls()
+        self._release_all()
+
+    def is_running(self):
+        return self._running
+
+    def pending_events(self):
+        """Eventos aún no despachados (aproximado si el hilo está activo)."""
+        return len(self._inbox) + len(self._schedule)
+
+    # ------------------------------------------------------------------
+    # Hilo de audio
+    # ------------------------------------------------------------------
+
+    def _post(self, at, event):
+        self._inbox.append((self.clock() if at is None else at, event))
+        self._wakeup.set()
+
+    def _run(self):
+        schedule = self._schedule
+        while self._running:
+            # Pasar lo recibido a la agenda
+            while self._inbox:
+                when, event = self._inbox.popleft()
+                if event[0] == self.CANCEL:
+                    schedule.clear()
+                    self._release_all()
+                    continue
+                heapq.heappush(schedule, (when, next(self._order), event))
+
+            # Despachar lo vencido
+            now = self.clock()
+            while schedule and schedule[0][0] <= now:
+                when, _, event = heapq.heappop(schedule)
+                self._dispatch(event, now - when)
+
+            # Dormir hasta el próximo evento o hasta que llegue uno nuevo
+            timeout = schedule[0][0] - self.clock() if schedule else None
+            if timeout is None or timeout > 0:
+                self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def _dispatch(self, event, lag):
+        kind, a, b, c = event
+        if kind == self.NOTE_ON:
+            self.synth.noteon(a, b, c)
+            self._sounding.add((a, b))
+            self.note_lags.append(lag)
+        elif kind == self.NOTE_OFF:
+            self.synth.noteoff(a, b)
+            self._sounding.discard((a, b))
+        elif c is None:
+            a(*b)
+        else:
+            # CALL con resultado: lo recibe quien espera el Future
+            try:
+                c.set_result(a(*b))
+            except Exception as e:
+                c.set_exception(e)
+
+        self.stats['dispatched'] += 1
+        if lag > self.late_threshold:
+            self.stats['late_events'] += 1
+        if lag > self.stats['max_lag']:
+            self.stats['max_lag'] = lag
+
+    def _cancel_calls(self):
+        # Llamadas que quedaron sin despachar al detener el motor
+        pending = [event for _, event in self._inbox] + [event for _, _, event in self._schedule]
+        for kind, _, _, future in pending:
+            if kind == self.CALL and future is not None:
+                future.cancel()
+
+    def _release_all(self):
+        for chan, key in list(self._sounding):
+            self.synth.noteoff(chan, key)
+        self._sounding.clear()
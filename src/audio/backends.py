@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backends de audio intercambiables
+- FluidSynthBackend: sonido en vivo por el driver del sistema
+- OfflineRenderBackend: fluidsynth sin dispositivo, renderiza con get_samples
+- NullBackend: sin sonido, solo registra los eventos con timestamp
+- MixerBackend (sample_mixer): muestras pre-renderizadas y mezclador NumPy
+
+Todos aceptan las llamadas de fluidsynth.Synth que usa la app
+(noteon/noteoff/program_select/delete), así que AudioEngine y las
+lecciones funcionan igual con cualquiera de ellos.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+from src.config.app_config import AppConfig
+
+# pyfluidsynth es opcional: sin él solo está disponible NullBackend
+try:
+    import fluidsynth
+except ImportError:
+    fluidsynth = None
+
+
+class AudioBackend(ABC):
+    """Interfaz común de los backends de audio."""
+
+    name = 'base'
+
+    def load_soundfont(self, path):
+        """
+        Carga un soundfont.
+
+        Returns:
+            sfid para program_select (None si no se cargó)
+        """
+        return None
+
+    @abstractmethod
+    def noteon(self, chan, key, vel):
+        pass
+
+    @abstractmethod
+    def noteoff(self, chan, key):
+        pass
+
+    def program_select(self, chan, sfid, bank, preset):
+        pass
+
+    def delete(self):
+        """Libera el sintetizador / dispositivo."""
+        pass
+
+
+class FluidSynthBackend(AudioBackend):
+    """Sonido en vivo con fluidsynth."""
+
+    name = 'fluidsynth'
+
+    def __init__(self, driver=None, gain=0.2, sample_rate=44100, start=True):
+        """
+        Args:
+            driver: Driver de audio ('dsound', 'alsa', 'pulseaudio'...; None = el de fluidsynth)
+            gain: Ganancia del sintetizador
+            sample_rate: Frecuencia de muestreo (Hz)
+            start: Abrir el dispositivo de audio (False = solo render offline)
+        """
+        if fluidsynth is None:
+            raise RuntimeError("pyfluidsynth no está instalado")
+        self.sample_rate = sample_rate
+        self.synth = fluidsynth.Synth(gain=gain, samplerate=float(sample_rate))
+        if start:
+            self.synth.start(driver=driver)
+
+    def load_soundfont(self, path):
+        if not path:
+            return None
+        sfid = self.synth.sfload(str(path))
+        return sfid if sfid >= 0 else None
+
+    def noteon(self, chan, key, vel):
+        self.synth.noteon(chan, key, vel)
+
+    def noteoff(self, chan, key):
+        self.synth.noteoff(chan, key)
+
+    def program_select(self, chan, sfid, bank, preset):
+        if sfid is not None:
+            self.synth.program_select(chan, sfid, bank, preset)
+
+    def delete(self):
+        self.synth.delete()
+
+
+class OfflineRenderBackend(FluidSynthBackend):
+    """
+    fluidsynth sin dispositivo: el audio se genera con render() en un buffer.
+
+    Cada evento se registra con la muestra en la que se aplicó, así la
+    latencia evento -> muestra se mide exacta con onset_after().
+    """
+
+    name = 'offline'
+
+    def __init__(self, gain=0.2, sample_rate=44100):
+        super().__init__(gain=gain, sample_rate=sample_rate, start=False)
+        self.blocks = []               # bloques int16 (n, 2)
+        self.samples_rendered = 0
+        self.events = []               # (muestra, tipo, canal, nota, velocidad)
+
+    def noteon(self, chan, key, vel):
+        self.events.append((self.samples_rendered, 'on', chan, key, vel))
+        super().noteon(chan, key, vel)
+
+    def noteoff(self, chan, key):
+        self.events.append((self.samples_rendered, 'off', chan, key, 0))
+        super().noteoff(chan, key)
+
+    def render(self, seconds):
+        """
+        Genera `seconds` de audio y lo agrega al buffer.
+
+        Returns:
+            np.ndarray int16 (n, 2) con el bloque generado
+        """
+        n = int(round(seconds * self.sample_rate))
+        block = np.asarray(self.synth.get_samples(n), dtype=np.int16).reshape(-1, 2)
+        self.blocks.append(block)
+        self.samples_rendered += len(block)
+        return block
+
+    def get_audio(self):
+        """Todo el audio renderizado, int16 (n, 2)."""
+        if not self.blocks:
+            return np.zeros((0, 2), dtype=np.int16)
+        return np.concatenate(self.blocks)
+
+    def onset_after(self, sample_index, threshold=64):
+        """
+        Primera muestra con amplitud > threshold desde sample_index.
+
+        Returns:
+            Índice de muestra, o None si no suena nada
+        """
+        audio = np.abs(self.get_audio()[sample_index:].astype(np.int32)).max(axis=1)
+        loud = np.flatnonzero(audio > threshold)
+        return sample_index + int(loud[0]) if len(loud) else None
+
+    def clear(self):
+        self.blocks.clear()
+        self.samples_rendered = 0
+        self.events.clear()
+
+
+class NullBackend(AudioBackend):
+    """
+    Sin sonido: registra (timestamp, tipo, canal, nota, velocidad) de cada evento.
+
+    Sirve para correr la app y los benchmarks en una máquina sin audio
+    y para medir la latencia hasta el sintetizador.
+    """
+
+    name = 'null'
+
+    def __init__(self, clock=time.time, max_events=100000):
+        self.clock = clock
+        self.events = deque(maxlen=max_events)
+
+    def load_soundfont(self, path):
+        return 1
+
+    def noteon(self, chan, key, vel):
+        self.events.append((self.clock(), 'on', chan, key, vel))
+
+    def noteoff(self, chan, key):
+        self.events.append((self.clock(), 'off', chan, key, 0))
+
+    def program_select(self, chan, sfid, bank, preset):
+        self.events.append((self.clock(), 'program', chan, bank, preset))
+
+
+BACKENDS = {
+    FluidSynthBackend.name: FluidSynthBackend,
+    OfflineRenderBackend.name: OfflineRenderBackend,
+    NullBackend.name: NullBackend,
+}
+
+
+def create_backend(name=None, driver=None):
+    """
+    Crea el backend configurado.
+
+    Args:
+        name: 'fluidsynth', 'offline', 'mixer' o 'null' (None = AppConfig.AUDIO_BACKEND)
+        driver: Driver de audio para 'fluidsynth'
+
+    Returns:
+        AudioBackend (NullBackend si fluidsynth no está disponible)
+    """
+    name = name or AppConfig.AUDIO_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de audio '{name}' no existe. Disponibles: {list(BACKENDS)}")
+
+    if name in (FluidSynthBackend.name, OfflineRenderBackend.name) and fluidsynth is None:
+        print("⚠ pyfluidsynth no disponible: audio desactivado (backend nulo)")
+        name = NullBackend.name
+
+    if name == FluidSynthBackend.name:
+        return FluidSynthBackend(driver=driver)
+    return BACKENDS[name]()
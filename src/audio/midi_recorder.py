@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grabación de la sesión en Standard MIDI File (.mid)
+En el lazo de visión cada nota solo se escribe en un ring buffer
+preasignado (instante en ns, tipo, canal, nota, velocidad); un hilo
+aparte codifica los delta-times y al detener se escribe el archivo
+(formato 0, una pista). Los .mid sirven para revisar la práctica y como
+entrada de pruebas de regresión offline (read_midi)
+"""
+
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+PROGRAM_CHANGE = 0xC0
+
+
+def _vlq(value):
+    """Cantidad de longitud variable de SMF (7 bits por byte, MSB = continúa)."""
+    out = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        out.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(out)
+
+
+class MidiRecorder:
+    """
+    Envoltorio de AudioEngine (o backend) que además graba las notas.
+
+    Se pasa donde iba el audio (p.ej. VoiceManager(recorder)): noteon y
+    noteoff se reenvían primero y luego se anotan en el ring buffer, así
+    la grabación no se suma a la latencia de la nota. Si el escritor se
+    atrasa más de `capacity` eventos, los más antiguos se pierden
+    (stats['dropped']).
+    """
+
+    def __init__(self, audio=None, capacity=8192, ticks_per_beat=480, tempo=500000,
+                 flush_interval=0.25, program=0, clock=time.perf_counter_ns):
+        """
+        Args:
+            audio: AudioEngine o backend al que se reenvían las notas (None = solo grabar)
+            capacity: Eventos en el ring buffer
+            ticks_per_beat: Resolución del archivo (ticks por negra)
+            tempo: µs por negra (500000 = 120 BPM)
+            flush_interval: s entre pasadas del escritor
+            program: Programa General MIDI del canal 0 (0 = piano)
+            clock: Reloj en ns
+        """
+        self.audio = audio
+        self.capacity = capacity
+        self.ticks_per_beat = ticks_per_beat
+        self.tempo = tempo
+        self.flush_interval = flush_interval
+        self.program = program
+        self.clock = clock
+
+        # Ring buffer (solo el productor escribe, solo el escritor lee)
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.status = np.zeros(capacity, dtype=np.uint8)
+        self.keys = np.zeros(capacity, dtype=np.uint8)
+        self.velocities = np.zeros(capacity, dtype=np.uint8)
+        self._head = 0                 # eventos escritos (productor)
+        self._tail = 0                 # eventos codificados (escritor)
+
+        self.path = None
+        self.start_ns = None
+        self._track = bytearray()
+        self._last_tick = 0
+        self._recording = False
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            'events': 0,
+            'dropped': 0,              # pisados antes de codificarse
+            'duration': 0.0            # s grabados
+        }
+
+    # ------------------------------------------------------------------
+    # Lazo de visión
+    # ------------------------------------------------------------------
+
+    def noteon(self, chan, key, vel):
+        if self.audio is not None:
+            self.audio.noteon(chan, key, vel)
+        self._append(NOTE_ON | chan, key, vel)
+
+    def noteoff(self, chan, key):
+        if self.audio is not None:
+            self.audio.noteoff(chan, key)
+        self._append(NOTE_OFF | chan, key, 0)
+
+    def _append(self, status, key, vel):
+        if not self._recording:
+            return
+        slot = self._head % self.capacity
+        self.times[slot] = self.clock()
+        self.status[slot] = status
+        self.keys[slot] = key
+        self.velocities[slot] = vel
+        self._head += 1
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self, path):
+        """Empieza a grabar; el archivo se escribe en stop()."""
+        self.path = str(path)
+        self._head = self._tail = 0
+        self._last_tick = 0
+        self.start_ns = self.clock()
+        self.stats.update(events=0, dropped=0, duration=0.0)
+
+        # Encabezado de la pista: tempo y programa del canal 0
+        self._track = bytearray()
+        self._track += _vlq(0) + b'\xFF\x51\x03' + self.tempo.to_bytes(3, 'big')
+        self._track += _vlq(0) + bytes([PROGRAM_CHANGE, self.program])
+
+        self._recording = True
+        self._thread = threading.Thread(target=self._run, name='MidiRecorder', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Detiene la grabación y escribe el .mid.
+
+        Returns:
+            Ruta del archivo o None si no se grabó ninguna nota
+        """
+        if not self._recording:
+            return None
+        self._recording = False
+        self._wakeup.set()
+        self._thread.join()
+        self._encode()
+
+        self.stats['duration'] = (self.clock() - self.start_ns) / 1e9
+        if self.stats['events'] == 0:
+            print("⚠ Grabación MIDI vacía: no se escribe archivo")
+            return None
+        self.write(self.path)
+        print(f"✓ Sesión grabada: {self.path} ({self.stats['events']} eventos, "
+              f"{self.stats['duration']:.1f} s)")
+        return self.path
+
+    def split(self, path):
+        """
+        Cierra la sesión actual (escribe su .mid) y empieza otra en path,
+        p. ej. al pasar de modo libre a juego.
+
+        Returns:
+            Ruta del archivo cerrado o None si estaba vacío
+        """
+        try:
+            previous = self.stop()
+        except OSError as e:
+            # La grabación sigue en el archivo nuevo aunque falle el anterior
+            print(f"⚠ No se pudo escribir {self.path}: {e}")
+            previous = None
+        self.start(path)
+        return previous
+
+    def _run(self):
+        while self._recording:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._encode()
+
+    # ------------------------------------------------------------------
+    # Escritor (hilo propio)
+    # ------------------------------------------------------------------
+
+    def _encode(self):
+        """Codifica los eventos pendientes del ring buffer en la pista."""
+        head = self._head
+        if head - self._tail > self.capacity:
+            self.stats['dropped'] += head - self._tail - self.capacity
+            self._tail = head - self.capacity
+
+        # ns -> ticks con el instante absoluto (sin acumular redondeos)
+        ns_per_tick = self.tempo * 1000 / self.ticks_per_beat
+        for i in range(self._tail, head):
+            slot = i % self.capacity
+            tick = max(self._last_tick, int(round((int(self.times[slot]) - self.start_ns) / ns_per_tick)))
+            self._track += _vlq(tick - self._last_tick)
+            self._track += bytes((int(self.status[slot]), int(self.keys[slot]), int(self.velocities[slot])))
+            self._last_tick = tick
+        self.stats['events'] += head - self._tail
+        self._tail = head
+
+    def write(self, path):
+        """Escribe el archivo (formato 0, una pista) de forma atómica."""
+        track = bytes(self._track) + _vlq(0) + b'\xFF\x2F\x00'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(b'MThd' + struct.pack('>IHHH', 6, 0, 1, self.ticks_per_beat))
+            f.write(b'MTrk' + struct.pack('>I', len(track)) + track)
+        os.replace(tmp, path)
+
+
+def _read_vlq(data, pos):
+    """(valor, posición siguiente) de una cantidad de longitud variable."""
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_midi(path):
+    """
+    Lee las notas de un .mid (formatos 0/1, tempo de la pista).
+
+    Returns:
+        [(instante_s, 'on'|'off', canal, nota, velocidad), ...] ordenados
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != b'MThd':
+        raise ValueError(f"{path} no es un Standard MIDI File")
+    _, n_tracks, division = struct.unpack('>HHH', data[8:14])
+
+    events, pos = [], 8 + struct.unpack('>I', data[4:8])[0]
+    for _ in range(n_tracks):
+        length = struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        pos, end = pos + 8, pos + 8 + length
+        seconds, tempo, running = 0.0, 500000, None
+        while pos < end:
+            delta, pos = _read_vlq(data, pos)
+            seconds += delta * tempo / 1e6 / division
+
+            status = data[pos]
+            if status == 0xFF:                                   # meta
+                kind = data[pos + 1]
+                size, pos = _read_vlq(data, pos + 2)
+                if kind == 0x51:
+                    tempo = int.from_bytes(data[pos:pos + 3], 'big')
+                pos += size
+                continue
+            if status in (0xF0, 0xF7):                           # sysex
+                size, pos = _read_vlq(data, pos + 1)
+                pos += size
+                continue
+            if status & 0x80:
+                running = status
+                pos += 1
+            command, chan = running & 0xF0, running & 0x0F
+            if command in (0xC0, 0xD0):
+                pos += 1
+                continue
+            key, vel = data[pos], data[pos + 1]
+            pos += 2
+            if command == NOTE_ON and vel > 0:
+                events.append((seconds, 'on', chan, key, vel))
+            elif command in (NOTE_ON, NOTE_OFF):
+                events.append((seconds, 'off', chan, key, 0))
+        pos = end
+    return sorted(events, key=lambda e: e[0])
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banco de muestras pre-renderizadas y mezclador NumPy
+Cada tecla del teclado virtual se renderiza offline con fluidsynth en
+varias capas de velocidad y se guarda como int16; en vivo un callback de
+bloque fijo suma las voces activas, así noteon no sintetiza nada (solo
+asigna una voz) y el costo por bloque está acotado por la polifonía
+"""
+
+import hashlib
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from src.audio.backends import BACKENDS, AudioBackend, OfflineRenderBackend, fluidsynth
+from src.config.app_config import AppConfig
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision.stereo_config import StereoConfig
+
+# Salida en vivo opcional (sin PortAudio el import lanza OSError)
+try:
+    import sounddevice
+except (ImportError, OSError):
+    sounddevice = None
+
+
+class SampleBank:
+    """
+    Muestras int16 (n, 2) por nota y capa de velocidad.
+
+    Velocidades entre capas usan la capa inmediata superior con ganancia
+    (vel / vel_capa)² <= 1 (sin saturar), la misma curva cóncava
+    velocidad -> amplitud del modulador por defecto de SoundFont 2. Sobre
+    la capa más alta se usa esa capa sin ganancia (1.0).
+    """
+
+    def __init__(self, notes, velocities, samples, sample_rate=44100):
+        """
+        Args:
+            notes: Notas MIDI renderizadas
+            velocities: Velocidades de cada capa (ascendentes)
+            samples: [nota * capas + capa] -> np.ndarray int16 (n, 2)
+            sample_rate: Frecuencia de muestreo (Hz)
+        """
+        self.notes = np.asarray(notes, dtype=np.int32)
+        self.velocities = np.asarray(velocities, dtype=np.int32)
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+        # Tablas por valor MIDI (0-127): noteon es una lectura O(1)
+        self.note_index = np.full(128, -1, dtype=np.int32)
+        self.note_index[self.notes] = np.arange(len(self.notes))
+        vel = np.arange(128)
+        self.layer_index = np.minimum(np.searchsorted(self.velocities, vel), len(self.velocities) - 1)
+        self.layer_gain = np.minimum((vel / self.velocities[self.layer_index]) ** 2, 1.0).astype(np.float32)
+
+    def lookup(self, key, vel):
+        """
+        Muestra y ganancia para (nota, velocidad).
+
+        Returns:
+            (índice de muestra, ganancia) o None si la nota no está en el banco
+        """
+        note = self.note_index[key] if 0 <= key < 128 else -1
+        if note < 0:
+            return None
+        vel = min(max(int(vel), 0), 127)
+        return note * len(self.velocities) + self.layer_index[vel], self.layer_gain[vel]
+
+    def nbytes(self):
+        return sum(s.nbytes for s in self.samples)
+
+    # ------------------------------------------------------------------
+    # Render y caché
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def render(cls, soundfont, notes, velocities, preset=(0, 0), hold=None, tail=None,
+               sample_rate=44100, silence=16):
+        """
+        Renderiza el banco con fluidsynth offline.
+
+        Args:
+            soundfont: .sf2 a usar
+            notes, velocities: Notas MIDI y capas de velocidad
+            preset: (banco, preset)
+            hold: s con la tecla pulsada (None = AppConfig.SAMPLE_HOLD)
+            tail: s de cola tras el noteoff (None = AppConfig.SAMPLE_TAIL)
+            silence: Amplitud bajo la que se recorta el final
+        """
+        hold = AppConfig.SAMPLE_HOLD if hold is None else hold
+        tail = AppConfig.SAMPLE_TAIL if tail is None else tail
+
+        synth = OfflineRenderBackend(sample_rate=sample_rate)
+        sfid = synth.load_soundfont(soundfont)
+        if sfid is None:
+            synth.delete()
+            raise OSError(f"No se pudo cargar el soundfont {soundfont}")
+        synth.program_select(0, sfid, *preset)
+
+        samples = []
+        for note in notes:
+            for vel in velocities:
+                synth.noteon(0, int(note), int(vel))
+                held = synth.render(hold)
+                synth.noteoff(0, int(note))
+                audio = np.concatenate([held, synth.render(tail)])
+                loud = np.flatnonzero(np.abs(audio).max(axis=1) > silence)
+                samples.append(audio[:loud[-1] + 1].copy() if len(loud) else audio[:0].copy())
+                synth.clear()
+        synth.delete()
+        return cls(notes, velocities, samples, sample_rate)
+
+    def save(self, path):
+        lengths = np.array([len(s) for s in self.samples], dtype=np.int64)
+        np.savez(path, notes=self.notes, velocities=self.velocities, lengths=lengths,
+                 sample_rate=self.sample_rate, data=np.concatenate(self.samples))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            bounds = np.concatenate([[0], np.cumsum(f['lengths'])])
+            data = f['data']
+            samples = [data[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+            return cls(f['notes'], f['velocities'], samples, int(f['sample_rate']))
+
+    @staticmethod
+    def cache_path(soundfont, notes, velocities, preset, sample_rate, cache_dir):
+        """Ruta del banco en caché (cambia con el soundfont o los parámetros)."""
+        stat = Path(soundfont).stat()
+        key = (f"{list(notes)}|{list(velocities)}|{tuple(preset)}|{sample_rate}|"
+               f"{AppConfig.SAMPLE_HOLD}|{AppConfig.SAMPLE_TAIL}|{stat.st_size}|{int(stat.st_mtime)}")
+        digest = hashlib.sha1(key.encode()).hexdigest()[:10]
+        return Path(cache_dir) / f"{Path(soundfont).stem}_samples_{digest}.npz"
+
+    @classmethod
+    def load_or_render(cls, soundfont, notes, velocities, preset=(0, 0), sample_rate=44100, cache_dir=None):
+        """Banco desde la caché en disco; lo renderiza la primera vez."""
+        cache_dir = cache_dir or AppConfig.SOUNDFONT_CACHE_DIR
+        path = cls.cache_path(soundfont, notes, velocities, preset, sample_rate, cache_dir)
+        if path.exists():
+            return cls.load(path)
+        if fluidsynth is None:
+            raise OSError("pyfluidsynth no está instalado y no hay banco de muestras en caché")
+
+        t0 = time.perf_counter()
+        bank = cls.render(soundfont, notes, velocities, preset, sample_rate=sample_rate)
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        bank.save(path)
+        print(f"✓ Banco de muestras: {len(bank.samples)} muestras ({bank.nbytes() / 1e6:.1f} MB) "
+              f"renderizadas en {time.perf_counter() - t0:.1f}s")
+        return bank
+
+
+class MixerBackend(AudioBackend):
+    """
+    Backend que reproduce el banco de muestras con un mezclador NumPy.
+
+    noteon/noteoff solo encolan; el mezclador aplica los eventos al inicio
+    de cada bloque, asigna voces (roba la más antigua al superar la
+    polifonía) y aplica un fundido lineal al soltar la tecla. La salida va
+    a sounddevice si está disponible, o se genera con render() (tests,
+    benchmarks).
+    """
+
+    name = 'mixer'
+
+    NOTE_ON = 0
+    NOTE_OFF = 1
+
+    def __init__(self, bank=None, block_size=None, polyphony=None, release=None,
+                 sample_rate=44100, start=True):
+        """
+        Args:
+            bank: SampleBank (None = se carga con load_soundfont)
+            block_size: Muestras por bloque (None = AppConfig.MIXER_BLOCK_SIZE)
+            polyphony: Voces simultáneas (None = AppConfig.MIXER_POLYPHONY)
+            release: s de fundido al soltar (None = AppConfig.SAMPLE_RELEASE)
+            sample_rate: Frecuencia de muestreo si no hay banco (Hz)
+            start: Abrir la salida en vivo (False = solo render())
+        """
+        self.block_size = block_size or AppConfig.MIXER_BLOCK_SIZE
+        self.polyphony = polyphony or AppConfig.MIXER_POLYPHONY
+        self.release = AppConfig.SAMPLE_RELEASE if release is None else release
+        self.sample_rate = bank.sample_rate if bank else sample_rate
+        self.bank = bank
+
+        self._events = deque()                                   # (tipo, canal, nota, vel)
+        self.voice_sample = np.full(self.polyphony, -1, dtype=np.int32)  # -1 = libre
+        self.voice_key = np.full(self.polyphony, -1, dtype=np.int32)     # canal * 128 + nota
+        self.voice_pos = np.zeros(self.polyphony, dtype=np.int64)
+        self.voice_gain = np.zeros(self.polyphony, dtype=np.float32)
+        self.voice_release = np.full(self.polyphony, -1, dtype=np.int64)  # posición en la rampa (-1 = sostenida)
+        self.voice_age = np.zeros(self.polyphony, dtype=np.int64)
+        self._age = 0
+        self._mix = np.zeros((self.block_size, 2), dtype=np.float32)
+        self._ramp = np.linspace(1.0, 0.0, max(1, int(self.release * self.sample_rate)),
+                                 dtype=np.float32)[:, None]
+
+        self.stats = {
+            'active_voices': 0,
+            'max_voices': 0,
+            'stolen': 0,
+            'blocks': 0,
+            'max_block_time': 0.0      # s del bloque más lento
+        }
+
+        self._stream = None
+        if start and sounddevice is not None:
+            self._stream = sounddevice.OutputStream(
+                samplerate=self.sample_rate, blocksize=self.block_size, channels=2,
+                dtype='int16', callback=self._callback)
+            self._stream.start()
+        elif start:
+            print("⚠ sounddevice/PortAudio no disponible: el mezclador solo renderiza offline")
+
+    def load_soundfont(self, path):
+        """Carga (o renderiza la primera vez) el banco de las teclas del teclado virtual."""
+        if not path:
+            return None
+        notes = [note + StereoConfig.OCTAVE_BASE for note in VirtualKeyboard.piano_notes()]
+        try:
+            self.bank = SampleBank.load_or_render(
+                path, notes, AppConfig.SAMPLE_VELOCITY_LAYERS, AppConfig.SOUNDFONT_PRESETS[0],
+                sample_rate=self.sample_rate)
+        except OSError as e:
+            print(f"⚠ Banco de muestras no disponible: {e}")
+            return None
+        return 1
+
+    def noteon(self, chan, key, vel):
+        self._events.append((self.NOTE_ON, chan, key, vel))
+
+    def noteoff(self, chan, key):
+        self._events.append((self.NOTE_OFF, chan, key, 0))
+
+    def delete(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def active_voices(self):
+        return int(np.count_nonzero(self.voice_sample >= 0))
+
+    # ------------------------------------------------------------------
+    # Mezclador (hilo de salida)
+    # ------------------------------------------------------------------
+
+    def _apply_events(self):
+        bank = self.bank
+        while self._events:
+            kind, chan, key, vel = self._events.popleft()
+            voice_key = chan * 128 + key
+            if kind == self.NOTE_OFF:
+                self.voice_release[(self.voice_key == voice_key) & (self.voice_release < 0)] = 0
+                continue
+
+            found = bank.lookup(key, vel) if bank is not None else None
+            if found is None:
+                continue
+            # Re-ataque de la misma tecla > voz libre > robar la más antigua
+            same = np.flatnonzero(self.voice_key == voice_key)
+            free = np.flatnonzero(self.voice_sample < 0)
+            if len(same):
+                v = same[0]
+            elif len(free):
+                v = free[0]
+            else:
+                v = int(self.voice_age.argmin())
+                self.stats['stolen'] += 1
+
+            self._age += 1
+            self.voice_sample[v], self.voice_gain[v] = found
+            self.voice_key[v] = voice_key
+            self.voice_pos[v] = 0
+            self.voice_release[v] = -1
+            self.voice_age[v] = self._age
+
+    def mix_block(self, frames=None):
+        """
+        Aplica los eventos pendientes y mezcla un bloque.
+
+        Returns:
+            np.ndarray int16 (frames, 2)
+        """
+        t0 = time.perf_counter()
+        frames = frames or self.block_size
+        self._apply_events()
+
+        out = self._mix[:frames]
+        out.fill(0.0)
+        ramp = self._ramp
+        samples = self.bank.samples if self.bank is not None else []
+        for v in np.flatnonzero(self.voice_sample >= 0):
+            sample = samples[self.voice_sample[v]]
+            pos, rel = self.voice_pos[v], self.voice_release[v]
+            n = min(frames, len(sample) - pos)
+            if rel >= 0:
+                n = min(n, len(ramp) - rel)
+                out[:n] += sample[pos:pos + n] * (ramp[rel:rel + n] * self.voice_gain[v])
+                self.voice_release[v] += n
+            else:
+                out[:n] += sample[pos:pos + n] * self.voice_gain[v]
+            self.voice_pos[v] += n
+
+            if self.voice_pos[v] >= len(sample) or self.voice_release[v] >= len(ramp):
+                self.voice_sample[v] = -1
+                self.voice_key[v] = -1
+
+        active = self.active_voices()
+        self.stats['active_voices'] = active
+        self.stats['max_voices'] = max(self.stats['max_voices'], active)
+        self.stats['blocks'] += 1
+        np.clip(out, -32768, 32767, out=out)
+        block = out.astype(np.int16)
+        self.stats['max_block_time'] = max(self.stats['max_block_time'], time.perf_counter() - t0)
+        return block
+
+    def render(self, seconds):
+        """Mezcla `seconds` de audio en bloques fijos (sin dispositivo)."""
+        n_blocks = int(np.ceil(seconds * self.sample_rate / self.block_size))
+        return np.concatenate([self.mix_block() for _ in range(n_blocks)])
+
+    def _callback(self, outdata, frames, time_info, status):
+        outdata[:] = self.mix_block(frames)
+
+
+BACKENDS[MixerBackend.name] = MixerBackend
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga del soundfont en segundo plano
+sfload de un banco General MIDI completo tarda segundos; se hace en un
+hilo mientras arrancan las cámaras y, si está activado, sobre el .sf2
+reducido con solo los presets configurados (ver soundfont_subset)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from src.audio.soundfont_subset import SoundFontError, get_subset_soundfont
+from src.config.app_config import AppConfig
+
+
+class SoundfontLoader:
+    """
+    Carga el soundfont y selecciona el preset del canal 0 sin bloquear.
+
+    Las notas enviadas antes de que termine la carga no suenan (el
+    sintetizador aún no tiene instrumento), pero la captura y la detección
+    arrancan sin esperar al audio. Con un AudioEngine el sfload se ejecuta
+    en el hilo de audio (AudioEngine.call): este hilo solo prepara el .sf2
+    reducido y espera el resultado.
+    """
+
+    def __init__(self, audio, path, presets=None, use_subset=None, cache_dir=None):
+        """
+        Args:
+            audio: AudioEngine (o backend) donde cargar y seleccionar el preset
+            path: .sf2 original
+            presets: [(banco, preset), ...]; el primero va al canal 0
+                (None = AppConfig.SOUNDFONT_PRESETS)
+            use_subset: Cargar el .sf2 reducido (None = AppConfig.SOUNDFONT_USE_SUBSET)
+            cache_dir: Carpeta de los .sf2 reducidos (None = AppConfig.SOUNDFONT_CACHE_DIR)
+        """
+        self.audio = audio
+        self.synth = getattr(audio, 'synth', audio)
+        self.path = path
+        self.presets = list(presets or AppConfig.SOUNDFONT_PRESETS)
+        self.use_subset = AppConfig.SOUNDFONT_USE_SUBSET if use_subset is None else use_subset
+        self.cache_dir = cache_dir or AppConfig.SOUNDFONT_CACHE_DIR
+
+        self.sfid = None
+        self.loaded_path = None
+        self.ready = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            'subset_time': 0.0,        # s generando / buscando el subconjunto
+            'load_time': 0.0,          # s en load_soundfont
+            'size_mb': 0.0             # tamaño del .sf2 cargado
+        }
+
+    def start(self):
+        """Lanza la carga en un hilo (retorna de inmediato)."""
+        self._thread = threading.Thread(target=self._run, name='SoundfontLoader', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Espera a que termine la carga. Retorna True si terminó."""
+        return self.ready.wait(timeout)
+
+    def is_ready(self):
+        return self.ready.is_set()
+
+    def _resolve_path(self):
+        """Ruta a cargar: el subconjunto en caché o, si falla, el original."""
+        if not self.use_subset:
+            return self.path
+        t0 = time.perf_counter()
+        try:
+            return str(get_subset_soundfont(self.path, self.presets, self.cache_dir))
+        except (OSError, SoundFontError) as e:
+            print(f"⚠ No se pudo reducir el soundfont ({e}); se carga completo")
+            return self.path
+        finally:
+            self.stats['subset_time'] = time.perf_counter() - t0
+
+    def _run(self):
+        try:
+            if not self.path:
+                return
+            path = self._resolve_path()
+
+            t0 = time.perf_counter()
+            if hasattr(self.audio, 'call'):
+                try:
+                    self.sfid = self.audio.call(self.synth.load_soundfont, path).result()
+                except CancelledError:
+                    print("⚠ Motor de audio detenido antes de cargar el soundfont")
+                    return
+            else:
+                self.sfid = self.synth.load_soundfont(path)
+            self.stats['load_time'] = time.perf_counter() - t0
+            if self.sfid is None:
+                print(f"⚠ No se pudo cargar el soundfont {path}")
+                return
+
+            bank, preset = self.presets[0]
+            self.audio.program_select(0, self.sfid, bank, preset)
+            self.loaded_path = path
+            self.stats['size_mb'] = os.path.getsize(path) / 1e6
+            print(f"✓ Soundfont cargado en {self.stats['load_time']:.2f}s "
+                  f"({self.stats['size_mb']:.1f} MB, preset {bank:03d}-{preset:03d})")
+        finally:
+            self.ready.set()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extractor de presets de un SoundFont 2 (.sf2)
+Copia solo los presets elegidos (con sus instrumentos y muestras) a un
+.sf2 compacto, así fluidsynth no carga ni mantiene en memoria el banco
+General MIDI completo cuando la app usa solo el piano
+
+Formato (RIFF 'sfbk'):
+- LIST INFO: metadatos (se copian tal cual)
+- LIST sdta: smpl (muestras int16) y opcionalmente sm24
+- LIST pdta: phdr/pbag/pmod/pgen (presets), inst/ibag/imod/igen
+  (instrumentos) y shdr (muestras); cada tabla termina en un registro
+  terminal y los índices de bag/gen/mod son rangos [i, i+1)
+
+Uso: python -m src.audio.soundfont_subset entrada.sf2 salida.sf2 [banco:preset ...]
+"""
+
+import hashlib
+import os
+import struct
+import sys
+from pathlib import Path
+
+# Registros de la sección pdta
+PDTA_FORMATS = {
+    'phdr': '<20sHHHIII',      # nombre, preset, banco, bag, library, genre, morphology
+    'pbag': '<HH',             # gen, mod
+    'pmod': '<HHhHH',          # src, dest, amount, amt_src, trans
+    'pgen': '<HH',             # operador, valor
+    'inst': '<20sH',           # nombre, bag
+    'ibag': '<HH',
+    'imod': '<HHhHH',
+    'igen': '<HH',
+    'shdr': '<20sIIIIIBbHH',   # nombre, start, end, loop_start, loop_end, rate, pitch, corr, link, tipo
+}
+PDTA_ORDER = ('phdr', 'pbag', 'pmod', 'pgen', 'inst', 'ibag', 'imod', 'igen', 'shdr')
+
+GEN_INSTRUMENT = 41            # pgen -> índice de instrumento
+GEN_SAMPLE_ID = 53             # igen -> índice de muestra
+SAMPLE_PADDING = 46            # ceros obligatorios tras cada muestra (spec 2.01)
+ROM_SAMPLE = 0x8000            # bit de muestras en ROM (sin datos en smpl)
+STEREO_SAMPLES = (2, 4, 8)     # right/left/linked: wSampleLink apunta al par
+
+
+class SoundFontError(ValueError):
+    """Archivo que no es un SoundFont 2 válido."""
+    pass
+
+
+class SoundFont2:
+    """
+    Estructura de un .sf2 sin los datos de audio.
+
+    Las muestras quedan en el archivo (smpl_offset/sm24_offset); solo se
+    leen los tramos que usa cada preset extraído.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.info = []                 # [(id, bytes)] de LIST INFO
+        self.smpl_offset = None        # posición de los datos smpl en el archivo
+        self.smpl_size = 0
+        self.sm24_offset = None
+        self.sm24_size = 0
+        self.pdta = {name: [] for name in PDTA_ORDER}
+
+    @property
+    def presets(self):
+        """[(banco, preset, nombre)] sin el registro terminal EOP."""
+        return [(bank, preset, _name(name)) for name, preset, bank, *_ in self.pdta['phdr'][:-1]]
+
+    @property
+    def sample_count(self):
+        return len(self.pdta['shdr']) - 1
+
+
+def _name(raw):
+    return raw.split(b'\0', 1)[0].decode('latin-1')
+
+
+def _chunks(f, end):
+    """Itera (id, tamaño, posición de datos) hasta `end`."""
+    while f.tell() + 8 <= end:
+        chunk_id, size = struct.unpack('<4sI', f.read(8))
+        start = f.tell()
+        yield chunk_id.decode('latin-1'), size, start
+        f.seek(start + size + (size & 1))
+
+
+def read_soundfont(path):
+    """
+    Lee la estructura de un .sf2 (sin cargar las muestras).
+
+    Raises:
+        SoundFontError: Si el archivo no es RIFF 'sfbk' o falta pdta/smpl
+    """
+    sf = SoundFont2(path)
+    with open(path, 'rb') as f:
+        riff, size, form = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or form != b'sfbk':
+            raise SoundFontError(f"{path} no es un SoundFont 2")
+
+        for chunk_id, chunk_size, start in _chunks(f, 8 + size):
+            if chunk_id != 'LIST':
+                continue
+            list_type = f.read(4).decode('latin-1')
+            for sub_id, sub_size, sub_start in _chunks(f, start + chunk_size):
+                if list_type == 'INFO':
+                    sf.info.append((sub_id, f.read(sub_size)))
+                elif list_type == 'sdta' and sub_id == 'smpl':
+                    sf.smpl_offset, sf.smpl_size = sub_start, sub_size
+                elif list_type == 'sdta' and sub_id == 'sm24':
+                    sf.sm24_offset, sf.sm24_size = sub_start, sub_size
+                elif list_type == 'pdta' and sub_id in PDTA_FORMATS:
+                    fmt = struct.Struct(PDTA_FORMATS[sub_id])
+                    sf.pdta[sub_id] = list(fmt.iter_unpack(f.read(sub_size)))
+
+    if sf.smpl_offset is None or any(len(sf.pdta[name]) < 1 for name in PDTA_ORDER):
+        raise SoundFontError(f"{path}: faltan secciones sdta/pdta")
+    return sf
+
+
+def _copy_zones(table, indices, bags, gens, mods, gen_remap, gen_oper):
+    """
+    Copia los headers elegidos con sus zonas (bag + generadores + moduladores).
+
+    Args:
+        table: Headers originales (phdr o inst, con terminal); el índice
+            de bag es el penúltimo campo en inst y el cuarto en phdr
+        indices: Índices de los headers a copiar, en orden
+        bags, gens, mods: Tablas originales (con terminal)
+        gen_remap: {índice_original: índice_nuevo} para el generador `gen_oper`
+        gen_oper: Generador que referencia el nivel inferior (41 o 53)
+
+    Returns:
+        (headers, bags, gens, mods) nuevos, sin registros terminales
+    """
+    bag_field = 3 if len(table[0]) == 7 else 1
+    new_headers, new_bags, new_gens, new_mods = [], [], [], []
+    for index in indices:
+        record = list(table[index])
+        first_bag, last_bag = record[bag_field], table[index + 1][bag_field]
+        record[bag_field] = len(new_bags)
+        new_headers.append(tuple(record))
+
+        for b in range(first_bag, last_bag):
+            new_bags.append((len(new_gens), len(new_mods)))
+            for oper, amount in gens[bags[b][0]:bags[b + 1][0]]:
+                if oper == gen_oper:
+                    amount = gen_remap[amount]
+                new_gens.append((oper, amount))
+            new_mods.extend(mods[bags[b][1]:bags[b + 1][1]])
+    return new_headers, new_bags, new_gens, new_mods
+
+
+def _referenced(table, indices, bags, gens, gen_oper):
+    """Índices referenciados por `gen_oper` desde las zonas de los headers, en orden."""
+    bag_field = 3 if len(table[0]) == 7 else 1
+    found = {}
+    for index in indices:
+        for b in range(table[index][bag_field], table[index + 1][bag_field]):
+            for oper, amount in gens[bags[b][0]:bags[b + 1][0]]:
+                if oper == gen_oper:
+                    found.setdefault(amount, len(found))
+    return found
+
+
+def extract_presets(source, destination, presets):
+    """
+    Escribe en `destination` un .sf2 con solo los presets pedidos.
+
+    Args:
+        source: .sf2 original
+        destination: .sf2 a generar
+        presets: [(banco, preset), ...] a conservar
+
+    Returns:
+        Diccionario con presets/instrumentos/muestras copiados y tamaños
+
+    Raises:
+        SoundFontError: Si el archivo no es válido o no contiene ningún preset pedido
+    """
+    sf = read_soundfont(source)
+    pdta = sf.pdta
+    wanted = {(int(bank), int(preset)) for bank, preset in presets}
+
+    # 1. Presets -> instrumentos -> muestras (más sus pares estéreo)
+    phdr = pdta['phdr']
+    preset_idx = [i for i, r in enumerate(phdr[:-1]) if (r[2], r[1]) in wanted]
+    if not preset_idx:
+        raise SoundFontError(f"{source}: no contiene los presets {sorted(wanted)}")
+
+    inst_remap = _referenced(phdr, preset_idx, pdta['pbag'], pdta['pgen'], GEN_INSTRUMENT)
+    inst_idx = list(inst_remap)
+    sample_remap = _referenced(pdta['inst'], inst_idx, pdta['ibag'], pdta['igen'], GEN_SAMPLE_ID)
+
+    shdr = pdta['shdr']
+    pending = list(sample_remap)
+    while pending:
+        _, _, _, _, _, _, _, _, link, kind = shdr[pending.pop()]
+        if kind & ~ROM_SAMPLE in STEREO_SAMPLES and link < len(shdr) - 1 and link not in sample_remap:
+            sample_remap[link] = len(sample_remap)
+            pending.append(link)
+    sample_idx = sorted(sample_remap, key=sample_remap.get)
+
+    # 2. Tablas de presets e instrumentos con índices renumerados
+    new = {}
+    new['phdr'], new['pbag'], new['pgen'], new['pmod'] = _copy_zones(
+        phdr, preset_idx, pdta['pbag'], pdta['pgen'], pdta['pmod'], inst_remap, GEN_INSTRUMENT)
+    new['inst'], new['ibag'], new['igen'], new['imod'] = _copy_zones(
+        pdta['inst'], inst_idx, pdta['ibag'], pdta['igen'], pdta['imod'], sample_remap, GEN_SAMPLE_ID)
+
+    # 3. Datos de audio: cada muestra con su relleno de ceros
+    smpl, sm24, new['shdr'] = bytearray(), bytearray(), []
+    with open(source, 'rb') as f:
+        for index in sample_idx:
+            name, start, end, loop_start, loop_end, rate, pitch, corr, link, kind = shdr[index]
+            shift = 0                  # las muestras en ROM conservan su dirección
+            if kind & ROM_SAMPLE == 0:
+                shift = len(smpl) // 2 - start
+                f.seek(sf.smpl_offset + 2 * start)
+                smpl += f.read(2 * (end - start))
+                smpl += bytes(2 * SAMPLE_PADDING)
+                if sf.sm24_offset is not None:
+                    f.seek(sf.sm24_offset + start)
+                    sm24 += f.read(end - start) + bytes(SAMPLE_PADDING)
+            new['shdr'].append((name, start + shift, end + shift, loop_start + shift,
+                                loop_end + shift, rate, pitch, corr,
+                                sample_remap.get(link, 0), kind))
+
+    # 4. Registros terminales
+    new['phdr'].append((b'EOP', 0, 0, len(new['pbag']), 0, 0, 0))
+    new['pbag'].append((len(new['pgen']), len(new['pmod'])))
+    new['pmod'].append((0, 0, 0, 0, 0))
+    new['pgen'].append((0, 0))
+    new['inst'].append((b'EOI', len(new['ibag'])))
+    new['ibag'].append((len(new['igen']), len(new['imod'])))
+    new['imod'].append((0, 0, 0, 0, 0))
+    new['igen'].append((0, 0))
+    new['shdr'].append((b'EOS', 0, 0, 0, 0, 0, 0, 0, 0, 0))
+
+    write_soundfont(destination, sf.info, smpl, new, sm24 if sf.sm24_offset is not None else None)
+    return {
+        'presets': [(r[2], r[1], _name(r[0])) for r in new['phdr'][:-1]],
+        'instruments': len(inst_idx),
+        'samples': len(sample_idx),
+        'source_size': os.path.getsize(source),
+        'size': os.path.getsize(destination),
+    }
+
+
+def _chunk(chunk_id, data):
+    pad = b'\0' if len(data) & 1 else b''
+    return struct.pack('<4sI', chunk_id.encode('latin-1'), len(data)) + bytes(data) + pad
+
+
+def _list(list_type, chunks):
+    return _chunk('LIST', list_type.encode('latin-1') + b''.join(chunks))
+
+
+def write_soundfont(path, info, smpl, pdta, sm24=None):
+    """
+    Escribe un .sf2.
+
+    Args:
+        path: Archivo de salida
+        info: [(id, bytes)] de LIST INFO (debe incluir 'ifil', 'isng' e 'INAM')
+        smpl: Muestras int16 little-endian (bytes)
+        pdta: {tabla: [registros]} con los registros terminales incluidos
+        sm24: Byte bajo de muestras de 24 bits (opcional)
+    """
+    sdta = [_chunk('smpl', smpl)]
+    if sm24:
+        sdta.append(_chunk('sm24', sm24))
+    tables = [_chunk(name, b''.join(struct.pack(PDTA_FORMATS[name], *record) for record in pdta[name]))
+              for name in PDTA_ORDER]
+
+    body = b'sfbk' + _list('INFO', [_chunk(i, d) for i, d in info]) + _list('sdta', sdta) + _list('pdta', tables)
+    tmp = Path(f"{path}.tmp")
+    tmp.write_bytes(_chunk('RIFF', body))
+    os.replace(tmp, path)          # nunca queda un .sf2 a medio escribir en la caché
+
+
+def subset_cache_path(source, presets, cache_dir):
+    """Ruta en caché del subconjunto (cambia si cambian los presets o el original)."""
+    stat = os.stat(source)
+    key = f"{sorted(set(map(tuple, presets)))}|{stat.st_size}|{int(stat.st_mtime)}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:10]
+    return Path(cache_dir) / f"{Path(source).stem}_{digest}.sf2"
+
+
+def get_subset_soundfont(source, presets, cache_dir):
+    """
+    .sf2 con solo `presets`, generándolo la primera vez.
+
+    Returns:
+        Ruta del subconjunto en caché
+    """
+    path = subset_cache_path(source, presets, cache_dir)
+    if not path.exists():
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        result = extract_presets(source, path, presets)
+        print(f"✓ Soundfont reducido: {result['source_size'] / 1e6:.1f} MB -> "
+              f"{result['size'] / 1e6:.1f} MB ({len(result['presets'])} presets) en {path}")
+    return path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    selected = [tuple(int(v) for v in arg.split(':')) for arg in sys.argv[3:]] or [(0, 0)]
+    result = extract_presets(sys.argv[1], sys.argv[2], selected)
+    for bank, preset, name in result['presets']:
+        print(f"  {bank:03d}-{preset:03d} {name}")
+    print(f"✓ {result['instruments']} instrumentos, {result['samples']} muestras | "
+          f"{result['source_size'] / 1e6:.1f} MB -> {result['size'] / 1e6:.1f} MB")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Administrador de voces
+Registra cada nota que la app enciende para que ninguna quede sonando:
+duración máxima por voz, liberación cuando las manos salen del cuadro
+(el bloque de detección no corre y no llegan flancos off) y robo de la
+voz más antigua al superar la polifonía
+"""
+
+import time
+from collections import OrderedDict
+
+from src.config.app_config import AppConfig
+
+
+class VoiceManager:
+    """
+    Envoltorio de AudioEngine (o backend) para las notas en vivo.
+
+    Las voces se guardan en orden de encendido (OrderedDict), así la más
+    antigua y las vencidas se encuentran al principio sin recorrer todo.
+    Las lecciones programan sus propios noteoff y no pasan por aquí.
+    """
+
+    def __init__(self, audio, max_duration=None, polyphony=None, hand_loss_timeout=None, clock=time.time):
+        """
+        Args:
+            audio: AudioEngine o backend (noteon/noteoff)
+            max_duration: s máximos que suena una voz (None = AppConfig.VOICE_MAX_DURATION)
+            polyphony: Voces simultáneas (None = AppConfig.VOICE_POLYPHONY)
+            hand_loss_timeout: s sin manos antes de liberar todo
+                               (None = AppConfig.VOICE_HAND_LOSS_TIMEOUT)
+            clock: Reloj (mismo que la captura)
+        """
+        self.audio = audio
+        self.max_duration = AppConfig.VOICE_MAX_DURATION if max_duration is None else max_duration
+        self.polyphony = polyphony or AppConfig.VOICE_POLYPHONY
+        self.hand_loss_timeout = (AppConfig.VOICE_HAND_LOSS_TIMEOUT if hand_loss_timeout is None
+                                  else hand_loss_timeout)
+        self.clock = clock
+
+        self.voices = OrderedDict()    # (canal, nota) -> instante de encendido
+        self._hands_lost_since = None
+        self._hand_loss_handled = False
+
+        self.stats = {
+            'noteons': 0,
+            'released_timeout': 0,     # por duración máxima
+            'released_hand_loss': 0,   # manos fuera del cuadro
+            'stolen': 0,               # por polifonía
+            'max_voices': 0
+        }
+
+    def noteon(self, chan, key, vel, now=None):
+        """Enciende una nota (re-ataque si ya sonaba; roba la más antigua si no hay voz)."""
+        now = self.clock() if now is None else now
+        voice = (chan, key)
+        if voice in self.voices:
+            self._release(voice)
+        elif len(self.voices) >= self.polyphony:
+            self._release(next(iter(self.voices)))
+            self.stats['stolen'] += 1
+
+        self.audio.noteon(chan, key, vel)
+        self.voices[voice] = now
+        self.stats['noteons'] += 1
+        self.stats['max_voices'] = max(self.stats['max_voices'], len(self.voices))
+
+    def noteoff(self, chan, key):
+        """Apaga una nota si está sonando (los flancos repetidos se ignoran)."""
+        if (chan, key) in self.voices:
+            self._release((chan, key))
+
+    def update(self, now=None, hands_visible=True):
+        """
+        Libera las voces vencidas y, tras hand_loss_timeout sin manos, todas.
+
+        Args:
+            now: Timestamp del frame (None = reloj)
+            hands_visible: Hay puntas detectadas en ambas cámaras
+
+        Returns:
+            True si se liberó todo por pérdida de manos (para soltar también
+            las teclas en KeyStateMachine)
+        """
+        now = self.clock() if now is None else now
+
+        while self.voices:
+            voice, start = next(iter(self.voices.items()))
+            if now - start < self.max_duration:
+                break
+            self._release(voice)
+            self.stats['released_timeout'] += 1
+
+        if hands_visible:
+            self._hands_lost_since = None
+            self._hand_loss_handled = False
+            return False
+        if self._hands_lost_since is None:
+            self._hands_lost_since = now
+        if self._hand_loss_handled or now - self._hands_lost_since < self.hand_loss_timeout:
+            return False
+
+        # Una vez por cada pérdida de manos
+        self._hand_loss_handled = True
+        self.stats['released_hand_loss'] += len(self.voices)
+        self.release_all()
+        return True
+
+    def release_all(self):
+        """Apaga todas las voces (cambio de modo, salida)."""
+        while self.voices:
+            self._release(next(iter(self.voices)))
+
+    def active_voices(self):
+        return len(self.voices)
+
+    def _release(self, voice):
+        del self.voices[voice]
+        self.audio.noteoff(*voice)
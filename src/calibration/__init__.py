@@ -12,13 +12,15 @@ from .camera_calibrator import CameraCalibrator
 from .stereo_calibrator import StereoCalibrator
 from .calibration_ui import CalibrationUI
 from .calibration_config import CalibrationConfig
+from .keyboard_calibrator import KeyboardCalibrator
 
 __all__ = [
     'CalibrationManager',
     'CameraCalibrator', 
     'StereoCalibrator',
     'CalibrationUI',
-    'CalibrationConfig'
+    'CalibrationConfig',
+    'KeyboardCalibrator'
 ]
 
 __version__ = '2.0.0'
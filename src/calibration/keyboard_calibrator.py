@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibrador de Teclado en Perspectiva
+Ubica las 4 esquinas de un teclado impreso/marcado en la mesa (clic o
+detección automática) para que VirtualKeyboard lo deforme por homografía
+"""
+
+import cv2
+import numpy as np
+import json
+from .calibration_config import CalibrationConfig
+
+
+class KeyboardCalibrator:
+    """
+    Calibrador de esquinas del teclado virtual
+    Las esquinas se guardan en calibration.json (sección 'keyboard_corners')
+    en orden: superior-izquierda, superior-derecha, inferior-derecha, inferior-izquierda
+    """
+
+    CORNER_NAMES = ['SUP-IZQ', 'SUP-DER', 'INF-DER', 'INF-IZQ']
+
+    def __init__(self, width=640, height=480):
+        """
+        Args:
+            width: Ancho de la imagen
+            height: Alto de la imagen
+        """
+        self.width = width
+        self.height = height
+        self.corners = []
+
+    def run_keyboard_calibration(self, cam):
+        """
+        Ejecuta la selección de esquinas sobre la cámara indicada
+
+        Controles:
+            Clic izquierdo: marcar la siguiente esquina
+            A: detectar esquinas automáticamente
+            R: reiniciar selección
+            ENTER: guardar (con 4 esquinas)
+            ESC: cancelar
+
+        Args:
+            cam: VideoThread de la cámara donde se dibuja el teclado
+
+        Returns:
+            list: 4 esquinas [(x, y), ...] (o None si cancelado)
+        """
+        print("\n" + "="*70)
+        print("CALIBRACIÓN DE TECLADO EN PERSPECTIVA")
+        print("="*70)
+        print("\nMarca las 4 esquinas del teclado en la mesa con el mouse:")
+        print("  " + " -> ".join(self.CORNER_NAMES))
+        print("  [A] Detectar automáticamente  [R] Reiniciar")
+        print("  [ENTER] Guardar  [ESC] Cancelar")
+        print("="*70 + "\n")
+
+        window_name = "Calibración de Teclado"
+        cv2.namedWindow(window_name)
+        cv2.setMouseCallback(window_name, self._on_mouse)
+        self.corners = []
+
+        try:
+            while True:
+                finished, frame = cam.next(black=False, wait=1)
+                if frame is None:
+                    # Cámara terminada: no llegarán más frames
+                    if finished:
+                        print("\n✗ Cámara no disponible, calibración de teclado cancelada")
+                        return None
+                    # Sin frame (reconectando): seguir atendiendo ESC
+                    if cv2.waitKey(1) & 0xFF == 27:
+                        print("\n✗ Calibración de teclado cancelada")
+                        return None
+                    continue
+
+                cv2.imshow(window_name, self._draw_calibration_ui(frame.copy()))
+                key = cv2.waitKey(1) & 0xFF
+
+                if key == 13 and len(self.corners) == 4:  # ENTER
+                    self._save_corners()
+                    print("✓ Esquinas del teclado calibradas")
+                    return [tuple(c) for c in self.corners]
+                elif key == ord('a') or key == ord('A'):
+                    detected = self.detect_corners(frame)
+                    if detected is not None:
+                        self.corners = [tuple(c) for c in detected]
+                        print("✓ Teclado detectado automáticamente")
+                    else:
+                        print("⚠ No se detectó un cuadrilátero claro, marca las esquinas a mano")
+                elif key == ord('r') or key == ord('R'):
+                    self.corners = []
+                elif key == 27:  # ESC
+                    print("\n✗ Calibración de teclado cancelada")
+                    return None
+        finally:
+            cv2.destroyWindow(window_name)
+
+    def _on_mouse(self, event, x, y, flags, param):
+        """Agrega esquinas con clic izquierdo (máximo 4)"""
+        if event == cv2.EVENT_LBUTTONDOWN and len(self.corners) < 4:
+            self.corners.append((float(x), float(y)))
+            if len(self.corners) == 4:
+                self.corners = [tuple(c) for c in self.order_corners(self.corners)]
+
+    @staticmethod
+    def order_corners(points):
+        """
+        Ordena 4 puntos como sup-izq, sup-der, inf-der, inf-izq
+
+        Args:
+            points: 4 puntos (x, y) en cualquier orden
+
+        Returns:
+            np.ndarray: (4, 2) float32 ordenado
+        """
+        pts = np.asarray(points, dtype=np.float32).reshape(4, 2)
+        s = pts.sum(axis=1)
+        d = pts[:, 1] - pts[:, 0]
+        return np.float32([pts[np.argmin(s)], pts[np.argmin(d)],
+                           pts[np.argmax(s)], pts[np.argmax(d)]])
+
+    def detect_corners(self, frame, min_area_ratio=0.05):
+        """
+        Detecta el cuadrilátero más grande del frame (hoja o cinta del teclado)
+
+        Args:
+            frame: Imagen BGR
+            min_area_ratio: Área mínima respecto al frame
+
+        Returns:
+            np.ndarray: (4, 2) esquinas ordenadas (o None si no se encuentra)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        min_area = min_area_ratio * frame.shape[0] * frame.shape[1]
+
+        # 1) Silueta por umbral (hoja clara sobre la mesa): esquinas precisas
+        # 2) Bordes (Canny) si la hoja no contrasta con la mesa
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        edges = cv2.dilate(cv2.Canny(gray, 50, 150), np.ones((3, 3), np.uint8))
+
+        for mask in (binary, edges):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+                if cv2.contourArea(contour) < min_area:
+                    break
+                approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+                if len(approx) == 4 and cv2.isContourConvex(approx):
+                    return self.order_corners(approx.reshape(4, 2))
+
+        return None
+
+    def _save_corners(self):
+        """Guarda las esquinas en el archivo de calibración"""
+        try:
+            calib_file = CalibrationConfig.CALIBRATION_FILE
+
+            # Leer calibración existente
+            calib_data = {}
+            if calib_file.exists():
+                with open(calib_file, 'r') as f:
+                    calib_data = json.load(f)
+
+            # Agregar sección de teclado
+            calib_data['keyboard_corners'] = {
+                'corners': [[float(x), float(y)] for x, y in self.corners],
+                'image_size': [self.width, self.height]
+            }
+
+            # Guardar
+            with open(calib_file, 'w') as f:
+                json.dump(calib_data, f, indent=4)
+
+            print(f"✓ Esquinas del teclado guardadas en: {calib_file}")
+
+        except Exception as e:
+            print(f"⚠ Error al guardar esquinas del teclado: {e}")
+
+    @staticmethod
+    def load_corners(width=640, height=480):
+        """
+        Lee las esquinas guardadas en calibration.json
+
+        Returns:
+            list: 4 esquinas [(x, y), ...] (o None si no hay o no coincide el tamaño)
+        """
+        try:
+            calib_file = CalibrationConfig.CALIBRATION_FILE
+            if not calib_file.exists():
+                return None
+
+            with open(calib_file, 'r') as f:
+                keyboard = json.load(f).get('keyboard_corners')
+
+            if not keyboard or keyboard.get('image_size') != [width, height]:
+                return None
+
+            return [tuple(c) for c in keyboard['corners']]
+
+        except Exception as e:
+            print(f"⚠ Error al leer esquinas del teclado: {e}")
+            return None
+
+    @staticmethod
+    def clear_corners():
+        """Elimina la calibración de esquinas (vuelve al teclado rectangular)"""
+        try:
+            calib_file = CalibrationConfig.CALIBRATION_FILE
+            if not calib_file.exists():
+                return
+
+            with open(calib_file, 'r') as f:
+                calib_data = json.load(f)
+
+            if calib_data.pop('keyboard_corners', None) is not None:
+                with open(calib_file, 'w') as f:
+                    json.dump(calib_data, f, indent=4)
+
+        except Exception as e:
+            print(f"⚠ Error al eliminar esquinas del teclado: {e}")
+
+    def _draw_calibration_ui(self, frame):
+        """Dibuja esquinas marcadas, contorno e instrucciones"""
+        for i, (x, y) in enumerate(self.corners):
+            cv2.circle(frame, (int(x), int(y)), 6, (0, 255, 255), -1)
+            cv2.putText(frame, self.CORNER_NAMES[i], (int(x) + 8, int(y) - 8),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+
+        if len(self.corners) == 4:
+            pts = np.int32(self.corners).reshape(-1, 1, 2)
+            cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
+            status = "[ENTER] Guardar  [R] Reiniciar"
+        else:
+            status = f"Clic en esquina {self.CORNER_NAMES[len(self.corners)]}  [A] Auto"
+
+        cv2.rectangle(frame, (0, 0), (frame.shape[1], 30), (30, 30, 30), -1)
+        cv2.putText(frame, status, (10, 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 1)
+        return frame
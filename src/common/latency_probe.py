@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Medición de latencia por etapa (captura -> sonido)
+Marca el instante de cada etapa del frame en arrays preasignados y, por
+cada nota enviada, el instante de noteon; el reporte muestra la
+distribución (histograma de texto) de cada tramo para ver dónde se va
+la latencia, no solo los FPS del lazo
+"""
+
+import time
+
+import numpy as np
+
+# Etapas del frame, en orden (la primera es el instante de captura de la cámara)
+FRAME_STAGES = ('capture', 'dequeue', 'inference', 'triangulation', 'key_state')
+
+STAGE_LABELS = {
+    'dequeue': 'captura -> next()',
+    'inference': 'detección de manos',
+    'triangulation': 'triangulación',
+    'key_state': 'algoritmos + flancos',
+    'noteon': 'flanco -> noteon',
+    'synth': 'noteon -> sintetizador',
+    'audio': 'sintetizador -> 1ª muestra',
+    'total': 'captura -> noteon',
+}
+
+
+class LatencyProbe:
+    """
+    Marcas de tiempo por frame y por nota (desactivable sin costo).
+
+    Uso en el lazo:
+        probe.start_frame(cam.frame_timestamp)   # captura + dequeue
+        probe.mark('inference') ... probe.mark('key_state')
+        probe.note_on(key)                       # cada noteon enviado
+    """
+
+    def __init__(self, capacity=4096, enabled=True, clock=time.time):
+        """
+        Args:
+            capacity: Frames y notas que se guardan (ring buffer)
+            enabled: False = todas las llamadas retornan de inmediato
+            clock: Reloj (mismo que el timestamp de captura)
+        """
+        self.enabled = enabled
+        self.capacity = capacity
+        self.clock = clock
+        self._stage_index = {stage: i for i, stage in enumerate(FRAME_STAGES)}
+
+        self.frames = np.full((capacity, len(FRAME_STAGES)), np.nan)
+        self.frame_count = 0
+        self._row = -1
+
+        # Por nota: instante de noteon y marcas del frame que la originó
+        # (copiadas: la fila del frame se reescribe tras `capacity` frames)
+        self.note_times = np.full(capacity, np.nan)
+        self.note_capture = np.full(capacity, np.nan)
+        self.note_key_state = np.full(capacity, np.nan)
+        self.note_count = 0
+
+        # Tramos medidos fuera del lazo (s): sintetizador y render de audio
+        self.external = {'synth': [], 'audio': []}
+
+    def start_frame(self, capture_time):
+        """Nuevo frame: instante de captura y de salida de la cola (ahora)."""
+        if not self.enabled:
+            return
+        self._row = self.frame_count % self.capacity
+        row = self.frames[self._row]
+        row.fill(np.nan)
+        row[0] = capture_time if capture_time is not None else np.nan
+        row[1] = self.clock()
+        self.frame_count += 1
+
+    def mark(self, stage):
+        """Fin de una etapa del frame actual."""
+        if not self.enabled or self._row < 0:
+            return
+        self.frames[self._row, self._stage_index[stage]] = self.clock()
+
+    def note_on(self, key=None):
+        """noteon enviado por el frame actual."""
+        if not self.enabled or self._row < 0:
+            return
+        slot = self.note_count % self.capacity
+        row = self.frames[self._row]
+        self.note_times[slot] = self.clock()
+        self.note_capture[slot] = row[0]
+        self.note_key_state[slot] = row[-1]
+        self.note_count += 1
+
+    def add_external(self, stage, latencies):
+        """Agrega latencias medidas aparte ('synth' o 'audio', en s)."""
+        self.external[stage].extend(float(v) for v in latencies)
+
+    # ------------------------------------------------------------------
+    # Reporte
+    # ------------------------------------------------------------------
+
+    def stage_latencies(self):
+        """
+        Latencia de cada tramo en ms.
+
+        Returns:
+            dict etapa -> np.ndarray (solo frames/notas con ambas marcas)
+        """
+        frames = self.frames[:min(self.frame_count, self.capacity)]
+        result = {}
+        for i, stage in enumerate(FRAME_STAGES[1:], start=1):
+            delta = (frames[:, i] - frames[:, i - 1]) * 1e3
+            result[stage] = delta[np.isfinite(delta)]
+
+        n = min(self.note_count, self.capacity)
+        times = self.note_times[:n]
+        for stage, start in (('noteon', self.note_key_state[:n]), ('total', self.note_capture[:n])):
+            delta = (times - start) * 1e3
+            result[stage] = delta[np.isfinite(delta)]
+
+        for stage, values in self.external.items():
+            result[stage] = np.asarray(values) * 1e3
+        return result
+
+    @staticmethod
+    def histogram(values, bins=8, width=30):
+        """Histograma de texto (una línea por intervalo)."""
+        if len(values) == 0:
+            return ["    (sin datos)"]
+        lo, hi = float(values.min()), float(values.max())
+        if hi - lo < 1e-6:
+            hi = lo + 1e-3
+        counts, edges = np.histogram(values, bins=bins, range=(lo, hi))
+        scale = width / max(1, counts.max())
+        return [f"    {edges[i]:8.3f}-{edges[i + 1]:8.3f} ms | {'#' * int(round(c * scale)):<{width}} {c}"
+                for i, c in enumerate(counts)]
+
+    def report(self, bins=8):
+        """Resumen por etapa (p50/p95/máx) con histograma."""
+        latencies = self.stage_latencies()
+        lines = ["=" * 70, "LATENCIA POR ETAPA", "=" * 70,
+                 f"Frames: {min(self.frame_count, self.capacity)} | Notas: {min(self.note_count, self.capacity)}"]
+        medians = 0.0
+        for stage in (*FRAME_STAGES[1:], 'noteon', 'synth', 'audio', 'total'):
+            values = latencies.get(stage, np.zeros(0))
+            if len(values):
+                p50, p95 = np.percentile(values, [50, 95])
+                lines.append(f"\n{STAGE_LABELS[stage]:<28} p50 {p50:8.3f} | p95 {p95:8.3f} | "
+                             f"máx {values.max():8.3f} ms (n={len(values)})")
+                if stage != 'total':
+                    medians += p50
+            else:
+                lines.append(f"\n{STAGE_LABELS[stage]:<28} sin datos")
+            lines.extend(self.histogram(values, bins))
+        lines.append(f"\nSuma de medianas captura -> sonido: {medians:.2f} ms")
+        lines.append("=" * 70)
+        return "\n".join(lines)
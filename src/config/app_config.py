@@ -8,6 +8,7 @@ Parámetros de app, modos, audio y UI general
 """
 
 import os
+import time
 from pathlib import Path
 
 
@@ -31,6 +32,8 @@ class AppConfig:
     
     # ==================== AUDIO ====================
     AUDIO_ENABLED_DEFAULT = True
+    AUDIO_BACKEND = 'fluidsynth'          # 'fluidsynth' (en vivo), 'mixer' (muestras pre-renderizadas),
+                                          # 'offline' (render) o 'null' (sin sonido)
     OCTAVE_BASE = 0                       # Octava base para MIDI
     
     # Ruta del soundfont - buscar en múltiples ubicaciones
@@ -49,6 +52,32 @@ class AppConfig:
         print("⚠ No se encontró el archivo soundfont")
         return None
     
+    # Presets que usa la app (banco, preset); el primero se asigna al canal 0.
+    # Con SOUNDFONT_USE_SUBSET se carga un .sf2 reducido con solo estos presets
+    # (se genera la primera vez en SOUNDFONT_CACHE_DIR)
+    SOUNDFONT_PRESETS = [(0, 0)]          # 000-000 Grand Piano
+    SOUNDFONT_USE_SUBSET = True
+    
+    # Mezclador de muestras (AUDIO_BACKEND = 'mixer'): cada tecla se renderiza
+    # una vez por capa de velocidad y se guarda en SOUNDFONT_CACHE_DIR
+    SAMPLE_VELOCITY_LAYERS = (40, 80, 120)  # Capas de velocidad por tecla
+    SAMPLE_HOLD = 1.5                     # s renderizados con la tecla pulsada
+    SAMPLE_TAIL = 0.5                     # s de cola tras soltar
+    SAMPLE_RELEASE = 0.15                 # s de fundido al soltar la tecla
+    MIXER_BLOCK_SIZE = 256                # Muestras por bloque (5.8 ms a 44.1 kHz)
+    MIXER_POLYPHONY = 16                  # Voces simultáneas (se roba la más antigua)
+    
+    # Administrador de voces (notas en vivo de modo libre y juego)
+    VOICE_MAX_DURATION = 4.0              # s máximos que suena una nota sin noteoff
+    VOICE_POLYPHONY = 16                  # Notas simultáneas (se apaga la más antigua)
+    VOICE_HAND_LOSS_TIMEOUT = 0.2         # s sin manos antes de apagar todo
+                                          # (tolera frames sueltos sin detección)
+    
+    # Grabación en .mid dentro de RECORDINGS_DIR: un archivo por sesión de
+    # modo libre ('free_...') o de juego ('game_...'); [G]/[F] cierran el
+    # archivo actual y empiezan otro
+    MIDI_RECORD = False
+    
     # ==================== UI GENERAL ====================
     SHOW_DASHBOARD_DEFAULT = False        # Mostrar dashboard de debugging
     SHOW_INSTRUCTIONS = True              # Mostrar instrucciones al inicio
@@ -85,6 +114,9 @@ class AppConfig:
     # Directorios de datos
     DATA_DIR = BASE_DIR / "data"
     SONGS_DIR = DATA_DIR / "songs"
+    SOUNDFONT_CACHE_DIR = DATA_DIR / "soundfonts"
+    RECORDINGS_DIR = DATA_DIR / "recordings"
+    CHART_CACHE_DIR = DATA_DIR / "charts"  # Charts compilados (.npy)
     CALIBRATION_DIR = BASE_DIR / "camcalibration"
     
     @staticmethod
@@ -94,9 +126,20 @@ class AppConfig:
         AppConfig.SONGS_DIR.mkdir(exist_ok=True)
         AppConfig.CALIBRATION_DIR.mkdir(exist_ok=True)
     
+    @staticmethod
+    def get_recording_path(mode):
+        """Ruta del .mid de una sesión nueva (modo + fecha y hora, sin pisar otra)"""
+        stem = f"{mode}_{time.strftime('%Y%m%d_%H%M%S')}"
+        path, n = AppConfig.RECORDINGS_DIR / f"{stem}.mid", 1
+        while path.exists():
+            n += 1
+            path = AppConfig.RECORDINGS_DIR / f"{stem}_{n}.mid"
+        return path
+    
     # ==================== DEBUG ====================
     DEBUG_MODE = False                    # Modo debug (más logging)
     VERBOSE_HAND_DETECTION = False        # Logging detallado de detección
+    LATENCY_PROBE = False                 # Latencia por etapa (reporte al salir)
     
     # ==================== DETECCIÓN DE TECLAS ====================
     # Sistema de detección por profundidad y velocidad
@@ -105,9 +148,10 @@ class AppConfig:
                                           # Menor valor = más estricto
     
     # Sistema de detección de movimiento (velocity-based triggering)
-    VELOCITY_THRESHOLD = 1.5              # Velocidad mínima hacia abajo (cm/frame)
+    VELOCITY_THRESHOLD = 45.0             # Velocidad mínima hacia abajo (cm/s)
                                           # para activar tecla
-                                          # Valores típicos: 1.0-3.0 cm/frame
+                                          # Valores típicos: 30-90 cm/s
+                                          # (1.0-3.0 cm/frame a 30 FPS)
                                           # Mayor valor = requiere golpe más fuerte
     
     VELOCITY_ENABLED = False              # Activar detección por velocidad
@@ -118,6 +162,20 @@ class AppConfig:
                                           # Valores típicos: 2-5 frames
                                           # Más frames = más suave pero menos responsivo
     
+    FINGER_STATE_TTL = 1.0                # Segundos sin ver un dedo antes de descartar
+                                          # su estado (historial, última posición...)
+                                          # Evita que dedos perdidos acumulen memoria
+    
+    # Velocidad MIDI según la rapidez del golpe (cm/s de bajada en el contacto)
+    VELOCITY_CURVE = 'normal'             # Curva activa de VELOCITY_CURVES ([V] en main cambia,
+                                          # [v] ajusta min/max a los golpes del usuario)
+    VELOCITY_CURVES = {
+        'normal': {'min_speed': 10.0, 'max_speed': 120.0, 'gamma': 1.0, 'min_velocity': 20},
+        'soft':   {'min_speed': 5.0, 'max_speed': 80.0, 'gamma': 0.6, 'min_velocity': 30},   # fuerte con poco
+        'hard':   {'min_speed': 20.0, 'max_speed': 150.0, 'gamma': 1.6, 'min_velocity': 10},  # pide golpes rápidos
+        'fixed':  {'fixed': 127 * 2 // 3},                                                    # sin dinámica
+    }
+    
     @staticmethod
     def set_key_sensitivity(sensitivity='normal'):
         """
@@ -129,21 +187,21 @@ class AppConfig:
         if sensitivity == 'soft':
             # Piano sensible (toques suaves)
             AppConfig.DEPTH_THRESHOLD = 4.0
-            AppConfig.VELOCITY_THRESHOLD = 1.0
+            AppConfig.VELOCITY_THRESHOLD = 30.0
             AppConfig.VELOCITY_ENABLED = True
             print("✓ Sensibilidad: SUAVE (toques ligeros)")
         
         elif sensitivity == 'normal':
             # Configuración balanceada (recomendado)
             AppConfig.DEPTH_THRESHOLD = 3.5
-            AppConfig.VELOCITY_THRESHOLD = 1.5
+            AppConfig.VELOCITY_THRESHOLD = 45.0
             AppConfig.VELOCITY_ENABLED = False
             print("✓ Sensibilidad: NORMAL (balanceado - modo clásico)")
         
         elif sensitivity == 'hard':
             # Requiere golpe fuerte
             AppConfig.DEPTH_THRESHOLD = 2.5
-            AppConfig.VELOCITY_THRESHOLD = 2.5
+            AppConfig.VELOCITY_THRESHOLD = 75.0
             AppConfig.VELOCITY_ENABLED = True
             print("✓ Sensibilidad: FUERTE (golpes pronunciados)")
         
@@ -166,7 +224,7 @@ class AppConfig:
         print(f"{AppConfig.APP_NAME} v{AppConfig.APP_VERSION}")
         print("="*60)
         print(f"Modo por defecto: {AppConfig.DEFAULT_MODE}")
-        print(f"Audio: {'Enabled' if AppConfig.AUDIO_ENABLED_DEFAULT else 'Disabled'}")
+        print(f"Audio: {'Enabled' if AppConfig.AUDIO_ENABLED_DEFAULT else 'Disabled'} ({AppConfig.AUDIO_BACKEND})")
         print(f"Soundfont: {AppConfig.get_soundfont_path() or 'No encontrado'}")
         print(f"Target FPS: {AppConfig.TARGET_FPS}")
         print(f"Debug mode: {'On' if AppConfig.DEBUG_MODE else 'Off'}")
@@ -174,7 +232,7 @@ class AppConfig:
         print(f"  Umbral profundidad: {AppConfig.DEPTH_THRESHOLD} cm")
         print(f"  Detección por velocidad: {'On' if AppConfig.VELOCITY_ENABLED else 'Off'}")
         if AppConfig.VELOCITY_ENABLED:
-            print(f"  Velocidad mínima: {AppConfig.VELOCITY_THRESHOLD} cm/frame")
+            print(f"  Velocidad mínima: {AppConfig.VELOCITY_THRESHOLD} cm/s")
         print("="*60 + "\n")
     
     @staticmethod
@@ -1,3 +1,4 @@
 # gameplay module init
+from .chart_compiler import CHART_DTYPE, compile_chart, load_compiled_chart
 from .rythm_game import RhythmGame
 from .song_chart import TUTORIAL_FACIL, MODO_APRENDER
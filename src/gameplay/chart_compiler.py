@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compilador de charts
+Une los dos formatos de canciones en un solo array estructurado de NumPy
+(time, key, duration, group) ordenado por tiempo:
+  - Song de gameplay/song_chart.py: tuplas (tecla, tiempo[, duración])
+  - BaseSong de songs/chart_files: {"time": s, "keys": ["A", ...]}
+Las notas con el mismo instante forman un acorde (mismo group). El
+resultado se guarda en disco (.npy) según el contenido del chart, así un
+catálogo grande se indexa sin recompilar
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.config.app_config import AppConfig
+
+# Formato compilado (se incluye en el hash del cache: cambiarlo invalida los .npy)
+CHART_FORMAT_VERSION = 1
+CHART_DTYPE = np.dtype([
+    ('time', '<f8'),       # s desde el inicio de la canción
+    ('key', '<i2'),        # tecla del teclado virtual (0 = Do de la octava base)
+    ('duration', '<f4'),   # s (0 = toque)
+    ('group', '<i4'),      # acorde: notas con el mismo instante
+])
+
+CHORD_TOLERANCE = 1e-6     # s entre notas del mismo acorde
+
+KEY_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+_SEMITONES = {name: i for i, name in enumerate(KEY_NAMES)}
+_SEMITONES.update({"Db": 1, "Eb": 3, "Gb": 6, "Ab": 8, "Bb": 10})
+_SEMITONES.update({"Do": 0, "Re": 2, "Mi": 4, "Fa": 5, "Sol": 7, "La": 9, "Si": 11})
+
+
+def parse_key(key):
+    """
+    Tecla del teclado virtual a partir de un nombre o número.
+
+    Args:
+        key: int, "A", "C#", "Bb", "Sol#" u octava explícita ("C1" = tecla 12)
+
+    Returns:
+        Número de tecla (int >= 0)
+    """
+    if isinstance(key, (int, np.integer)):
+        if key < 0:
+            raise ValueError(f"Tecla negativa en el chart: {key}")
+        return int(key)
+
+    name, octave = str(key).strip(), 0
+    if name[-1:].isdigit():
+        name, octave = name[:-1], int(name[-1])
+    accidental = 0
+    if len(name) > 1 and name[-1] in '#b' and name[:-1] in _SEMITONES:
+        accidental = 1 if name[-1] == '#' else -1
+        name = name[:-1]
+    if name not in _SEMITONES:
+        raise ValueError(f"Tecla '{key}' no válida. Use {KEY_NAMES} (o Do-Si) con #/b y octava opcional")
+    key_number = 12 * octave + _SEMITONES[name] + accidental
+    if key_number < 0:
+        raise ValueError(f"Tecla '{key}' queda debajo del teclado")
+    return key_number
+
+
+def key_name(key):
+    """Nombre de una tecla (sin octava), p.ej. 9 -> 'A'."""
+    return KEY_NAMES[int(key) % 12]
+
+
+def compile_chart(chart):
+    """
+    Compila un chart en cualquiera de los dos formatos.
+
+    Args:
+        chart: [(tecla, tiempo[, duración]), ...], [{"time", "keys"[, "duration"]}, ...]
+               o un array ya compilado
+
+    Returns:
+        np.ndarray con CHART_DTYPE, ordenado por (time, key)
+    """
+    if isinstance(chart, np.ndarray) and chart.dtype == CHART_DTYPE:
+        return chart
+
+    rows = []
+    for entry in chart:
+        if isinstance(entry, dict):
+            time_s, duration = float(entry["time"]), float(entry.get("duration", 0.0))
+            rows.extend((time_s, parse_key(key), duration, 0) for key in entry["keys"])
+        else:
+            key, time_s, *rest = entry
+            rows.append((float(time_s), parse_key(key), float(rest[0]) if rest else 0.0, 0))
+
+    compiled = np.array(rows, dtype=CHART_DTYPE)
+    compiled = compiled[np.lexsort((compiled['key'], compiled['time']))]
+    if len(compiled):
+        compiled['group'] = np.cumsum(np.r_[0, np.diff(compiled['time']) > CHORD_TOLERANCE])
+    return compiled
+
+
+def chart_cache_path(chart, cache_dir=None):
+    """Ruta del .npy compilado (hash del contenido del chart y del formato)."""
+    cache_dir = Path(cache_dir or AppConfig.CHART_CACHE_DIR)
+    digest = hashlib.sha1(f"{CHART_FORMAT_VERSION}:{chart!r}".encode()).hexdigest()[:16]
+    return cache_dir / f"chart_{digest}.npy"
+
+
+def load_compiled_chart(chart, cache_dir=None):
+    """
+    Chart compilado desde el cache en disco (lo genera la primera vez).
+
+    Args:
+        chart: Chart en formato tuplas o dicts (ver compile_chart)
+        cache_dir: Carpeta de los .npy (None = AppConfig.CHART_CACHE_DIR)
+
+    Returns:
+        np.ndarray con CHART_DTYPE
+    """
+    if isinstance(chart, np.ndarray) and chart.dtype == CHART_DTYPE:
+        return chart
+
+    path = chart_cache_path(chart, cache_dir)
+    if path.exists():
+        try:
+            compiled = np.load(path, allow_pickle=False)
+            if compiled.dtype == CHART_DTYPE:
+                return compiled
+        except (OSError, ValueError):
+            pass
+        print(f"⚠ Chart en cache inválido, se recompila: {path}")
+
+    compiled = compile_chart(chart)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, compiled, allow_pickle=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠ No se pudo guardar el chart compilado: {e}")
+    return compiled
+
+
+def chord_window(compiled, start, end):
+    """
+    Acordes con start < time < end (búsqueda binaria, sin recorrer el chart).
+
+    Returns:
+        [(time, [teclas]), ...] en orden de tiempo
+    """
+    times = compiled['time']
+    lo = int(np.searchsorted(times, start, side='right'))
+    hi = int(np.searchsorted(times, end, side='left'))
+    window = compiled[lo:hi]
+    if not len(window):
+        return []
+    bounds = np.flatnonzero(np.diff(window['group'])) + 1
+    return [(float(notes['time'][0]), notes['key'].tolist()) for notes in np.split(window, bounds)]
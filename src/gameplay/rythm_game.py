@@ -5,13 +5,15 @@ Rhythm Game
 import cv2
 import numpy as np
 import time
+from collections import deque
 from src.vision.stereo_config import StereoConfig
+from src.gameplay.chart_compiler import compile_chart, load_compiled_chart
 
 class Song:
     """Representa una canción del juego de ritmo"""
     def __init__(self, title, chart, difficulty, bpm):
         self.title = title
-        self.chart = chart  # Lista de tuplas (key, time, duration)
+        self.chart = chart  # Lista de tuplas (key, time[, duration]); ver chart_compiler
         self.difficulty = difficulty
         self.bpm = bpm
         
@@ -28,6 +30,15 @@ class Note:
 class RhythmGame:
     """Lógica del juego de ritmo"""
     
+    # Color palette - Professional theme (sin overlay oscuro para mejor detección)
+    HIT_ZONE_PRIMARY = (0, 200, 100)
+    HIT_ZONE_SECONDARY = (0, 255, 150)
+    NOTE_COLOR = (0, 200, 255)
+    NOTE_GLOW = (100, 230, 255)
+    LANE_DIVIDER = (60, 60, 80)
+    HIT_ZONE_ALPHA = (77, 77, 77)         # 0.3 en 0-255 (capa de draw)
+    NOTE_ALPHA = (77, 77, 77)
+    
     def __init__(self, num_keys=24):
         self.num_keys = num_keys
         self.notes = []  # Lista de notas activas
@@ -47,14 +58,33 @@ class RhythmGame:
         self.perfect_window = StereoConfig.PERFECT_WINDOW
         self.good_window = StereoConfig.GOOD_WINDOW
         
+        # Latencia del pipeline (captura -> pantalla) y errores de timing para calibrarla
+        self.latency_offset = StereoConfig.INPUT_LATENCY_OFFSET
+        self.timing_errors = deque(maxlen=64)
+        
         # Control de tiempo
         self.start_time = None
         self.is_playing = False
         
+        # Línea de tiempo (ver start_game): notas ordenadas por hit_time,
+        # cursores y colas por tecla; update/check_hit solo tocan la ventana activa
+        self.chart = compile_chart([])
+        self.spawn_times = np.zeros(0)
+        self._spawn_cursor = 0        # próxima nota por aparecer
+        self._done_cursor = 0         # notas iniciales ya resueltas o vencidas
+        self._active = deque()        # en pantalla, sin resolver (orden de hit_time)
+        self._pending = {}            # tecla -> deque de notas sin resolver
+        
+        # Capa de composición de draw() (se crea con la geometría del frame)
+        # y fondos sólidos de los paneles de draw_ui
+        self._layer = None
+        self._panel_fills = {}
+        
     def start_game(self, song_chart):
         """
         Inicia el juego con una canción
-        song_chart: objeto Song o lista de tuplas (tecla, tiempo_en_segundos)
+        song_chart: objeto Song (compilado con cache en disco), lista de tuplas
+                    (tecla, tiempo_en_segundos) o chart ya compilado (CHART_DTYPE)
         """
         self.start_time = time.time()
         self.is_playing = True
@@ -64,25 +94,27 @@ class RhythmGame:
         self.perfect_count = 0
         self.good_count = 0
         self.miss_count = 0
-        self.notes = []
         
-        # Extraer chart de Song object si es necesario
+        # Chart compilado (time, key, duration, group), ordenado por tiempo
         if isinstance(song_chart, Song):
-            chart = song_chart.chart
+            self.chart = load_compiled_chart(song_chart.chart)
         else:
-            chart = song_chart
-        
-        # Crear notas desde el chart
-        for item in chart:
-            if len(item) == 3:  # (key, time, duration)
-                key, hit_time, duration = item
-            else:  # (key, time)
-                key, hit_time = item
-            
-            # Calcular cuándo debe aparecer la nota
-            travel_time = self.hit_zone_y / self.note_speed
-            spawn_time = hit_time - travel_time
-            self.notes.append(Note(key, spawn_time, hit_time))
+            self.chart = compile_chart(song_chart)
+        
+        # Calcular cuándo debe aparecer cada nota; el viaje es igual para
+        # todas, así que el orden por hit_time es también el de aparición
+        travel_time = self.hit_zone_y / self.note_speed
+        self.spawn_times = self.chart['time'] - travel_time
+        self.notes = [Note(key, spawn_time, hit_time) for key, spawn_time, hit_time
+                      in zip(self.chart['key'].tolist(), self.spawn_times.tolist(), self.chart['time'].tolist())]
+        
+        # Línea de tiempo: cursores y una cola por tecla
+        self._spawn_cursor = 0
+        self._done_cursor = 0
+        self._active = deque()
+        self._pending = {}
+        for note in self.notes:
+            self._pending.setdefault(note.key, deque()).append(note)
     
     def stop_game(self):
         """Detiene el juego de ritmo"""
@@ -97,12 +129,14 @@ class RhythmGame:
         
         current_time = time.time() - self.start_time
         
-        # Verificar si todas las notas han sido procesadas (hit o missed)
-        for note in self.notes:
-            if not note.hit and not note.missed:
-                # Si la nota aún no ha pasado su tiempo de hit + margen, el juego continúa
-                if current_time < note.hit_time + self.good_window * 2:
-                    return False
+        # Avanzar el cursor sobre las notas procesadas (hit o missed) o cuyo
+        # tiempo de hit + margen ya pasó; ambas condiciones no se revierten
+        notes = self.notes
+        while self._done_cursor < len(notes):
+            note = notes[self._done_cursor]
+            if not note.hit and not note.missed and current_time < note.hit_time + self.good_window * 2:
+                return False
+            self._done_cursor += 1
         
         # Todas las notas han sido procesadas
         return True
@@ -132,49 +166,67 @@ class RhythmGame:
             
         current_time = time.time() - self.start_time
         
-        # Actualizar posición de cada nota
-        for note in self.notes:
+        # Notas que ya deben aparecer entran a la ventana activa
+        cursor = int(np.searchsorted(self.spawn_times, current_time, side='right'))
+        if cursor > self._spawn_cursor:
+            self._active.extend(self.notes[self._spawn_cursor:cursor])
+            self._spawn_cursor = cursor
+        
+        # Sacar del frente las resueltas y marcar las que se pasaron
+        # (la ventana está ordenada por hit_time)
+        active = self._active
+        miss_time = current_time - self.good_window * 1.5
+        while active and (active[0].hit or active[0].missed or active[0].hit_time < miss_time):
+            note = active.popleft()
             if not note.hit and not note.missed:
-                # Calcular posición basada en tiempo
-                time_since_spawn = current_time - note.spawn_time
-                if time_since_spawn < 0:
-                    continue  # Saltar notas que aún no deben aparecer
-                    
-                note.y_pos = int(time_since_spawn * self.note_speed)
-                
-                # Verificar si se pasó la nota
-                if current_time > note.hit_time + self.good_window * 1.5:
-                    note.missed = True
-                    self.miss_count += 1
-                    self.combo = 0
+                note.y_pos = int((current_time - note.spawn_time) * self.note_speed)
+                note.missed = True
+                self.miss_count += 1
+                self.combo = 0
+        
+        # Actualizar posición de las notas en pantalla
+        for note in active:
+            if not note.hit:
+                note.y_pos = int((current_time - note.spawn_time) * self.note_speed)
                     
-    def check_hit(self, key_pressed):
+    def check_hit(self, key_pressed, press_time=None):
         """
         Verifica si se presionó la tecla correcta en el momento correcto
         key_pressed: número de tecla (0-23)
+        press_time: instante de contacto (km.key_state.press_time, reloj de
+                    captura); si es None se usa la hora actual
         """
         if not self.is_playing:
             return None
-            
-        current_time = time.time() - self.start_time
         
-        # Buscar la nota más cercana en esa tecla
+        if press_time is None:
+            press_time = time.time()
+        current_time = press_time - self.latency_offset - self.start_time
+        
+        # Buscar la nota más cercana en esa tecla (cola ordenada por hit_time:
+        # se descartan las resueltas del frente y se revisa solo la ventana)
         best_note = None
         best_diff = float('inf')
         
-        for note in self.notes:
-            if note.key == key_pressed and not note.hit and not note.missed:
-                time_to_hit = note.hit_time - current_time
+        pending = self._pending.get(key_pressed)
+        while pending and (pending[0].hit or pending[0].missed):
+            pending.popleft()
+        
+        for note in pending or ():
+            time_to_hit = note.hit_time - current_time
+            if time_to_hit > self.good_window:
+                break
+            
+            if not note.hit and not note.missed and time_to_hit >= -self.good_window:
+                time_diff = abs(time_to_hit)
                 
-                if -self.good_window <= time_to_hit <= self.good_window:
-                    time_diff = abs(time_to_hit)
-                    
-                    if time_diff < best_diff:
-                        best_diff = time_diff
-                        best_note = note
+                if time_diff < best_diff:
+                    best_diff = time_diff
+                    best_note = note
                     
         if best_note:
             best_note.hit = True
+            self.timing_errors.append(current_time - best_note.hit_time)
             self.combo += 1
             self.max_combo = max(self.max_combo, self.combo)
             
@@ -190,10 +242,34 @@ class RhythmGame:
             
         return None
         
+    def calibrate_latency(self, min_samples=8):
+        """
+        Ajusta latency_offset con la mediana de los errores de timing recientes
+        (positivo = el jugador llega tarde de forma sistemática).
+        Se usa tras una canción de calibración tocando al ritmo de las notas
+        (tecla [O] en main, o al salir del juego con [F]).
+        
+        Retorna el nuevo offset (s), o None si no hay suficientes aciertos
+        """
+        if len(self.timing_errors) < min_samples:
+            print(f"⚠ Latencia sin calibrar: {len(self.timing_errors)}/{min_samples} aciertos")
+            return None
+        
+        self.latency_offset += float(np.median(self.timing_errors))
+        self.timing_errors.clear()
+        print(f"✓ Latencia calibrada: {self.latency_offset * 1e3:.0f} ms "
+              f"(StereoConfig.INPUT_LATENCY_OFFSET = {self.latency_offset:.3f})")
+        return self.latency_offset
+        
     def draw(self, frame, keyboard_x0, keyboard_x1, key_width):
         """
         Dibuja las notas cayendo y la zona de acierto con diseño profesional
         Siempre dibuja las estadísticas si hay notas (incluso si el juego terminó)
+        
+        Compositor por capas: la zona de acierto (gradiente cacheado), los
+        glows y las notas se pintan en una capa del tamaño de la región del
+        teclado (color + alfa por píxel) y se mezclan con el frame una sola
+        vez; el costo por frame no depende de la cantidad de notas
         """
         # Siempre dibujar UI si hay notas, incluso si el juego terminó
         has_notes = len(self.notes) > 0
@@ -203,48 +279,27 @@ class RhythmGame:
         
         keyboard_x0 = int(keyboard_x0)
         keyboard_x1 = int(keyboard_x1)
+        layer = self._get_layer(frame.shape, keyboard_x0, keyboard_x1)
+        overlay, alpha, layer_x0 = layer['overlay'], layer['alpha'], layer['x0']
         
-        # Color palette - Professional theme (sin overlay oscuro para mejor detección)
-        HIT_ZONE_PRIMARY = (0, 200, 100)
-        HIT_ZONE_SECONDARY = (0, 255, 150)
-        NOTE_COLOR = (0, 200, 255)
-        NOTE_GLOW = (100, 230, 255)
-        LANE_DIVIDER = (60, 60, 80)
+        # Capa base: gradiente de la zona de acierto (copia del cache)
+        overlay[:] = layer['base_overlay']
+        alpha[:] = layer['base_alpha']
         
         # NO oscurecer la interfaz para mejor detección de dedos
         
-        # Dibujar líneas de separación con estilo profesional
+        # Dibujar líneas de separación con estilo profesional (debajo de la capa)
         for i in range(self.num_keys + 1):
             x = int(keyboard_x0 + i * key_width)
             if keyboard_x0 <= x <= keyboard_x1:
                 cv2.line(frame, (x, 0), (x, self.hit_zone_y + self.hit_zone_height), 
-                        LANE_DIVIDER, 1)
-        
-        # Dibujar zona de acierto con gradiente
-        hit_zone_overlay = frame.copy()
-        for i in range(self.hit_zone_height):
-            ratio = i / self.hit_zone_height
-            color = tuple(int(HIT_ZONE_PRIMARY[j] + (HIT_ZONE_SECONDARY[j] - HIT_ZONE_PRIMARY[j]) * ratio) 
-                         for j in range(3))
-            cv2.line(hit_zone_overlay, 
-                    (keyboard_x0, self.hit_zone_y + i),
-                    (keyboard_x1, self.hit_zone_y + i),
-                    color, 1)
-        frame = cv2.addWeighted(frame, 0.7, hit_zone_overlay, 0.3, 0)
+                        self.LANE_DIVIDER, 1)
         
-        # Borde de zona de acierto
-        cv2.rectangle(frame, 
-                     (keyboard_x0, self.hit_zone_y),
-                     (keyboard_x1, self.hit_zone_y + self.hit_zone_height),
-                     HIT_ZONE_SECONDARY, 3)
-        
-        # Línea central de timing perfecto
         perfect_line_y = self.hit_zone_y + self.hit_zone_height // 2
-        cv2.line(frame, (keyboard_x0, perfect_line_y), (keyboard_x1, perfect_line_y),
-                (255, 255, 0), 2)
         
-        # Dibujar notas con efecto de glow
-        for note in self.notes:
+        # Notas visibles: glow y cuerpo a la capa, bordes después de mezclar
+        borders = []
+        for note in self._active:
             if not note.hit and not note.missed and 0 <= note.y_pos <= self.hit_zone_y + 100:
                 note_x0 = int(keyboard_x0 + note.key * key_width + 5)
                 note_x1 = int(keyboard_x0 + (note.key + 1) * key_width - 5)
@@ -252,228 +307,102 @@ class RhythmGame:
                 note_y1 = note.y_pos + 30
                 
                 if note_x0 >= keyboard_x0 and note_x1 <= keyboard_x1:
-                    # Calcular distancia a la zona de hit para efecto glow
-                    distance_to_hit = abs(note_y0 - perfect_line_y)
+                    # Coordenadas relativas a la capa
+                    x0, x1 = note_x0 - layer_x0, note_x1 - layer_x0
                     
                     # Efecto glow cuando se acerca a la zona de hit
+                    distance_to_hit = abs(note_y0 - perfect_line_y)
                     if distance_to_hit < 80:
                         glow_intensity = 1.0 - (distance_to_hit / 80)
-                        glow_overlay = frame.copy()
-                        cv2.rectangle(glow_overlay, 
-                                    (note_x0 - 3, note_y0 - 3), 
-                                    (note_x1 + 3, note_y1 + 3), 
-                                    NOTE_GLOW, -1)
-                        frame = cv2.addWeighted(frame, 1.0, glow_overlay, 
-                                              glow_intensity * 0.4, 0)
+                        cv2.rectangle(overlay, (x0 - 3, note_y0 - 3), (x1 + 3, note_y1 + 3),
+                                      self.NOTE_GLOW, -1)
+                        cv2.rectangle(alpha, (x0 - 3, note_y0 - 3), (x1 + 3, note_y1 + 3),
+                                      (int(glow_intensity * 0.4 * 255),) * 3, -1)
                     
                     # Nota principal
-                    note_overlay = frame.copy()
-                    cv2.rectangle(note_overlay, (note_x0, note_y0), 
-                                (note_x1, note_y1), NOTE_COLOR, -1)
-                    frame = cv2.addWeighted(frame, 0.7, note_overlay, 0.3, 0)
-                    
-                    # Borde brillante
-                    cv2.rectangle(frame, (note_x0, note_y0), 
-                                (note_x1, note_y1), (255, 255, 255), 2)
+                    cv2.rectangle(overlay, (x0, note_y0), (x1, note_y1), self.NOTE_COLOR, -1)
+                    cv2.rectangle(alpha, (x0, note_y0), (x1, note_y1), self.NOTE_ALPHA, -1)
+                    borders.append((note_x0, note_y0, note_x1, note_y1))
         
-        # SIEMPRE dibujar UI profesional (incluso si el juego terminó, para mostrar estadísticas finales)
-            self.notes.append(Note(key, spawn_time, hit_time))
-    
-    def stop_game(self):
-        """Detiene el juego de ritmo"""
-        self.is_playing = False
-        
-    def is_game_finished(self):
-        """
-        Verifica si el juego ha terminado (todas las notas procesadas)
-        """
-        if not self.is_playing:
-            return False
-        
-        current_time = time.time() - self.start_time
-        
-        # Verificar si todas las notas han sido procesadas (hit o missed)
-        for note in self.notes:
-            if not note.hit and not note.missed:
-                # Si la nota aún no ha pasado su tiempo de hit + margen, el juego continúa
-                if current_time < note.hit_time + self.good_window * 2:
-                    return False
-        
-        # Todas las notas han sido procesadas
-        return True
-    
-    def get_final_score(self):
-        """Retorna el score final y estadísticas completas"""
-        total_notes = len(self.notes)
-        total_hit = self.perfect_count + self.good_count
-        total_miss = self.miss_count
-        accuracy = (total_hit / total_notes * 100) if total_notes > 0 else 0
-        
-        return {
-            'score': self.score,
-            'combo': self.max_combo,
-            'perfect': self.perfect_count,
-            'good': self.good_count,
-            'miss': self.miss_count,
-            'total_notes': total_notes,
-            'total_hit': total_hit,
-            'accuracy': accuracy
-        }
-            
-    def update(self):
-        """Actualiza la posición de las notas"""
-        if not self.is_playing:
-            return
-            
-        current_time = time.time() - self.start_time
-        
-        # Actualizar posición de cada nota
-        for note in self.notes:
-            if not note.hit and not note.missed:
-                # Calcular posición basada en tiempo
-                time_since_spawn = current_time - note.spawn_time
-                if time_since_spawn < 0:
-                    continue  # Saltar notas que aún no deben aparecer
-                    
-                note.y_pos = int(time_since_spawn * self.note_speed)
-                
-                # Verificar si se pasó la nota
-                if current_time > note.hit_time + self.good_window * 1.5:
-                    note.missed = True
-                    self.miss_count += 1
-                    self.combo = 0
-                    
-    def check_hit(self, key_pressed):
-        """
-        Verifica si se presionó la tecla correcta en el momento correcto
-        key_pressed: número de tecla (0-23)
-        """
-        if not self.is_playing:
-            return None
-            
-        current_time = time.time() - self.start_time
-        
-        # Buscar la nota más cercana en esa tecla
-        best_note = None
-        best_diff = float('inf')
-        
-        for note in self.notes:
-            if note.key == key_pressed and not note.hit and not note.missed:
-                time_to_hit = note.hit_time - current_time
-                
-                if -self.good_window <= time_to_hit <= self.good_window:
-                    time_diff = abs(time_to_hit)
-                    
-                    if time_diff < best_diff:
-                        best_diff = time_diff
-                        best_note = note
-                    
-        if best_note:
-            best_note.hit = True
-            self.combo += 1
-            self.max_combo = max(self.max_combo, self.combo)
-            
-            # Determinar calificación
-            if best_diff <= self.perfect_window:
-                self.score += 100 * self.combo
-                self.perfect_count += 1
-                return "PERFECT"
-            elif best_diff <= self.good_window:
-                self.score += 50 * self.combo
-                self.good_count += 1
-                return "GOOD"
-            
-        return None
-        
-    def draw(self, frame, keyboard_x0, keyboard_x1, key_width):
-        """
-        Dibuja las notas cayendo y la zona de acierto con diseño profesional
-        Siempre dibuja las estadísticas si hay notas (incluso si el juego terminó)
-        """
-        # Siempre dibujar UI si hay notas, incluso si el juego terminó
-        has_notes = len(self.notes) > 0
-        
-        if not self.is_playing and not has_notes:
-            return frame
-        
-        keyboard_x0 = int(keyboard_x0)
-        keyboard_x1 = int(keyboard_x1)
-        
-        # Color palette - Professional theme (sin overlay oscuro para mejor detección)
-        HIT_ZONE_PRIMARY = (0, 200, 100)
-        HIT_ZONE_SECONDARY = (0, 255, 150)
-        NOTE_COLOR = (0, 200, 255)
-        NOTE_GLOW = (100, 230, 255)
-        LANE_DIVIDER = (60, 60, 80)
-        
-        # NO oscurecer la interfaz para mejor detección de dedos
-        
-        # Dibujar líneas de separación con estilo profesional
-        for i in range(self.num_keys + 1):
-            x = int(keyboard_x0 + i * key_width)
-            if keyboard_x0 <= x <= keyboard_x1:
-                cv2.line(frame, (x, 0), (x, self.hit_zone_y + self.hit_zone_height), 
-                        LANE_DIVIDER, 1)
-        
-        # Dibujar zona de acierto con gradiente
-        hit_zone_overlay = frame.copy()
-        for i in range(self.hit_zone_height):
-            ratio = i / self.hit_zone_height
-            color = tuple(int(HIT_ZONE_PRIMARY[j] + (HIT_ZONE_SECONDARY[j] - HIT_ZONE_PRIMARY[j]) * ratio) 
-                         for j in range(3))
-            cv2.line(hit_zone_overlay, 
-                    (keyboard_x0, self.hit_zone_y + i),
-                    (keyboard_x1, self.hit_zone_y + i),
-                    color, 1)
-        frame = cv2.addWeighted(frame, 0.7, hit_zone_overlay, 0.3, 0)
+        # Una sola mezcla de la región del teclado: roi*(1-a) + capa*a (a en 0-255)
+        inv_alpha = cv2.bitwise_not(alpha, dst=layer['inv_alpha'])
+        roi = frame[:layer['height'], layer_x0:layer_x0 + layer['width']]
+        roi[:] = cv2.add(cv2.multiply(roi, inv_alpha, scale=1 / 255),
+                         cv2.multiply(overlay, alpha, scale=1 / 255))
         
         # Borde de zona de acierto
         cv2.rectangle(frame, 
                      (keyboard_x0, self.hit_zone_y),
                      (keyboard_x1, self.hit_zone_y + self.hit_zone_height),
-                     HIT_ZONE_SECONDARY, 3)
+                     self.HIT_ZONE_SECONDARY, 3)
         
         # Línea central de timing perfecto
-        perfect_line_y = self.hit_zone_y + self.hit_zone_height // 2
         cv2.line(frame, (keyboard_x0, perfect_line_y), (keyboard_x1, perfect_line_y),
                 (255, 255, 0), 2)
         
-        # Dibujar notas con efecto de glow
-        for note in self.notes:
-            if not note.hit and not note.missed and 0 <= note.y_pos <= self.hit_zone_y + 100:
-                note_x0 = int(keyboard_x0 + note.key * key_width + 5)
-                note_x1 = int(keyboard_x0 + (note.key + 1) * key_width - 5)
-                note_y0 = note.y_pos
-                note_y1 = note.y_pos + 30
-                
-                if note_x0 >= keyboard_x0 and note_x1 <= keyboard_x1:
-                    # Calcular distancia a la zona de hit para efecto glow
-                    distance_to_hit = abs(note_y0 - perfect_line_y)
-                    
-                    # Efecto glow cuando se acerca a la zona de hit
-                    if distance_to_hit < 80:
-                        glow_intensity = 1.0 - (distance_to_hit / 80)
-                        glow_overlay = frame.copy()
-                        cv2.rectangle(glow_overlay, 
-                                    (note_x0 - 3, note_y0 - 3), 
-                                    (note_x1 + 3, note_y1 + 3), 
-                                    NOTE_GLOW, -1)
-                        frame = cv2.addWeighted(frame, 1.0, glow_overlay, 
-                                              glow_intensity * 0.4, 0)
-                    
-                    # Nota principal
-                    note_overlay = frame.copy()
-                    cv2.rectangle(note_overlay, (note_x0, note_y0), 
-                                (note_x1, note_y1), NOTE_COLOR, -1)
-                    frame = cv2.addWeighted(frame, 0.7, note_overlay, 0.3, 0)
-                    
-                    # Borde brillante
-                    cv2.rectangle(frame, (note_x0, note_y0), 
-                                (note_x1, note_y1), (255, 255, 255), 2)
+        # Borde brillante de cada nota
+        for note_x0, note_y0, note_x1, note_y1 in borders:
+            cv2.rectangle(frame, (note_x0, note_y0), 
+                        (note_x1, note_y1), (255, 255, 255), 2)
         
         # SIEMPRE dibujar UI profesional (incluso si el juego terminó, para mostrar estadísticas finales)
         self.draw_ui(frame)
         return frame
+    
+    def _get_layer(self, frame_shape, keyboard_x0, keyboard_x1):
+        """
+        Capa de composición de la región del teclado (cacheada por geometría)
+        
+        Alto: hasta la nota más baja visible (hit_zone_y + 100 + 30 + glow).
+        El alfa es uint8 de 3 canales (0-255) para mezclar con multiply/add.
+        base_overlay/base_alpha tienen el gradiente de la zona de acierto ya
+        dibujado; overlay/alpha se reescriben desde la base en cada frame
+        """
+        frame_height, frame_width = frame_shape[:2]
+        keyboard_x0 = max(0, keyboard_x0)
+        width = max(1, min(frame_width, keyboard_x1 + 1) - keyboard_x0)
+        height = min(frame_height, self.hit_zone_y + 100 + 30 + 4)
+        key = (height, width, keyboard_x0)
+        if self._layer is not None and self._layer['key'] == key:
+            return self._layer
+        
+        # Gradiente de la zona de acierto (una fila por línea, como antes)
+        base_overlay = np.zeros((height, width, 3), np.uint8)
+        base_alpha = np.zeros((height, width, 3), np.uint8)
+        y0 = min(self.hit_zone_y, height)
+        y1 = min(self.hit_zone_y + self.hit_zone_height, height)
+        ratio = np.arange(self.hit_zone_height)[:y1 - y0, None] / self.hit_zone_height
+        primary = np.array(self.HIT_ZONE_PRIMARY, np.float64)
+        secondary = np.array(self.HIT_ZONE_SECONDARY, np.float64)
+        base_overlay[y0:y1] = (primary + (secondary - primary) * ratio).astype(np.uint8)[:, None, :]
+        base_alpha[y0:y1] = self.HIT_ZONE_ALPHA[0]
+        
+        self._layer = {
+            'key': key,
+            'x0': keyboard_x0,
+            'height': height,
+            'width': width,
+            'base_overlay': base_overlay,
+            'base_alpha': base_alpha,
+            'overlay': base_overlay.copy(),
+            'alpha': base_alpha.copy(),
+            'inv_alpha': np.empty_like(base_alpha)
+        }
+        return self._layer
+    
+    def _blend_panel(self, frame, x0, y0, x1, y1, color, opacity):
+        """Fondo semitransparente de un panel: mezcla solo su región"""
+        frame_height, frame_width = frame.shape[:2]
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(frame_width, x1 + 1), min(frame_height, y1 + 1)
+        if x1 <= x0 or y1 <= y0:
+            return
+        roi = frame[y0:y1, x0:x1]
+        key = (roi.shape, color)
+        solid = self._panel_fills.get(key)
+        if solid is None:
+            solid = self._panel_fills[key] = np.full(roi.shape, color, np.uint8)
+        roi[:] = cv2.addWeighted(roi, 1 - opacity, solid, opacity, 0)
         
     def draw_ui(self, frame):
         """Dibuja UI con diseño profesional y colores unificados - MEJORADO PARA MAYOR VISIBILIDAD"""
@@ -496,11 +425,8 @@ class RhythmGame:
         panel_y = 10
         
         # Fondo del panel con MÁS OPACIDAD para mejor visibilidad
-        panel_overlay = frame.copy()
-        cv2.rectangle(panel_overlay, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     PANEL_BG, -1)
-        frame = cv2.addWeighted(frame, 0.5, panel_overlay, 0.5, 0)  # Más opaco
+        self._blend_panel(frame, panel_x, panel_y, panel_x + panel_width,
+                          panel_y + panel_height, PANEL_BG, 0.5)  # Más opaco
         
         # Borde del panel MÁS GRUESO
         cv2.rectangle(frame, (panel_x, panel_y), 
@@ -546,11 +472,8 @@ class RhythmGame:
         stats_panel_height = 280
         
         # Fondo del panel de estadísticas MÁS OPACO
-        stats_overlay = frame.copy()
-        cv2.rectangle(stats_overlay, (stats_panel_x, stats_panel_y),
-                     (stats_panel_x + stats_panel_width, stats_panel_y + stats_panel_height),
-                     PANEL_BG, -1)
-        frame = cv2.addWeighted(frame, 0.5, stats_overlay, 0.5, 0)  # Más opaco
+        self._blend_panel(frame, stats_panel_x, stats_panel_y, stats_panel_x + stats_panel_width,
+                          stats_panel_y + stats_panel_height, PANEL_BG, 0.5)  # Más opaco
         
         # Borde del panel MÁS GRUESO
         cv2.rectangle(frame, (stats_panel_x, stats_panel_y),
@@ -63,7 +63,6 @@ import time
 import traceback
 import cv2
 import numpy as np
-import fluidsynth
 from collections import deque
 
 # --- Vision ---
@@ -74,7 +73,11 @@ from src.vision import load_depth_estimator
 from src.vision.stereo_config import StereoConfig
 
 # --- Calibration ---
-from src.calibration import CalibrationManager
+from src.calibration import CalibrationManager, KeyboardCalibrator
+
+# --- Audio ---
+from src.audio import AudioEngine, MidiRecorder, SoundfontLoader, VoiceManager, create_backend
+from src.config.app_config import AppConfig
 
 # --- Piano ---
 from src.piano import virtual_keyboard as vkb
@@ -100,6 +103,7 @@ from src.ui.config_ui import ConfigUI
 
 # --- Common ---
 from src.common.toolbox import round_half_up
+from src.common.latency_probe import LatencyProbe
 
 def frame_add_crosshairs(frame,
                          x,
@@ -736,6 +740,10 @@ def main():
     while True:  # <--- 1. BUCLE GLOBAL AGREGADO
         # Inicializar variables para limpieza segura
         fs = None
+        audio = None
+        voices = None
+        recorder = None
+        probe = None
         cam_left = None
         cam_right = None
         try:
@@ -847,6 +855,33 @@ def main():
                 buffer_all=False,
                 try_to_reconnect=False)
 
+            # ------------------------------
+            # set up synth
+            # ------------------------------
+
+            # Backend configurable: fluidsynth en vivo, render offline o nulo (sin audio)
+            fs = create_backend(AppConfig.AUDIO_BACKEND, driver=config.AUDIO_DRIVER)
+
+            # Hilo de audio: visión, juego y lecciones solo encolan eventos
+            audio = AudioEngine(fs).start()
+            # Grabación .mid de la sesión: las notas en vivo pasan por el grabador
+            if AppConfig.MIDI_RECORD:
+                recorder = MidiRecorder(audio).start(
+                    AppConfig.get_recording_path('game' if initial_mode == 'rhythm' else 'free'))
+            # Notas en vivo: duración máxima, manos fuera del cuadro y polifonía
+            voices = VoiceManager(recorder or audio)
+            # Latencia por etapa captura -> sonido (reporte al salir)
+            probe = LatencyProbe(enabled=AppConfig.LATENCY_PROBE)
+
+            # El soundfont se carga en segundo plano mientras arrancan las
+            # cámaras; preset del canal 0 = AppConfig.SOUNDFONT_PRESETS[0]:
+            # (0, 0) 000-000 Yamaha Grand Piano
+            # (8, 14) 008-014 Church Bell
+            # (8, 26) 008-026 Hawaiian Guitar
+            # (128, 0) Standard
+            # (0, 103) 000-103 Star Theme
+            soundfont_loader = SoundfontLoader(audio, AppConfig.get_soundfont_path()).start()
+
             # start cameras
             cam_left.start()
             cam_right.start()
@@ -974,6 +1009,12 @@ def main():
             vk_right = vkb.VirtualKeyboard(pixel_width, pixel_height,
                                         KEYBOARD_WHIITE_N_KEYS)
             
+            # Teclado en perspectiva (si se calibraron las esquinas con [K])
+            keyboard_corners = KeyboardCalibrator.load_corners(pixel_width, pixel_height)
+            if keyboard_corners:
+                vk_left.set_perspective(keyboard_corners)
+                print("✓ Teclado en perspectiva cargado desde calibración")
+            
             # Inicializar sistemas
             rhythm_game = RhythmGame(num_keys=KEYBOARD_TOT_KEYS)
             lesson_manager = get_lesson_manager()
@@ -1042,6 +1083,10 @@ def main():
             # -----------------------------
             km = kbm.KeyboardMap(depth_threshold=config.DEPTH_THRESHOLD)
 
+            # Suavizado de posición 3D por dedo (expira con el registro de dedos)
+            finger_position_history = {}
+            km.finger_registry.track_dict(finger_position_history)
+
             # ------------------------------
             # set up angles
             # ------------------------------
@@ -1057,27 +1102,6 @@ def main():
                                                     detectionCon=config.HAND_DETECTION_CONFIDENCE,
                                                     trackCon=config.HAND_TRACKING_CONFIDENCE)
 
-            # ------------------------------
-            # set up synth
-            # ------------------------------
-
-            fs = fluidsynth.Synth()
-            fs.start(driver='dsound') # Windows
-            sfid = fs.sfload(r"C:\Users\MI PC\OneDrive\Desktop\fluid\FluidR3_GM.sf2")
-
-
-            # 000-000 Yamaha Grand Piano
-            fs.program_select(chan=0, sfid=sfid, bank=0, preset=0)
-
-            # # 008-014 Church Bell
-            # fs.program_select(chan=0, sfid=sfid, bank=8, preset=14)
-            # # 008-026 Hawaiian Guitar
-            # fs.program_select(chan=0, sfid=sfid, bank=8, preset=26)
-            # # Standard
-            # fs.program_select(chan=0, sfid=sfid, bank=128, preset=0)
-            # # 000-103 Star Theme
-            # fs.program_select(chan=0, sfid=sfid, bank=0, preset=103)
-
             # ------------------------------
             # stabilize
             # ------------------------------
@@ -1128,6 +1152,7 @@ def main():
                 # Aplicar flip una sola vez al principio (Selfie point of view)
                 frame_left = cv2.flip(frame_left, -1)
                 frame_right = cv2.flip(frame_right, -1)
+                probe.start_frame(cam_left.frame_timestamp)
 
                 hands_left_image = fingers_left_image = []
                 hands_right_image = fingers_right_image = []
@@ -1144,9 +1169,12 @@ def main():
                 if hands_detected_right:
                     hands_right_image, fingers_right_image = \
                         right_detector.getFingerTipsPos()
+                probe.mark('inference')
 
                 # Dibujar teclado PRIMERO (debajo de las manos)
-                vk_left.draw_virtual_keyboard(frame_left)
+                # (resaltando las teclas activas del frame anterior)
+                vk_left.draw_virtual_keyboard(
+                    frame_left, pressed_keys=km.key_state.pressed_keys())
                 
                 # En modo juego: dibujar notas cayendo DESPUÉS del teclado pero ANTES de las manos
                 if game_mode:
@@ -1174,24 +1202,51 @@ def main():
                     fingers_dist = []
                     finger_depths_dict = {}  # Dict para pasar profundidades a KeyboardMap
                     
-                    # Rectificar imágenes si usamos calibración estéreo
+                    # Triangular TODOS los dedos de una vez (ruta rápida rectificada):
+                    # solo se rectifican las coordenadas de las puntas, no las imágenes
                     if use_stereo_calibration and depth_estimator:
-                        frame_left_rect, frame_right_rect = depth_estimator.rectify_images(frame_left, frame_right)
+                        finger_pairs = list(zip(fingers_left_image, fingers_right_image))
+                        try:
+                            points_3d, points_valid = depth_estimator.batch_triangulate_rectified(
+                                [(f_left[2], f_left[3]) for f_left, _ in finger_pairs],
+                                [(f_right[2], f_right[3]) for _, f_right in finger_pairs])
+                        except Exception as e:
+                            print(f"⚠ Error en triangulación estéreo: {e}")
+                            points_3d = np.zeros((len(finger_pairs), 3))
+                            points_valid = np.zeros(len(finger_pairs), dtype=bool)
                     else:
-                        frame_left_rect, frame_right_rect = frame_left, frame_right
+                        # Método por ángulos: todas las puntas en una sola pasada
+                        # (tablas de ángulo por píxel + triangulación vectorizada)
+                        finger_pairs = list(zip(fingers_left_image, fingers_right_image))
+                        angles_left = angler.angles_from_center_array(
+                            x = [f_left[2] for f_left, _ in finger_pairs],
+                            y = [f_left[3] for f_left, _ in finger_pairs],
+                            lookup=True)
+                        angles_right = angler.angles_from_center_array(
+                            x = [f_right[2] for _, f_right in finger_pairs],
+                            y = [f_right[3] for _, f_right in finger_pairs],
+                            lookup=True)
+                        X_all, Y_all, Z_all, D_all = angler.location_array(
+                            camera_separation,
+                            angles_left,
+                            angles_right,
+                            center=True,
+                            degrees=True)
+                        # angle normalization
+                        delta_y_all = 0.006509695290859 * X_all * X_all + \
+                            0.039473684210526 * -1 * X_all # + vkb_center_point_camera_dist
+                        depth_corrected_all = D_all - delta_y_all
                     
-                    for finger_left, finger_right in \
-                        zip(fingers_left_image, fingers_right_image):
+                    for finger_idx, (finger_left, finger_right) in \
+                        enumerate(zip(fingers_left_image, fingers_right_image)):
                         
                         if use_stereo_calibration and depth_estimator:
                             # ========== MÉTODO PRECISO: Calibración Estéreo ==========
                             try:
-                                # Obtener posiciones de dedos
-                                point_left = (finger_left[2], finger_left[3])
-                                point_right = (finger_right[2], finger_right[3])
-                                
-                                # Triangular con calibración completa
-                                result_3d = depth_estimator.triangulate_point(point_left, point_right)
+                                if points_valid[finger_idx]:
+                                    result_3d = points_3d[finger_idx]
+                                else:
+                                    result_3d = None
                                 
                                 if result_3d is not None:
                                     X_raw, Y_raw, Z_raw = result_3d
@@ -1208,19 +1263,18 @@ def main():
                                     finger_id = (finger_left[0], finger_left[1])
                                     
                                     # Inicializar buffer de suavizado si no existe
-                                    if not hasattr(depth_estimator, 'finger_position_history'):
-                                        depth_estimator.finger_position_history = {}
-                                    if finger_id not in depth_estimator.finger_position_history:
-                                        depth_estimator.finger_position_history[finger_id] = deque(maxlen=5)
+                                    # (expira con el registro de dedos de km)
+                                    if finger_id not in finger_position_history:
+                                        finger_position_history[finger_id] = deque(maxlen=5)
                                     
                                     # Agregar posición actual al buffer
-                                    depth_estimator.finger_position_history[finger_id].append(
+                                    finger_position_history[finger_id].append(
                                         (X_local, Y_local, Z_local)
                                     )
                                     
                                     # Calcular promedio de últimas 5 posiciones
-                                    if len(depth_estimator.finger_position_history[finger_id]) > 0:
-                                        history = np.array(list(depth_estimator.finger_position_history[finger_id]))
+                                    if len(finger_position_history[finger_id]) > 0:
+                                        history = np.array(list(finger_position_history[finger_id]))
                                         X_local, Y_local, Z_local = np.mean(history, axis=0)
                                     
                                     D_local = Z_local  # Profundidad = coordenada Z
@@ -1235,25 +1289,13 @@ def main():
                                 depth_corrected = 0
                         else:
                             # ========== MÉTODO ANTIGUO: Triangulación por ángulos ==========
-                            # get angles from camera centers
-                            xlangle, ylangle = angler.angles_from_center(
-                                x = finger_left[2], y = finger_left[3],
-                                top_left=True, degrees=True)
-                            xrangle, yrangle = angler.angles_from_center(
-                                x = finger_right[2], y = finger_right[3],
-                                top_left=True, degrees=True)
-
-                            # triangulate
-                            X_local, Y_local, Z_local, D_local = angler.location(
-                                camera_separation,
-                                (xlangle, ylangle),
-                                (xrangle, yrangle),
-                                center=True,
-                                degrees=True)
-                            # angle normalization
-                            delta_y = 0.006509695290859 * X_local * X_local + \
-                                0.039473684210526 * -1 * X_local # + vkb_center_point_camera_dist
-                            depth_corrected = D_local - delta_y
+                            # (ya calculado para todas las puntas antes del bucle)
+                            X_local = X_all[finger_idx]
+                            Y_local = Y_all[finger_idx]
+                            Z_local = Z_all[finger_idx]
+                            D_local = D_all[finger_idx]
+                            delta_y = delta_y_all[finger_idx]
+                            depth_corrected = depth_corrected_all[finger_idx]
                         
                         fingers_dist.append(depth_corrected)
                         
@@ -1271,44 +1313,57 @@ def main():
                             D = D_local
                             
 
+                    probe.mark('triangulation')
                     on_map, off_map = km.get_kayboard_map(
                         virtual_keyboard=vk_left,
                         fingertips_pos=fingers_left_image,
                         finger_depths=finger_depths_dict,  # Pasar profundidades 3D
-                        keyboard_n_key=KEYBOARD_TOT_KEYS)
+                        keyboard_n_key=KEYBOARD_TOT_KEYS,
+                        timestamp=cam_left.frame_timestamp)  # Instante de captura
+                    probe.mark('key_state')
                     
                     if game_mode:
                         # Verificar aciertos cuando se presiona una tecla - optimizado
                         # Solo verificar teclas que están activas (más eficiente)
                         active_keys = np.where(on_map)[0]
                         for k_pos in active_keys:
-                            hit_result = rhythm_game.check_hit(k_pos)
+                            hit_result = rhythm_game.check_hit(
+                                k_pos, press_time=km.key_state.press_time[k_pos])  # Contacto interpolado
                             if hit_result:
                                 print(f"Tecla {k_pos}: {hit_result}")
                                 # Reproducir audio solo en modo juego
-                                fs.noteon(
+                                voices.noteon(
                                     chan=0,
                                     key=vk_left.note_from_key(k_pos)+octave_base,
-                                    vel=127*2//3)
+                                    vel=int(km.key_state.press_velocity[k_pos]))  # Rapidez del golpe
+                                probe.note_on(k_pos)
+
+                        for k_pos in np.flatnonzero(off_map):
+                            voices.noteoff(
+                                chan=0,
+                                key=vk_left.note_from_key(k_pos)+octave_base)
                         
                         # NOTA: El dibujo del juego ya se hace arriba, antes de las manos
                     else:
                         # Modo libre: reproducir audio en todas las teclas
-                        if np.any(on_map):
-                            for k_pos, on_key in enumerate(on_map):
-                                if on_key:
-                                    fs.noteon(
-                                        chan=0,
-                                        key=vk_left.note_from_key(k_pos)+octave_base,
-                                        vel=127*2//3)
-
-                        if np.any(off_map):
-                            for k_pos, off_key in enumerate(off_map):
-                                if off_key:
-                                    fs.noteoff(
-                                        chan=0,
-                                        key=vk_left.note_from_key(k_pos)+octave_base
-                                        )
+                        for k_pos in np.flatnonzero(on_map):
+                            voices.noteon(
+                                chan=0,
+                                key=vk_left.note_from_key(k_pos)+octave_base,
+                                vel=int(km.key_state.press_velocity[k_pos]))
+                            probe.note_on(k_pos)
+
+                        for k_pos in np.flatnonzero(off_map):
+                            voices.noteoff(
+                                chan=0,
+                                key=vk_left.note_from_key(k_pos)+octave_base
+                                )
+
+                # Voces vencidas y manos fuera del cuadro (sin manos el bloque
+                # anterior no corre y no llegan flancos off)
+                hands_visible = len(fingers_left_image) > 0 and len(fingers_right_image) > 0
+                if voices.update(hands_visible=hands_visible):
+                    km.release_all(cam_left.frame_timestamp)
 
                 # display camera centers
                 angler.frame_add_crosshairs(frame_left)
@@ -1340,18 +1395,12 @@ def main():
                     # Ajustar valores
                     elif key == 83 or key == ord('d') or key == ord('D'):  # Derecha (aumentar)
                         config_ui.increase_value()
-                        # Aplicar cambios en tiempo real
-                        km.depth_threshold = AppConfig.DEPTH_THRESHOLD
-                        km.velocity_threshold = AppConfig.VELOCITY_THRESHOLD
-                        km.velocity_enabled = AppConfig.VELOCITY_ENABLED
-                        km.velocity_history_size = AppConfig.VELOCITY_HISTORY_SIZE
+                        # Aplicar cambios en tiempo real (entre frames)
+                        km.schedule_config(**config_ui.get_detection_config())
                     elif key == 81 or key == ord('a') or key == ord('A'):  # Izquierda (disminuir)
                         config_ui.decrease_value()
-                        # Aplicar cambios en tiempo real
-                        km.depth_threshold = AppConfig.DEPTH_THRESHOLD
-                        km.velocity_threshold = AppConfig.VELOCITY_THRESHOLD
-                        km.velocity_enabled = AppConfig.VELOCITY_ENABLED
-                        km.velocity_history_size = AppConfig.VELOCITY_HISTORY_SIZE
+                        # Aplicar cambios en tiempo real (entre frames)
+                        km.schedule_config(**config_ui.get_detection_config())
                     
                     # Presets (teclas 1-4)
                     elif 49 <= key <= 52:  # Teclas 1-4
@@ -1361,11 +1410,8 @@ def main():
                             config_ui.apply_preset(preset_key)
                             config_ui.selected_preset = preset_idx
                             print(f"✓ Preset aplicado: {config_ui.presets[preset_idx]['name']}")
-                            # Aplicar cambios en tiempo real
-                            km.depth_threshold = AppConfig.DEPTH_THRESHOLD
-                            km.velocity_threshold = AppConfig.VELOCITY_THRESHOLD
-                            km.velocity_enabled = AppConfig.VELOCITY_ENABLED
-                            km.velocity_history_size = AppConfig.VELOCITY_HISTORY_SIZE
+                            # Aplicar cambios en tiempo real (entre frames)
+                            km.schedule_config(**config_ui.get_detection_config())
                     
                     # Salir
                     elif key == ord('q') or key == ord('Q') or key == 27:  # Q o ESC
@@ -1381,7 +1427,7 @@ def main():
                     # Ejecutar canción activa
                     try:
                         frame_left, frame_right, continue_song = current_song.run(
-                            frame_left, frame_right, vk_left, fs,
+                            frame_left, frame_right, vk_left, audio,
                             left_detector, right_detector
                         )
                         
@@ -1469,9 +1515,10 @@ def main():
                 # === MODO TEORÍA ===
                 if theory_mode:
                     if in_lesson and current_lesson:
-                        # Ejecutar lección activa
+                        # Ejecutar lección activa (con el acorde que se está tocando)
+                        current_lesson.detected_chord = km.current_chord
                         frame_left, frame_right, continue_lesson = current_lesson.run(
-                            frame_left, frame_right, vk_left, fs,
+                            frame_left, frame_right, vk_left, audio,
                             left_detector, right_detector
                         )
                         
@@ -1509,6 +1556,7 @@ def main():
                                 lesson_id, lesson = lessons[selected_idx]
                                 current_lesson = lesson
                                 current_lesson_id = lesson_id
+                                voices.release_all()
                                 current_lesson.start()
                                 in_lesson = True
                                 print(f"Iniciando lección: {lesson.name}")
@@ -1519,6 +1567,7 @@ def main():
                                 lesson_id, lesson = lessons[selected_idx]
                                 current_lesson = lesson
                                 current_lesson_id = lesson_id
+                                voices.release_all()
                                 current_lesson.start()
                                 in_lesson = True
                                 print(f"Iniciando lección: {lesson.name}")
@@ -1557,7 +1606,8 @@ def main():
                     fps1 = int(cam_left.current_frame_rate)
                     fps2 = int(cam_right.current_frame_rate)
                     cps_avg = int(round_half_up(fps))  # Average Cycles per second
-                    text = 'X: {:3.1f}\nY: {:3.1f}\nZ: {:3.1f}\nD: {:3.1f}\nDr: {:3.1f}\nDepth Thr: {:.2f}\nFPS:{}/{}\nCPS:{}'.format(X, Y, Z, D, D-delta_y, km.depth_threshold, fps1, fps2, cps_avg)
+                    chord_symbol = km.current_chord.symbol if km.current_chord else '-'
+                    text = 'X: {:3.1f}\nY: {:3.1f}\nZ: {:3.1f}\nD: {:3.1f}\nDr: {:3.1f}\nDepth Thr: {:.2f}\nFPS:{}/{}\nCPS:{}\nAcorde: {}\nVoces: {}'.format(X, Y, Z, D, D-delta_y, km.depth_threshold, fps1, fps2, cps_avg, chord_symbol, voices.active_voices())
                     lineloc = 0
                     lineheight = 30
                     for t in text.split('\n'):
@@ -1622,6 +1672,7 @@ def main():
                 else:
                     display_dashboard = True
             elif key == ord('n') or key == ord('N'):  # ========== MODO CANCIONES (NEW) ==========
+                voices.release_all()  # Notas sostenidas no pasan al nuevo modo
                 songs_mode = True
                 game_mode = False
                 theory_mode = False
@@ -1630,19 +1681,27 @@ def main():
                 songs_ui.reset_selection()
                 print("¡Modo Canciones activado! Selecciona una canción. Presiona Q para salir.")
             elif key == ord('g'):  # ========== NUEVA TECLA ==========
+                voices.release_all()  # Notas sostenidas no pasan al nuevo modo
+                if recorder is not None:  # Cada partida en su propio .mid
+                    recorder.split(AppConfig.get_recording_path('game'))
                 game_mode = True
                 rhythm_game.start_game(TUTORIAL_FACIL)
                 print("¡Juego de ritmo iniciado! Presiona 'f' para volver al modo libre")
                 ui_helper.reset_instructions()  # Mostrar instrucciones del juego
             elif key == ord('f'):  # ========== NUEVA TECLA ==========
+                voices.release_all()  # Notas sostenidas no pasan al nuevo modo
                 # Detener juego si está activo
                 if game_mode and rhythm_game.is_playing:
                     rhythm_game.stop_game()
+                    rhythm_game.calibrate_latency()
+                if game_mode and recorder is not None:  # Vuelta a modo libre: nuevo .mid
+                    recorder.split(AppConfig.get_recording_path('free'))
                 game_mode = False
                 theory_mode = False
                 print("Modo libre activado")
                 ui_helper.reset_instructions()  # Mostrar instrucciones del modo libre
             elif key == ord('l'):  # ========== MODO TEORÍA ==========
+                voices.release_all()  # Notas sostenidas no pasan al nuevo modo
                 theory_mode = True
                 game_mode = False
                 if rhythm_game.is_playing:
@@ -1662,14 +1721,34 @@ def main():
                     print(f"Profundidades detectadas (D - delta_y):")
                     for fid, depth in finger_depths_dict.items():
                         print(f"  Dedo {fid}: {depth:.2f} cm")
+            elif key == ord('k'):  # Calibrar esquinas del teclado (perspectiva)
+                keyboard_corners = KeyboardCalibrator(
+                    pixel_width, pixel_height).run_keyboard_calibration(cam_left)
+                if keyboard_corners:
+                    vk_left.set_perspective(keyboard_corners)
+            elif key == ord('K'):  # Volver al teclado rectangular
+                KeyboardCalibrator.clear_corners()
+                vk_left.clear_perspective()
+                print("Teclado rectangular restaurado")
+            elif key == ord('o') and game_mode:  # Calibrar latencia con los aciertos del juego
+                rhythm_game.calibrate_latency()
+            elif key == ord('v'):  # Ajustar la curva de velocidad a los golpes recientes
+                if not km.key_state.calibrate_velocity():
+                    print("⚠ Faltan golpes para calibrar la curva de velocidad (mínimo 8)")
+            elif key == ord('V'):  # Siguiente curva de velocidad (AppConfig.VELOCITY_CURVES)
+                names = list(AppConfig.VELOCITY_CURVES)
+                AppConfig.VELOCITY_CURVE = names[(names.index(AppConfig.VELOCITY_CURVE) + 1) % len(names)]
+                km.set_velocity_curve(AppConfig.VELOCITY_CURVE)
+                print(f"Curva de velocidad '{AppConfig.VELOCITY_CURVE}': {km.key_state.velocity_curve}")
             elif key == 27 and in_lesson:  # ESC dentro de lección
                 if current_lesson:
                     current_lesson.stop()
+                    audio.cancel_scheduled()
                 in_lesson = False
                 current_lesson = None
                 print("Volviendo al menú de lecciones...")
             elif in_lesson and current_lesson:  # Pasar teclas a la lección activa
-                current_lesson.handle_key(key, fs, octave_base)
+                current_lesson.handle_key(key, audio, octave_base)
             elif key != 255:
                 print('KEY PRESS:', [chr(key)])
 
@@ -1683,7 +1762,27 @@ def main():
     # close all
     # ------------------------------
 
-    # Fluidsynth
+    # Audio + Fluidsynth
+    try:
+        if recorder is not None:
+            recorder.stop()
+    except Exception:
+        print(traceback.format_exc())
+    try:
+        if voices is not None:
+            voices.release_all()
+    except Exception:
+        pass
+    try:
+        audio.stop()
+    except Exception:
+        pass
+    try:
+        if probe is not None and probe.enabled:
+            probe.add_external('synth', audio.note_lags)
+            print(probe.report())
+    except Exception:
+        print(traceback.format_exc())
     try:
         fs.delete()
     except Exception:
@@ -1718,19 +1817,26 @@ def main():
                     else:
                         display_dashboard = True
                 elif key == ord('g'):  # ========== NUEVA TECLA ==========
+                    voices.release_all()  # Notas sostenidas no pasan al nuevo modo
+                    if recorder is not None:  # Cada partida en su propio .mid
+                        recorder.split(AppConfig.get_recording_path('game'))
                     game_mode = True
                     rhythm_game.start_game(TUTORIAL_FACIL)
                     print("¡Juego de ritmo iniciado! Presiona 'f' para volver al modo libre")
                     ui_helper.reset_instructions()  # Mostrar instrucciones del juego
                 elif key == ord('f'):  # ========== NUEVA TECLA ==========
+                    voices.release_all()  # Notas sostenidas no pasan al nuevo modo
                     # Detener juego si está activo
                     if game_mode and rhythm_game.is_playing:
                         rhythm_game.stop_game()
+                    if game_mode and recorder is not None:  # Vuelta a modo libre: nuevo .mid
+                        recorder.split(AppConfig.get_recording_path('free'))
                     game_mode = False
                     theory_mode = False
                     print("Modo libre activado")
                     ui_helper.reset_instructions()  # Mostrar instrucciones del modo libre
                 elif key == ord('l'):  # ========== MODO TEORÍA ==========
+                    voices.release_all()  # Notas sostenidas no pasan al nuevo modo
                     theory_mode = True
                     game_mode = False
                     if rhythm_game.is_playing:
@@ -1753,11 +1859,12 @@ def main():
                 elif key == 27 and in_lesson:  # ESC dentro de lección
                     if current_lesson:
                         current_lesson.stop()
+                        audio.cancel_scheduled()
                     in_lesson = False
                     current_lesson = None
                     print("Volviendo al menú de lecciones...")
                 elif in_lesson and current_lesson:  # Pasar teclas a la lección activa
-                    current_lesson.handle_key(key, fs, octave_base)
+                    current_lesson.handle_key(key, audio, octave_base)
                 elif key != 255:
                     print('KEY PRESS:', [chr(key)])
 
@@ -1771,7 +1878,27 @@ def main():
         # close all
         # ------------------------------
 
-        # Fluidsynth
+        # Audio + Fluidsynth
+        try:
+            if recorder is not None:
+                recorder.stop()
+        except Exception:
+            print(traceback.format_exc())
+        try:
+            if voices is not None:
+                voices.release_all()
+        except Exception:
+            pass
+        try:
+            audio.stop()
+        except Exception:
+            pass
+        try:
+            if probe is not None and probe.enabled:
+                probe.add_external('synth', audio.note_lags)
+                print(probe.report())
+        except Exception:
+            print(traceback.format_exc())
         try:
             fs.delete()
         except Exception:
@@ -33,6 +33,9 @@ class VirtualKeyboard():
         7: 13,  8: 15,  9: None, 10: 18, 11: 20, 12: 22, 13: None
     }
 
+    # Valor del raster de teclas para píxeles fuera del teclado
+    NO_KEY = 255
+
     __keyboard_piano_map = {
         # Primera octava (C4=60 a B4=71)
         0: 60,   1: 61,   2: 62,   3: 63,   4: 64,   5: 65,   6: 66,   7: 67,
@@ -87,6 +90,19 @@ class VirtualKeyboard():
         self.rectangle = []
         self.upper_zone_divisions = []
 
+        # Raster de ids de tecla (uint8, tamaño del canvas): la geometría se
+        # compila una sola vez y find_key/intersect pasan a ser lecturas O(1)
+        self.key_raster = None
+        self.sprite = None
+        self.sprite_roi = None
+
+        # Calibración en perspectiva (opcional): homografía del layout
+        # rectangular (kb_x0..kb_x1 x kb_y0..kb_y1) a las 4 esquinas en cámara
+        self.corners = None
+        self.homography = None
+
+        self.build_key_raster()
+
     def new_key(self, key_id, top_left, bottom_rigth):
         self.key_id = key_id
         self.rectangle = [top_left, bottom_rigth]
@@ -94,24 +110,273 @@ class VirtualKeyboard():
 
     # def add_key_key_upper_zone(self):
 
-    def draw_virtual_keyboard(self, img):
-        # Prepara shapes
-        # Initialize blank mask image of same dimensions for drawing the shapes
-        shapes = np.zeros_like(img, np.uint8)
-        cv2.rectangle(
-            img=shapes,
-            pt1=(self.kb_x0, self.kb_y0),
-            pt2=(self.kb_x1, self.kb_y1),
-            color=(255, 255, 255),
-            thickness=cv2.FILLED)
-
-        # Generate output by blending image with shapes image, using the shapes
-        # images also as mask to limit the blending to those parts
+    def black_key_rect(self, p):
+        """Rectángulo ((x0, y0), (x1, y1)) de la tecla negra a la derecha de la blanca p"""
+        x_line_pos = self.kb_x0 + self.white_key_width * (p+1)
+
+        # Teclas negras a la izquierda: Do#, Fa#, Sol#
+        if p in (0, 3, 4):
+            b_bk_x0 = int(round_half_up(
+                x_line_pos - self.black_key_width*(2/3)))
+            b_bk_x1 = int(round_half_up(
+                x_line_pos + self.black_key_width*(1/3)))
+        # Teclas negras a la derecha: Re#, La#
+        elif p in (1, 5):
+            b_bk_x0 = int(round_half_up(
+                x_line_pos - self.black_key_width*(1/3)))
+            b_bk_x1 = int(round_half_up(
+                x_line_pos + self.black_key_width*(2/3)))
+        else:
+            b_bk_x0 = int(round_half_up(
+                x_line_pos - self.black_key_width/2))
+            b_bk_x1 = int(round_half_up(
+                x_line_pos + self.black_key_width/2))
+
+        return (b_bk_x0, self.kb_y0), \
+            (b_bk_x1, int(round_half_up(self.kb_y0 + self.black_key_heigth)))
+
+    def set_perspective(self, corners):
+        """
+        Ajusta el teclado a 4 esquinas en la imagen de cámara.
+
+        Args:
+            corners: [(x, y) sup-izq, sup-der, inf-der, inf-izq] en píxeles
+        """
+        corners = np.asarray(corners, dtype=np.float32).reshape(4, 2)
+        layout = np.float32([
+            [self.kb_x0, self.kb_y0], [self.kb_x1, self.kb_y0],
+            [self.kb_x1, self.kb_y1], [self.kb_x0, self.kb_y1]])
+
+        self.corners = corners
+        self.homography = cv2.getPerspectiveTransform(layout, corners)
+        self.build_key_raster()
+
+    def clear_perspective(self):
+        """Vuelve al teclado rectangular definido por StereoConfig"""
+        self.corners = None
+        self.homography = None
+        self.build_key_raster()
+
+    def bottom_edge(self, xs):
+        """
+        Borde inferior del teclado (y en píxeles) en cada x.
+
+        Rectangular: kb_y1. En perspectiva: recta entre las esquinas inf-izq
+        e inf-der (extendida fuera de ellas).
+
+        Args:
+            xs: coordenadas x en píxeles (escalar o array)
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        if self.corners is None:
+            return np.full(xs.shape, float(self.kb_y1))
+        (x_right, y_right), (x_left, y_left) = self.corners[2], self.corners[3]
+        if x_right == x_left:
+            return np.full(xs.shape, float(max(y_left, y_right)))
+        slope = (float(y_right) - float(y_left)) / (float(x_right) - float(x_left))
+        return float(y_left) + slope * (xs - float(x_left))
+
+    def _warp_layout(self, img, interpolation, border_value):
+        # Lleva una imagen del layout rectangular al espacio de cámara
+        return cv2.warpPerspective(
+            img, self.homography, (self.canvas_w, self.canvas_h),
+            flags=interpolation, borderMode=cv2.BORDER_CONSTANT,
+            borderValue=border_value)
+
+    def build_key_raster(self):
+        """
+        Compila la geometría del teclado en un raster uint8 (canvas_h x canvas_w)
+        con el id de tecla de cada píxel (NO_KEY fuera del teclado).
+
+        Reproduce exactamente intersect (bordes exclusivos) y find_key
+        (zona superior de teclas negras, resto teclas blancas). Volver a
+        llamarlo si cambian kb_x0/kb_y0/kb_x1/kb_y1. Con set_perspective
+        el raster queda en espacio de cámara.
+        """
+        # Divisiones de la zona superior (teclas negras), fijas para esta geometría
+        self.upper_zone_divisions = [
+            (p, list(self.black_key_rect(p)))
+            for p in range(self.kb_white_n_keys)
+            if p not in self.keys_without_black]
+
+        xs = np.arange(self.canvas_w)
+        ys = np.arange(self.canvas_h)
+
+        # Tecla blanca de cada columna
+        white_lut = np.full(self.kb_white_n_keys, self.NO_KEY, dtype=np.uint8)
+        for p in range(self.kb_white_n_keys):
+            if p in self.__white_map:
+                white_lut[p] = self.__white_map[p]
+        white_idx = np.floor((xs - self.kb_x0) / self.white_key_width).astype(int)
+        white_cols = white_lut[np.clip(white_idx, 0, self.kb_white_n_keys - 1)]
+
+        # Tecla negra de cada columna (NO_KEY si no hay)
+        black_cols = np.full(self.canvas_w, self.NO_KEY, dtype=np.uint8)
+        for p, ((b_bk_x0, _), (b_bk_x1, _)) in self.upper_zone_divisions:
+            if self.__black_map.get(p) is not None:
+                black_cols[(xs > b_bk_x0) & (xs < b_bk_x1)] = self.__black_map[p]
+
+        upper_rows = (ys - self.kb_y0) < self.black_key_heigth
+        raster = np.where(upper_rows[:, None] & (black_cols != self.NO_KEY)[None, :],
+                          black_cols[None, :], white_cols[None, :]).astype(np.uint8)
+
+        # Fuera del teclado (bordes exclusivos, igual que intersect)
+        inside_x = (xs > self.kb_x0) & (xs < self.kb_x1)
+        inside_y = (ys > self.kb_y0) & (ys < self.kb_y1)
+        raster[~(inside_y[:, None] & inside_x[None, :])] = self.NO_KEY
+
+        # En perspectiva, el raster se precalcula ya deformado (espacio de cámara)
+        if self.homography is not None:
+            raster = self._warp_layout(raster, cv2.INTER_NEAREST, int(self.NO_KEY))
+
+        self.key_raster = raster
+
+        # El sprite depende de la geometría: se regenera en el próximo dibujo
+        self.sprite = None
+        return raster
+
+    def lookup_keys(self, xs, ys):
+        """
+        Id de tecla para todas las puntas a la vez.
+
+        Args:
+            xs, ys: coordenadas en píxeles (listas o arrays)
+
+        Returns:
+            np.ndarray int: id de tecla por punta, -1 fuera del teclado
+        """
+        xs = np.floor(np.asarray(xs, dtype=np.float64)).astype(int)
+        ys = np.floor(np.asarray(ys, dtype=np.float64)).astype(int)
+
+        keys = np.full(xs.shape, -1, dtype=int)
+        in_canvas = (xs >= 0) & (xs < self.canvas_w) & (ys >= 0) & (ys < self.canvas_h)
+        keys[in_canvas] = self.key_raster[ys[in_canvas], xs[in_canvas]]
+        keys[keys == self.NO_KEY] = -1
+        return keys
+
+    def build_sprite(self):
+        """
+        Pre-renderiza el teclado en un sprite BGRA para la geometría actual.
+
+        El sprite cubre solo el rectángulo del teclado (más el borde), o el
+        cuadrilátero deformado si hay calibración en perspectiva. El canal
+        alfa es la cobertura de las formas (líneas, teclas negras, círculos y
+        texto, incluido su antialiasing); el fondo blanco semitransparente se
+        mezcla aparte con KEYBOARD_ALPHA.
+        """
+        # Dibujar las formas sobre fondo negro y sobre fondo blanco:
+        # negro = color*a, blanco = color*a + 255*(1-a)  =>  cobertura a
+        on_black = np.zeros((self.canvas_h, self.canvas_w, 3), np.uint8)
+        on_white = np.full((self.canvas_h, self.canvas_w, 3), 255, np.uint8)
+        self._draw_keyboard_shapes(on_black)
+        self._draw_keyboard_shapes(on_white)
+
+        # Fondo blanco semitransparente (cv2.FILLED incluye ambos extremos)
+        base = np.zeros((self.canvas_h, self.canvas_w), np.uint8)
+        base[self.kb_y0:self.kb_y1 + 1, self.kb_x0:self.kb_x1 + 1] = 1
+
+        if self.homography is not None:
+            on_black = self._warp_layout(on_black, cv2.INTER_LINEAR, (0, 0, 0))
+            on_white = self._warp_layout(on_white, cv2.INTER_LINEAR, (255, 255, 255))
+            base = self._warp_layout(base, cv2.INTER_NEAREST, 0)
+
+        # ROI: caja envolvente de todo lo dibujado
+        # (sin dibujar: negro=0 y blanco=255, es decir cobertura 0)
+        drawn = (base > 0) | ((on_white.astype(np.int16) - on_black) < 255).any(axis=2)
+        rows = np.flatnonzero(drawn.any(axis=1))
+        cols = np.flatnonzero(drawn.any(axis=0))
+        y0, y1 = rows[0], rows[-1] + 1
+        x0, x1 = cols[0], cols[-1] + 1
+        self.sprite_roi = (y0, y1, x0, x1)
+
+        on_black = on_black[y0:y1, x0:x1].astype(np.float32)
+        on_white = on_white[y0:y1, x0:x1].astype(np.float32)
+        base = base[y0:y1, x0:x1]
+
+        coverage = 1 - (on_white - on_black).mean(axis=2) / 255
+        opaque = coverage >= 1
+        partial = (coverage > 0) & ~opaque
+
+        self.sprite = np.zeros((y1 - y0, x1 - x0, 4), np.uint8)
+        self.sprite[opaque, :3] = on_black[opaque]
+        self.sprite[partial, :3] = np.clip(
+            on_black[partial] / coverage[partial, None] + 0.5, 0, 255)
+        self.sprite[..., 3] = np.clip(coverage * 255 + 0.5, 0, 255)
+
+        # Datos precalculados para el blending por frame:
+        # - fondo: máscara del teclado (rectángulo o cuadrilátero)
+        # - opacos: copia directa con máscara
+        # - antialiasing: pocos píxeles, mezcla explícita
+        self._sprite_base = base
+        self._sprite_white = np.full((y1 - y0, x1 - x0, 3), 255, np.uint8)
+        self._sprite_bgr = np.ascontiguousarray(self.sprite[..., :3])
+        self._sprite_opaque = opaque.astype(np.uint8)
+        self._sprite_partial = np.nonzero(partial)
+        self._sprite_partial_bgr = on_black[partial]
+        self._sprite_partial_alpha = (1 - coverage[partial])[:, None]
+        self._highlight_cache = {}
+        return self.sprite
+
+    def draw_virtual_keyboard(self, img, pressed_keys=None):
+        """
+        Dibuja el teclado sobre img mezclando el sprite cacheado solo dentro
+        del rectángulo del teclado.
+
+        Args:
+            img: frame BGR (canvas_w x canvas_h)
+            pressed_keys: ids de tecla a resaltar (opcional)
+        """
+        if self.sprite is None:
+            self.build_sprite()
+
+        y0, y1, x0, x1 = self.sprite_roi
+        roi = img[y0:y1, x0:x1]
+
+        # Fondo blanco semitransparente, solo dentro del teclado
         # Usar alpha desde configuración centralizada
         alpha = StereoConfig.KEYBOARD_ALPHA
-        mask = shapes.astype(bool)
-        img[mask] = cv2.addWeighted(img, alpha, shapes, 1 - alpha, 0)[mask]
-
+        blended = cv2.addWeighted(roi, alpha, self._sprite_white, 1 - alpha, 0)
+        cv2.copyTo(blended, self._sprite_base, roi)
+
+        # Formas del sprite: opacas por máscara, bordes antialiasing mezclados
+        ys, xs = self._sprite_partial
+        partial = roi[ys, xs] * self._sprite_partial_alpha + self._sprite_partial_bgr
+        cv2.copyTo(self._sprite_bgr, self._sprite_opaque, roi)
+        roi[ys, xs] = (partial + 0.5).astype(np.uint8)
+
+        if pressed_keys is not None:
+            for key in pressed_keys:
+                self.draw_key_highlight(roi, int(key))
+
+    def draw_key_highlight(self, roi, key):
+        """Tiñe solo los píxeles de una tecla (delta sobre el sprite ya mezclado)"""
+        if key not in self._highlight_cache:
+            y0, y1, x0, x1 = self.sprite_roi
+            key_mask = self.key_raster[y0:y1, x0:x1] == key
+            rows = np.flatnonzero(key_mask.any(axis=1))
+            cols = np.flatnonzero(key_mask.any(axis=0))
+            if len(rows) == 0:
+                self._highlight_cache[key] = None
+            else:
+                ky0, ky1 = rows[0], rows[-1] + 1
+                kx0, kx1 = cols[0], cols[-1] + 1
+                color = np.empty((ky1 - ky0, kx1 - kx0, 3), np.uint8)
+                color[:] = StereoConfig.KEYBOARD_HIGHLIGHT_COLOR
+                self._highlight_cache[key] = (
+                    (ky0, ky1, kx0, kx1),
+                    key_mask[ky0:ky1, kx0:kx1].astype(np.uint8), color)
+
+        cached = self._highlight_cache[key]
+        if cached is None:
+            return
+
+        (ky0, ky1, kx0, kx1), key_mask, color = cached
+        sub = roi[ky0:ky1, kx0:kx1]
+        alpha = StereoConfig.KEYBOARD_HIGHLIGHT_ALPHA
+        cv2.copyTo(cv2.addWeighted(sub, 1 - alpha, color, alpha, 0), key_mask, sub)
+
+    def _draw_keyboard_shapes(self, img):
+        # Formas opacas del teclado (teclas negras, divisiones, marcas y borde)
         for p in range(self.kb_white_n_keys):
             x_line_pos = self.kb_x0 + self.white_key_width * (p+1)
 
@@ -120,41 +385,14 @@ class VirtualKeyboard():
             # Las teclas negras están entre: 0-1 (Do#), 1-2 (Re#), 3-4 (Fa#), 4-5 (Sol#), 5-6 (La#)
             # No hay tecla negra entre E-F (posición 2-3) ni B-C (posición 6-7)
             if p not in self.keys_without_black:
-                # Teclas negras a la izquierda: Do#, Fa#, Sol#
-                if p in (0, 3, 4):
-                    b_bk_x0 = int(round_half_up(
-                        x_line_pos - self.black_key_width*(2/3)))
-                    b_bk_x1 = int(round_half_up(
-                        x_line_pos + self.black_key_width*(1/3)))
-                # Teclas negras a la derecha: Re#, La#
-                elif p in (1, 5):
-                    b_bk_x0 = int(round_half_up(
-                        x_line_pos - self.black_key_width*(1/3)))
-                    b_bk_x1 = int(round_half_up(
-                        x_line_pos + self.black_key_width*(2/3)))
-                else:
-                    b_bk_x0 = int(round_half_up(
-                        x_line_pos - self.black_key_width/2))
-                    b_bk_x1 = int(round_half_up(
-                        x_line_pos + self.black_key_width/2))
-
+                top_left, bottom_rigth = self.black_key_rect(p)
                 cv2.rectangle(
                     img=img,
-                    pt1=(b_bk_x0, self.kb_y0),
-                    pt2=(b_bk_x1, int(
-                        round_half_up(self.kb_y0 + self.black_key_heigth))),
+                    pt1=top_left,
+                    pt2=bottom_rigth,
                     color=(0, 0, 0),
                     thickness=cv2.FILLED)
 
-                key_coord = \
-                    self.new_key(p,
-                                 (b_bk_x0, self.kb_y0),
-                                 (b_bk_x1,
-                                  int(
-                                      round_half_up(self.kb_y0 +
-                                                    self.black_key_heigth))))
-                self.upper_zone_divisions.append(key_coord)
-
             cv2.line(img=img,
                      pt1=(int(round_half_up(x_line_pos)), self.kb_y0),
                      pt2=(int(round_half_up(x_line_pos)), self.kb_y1),
@@ -186,11 +424,10 @@ class VirtualKeyboard():
         cv2.rectangle(img, (self.kb_x0, self.kb_y0),
                       (self.kb_x1, self.kb_y1), (255, 0, 0), 2)
 
-
     def intersect(self, pointXY):
-        if pointXY[0] > self.kb_x0 and pointXY[0] < self.kb_x1 and \
-                pointXY[1] > self.kb_y0 and pointXY[1] < self.kb_y1:
-            return True
+        x, y = int(math.floor(pointXY[0])), int(math.floor(pointXY[1]))
+        if 0 <= x < self.canvas_w and 0 <= y < self.canvas_h:
+            return bool(self.key_raster[y, x] != self.NO_KEY)
         return False
 
     # def find_key(self, x_pos):
@@ -222,25 +459,18 @@ class VirtualKeyboard():
         # print('find_key:x_pos {}'.format(x_pos))
         # print('find_key:y_pos {}'.format(y_pos))
 
-        x = x_pos - self.kb_x0
-        y = y_pos - self.kb_y0
-
-        if y < self.black_key_heigth:
-            key = x/self.white_key_width*2
-            key = math.floor(key)
-
-            key = self.find_key_in_upper_zone(x_pos, y_pos)
-            # print('find_key:upper zone key {}'.format(key))
-            if key == -1:
-                key = x/self.white_key_width
-                key = math.floor(key)
-                return self.__white_map[int(key)]
-            else:
-                return self.__black_map[int(key)]
-        else:
-            key = x/self.white_key_width
-            key = math.floor(key)
-            return self.__white_map[int(key)]
+        # Lectura directa del raster (-1 fuera del teclado)
+        x, y = int(math.floor(x_pos)), int(math.floor(y_pos))
+        if 0 <= x < self.canvas_w and 0 <= y < self.canvas_h:
+            key = int(self.key_raster[y, x])
+            if key != self.NO_KEY:
+                return key
+        return -1
 
     def note_from_key(self, key):
         return self.__keyboard_piano_map[key]
+
+    @classmethod
+    def piano_notes(cls):
+        """Notas MIDI de todas las teclas, en orden de tecla."""
+        return [cls.__keyboard_piano_map[key] for key in sorted(cls.__keyboard_piano_map)]
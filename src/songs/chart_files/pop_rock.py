@@ -35,29 +35,27 @@ class PopRockSong(BaseSong):
         current_time = time.time() - self.start_time
 
         # 3. Lógica de notas cayendo
-        for note in self.chart:
-            time_diff = note["time"] - current_time
+        # Solo los acordes en rango visible (entre 3s antes y 0.2s después)
+        for note_time, txt in self.visible_chords(current_time, ahead=3.0, behind=0.2):
+            time_diff = note_time - current_time
             
-            # Si la nota está en rango visible (entre 3s antes y 0.2s después)
-            if -0.2 < time_diff < 3.0:
-                # Matemáticas de caída: 
-                # Si time_diff es 3.0 (lejos), y_pos es pequeña (arriba).
-                # Si time_diff es 0 (ahora), y_pos es target_y.
-                pixels_per_second = 150 * self.scroll_speed
-                y_pos = int(target_y - (time_diff * pixels_per_second))
-
-                if 0 < y_pos < h:
-                    # Dibujar nota
-                    cv2.circle(frame_left, (w//2, y_pos), 25, (50, 100, 255), -1)
-                    cv2.circle(frame_left, (w//2, y_pos), 25, (255, 255, 255), 2)
-                    
-                    # Texto de la tecla dentro de la nota
-                    txt = "+".join(note["keys"])
-                    cv2.putText(frame_left, txt, (w//2 - 10, y_pos + 5), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            # Matemáticas de caída: 
+            # Si time_diff es 3.0 (lejos), y_pos es pequeña (arriba).
+            # Si time_diff es 0 (ahora), y_pos es target_y.
+            pixels_per_second = 150 * self.scroll_speed
+            y_pos = int(target_y - (time_diff * pixels_per_second))
+
+            if 0 < y_pos < h:
+                # Dibujar nota
+                cv2.circle(frame_left, (w//2, y_pos), 25, (50, 100, 255), -1)
+                cv2.circle(frame_left, (w//2, y_pos), 25, (255, 255, 255), 2)
+                
+                # Texto de la tecla dentro de la nota
+                cv2.putText(frame_left, txt, (w//2 - 10, y_pos + 5), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
         # 4. Chequear fin de canción
-        if current_time > self.chart[-1]["time"] + 2:
+        if current_time > self.end_time + 2:
             self.running = False
 
         return frame_left, frame_right, self.running
\ No newline at end of file
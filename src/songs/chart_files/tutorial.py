@@ -27,24 +27,22 @@ class TutorialSong(BaseSong):
         current_time = time.time() - self.start_time
         
         # 3. Dibujar notas cayendo (Lógica visual simple)
-        for note in self.chart:
-            diff = note["time"] - current_time
+        # Solo las notas cercanas (entre 3 seg antes y 0.5 seg después)
+        for note_time, label in self.visible_chords(current_time, ahead=3.0, behind=0.5):
+            diff = note_time - current_time
             
-            # Si la nota está cerca (entre 3 seg antes y 0.5 seg después)
-            if -0.5 < diff < 3.0:
-                # Calculamos posición Y (mientras más cerca a 0, más cerca a target_y)
-                y_pos = int(target_y - (diff * 150)) 
-                
-                if 0 < y_pos < h:
-                    # Dibujamos un círculo representando la nota
-                    cv2.circle(frame_left, (w//2, y_pos), 25, (0, 255, 0), -1)
-                    # Ponemos qué tecla es
-                    label = "+".join(note["keys"])
-                    cv2.putText(frame_left, label, (w//2 - 10, y_pos+5), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
+            # Calculamos posición Y (mientras más cerca a 0, más cerca a target_y)
+            y_pos = int(target_y - (diff * 150)) 
+            
+            if 0 < y_pos < h:
+                # Dibujamos un círculo representando la nota
+                cv2.circle(frame_left, (w//2, y_pos), 25, (0, 255, 0), -1)
+                # Ponemos qué tecla es
+                cv2.putText(frame_left, label, (w//2 - 10, y_pos+5), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
 
         # 4. Verificar condición de salida (si pasó el tiempo de la última nota)
-        last_note_time = self.chart[-1]["time"]
+        last_note_time = self.end_time
         if current_time > last_note_time + 3:
             print("Canción terminada")
             self.running = False
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import cv2
 import time
+from src.gameplay.chart_compiler import chord_window, key_name, load_compiled_chart
 
 class BaseSong(ABC):
     """
@@ -22,20 +23,41 @@ class BaseSong(ABC):
         self.running = False
         self.start_time = 0
         self.score = 0
-        self.active_chart = [] # Copia del chart para jugar
+        self.active_chart = None # Chart compilado para jugar (ver compile())
+
+    def compile(self):
+        """Chart compilado (time, key, duration, group) con cache en disco"""
+        if self.active_chart is None:
+            self.active_chart = load_compiled_chart(self.chart)
+        return self.active_chart
 
     def start(self):
         """Reinicia el reloj y prepara las notas"""
         self.running = True
         self.start_time = time.time()
         self.score = 0
-        self.active_chart = self.chart.copy()
+        self.compile()
         print(f"🎵 Iniciando: {self.name} ({self.bpm} BPM)")
 
     def stop(self):
         self.running = False
         print(f"⏹ Deteniendo: {self.name}")
 
+    @property
+    def end_time(self):
+        """Instante de la última nota (s)"""
+        chart = self.compile()
+        return float(chart['time'][-1]) if len(chart) else 0.0
+
+    def visible_chords(self, current_time, ahead, behind):
+        """
+        Acordes entre `behind` s atrás y `ahead` s adelante del instante actual
+        (búsqueda binaria en el chart compilado, sin recorrer todas las notas).
+        Devuelve [(tiempo, "A+C+E"), ...]
+        """
+        return [(time_s, "+".join(key_name(key) for key in keys))
+                for time_s, keys in chord_window(self.compile(), current_time - behind, current_time + ahead)]
+
     def get_info(self):
         return {
             'name': self.name,
@@ -4,11 +4,19 @@ import inspect
 from src.songs.song_base import BaseSong
 import src.songs.chart_files as chart_package # Importamos la carpeta de canciones
 
-def get_all_songs():
+# Catálogo ya escaneado y compilado (el menú lo pide en cada frame)
+_catalog = None
+
+def get_all_songs(reload=False):
     """
     Escanea la carpeta 'chart_files' y devuelve un diccionario:
     { "Nombre Cancion": InstanciaDeLaCancion }
+    El escaneo y la compilación de los charts se hacen una sola vez
+    (reload=True vuelve a escanear)
     """
+    global _catalog
+    if _catalog is not None and not reload:
+        return _catalog
     songs = {}
     
     # Rutas para buscar módulos
@@ -27,10 +35,12 @@ def get_all_songs():
                     issubclass(obj, BaseSong) and 
                     obj is not BaseSong):
                     
-                    # Instanciamos la canción
+                    # Instanciamos la canción y compilamos su chart (cache en disco)
                     song_instance = obj()
+                    song_instance.compile()
                     songs[song_instance.name] = song_instance
         except Exception as e:
             print(f"❌ Error cargando {name}: {e}")
-            
+    
+    _catalog = songs
     return songs
\ No newline at end of file
@@ -8,5 +8,7 @@ Sistema de lecciones interactivas para aprender teoría musical
 from .lesson_base import BaseLesson
 from .lesson_manager import LessonManager, get_lesson_manager
 from .theory_ui import TheoryUI
+from .chord_recognizer import ChordInfo, ChordRecognizer, identify_chord
 
-__all__ = ['BaseLesson', 'LessonManager', 'get_lesson_manager', 'TheoryUI']
+__all__ = ['BaseLesson', 'LessonManager', 'get_lesson_manager', 'TheoryUI',
+           'ChordInfo', 'ChordRecognizer', 'identify_chord']
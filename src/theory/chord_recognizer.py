@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconocimiento de acordes por máscara de clases de altura
+Convierte las notas activas en una máscara de 12 bits (Do=bit 0 ... Si=bit 11)
+y resuelve nombre, tónica e inversión con una tabla precalculada de
+tríadas, séptimas y acordes sus (una indexación por frame)
+"""
+
+from typing import Iterable, List, NamedTuple, Optional
+
+
+NOTE_NAMES = ["Do", "Do#", "Re", "Re#", "Mi", "Fa", "Fa#", "Sol", "Sol#", "La", "La#", "Si"]
+
+# (id, nombre, sufijo del cifrado, intervalos en semitonos desde la tónica)
+# El orden decide los empates cuando el bajo no es tónica de ningún candidato
+CHORD_QUALITIES = [
+    ('mayor', 'Mayor', '', (0, 4, 7)),
+    ('menor', 'Menor', 'm', (0, 3, 7)),
+    ('dim', 'Disminuido', 'dim', (0, 3, 6)),
+    ('aum', 'Aumentado', 'aug', (0, 4, 8)),
+    ('sus4', 'Sus4', 'sus4', (0, 5, 7)),
+    ('sus2', 'Sus2', 'sus2', (0, 2, 7)),
+    ('7', 'Septima', '7', (0, 4, 7, 10)),
+    ('maj7', 'Septima mayor', 'maj7', (0, 4, 7, 11)),
+    ('m7', 'Menor septima', 'm7', (0, 3, 7, 10)),
+    ('mmaj7', 'Menor septima mayor', 'm(maj7)', (0, 3, 7, 11)),
+    ('m7b5', 'Semidisminuido', 'm7b5', (0, 3, 6, 10)),
+    ('dim7', 'Disminuido septima', 'dim7', (0, 3, 6, 9)),
+    ('aum7', 'Aumentado septima', 'aug7', (0, 4, 8, 10)),
+    ('7sus4', 'Septima sus4', '7sus4', (0, 5, 7, 10)),
+]
+
+_QUALITY_INDEX = {quality[0]: i for i, quality in enumerate(CHORD_QUALITIES)}
+
+
+class ChordInfo(NamedTuple):
+    """Acorde reconocido."""
+    name: str        # "Do Mayor"
+    symbol: str      # Cifrado: "Dom7", "Do/Mi" (inversión: bajo tras la barra)
+    root: int        # Clase de altura de la tónica (0-11)
+    quality: str     # id de CHORD_QUALITIES
+    inversion: int   # 0 = fundamental, 1 = primera, 2 = segunda, 3 = tercera
+    bass: int        # Clase de altura del bajo (0-11)
+    mask: int        # Máscara de 12 bits
+
+
+def pitch_class_mask(notes: Iterable[int]) -> int:
+    """Máscara de 12 bits con las clases de altura de las notas MIDI."""
+    mask = 0
+    for note in notes:
+        mask |= 1 << (note % 12)
+    return mask
+
+
+def chord_notes(root: int, quality: str) -> List[int]:
+    """
+    Notas del acorde en estado fundamental (semitonos desde Do).
+
+    Args:
+        root: Tónica (0-11, o una nota MIDI)
+        quality: id de CHORD_QUALITIES ('mayor', 'm7', ...)
+    """
+    return [root + interval for interval in CHORD_QUALITIES[_QUALITY_INDEX[quality]][3]]
+
+
+def chord_name(root: int, quality: str) -> str:
+    """Nombre del acorde ("Do Mayor", "La Menor septima")."""
+    return f"{NOTE_NAMES[root % 12]} {CHORD_QUALITIES[_QUALITY_INDEX[quality]][1]}"
+
+
+def _build_table() -> List[Optional[ChordInfo]]:
+    """Tabla [mask * 12 + bajo] -> ChordInfo (None = no es un acorde conocido)."""
+    candidates = {}
+    for quality_id, _, _, intervals in CHORD_QUALITIES:
+        for root in range(12):
+            mask = pitch_class_mask(root + interval for interval in intervals)
+            candidates.setdefault(mask, []).append((root, quality_id, intervals))
+
+    table = [None] * (4096 * 12)
+    for mask, options in candidates.items():
+        for bass in range(12):
+            if not mask >> bass & 1:
+                continue
+            # Acordes simétricos (aum, dim7) y sus2/sus4: se prefiere la tónica en el bajo
+            root, quality_id, intervals = next((o for o in options if o[0] == bass), options[0])
+            suffix = CHORD_QUALITIES[_QUALITY_INDEX[quality_id]][2]
+            inversion = intervals.index((bass - root) % 12)
+            symbol = NOTE_NAMES[root] + suffix
+            if inversion:
+                symbol += '/' + NOTE_NAMES[bass]
+            table[mask * 12 + bass] = ChordInfo(
+                name=chord_name(root, quality_id), symbol=symbol, root=root,
+                quality=quality_id, inversion=inversion, bass=bass, mask=mask)
+    return table
+
+
+CHORD_TABLE = _build_table()
+
+
+def identify_chord(notes: Iterable[int]) -> Optional[ChordInfo]:
+    """
+    Identifica el acorde de un conjunto de notas MIDI (duplicados y octavas se ignoran).
+
+    Returns:
+        ChordInfo, o None si las notas no forman un acorde de la tabla
+    """
+    notes = list(notes)
+    if len(notes) < 3:
+        return None
+    return CHORD_TABLE[pitch_class_mask(notes) * 12 + min(notes) % 12]
+
+
+class ChordRecognizer:
+    """
+    Acorde actual a partir de las teclas presionadas (se llama cada frame).
+    """
+
+    def __init__(self):
+        self.current = None       # ChordInfo o None
+        self.stats = {'chords_detected': 0}
+
+    def update(self, keys: Iterable[int], note_from_key) -> Optional[ChordInfo]:
+        """
+        Actualiza el acorde actual.
+
+        Args:
+            keys: Teclas presionadas (key_state.pressed_keys())
+            note_from_key: Función tecla -> nota MIDI (VirtualKeyboard.note_from_key)
+
+        Returns:
+            ChordInfo del acorde actual o None
+        """
+        chord = identify_chord(note_from_key(key) for key in keys)
+        if chord is not None and chord != self.current:
+            self.stats['chords_detected'] += 1
+        self.current = chord
+        return chord
+
+    def reset(self):
+        self.current = None
+        self.stats['chords_detected'] = 0
@@ -25,6 +25,7 @@ class BaseLesson(ABC):
         self.description = "Sin descripción"
         self.difficulty = "Básico"
         self.running = False
+        self.detected_chord = None  # ChordInfo de lo que se toca (lo actualiza main cada frame)
     
     @abstractmethod
     def run(self, frame_left, frame_right, virtual_keyboard, synth, hand_detector_left=None, hand_detector_right=None):
@@ -37,7 +38,7 @@ class BaseLesson(ABC):
             frame_left: Frame de cámara izquierda
             frame_right: Frame de cámara derecha
             virtual_keyboard: Instancia de VirtualKeyboard
-            synth: Instancia de FluidSynth
+            synth: AudioEngine (noteon/noteoff/play_note/play_sequence)
             hand_detector_left: Detector de manos izquierdo (opcional)
             hand_detector_right: Detector de manos derecho (opcional)
         
@@ -8,6 +8,7 @@ Aprende a tocar y reconocer acordes mayores y menores
 import cv2
 import numpy as np
 from ..lesson_base import BaseLesson
+from ..chord_recognizer import chord_name, chord_notes, pitch_class_mask
 
 
 class ChordsLesson(BaseLesson):
@@ -19,17 +20,20 @@ class ChordsLesson(BaseLesson):
         self.description = "Aprende acordes mayores, menores y su construccion (triadas)"
         self.difficulty = "Intermedio"
         
-        # Acordes (nombre, notas en semitonos desde tónica, tipo)
+        # Acordes (nombre, notas en semitonos desde Do, info) desde la tabla de acordes
         self.chords = [
-            ("Do Mayor", [0, 4, 7], "Mayor: T + 3ªM + 5ªJ"),
-            ("Do Menor", [0, 3, 7], "Menor: T + 3ªm + 5ªJ"),
-            ("Re Mayor", [2, 6, 9], "Mayor"),
-            ("Re Menor", [2, 5, 9], "Menor"),
-            ("Mi Mayor", [4, 8, 11], "Mayor"),
-            ("Mi Menor", [4, 7, 11], "Menor"),
-            ("Fa Mayor", [5, 9, 12], "Mayor"),
-            ("Sol Mayor", [7, 11, 14], "Mayor"),
-            ("La Menor", [9, 12, 16], "Menor - Relativo de Do Mayor")
+            (chord_name(root, quality), chord_notes(root, quality), info)
+            for root, quality, info in [
+                (0, 'mayor', "Mayor: T + 3ªM + 5ªJ"),
+                (0, 'menor', "Menor: T + 3ªm + 5ªJ"),
+                (2, 'mayor', "Mayor"),
+                (2, 'menor', "Menor"),
+                (4, 'mayor', "Mayor"),
+                (4, 'menor', "Menor"),
+                (5, 'mayor', "Mayor"),
+                (7, 'mayor', "Mayor"),
+                (9, 'menor', "Menor - Relativo de Do Mayor")
+            ]
         ]
         self.current_chord = 0
         self.show_construction = False
@@ -40,13 +44,21 @@ class ChordsLesson(BaseLesson):
         # Header
         frame_left = self.draw_lesson_header(frame_left)
         
-        chord_name, chord_notes, chord_info = self.chords[self.current_chord]
+        name, notes, info = self.chords[self.current_chord]
+        
+        # Acorde que se está tocando (reconocido en cada frame)
+        if self.detected_chord is None:
+            playing = "Tocando: -"
+        elif self.detected_chord.mask == pitch_class_mask(notes):
+            playing = f"Tocando: {self.detected_chord.symbol} - Correcto!"
+        else:
+            playing = f"Tocando: {self.detected_chord.symbol}"
         
         instructions = [
-            f"Acorde: {chord_name}",
-            f"Info: {chord_info}",
-            f"Notas: {len(chord_notes)} notas simultaneas",
-            "",
+            f"Acorde: {name}",
+            f"Info: {info}",
+            f"Notas: {len(notes)} notas simultaneas",
+            playing,
             "Controles:",
             "ESPACIO: Tocar acorde (arpegiado)",
             "C: Tocar acorde completo (simultaneo)",
@@ -62,12 +74,12 @@ class ChordsLesson(BaseLesson):
                                            len(self.chords), y=380)
         
         # Visualización del acorde
-        self._visualize_chord(frame_left, chord_notes)
+        self._visualize_chord(frame_left, notes)
         
         # Frame derecho - construcción del acorde
         frame_right = self.draw_lesson_header(frame_right, "Acordes")
         if self.show_construction:
-            self._draw_chord_construction(frame_right, chord_name, chord_notes)
+            self._draw_chord_construction(frame_right, name, notes)
         else:
             cv2.putText(frame_right, "Presiona I para ver", (100, 200),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 1, cv2.LINE_AA)
@@ -76,7 +88,7 @@ class ChordsLesson(BaseLesson):
         
         return frame_left, frame_right, True
     
-    def _visualize_chord(self, frame, chord_notes):
+    def _visualize_chord(self, frame, notes):
         """Visualiza las notas del acorde"""
         note_names = ["Do", "Do#", "Re", "Re#", "Mi", "Fa", "Fa#", "Sol", "Sol#", "La", "La#", "Si"]
         
@@ -84,7 +96,7 @@ class ChordsLesson(BaseLesson):
         cv2.putText(frame, "Notas del acorde:", (20, y),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1, cv2.LINE_AA)
         
-        for i, semitone in enumerate(chord_notes):
+        for i, semitone in enumerate(notes):
             note_name = note_names[semitone % 12]
             x = 220 + i * 80
             
@@ -95,17 +107,17 @@ class ChordsLesson(BaseLesson):
             cv2.putText(frame, note_name, (x - 15, y),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA)
     
-    def _draw_chord_construction(self, frame, chord_name, chord_notes):
+    def _draw_chord_construction(self, frame, name, notes):
         """Dibuja cómo se construye el acorde"""
         h, w = frame.shape[:2]
         
-        cv2.putText(frame, f"Construccion de {chord_name}:", (50, 120),
+        cv2.putText(frame, f"Construccion de {name}:", (50, 120),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2, cv2.LINE_AA)
         
         # Mostrar intervalos
         intervals = []
-        for i in range(1, len(chord_notes)):
-            interval = chord_notes[i] - chord_notes[i-1]
+        for i in range(1, len(notes)):
+            interval = notes[i] - notes[i-1]
             intervals.append(interval)
         
         y = 170
@@ -132,32 +144,19 @@ class ChordsLesson(BaseLesson):
     
     def handle_key(self, key, synth, octave_base=60):
         """Maneja teclas de la lección"""
-        chord_name, chord_notes, chord_info = self.chords[self.current_chord]
+        name, notes, info = self.chords[self.current_chord]
         
         if key == ord(' '):  # Arpegiado
-            print(f"Arpeggiando: {chord_name}")
-            import time
-            for semitone in chord_notes:
-                note = octave_base + semitone
-                synth.noteon(0, note, 100)
-                time.sleep(0.3)
-                synth.noteoff(0, note)
-                time.sleep(0.05)
+            print(f"Arpeggiando: {name}")
+            synth.play_sequence([(i * 0.35, octave_base + semitone, 100, 0.3)
+                                 for i, semitone in enumerate(notes)])
             return True
         
         elif key == ord('c'):  # Acorde completo
-            print(f"Acorde completo: {chord_name}")
-            import time
+            print(f"Acorde completo: {name}")
             # Tocar todas las notas simultáneamente
-            for semitone in chord_notes:
-                note = octave_base + semitone
-                synth.noteon(0, note, 100)
-            
-            time.sleep(1.0)
-            
-            for semitone in chord_notes:
-                note = octave_base + semitone
-                synth.noteoff(0, note)
+            synth.play_sequence([(0.0, octave_base + semitone, 100, 1.0)
+                                 for semitone in notes])
             return True
         
         elif key == ord('i'):  # Toggle construcción
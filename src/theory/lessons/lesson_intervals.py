@@ -87,7 +87,7 @@ class IntervalsLesson(BaseLesson):
         
         Args:
             key: Código de tecla presionada
-            synth: Instancia de FluidSynth
+            synth: AudioEngine (noteon/noteoff/play_note/play_sequence)
             octave_base: Nota MIDI base
         
         Returns:
@@ -99,16 +99,9 @@ class IntervalsLesson(BaseLesson):
             base_note = octave_base
             target_note = base_note + semitones
             
-            # Tocar nota base
-            synth.noteon(0, base_note, 100)
-            import time
-            time.sleep(0.5)
-            synth.noteoff(0, base_note)
-            
-            # Tocar nota objetivo
-            synth.noteon(0, target_note, 100)
-            time.sleep(0.5)
-            synth.noteoff(0, target_note)
+            # Tocar nota base y luego nota objetivo
+            synth.play_sequence([(0.0, base_note, 100, 0.5),
+                                 (0.5, target_note, 100, 0.5)])
             
             self.play_count += 1
             print(f"Reproduciendo: {interval_name} ({example})")
@@ -253,9 +253,7 @@ class RhythmLesson(BaseLesson):
             print(f"Tocando {note_name} ({duration} beats = {note_duration_seconds:.2f}s a {bpm} BPM)")
             
             note = octave_base
-            synth.noteon(0, note, 100)
-            time.sleep(note_duration_seconds)
-            synth.noteoff(0, note)
+            synth.play_note(0, note, 100, note_duration_seconds)
             
             return True
         
@@ -303,13 +301,14 @@ class RhythmLesson(BaseLesson):
         beat_duration = 60.0 / bpm
         note = octave_base
         
+        # Programar el patrón completo (el audio lo toca sin detener la captura)
+        sequence = []
+        offset = 0.0
         for i, duration in enumerate(durations):
             note_duration_seconds = duration * beat_duration
-            
-            # Tocar nota
-            synth.noteon(0, note + (i % 3), 100)  # Variar ligeramente el tono
-            time.sleep(note_duration_seconds * 0.9)  # 90% para articulación
-            synth.noteoff(0, note + (i % 3))
-            time.sleep(note_duration_seconds * 0.1)  # 10% de silencio
+            # Variar ligeramente el tono; 90% sonando para articulación, 10% de silencio
+            sequence.append((offset, note + (i % 3), 100, note_duration_seconds * 0.9))
+            offset += note_duration_seconds
         
-        print("Patrón completado")
+        synth.play_sequence(sequence)
+        print(f"Patrón programado ({offset:.1f}s)")
@@ -99,10 +99,7 @@ class ScalesLesson(BaseLesson):
         
         if key == ord(' '):  # Tocar nota actual
             note = octave_base + scale_notes[self.current_note]
-            synth.noteon(0, note, 100)
-            import time
-            time.sleep(0.3)
-            synth.noteoff(0, note)
+            synth.play_note(0, note, 100, 0.3)
             print(f"Nota {self.current_note + 1}: MIDI {note}")
             return True
         
@@ -135,12 +132,7 @@ class ScalesLesson(BaseLesson):
         return False
     
     def _auto_play_scale(self, synth, octave_base, scale_notes):
-        """Reproduce toda la escala automáticamente"""
-        import time
+        """Reproduce toda la escala automáticamente (programada, no bloquea)"""
         print(f"Reproduciendo escala completa...")
-        for semitone in scale_notes:
-            note = octave_base + semitone
-            synth.noteon(0, note, 100)
-            time.sleep(0.4)
-            synth.noteoff(0, note)
-            time.sleep(0.1)
+        synth.play_sequence([(i * 0.5, octave_base + semitone, 100, 0.4)
+                             for i, semitone in enumerate(scale_notes)])
@@ -45,10 +45,10 @@ class ConfigUI:
                 'name': 'Velocidad Mínima',
                 'key': 'velocity_threshold',
                 'value': AppConfig.VELOCITY_THRESHOLD,
-                'min': 0.5,
-                'max': 4.0,
-                'step': 0.1,
-                'unit': 'cm/f',
+                'min': 15.0,
+                'max': 120.0,
+                'step': 3.0,
+                'unit': 'cm/s',
                 'desc': 'Velocidad descendente requerida'
             },
             {
@@ -127,6 +127,20 @@ class ConfigUI:
         AppConfig.VELOCITY_ENABLED = bool(self.params[2]['value'])
         AppConfig.VELOCITY_HISTORY_SIZE = int(self.params[3]['value'])
     
+    def get_detection_config(self):
+        """
+        Parámetros de detección actuales para KeyboardMapModular.schedule_config
+        
+        Returns:
+            dict: {depth_threshold, velocity_threshold, velocity_enabled, velocity_history_size}
+        """
+        return {
+            'depth_threshold': AppConfig.DEPTH_THRESHOLD,
+            'velocity_threshold': AppConfig.VELOCITY_THRESHOLD,
+            'velocity_enabled': AppConfig.VELOCITY_ENABLED,
+            'velocity_history_size': AppConfig.VELOCITY_HISTORY_SIZE
+        }
+    
     def draw_config_panel(self, frame):
         """
         Dibuja el panel de configuración sobre el frame
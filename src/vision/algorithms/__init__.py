@@ -5,5 +5,8 @@ Arquitectura modular y escalable
 
 from .base_algorithm import BaseAlgorithm
 from .algorithm_manager import AlgorithmManager
+from .detection_batch import DetectionBatch
+from .stage_profiler import StageProfiler
+from .finger_registry import FingerRegistry
 
-__all__ = ['BaseAlgorithm', 'AlgorithmManager']
+__all__ = ['BaseAlgorithm', 'AlgorithmManager', 'DetectionBatch', 'StageProfiler', 'FingerRegistry']
@@ -7,7 +7,11 @@ Previene activaciones múltiples rápidas de la misma tecla
 
 import time
 from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_KEYS, occurrence_rank
 
 
 class AntireboteAlgorithm(BaseAlgorithm):
@@ -24,9 +28,9 @@ class AntireboteAlgorithm(BaseAlgorithm):
         # Parámetros configurables
         self.debounce_time = 0.05  # 50ms
         
-        # Estado interno
-        self.last_press_time = {}  # {key_id: timestamp}
-        self.last_release_time = {}  # {key_id: timestamp}
+        # Estado interno (arrays fijos por tecla, -inf = nunca)
+        self.last_press_time = np.full(MAX_KEYS, -np.inf)
+        self.last_release_time = np.full(MAX_KEYS, -np.inf)
         
         # Estadísticas
         self.stats = {
@@ -49,29 +53,34 @@ class AntireboteAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Versión vectorizada: una máscara por tiempo desde la última presión.
+        
+        Solo la primera detección de cada tecla en el frame puede pasar:
+        una segunda en el mismo instante siempre cae dentro de debounce_time.
+        """
+        if not self.enabled or len(batch) == 0:
+            return batch
+        
         current_time = context.get('timestamp', time.time())
-        filtered = []
         
-        for detection in detections:
-            finger_id, key, depth, velocity, x, y = detection
-            
-            self.stats['total_checks'] += 1
-            
-            # Verificar si pasó suficiente tiempo desde última presión
-            if key in self.last_press_time:
-                time_since_press = current_time - self.last_press_time[key]
-                
-                if time_since_press < self.debounce_time:
-                    # Bloquear: muy rápido
-                    self.stats['blocked_presses'] += 1
-                    continue
-            
-            # Permitir detección
-            self.last_press_time[key] = current_time
-            filtered.append(detection)
-            self.stats['allowed_presses'] += 1
+        # Verificar si pasó suficiente tiempo desde última presión
+        allowed = (current_time - self.last_press_time[batch.key]) >= self.debounce_time
+        if self.debounce_time > 0:
+            allowed &= occurrence_rank(batch.key) == 0
+        
+        # Permitir detecciones
+        self.last_press_time[batch.key[allowed]] = current_time
+        
+        n_allowed = int(np.count_nonzero(allowed))
+        self.stats['total_checks'] += len(batch)
+        self.stats['blocked_presses'] += len(batch) - n_allowed
+        self.stats['allowed_presses'] += n_allowed
         
-        return filtered
+        return batch.select(allowed)
     
     def configure(self, **params):
         """
@@ -85,8 +94,8 @@ class AntireboteAlgorithm(BaseAlgorithm):
     
     def reset(self):
         """Limpia el historial de tiempos."""
-        self.last_press_time.clear()
-        self.last_release_time.clear()
+        self.last_press_time.fill(-np.inf)
+        self.last_release_time.fill(-np.inf)
         self.stats['total_checks'] = 0
         self.stats['blocked_presses'] = 0
         self.stats['allowed_presses'] = 0
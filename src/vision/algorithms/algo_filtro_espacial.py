@@ -5,9 +5,12 @@ ALGORITMO 5: Filtrado espacial
 Previene que dedos cercanos activen múltiples teclas adyacentes
 """
 
-import math
 from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_FINGERS
 
 
 class FiltroEspacialAlgorithm(BaseAlgorithm):
@@ -26,8 +29,13 @@ class FiltroEspacialAlgorithm(BaseAlgorithm):
         self.min_finger_distance = 35  # píxeles
         self.adjacent_keys_threshold = 2  # teclas
         
-        # Estado interno
-        self.finger_positions = {}  # {finger_id: (x, y, key, depth)}
+        # Estado interno: última posición conocida de cada dedo (arrays por slot)
+        self.finger_x = np.zeros(MAX_FINGERS)
+        self.finger_y = np.zeros(MAX_FINGERS)
+        self.finger_key = np.zeros(MAX_FINGERS, dtype=np.int64)
+        self.finger_depth = np.zeros(MAX_FINGERS)
+        self.finger_known = np.zeros(MAX_FINGERS, dtype=bool)
+        self.known_fingers = np.empty(0, dtype=np.int64)  # slots en orden de primera aparición
         
         # Estadísticas
         self.stats = {
@@ -50,55 +58,61 @@ class FiltroEspacialAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Versión vectorizada: matriz de distancias entre todos los dedos conocidos.
+        
+        Los pares se recorren en el orden en que se vio cada dedo por primera
+        vez (igual que el diccionario original), lo que decide los empates.
+        """
+        if not self.enabled:
+            return batch
+        
         # Actualizar posiciones
-        for detection in detections:
-            finger_id, key, depth, velocity, x, y = detection
-            self.finger_positions[finger_id] = (x, y, key, depth)
+        fingers = batch.finger
+        new_fingers = fingers[~self.finger_known[fingers]]
+        if len(new_fingers):
+            new_fingers = np.array(list(dict.fromkeys(new_fingers.tolist())), dtype=np.int64)
+            self.finger_known[new_fingers] = True
+            self.known_fingers = np.concatenate((self.known_fingers, new_fingers))
+        
+        self.finger_x[fingers] = batch.x
+        self.finger_y[fingers] = batch.y
+        self.finger_key[fingers] = batch.key
+        self.finger_depth[fingers] = batch.depth
         
         # Detectar conflictos (dedos cercanos en teclas adyacentes)
-        conflicts = []
-        fingers = list(self.finger_positions.keys())
-        
-        for i in range(len(fingers)):
-            for j in range(i + 1, len(fingers)):
-                finger1 = fingers[i]
-                finger2 = fingers[j]
-                
-                x1, y1, key1, depth1 = self.finger_positions[finger1]
-                x2, y2, key2, depth2 = self.finger_positions[finger2]
-                
-                # Calcular distancia euclidiana
-                distance = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-                
-                # Calcular distancia entre teclas
-                key_distance = abs(key2 - key1)
-                
-                # Verificar si hay conflicto
-                if (distance < self.min_finger_distance and 
-                    key_distance <= self.adjacent_keys_threshold):
-                    conflicts.append((finger1, finger2, distance, depth1, depth2))
-                    self.stats['total_conflicts'] += 1
-        
-        # Resolver conflictos: mantener el dedo con mayor profundidad (más cerca)
-        fingers_to_remove = set()
-        
-        for finger1, finger2, distance, depth1, depth2 in conflicts:
-            if depth1 < depth2:
-                # finger1 está más cerca (menor profundidad)
-                fingers_to_remove.add(finger2)
-            else:
-                # finger2 está más cerca
-                fingers_to_remove.add(finger1)
-            
-            self.stats['resolved_by_depth'] += 1
+        known = self.known_fingers
+        if len(known) < 2:
+            return batch
         
-        # Filtrar detecciones
-        filtered = [
-            detection for detection in detections
-            if detection[0] not in fingers_to_remove
-        ]
+        x = self.finger_x[known]
+        y = self.finger_y[known]
+        key = self.finger_key[known]
+        depth = self.finger_depth[known]
+        
+        # Calcular distancia euclidiana y distancia entre teclas (pares i < j)
+        distance = np.hypot(x[None, :] - x[:, None], y[None, :] - y[:, None])
+        key_distance = np.abs(key[None, :] - key[:, None])
+        conflict = np.triu((distance < self.min_finger_distance) &
+                           (key_distance <= self.adjacent_keys_threshold), k=1)
+        
+        i, j = np.nonzero(conflict)
+        n_conflicts = len(i)
+        if n_conflicts == 0:
+            return batch
         
-        return filtered
+        self.stats['total_conflicts'] += n_conflicts
+        self.stats['resolved_by_depth'] += n_conflicts
+        
+        # Resolver conflictos: mantener el dedo con menor profundidad (más cerca)
+        remove = np.zeros(MAX_FINGERS, dtype=bool)
+        remove[np.where(depth[i] < depth[j], known[j], known[i])] = True
+        
+        # Filtrar detecciones
+        return batch.select(~remove[fingers])
     
     def configure(self, **params):
         """
@@ -113,9 +127,15 @@ class FiltroEspacialAlgorithm(BaseAlgorithm):
         if 'adjacent_keys_threshold' in params:
             self.adjacent_keys_threshold = int(params['adjacent_keys_threshold'])
     
+    def evict_fingers(self, slots):
+        """Olvida la posición de los dedos expirados (dejan de generar pares)."""
+        self.finger_known[slots] = False
+        self.known_fingers = self.known_fingers[self.finger_known[self.known_fingers]]
+    
     def reset(self):
         """Limpia posiciones de dedos."""
-        self.finger_positions.clear()
+        self.finger_known.fill(False)
+        self.known_fingers = np.empty(0, dtype=np.int64)
         self.stats['total_conflicts'] = 0
         self.stats['resolved_by_depth'] = 0
         self.stats['resolved_by_distance'] = 0
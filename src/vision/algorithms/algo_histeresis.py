@@ -6,7 +6,11 @@ Usa umbrales diferentes para presionar y soltar teclas
 """
 
 from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_KEYS, occurrence_rounds
 
 
 class HisteresisAlgorithm(BaseAlgorithm):
@@ -26,7 +30,7 @@ class HisteresisAlgorithm(BaseAlgorithm):
         self.release_threshold = 4.0  # cm (más alto)
         
         # Estado interno
-        self.key_pressed_state = {}  # {key_id: bool}
+        self.key_pressed_state = np.zeros(MAX_KEYS, dtype=bool)  # [key_id] -> presionada
         
         # Estadísticas
         self.stats = {
@@ -49,33 +53,47 @@ class HisteresisAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
-        filtered = []
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Versión vectorizada: umbral por tecla según key_pressed_state.
+        
+        Si una tecla aparece varias veces en el frame, se procesa por rondas
+        (occurrence_rounds) para respetar el orden secuencial.
         
-        for detection in detections:
-            finger_id, key, depth, velocity, x, y = detection
+        Publica en context['press_depth'] la profundidad de contacto efectiva
+        (la usa Predicción para estimar el tiempo hasta el contacto).
+        """
+        if not self.enabled:
+            return batch
+        
+        context['press_depth'] = min(context.get('press_depth', self.press_threshold), self.press_threshold)
+        if len(batch) == 0:
+            return batch
+        
+        keep = np.zeros(len(batch), dtype=bool)
+        
+        for idx in occurrence_rounds(batch.key):
+            keys = batch.key[idx]
+            depth = batch.depth[idx]
+            is_pressed = self.key_pressed_state[keys]
             
-            self.stats['total_checks'] += 1
+            # Tecla presionada: umbral de liberación / no presionada: umbral de presión
+            hold = is_pressed & (depth <= self.release_threshold)
+            release = is_pressed & ~hold
+            press = ~is_pressed & (depth <= self.press_threshold)
             
-            is_pressed = self.key_pressed_state.get(key, False)
+            self.key_pressed_state[keys[release]] = False
+            self.key_pressed_state[keys[press]] = True
+            keep[idx] = hold | press
             
-            if is_pressed:
-                # Tecla ya presionada: usar umbral de liberación
-                if depth <= self.release_threshold:
-                    # Mantener presionada
-                    filtered.append(detection)
-                else:
-                    # Liberar
-                    self.key_pressed_state[key] = False
-                    self.stats['release_applied'] += 1
-            else:
-                # Tecla no presionada: usar umbral de presión
-                if depth <= self.press_threshold:
-                    # Activar
-                    self.key_pressed_state[key] = True
-                    filtered.append(detection)
-                    self.stats['press_applied'] += 1
+            self.stats['release_applied'] += int(np.count_nonzero(release))
+            self.stats['press_applied'] += int(np.count_nonzero(press))
+        
+        self.stats['total_checks'] += len(batch)
         
-        return filtered
+        return batch.select(keep)
     
     def configure(self, **params):
         """
@@ -92,7 +110,7 @@ class HisteresisAlgorithm(BaseAlgorithm):
     
     def reset(self):
         """Limpia el estado de teclas."""
-        self.key_pressed_state.clear()
+        self.key_pressed_state.fill(False)
         self.stats['total_checks'] = 0
         self.stats['press_applied'] = 0
         self.stats['release_applied'] = 0
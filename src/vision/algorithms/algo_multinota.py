@@ -7,7 +7,11 @@ Detecta cuando múltiples teclas se presionan simultáneamente
 
 import time
 from typing import Any, Dict, List, Tuple, Set
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_KEYS
 
 
 class MultinotaAlgorithm(BaseAlgorithm):
@@ -25,7 +29,7 @@ class MultinotaAlgorithm(BaseAlgorithm):
         self.simultaneous_window = 0.05  # 50ms
         
         # Estado interno
-        self.press_timestamps = {}  # {key_id: timestamp}
+        self.press_timestamps = np.full(MAX_KEYS, np.nan)  # [key_id] -> timestamp (nan = sin registro)
         self.last_chord_keys = set()  # Últimas teclas en acorde
         
         # Estadísticas
@@ -49,29 +53,26 @@ class MultinotaAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
+        self.process_batch(DetectionBatch.from_tuples(detections), context)
+        return detections
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """Versión vectorizada: timestamps por tecla en un array fijo."""
+        if not self.enabled:
+            return batch
+        
         current_time = context.get('timestamp', time.time())
         
         # Registrar timestamps de nuevas presiones
-        current_keys = set()
-        for detection in detections:
-            _, key, _, _, _, _ = detection
-            self.press_timestamps[key] = current_time
-            current_keys.add(key)
+        self.press_timestamps[batch.key] = current_time
         
         # Limpiar timestamps antiguos
-        keys_to_remove = []
-        for key, timestamp in self.press_timestamps.items():
-            if current_time - timestamp > self.simultaneous_window * 2:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.press_timestamps[key]
-        
-        # Detectar si hay acorde activo
-        simultaneous_keys = set()
-        for key, timestamp in self.press_timestamps.items():
-            if current_time - timestamp <= self.simultaneous_window:
-                simultaneous_keys.add(key)
+        with np.errstate(invalid='ignore'):
+            age = current_time - self.press_timestamps
+            self.press_timestamps[age > self.simultaneous_window * 2] = np.nan
+            
+            # Detectar si hay acorde activo
+            simultaneous_keys = set(np.flatnonzero(age <= self.simultaneous_window).tolist())
         
         # Actualizar estadísticas
         if len(simultaneous_keys) >= 2:
@@ -89,7 +90,7 @@ class MultinotaAlgorithm(BaseAlgorithm):
         else:
             self.last_chord_keys = set()
         
-        return detections
+        return batch
     
     def configure(self, **params):
         """
@@ -103,7 +104,7 @@ class MultinotaAlgorithm(BaseAlgorithm):
     
     def reset(self):
         """Limpia historial de acordes."""
-        self.press_timestamps.clear()
+        self.press_timestamps.fill(np.nan)
         self.last_chord_keys.clear()
         self.stats['total_chords'] = 0
         self.stats['total_single_notes'] = 0
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ALGORITMO 9: Predicción de pulsación
+Ajusta la trayectoria de profundidad de cada dedo y adelanta la pulsación
+cuando el contacto es inminente (con rollback si no se confirma)
+"""
+
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_FINGERS
+from .finger_registry import slot_finger_id
+
+
+class PrediccionAlgorithm(BaseAlgorithm):
+    """
+    Predice el contacto a partir de la trayectoria reciente de cada dedo.
+
+    Con una recta por mínimos cuadrados sobre las últimas muestras (t, depth)
+    estima la velocidad de bajada y el tiempo hasta el contacto (TTC). Si el
+    contacto cae dentro de lookahead, emite la pulsación antes de que la
+    profundidad cruce el umbral. La predicción se mantiene hasta que llega
+    la detección real (confirmada) o vence el plazo (rollback: la tecla se
+    suelta en el siguiente frame).
+
+    Necesita en el contexto:
+    - 'tracked_fingers': DetectionBatch con todos los dedos sobre el teclado
+      (una fila por dedo, hayan pasado el umbral o no)
+    - 'press_depth': profundidad de contacto efectiva (la baja Histéresis)
+
+    Debe ir al final de la cadena para que los filtros no descarten las
+    pulsaciones predichas.
+
+    Parámetros configurables:
+    - lookahead: Anticipación máxima (s)
+    - min_velocity: Velocidad de bajada mínima (cm/s)
+    - min_confidence: Confianza mínima [0-1] para emitir
+    - history_size: Muestras para ajustar la trayectoria
+    - confirm_tolerance: Margen (s) tras el contacto previsto antes del rollback
+    """
+
+    def __init__(self, enabled: bool = False):
+        super().__init__(name="Predicción", enabled=enabled)
+
+        # Parámetros configurables
+        self.lookahead = 0.05         # ~1.5 frames a 30 FPS
+        self.min_velocity = 20.0      # cm/s
+        self.min_confidence = 0.6
+        self.history_size = 4
+        self.confirm_tolerance = 0.05  # s
+
+        # Estado interno: trayectoria circular por dedo
+        self._allocate_history(self.history_size)
+
+        # Predicción pendiente por dedo (-1 = ninguna)
+        self.pending_key = np.full(MAX_FINGERS, -1, dtype=np.int64)
+        self.pending_since = np.full(MAX_FINGERS, np.nan)
+        self.pending_deadline = np.full(MAX_FINGERS, np.nan)
+        self.pending_confidence = np.zeros(MAX_FINGERS)
+
+        # Estadísticas
+        self.stats = {
+            'predictions': 0,
+            'confirmed': 0,
+            'rolled_back': 0,
+            'avg_lead_time': 0.0  # anticipación media de las confirmadas (s)
+        }
+        self._lead_sum = 0.0
+
+    def _allocate_history(self, size: int):
+        """Crea la trayectoria circular [dedo, muestras] vacía."""
+        self.traj_time = np.zeros((MAX_FINGERS, size))
+        self.traj_depth = np.zeros((MAX_FINGERS, size))
+        self.traj_head = np.zeros(MAX_FINGERS, dtype=np.int64)
+        self.traj_count = np.zeros(MAX_FINGERS, dtype=np.int64)
+
+    def process(self, detections: List[Tuple], context: Dict[str, Any]) -> List[Tuple]:
+        """
+        Agrega pulsaciones predichas a las detecciones.
+
+        Args:
+            detections: [(finger_id, key, depth, velocity, x, y), ...]
+            context: {'timestamp', 'tracked_fingers', 'press_depth', ...}
+
+        Returns:
+            Detecciones reales + predichas
+        """
+        if not self.enabled:
+            return detections
+
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """Versión vectorizada: ajuste lineal de todas las trayectorias a la vez."""
+        if not self.enabled:
+            return batch
+
+        tracked = context.get('tracked_fingers')
+        press_depth = context.get('press_depth')
+        if tracked is None or press_depth is None:
+            return batch
+
+        now = context.get('timestamp', time.time())
+        fingers = tracked.finger
+
+        # 1. Agregar la muestra actual a la trayectoria
+        window = self.traj_time.shape[1]
+        head = self.traj_head[fingers]
+        self.traj_time[fingers, head] = now
+        self.traj_depth[fingers, head] = tracked.depth
+        self.traj_head[fingers] = (head + 1) % window
+        self.traj_count[fingers] = np.minimum(self.traj_count[fingers] + 1, window)
+
+        # 2. Confirmar: llegó la detección real del dedo en la tecla predicha
+        confirmed = batch.finger[self.pending_key[batch.finger] == batch.key]
+        if len(confirmed):
+            self._lead_sum += float(np.sum(now - self.pending_since[confirmed]))
+            self.stats['confirmed'] += len(confirmed)
+            self.stats['avg_lead_time'] = self._lead_sum / self.stats['confirmed']
+            self._clear_pending(confirmed)
+
+        # 3. Rollback: venció el plazo, el dedo cambió de tecla o dejó de verse
+        current_key = np.full(MAX_FINGERS, -1, dtype=np.int64)
+        current_key[fingers] = tracked.key
+        pending = np.flatnonzero(self.pending_key >= 0)
+        failed = pending[(now > self.pending_deadline[pending]) |
+                         (current_key[pending] != self.pending_key[pending])]
+        if len(failed):
+            self.stats['rolled_back'] += len(failed)
+            self._clear_pending(failed)
+
+        # 4. Nuevas predicciones (dedos sin pulsación real ni predicción)
+        pressed = np.zeros(MAX_FINGERS, dtype=bool)
+        pressed[batch.finger] = True
+        candidate = (~pressed[fingers] & (self.pending_key[fingers] < 0) &
+                     (self.traj_count[fingers] >= 3) & (tracked.depth > press_depth))
+        if np.any(candidate):
+            self._predict(tracked.select(candidate), press_depth, now)
+
+        # 5. Emitir las predicciones activas que aún no tienen detección real
+        emit = (self.pending_key[fingers] >= 0) & ~pressed[fingers]
+        if not np.any(emit):
+            return batch
+        return batch.concat(tracked.select(emit))
+
+    def _predict(self, candidates: DetectionBatch, press_depth: float, now: float):
+        """Ajuste lineal depth(t) por dedo y tiempo hasta el contacto."""
+        fingers = candidates.finger
+        t = self.traj_time[fingers]
+        d = self.traj_depth[fingers]
+        valid = (np.arange(t.shape[1]) < self.traj_count[fingers][:, None]).astype(np.float64)
+        n = valid.sum(axis=1)
+
+        # Mínimos cuadrados centrados (solo muestras válidas)
+        tc = (t - (t * valid).sum(axis=1, keepdims=True) / n[:, None]) * valid
+        dc = (d - (d * valid).sum(axis=1, keepdims=True) / n[:, None]) * valid
+        stt = (tc * tc).sum(axis=1)
+        std = (tc * dc).sum(axis=1)
+        sdd = (dc * dc).sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity = -std / stt                       # cm/s hacia abajo
+            r2 = np.nan_to_num(std * std / (stt * sdd))
+            ttc = (candidates.depth - press_depth) / velocity
+
+        confidence = r2 * np.minimum(1.0, velocity / (2 * self.min_velocity))
+        predicted = ((velocity >= self.min_velocity) & (ttc > 0) & (ttc <= self.lookahead) &
+                     (confidence >= self.min_confidence))
+        if not np.any(predicted):
+            return
+
+        slots = fingers[predicted]
+        self.pending_key[slots] = candidates.key[predicted]
+        self.pending_since[slots] = now
+        self.pending_deadline[slots] = now + ttc[predicted] + self.confirm_tolerance
+        self.pending_confidence[slots] = confidence[predicted]
+        self.stats['predictions'] += len(slots)
+
+    def _clear_pending(self, slots):
+        self.pending_key[slots] = -1
+        self.pending_since[slots] = np.nan
+        self.pending_deadline[slots] = np.nan
+        self.pending_confidence[slots] = 0.0
+
+    def get_predictions(self) -> List[Dict[str, Any]]:
+        """
+        Predicciones activas.
+
+        Returns:
+            [{'finger_id', 'key', 'confidence', 'deadline'}, ...]
+        """
+        return [
+            {
+                'finger_id': slot_finger_id(slot),
+                'key': int(self.pending_key[slot]),
+                'confidence': float(self.pending_confidence[slot]),
+                'deadline': float(self.pending_deadline[slot])
+            }
+            for slot in np.flatnonzero(self.pending_key >= 0)
+        ]
+
+    def configure(self, **params):
+        """
+        Configura parámetros de predicción.
+
+        Args:
+            lookahead: float (segundos)
+            min_velocity: float (cm/s)
+            min_confidence: float (0-1)
+            history_size: int (muestras)
+            confirm_tolerance: float (segundos)
+        """
+        if 'lookahead' in params:
+            self.lookahead = float(params['lookahead'])
+        if 'min_velocity' in params:
+            self.min_velocity = float(params['min_velocity'])
+        if 'min_confidence' in params:
+            self.min_confidence = float(params['min_confidence'])
+        if 'confirm_tolerance' in params:
+            self.confirm_tolerance = float(params['confirm_tolerance'])
+        if 'history_size' in params and int(params['history_size']) != self.history_size:
+            self.history_size = max(3, int(params['history_size']))
+            self._allocate_history(self.history_size)
+
+    def evict_fingers(self, slots):
+        """Olvida trayectoria y predicción de los dedos expirados."""
+        self.traj_count[slots] = 0
+        self.traj_head[slots] = 0
+        self._clear_pending(slots)
+
+    def reset(self):
+        """Limpia trayectorias y predicciones."""
+        self._allocate_history(self.history_size)
+        self._clear_pending(slice(None))
+        self.stats['predictions'] = 0
+        self.stats['confirmed'] = 0
+        self.stats['rolled_back'] = 0
+        self.stats['avg_lead_time'] = 0.0
+        self._lead_sum = 0.0
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'lookahead': self.lookahead,
+            'min_velocity': self.min_velocity,
+            'min_confidence': self.min_confidence,
+            'history_size': self.history_size,
+            'confirm_tolerance': self.confirm_tolerance
+        }
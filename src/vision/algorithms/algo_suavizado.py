@@ -5,15 +5,22 @@ ALGORITMO 3: Suavizado de velocidad
 Calcula velocidad promediando múltiples mediciones
 """
 
-from collections import deque, defaultdict
+import time
 from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_FINGERS, occurrence_rounds
 
 
 class SuavizadoAlgorithm(BaseAlgorithm):
     """
     Implementa suavizado de velocidad mediante promedio móvil.
     
+    La velocidad se mide en cm/s con los timestamps de captura del contexto,
+    así no cambia de significado si baja el FPS o se saltan frames.
+    
     Parámetros configurables:
     - smoothing_window: Número de mediciones para promediar
     """
@@ -24,14 +31,34 @@ class SuavizadoAlgorithm(BaseAlgorithm):
         # Parámetros configurables
         self.smoothing_window = 7  # Número de frames
         
-        # Estado interno
-        self.finger_depth_history = defaultdict(lambda: deque(maxlen=self.smoothing_window))
+        # Estado interno: historial circular de profundidades (y sus timestamps) por dedo
+        self._allocate_history(self.smoothing_window)
         
         # Estadísticas
         self.stats = {
             'total_smoothed': 0,
             'avg_smoothing_effect': 0.0
         }
+        # avg_smoothing_effect = promedio sobre detecciones con velocidad original != 0
+        self._effect_sum = 0.0
+        self._effect_count = 0
+    
+    def _allocate_history(self, window: int):
+        """Crea el historial circular [dedo, ventana] vacío."""
+        self.depth_history = np.zeros((MAX_FINGERS, window))
+        self.time_history = np.zeros((MAX_FINGERS, window))
+        self.history_head = np.zeros(MAX_FINGERS, dtype=np.int64)   # próxima posición a escribir
+        self.history_count = np.zeros(MAX_FINGERS, dtype=np.int64)  # muestras válidas
+    
+    def _history_index(self, finger_slot: int) -> np.ndarray:
+        """Posiciones válidas del historial circular (más antigua primero)."""
+        count = self.history_count[finger_slot]
+        window = self.depth_history.shape[1]
+        return (self.history_head[finger_slot] - count + np.arange(count)) % window
+    
+    def get_finger_history(self, finger_slot: int) -> np.ndarray:
+        """Profundidades del dedo (más antigua primero)."""
+        return self.depth_history[finger_slot, self._history_index(finger_slot)]
     
     def process(self, detections: List[Tuple], context: Dict[str, Any]) -> List[Tuple]:
         """
@@ -47,41 +74,60 @@ class SuavizadoAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
-        smoothed = []
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Versión vectorizada con historial circular por dedo.
+        
+        La pendiente media del historial es
+        (más antigua - más reciente) / (t más reciente - t más antigua),
+        así que no hace falta recorrer la ventana.
+        """
+        if not self.enabled or len(batch) == 0:
+            return batch
+        
+        current_time = context.get('timestamp', time.time())
+        window = self.depth_history.shape[1]
+        velocity = batch.velocity.copy()
         
-        for detection in detections:
-            finger_id, key, depth, velocity, x, y = detection
+        for idx in occurrence_rounds(batch.finger):
+            fingers = batch.finger[idx]
+            depth = batch.depth[idx]
             
             # Agregar profundidad al historial
-            self.finger_depth_history[finger_id].append(depth)
+            head = self.history_head[fingers]
+            self.depth_history[fingers, head] = depth
+            self.time_history[fingers, head] = current_time
+            self.history_head[fingers] = (head + 1) % window
+            count = np.minimum(self.history_count[fingers] + 1, window)
+            self.history_count[fingers] = count
             
-            # Calcular velocidad suavizada
-            history = list(self.finger_depth_history[finger_id])
+            # Velocidad promedio (cm/s) de las últimas N mediciones
+            oldest_pos = (head + 1 - count) % window
+            elapsed = current_time - self.time_history[fingers, oldest_pos]
+            enough = (count >= 2) & (elapsed > 0)
+            oldest = self.depth_history[fingers, oldest_pos]
+            original = velocity[idx]
+            smoothed = np.where(enough, (oldest - depth) / np.where(enough, elapsed, 1.0), original)
             
-            if len(history) >= 2:
-                # Velocidad promedio de las últimas N mediciones
-                velocities = [history[i] - history[i+1] for i in range(len(history) - 1)]
-                smoothed_velocity = sum(velocities) / len(velocities)
-                
-                # Registrar efecto de suavizado
-                original_mag = abs(velocity)
-                smoothed_mag = abs(smoothed_velocity)
-                if original_mag > 0:
-                    effect = abs(smoothed_mag - original_mag) / original_mag
-                    self.stats['avg_smoothing_effect'] = (
-                        (self.stats['avg_smoothing_effect'] * self.stats['total_smoothed'] + effect) /
-                        (self.stats['total_smoothed'] + 1)
-                    )
-                
-                self.stats['total_smoothed'] += 1
-                
-                # Usar velocidad suavizada
-                smoothed.append((finger_id, key, depth, smoothed_velocity, x, y))
-            else:
-                # No hay suficiente historial
-                smoothed.append(detection)
+            # Registrar efecto de suavizado
+            original_mag = np.abs(original)
+            has_effect = enough & (original_mag > 0)
+            n_effect = int(np.count_nonzero(has_effect))
+            if n_effect:
+                self._effect_sum += float(np.sum(np.abs(np.abs(smoothed) - original_mag)[has_effect] /
+                                                 original_mag[has_effect]))
+                self._effect_count += n_effect
+            self.stats['total_smoothed'] += int(np.count_nonzero(enough))
+            
+            # Usar velocidad suavizada
+            velocity[idx] = smoothed
+        
+        if self._effect_count:
+            self.stats['avg_smoothing_effect'] = self._effect_sum / self._effect_count
         
-        return smoothed
+        return batch.with_velocity(velocity)
     
     def configure(self, **params):
         """
@@ -92,17 +138,31 @@ class SuavizadoAlgorithm(BaseAlgorithm):
         """
         if 'smoothing_window' in params:
             new_window = int(params['smoothing_window'])
+            # Recrear historial con nuevo tamaño (conservando las últimas muestras)
+            kept = [self._history_index(f)[-new_window:] for f in range(MAX_FINGERS)]
+            depths = [self.depth_history[f, idx] for f, idx in enumerate(kept)]
+            times = [self.time_history[f, idx] for f, idx in enumerate(kept)]
             self.smoothing_window = new_window
-            # Recrear deques con nuevo tamaño
-            for finger_id in self.finger_depth_history:
-                old_data = list(self.finger_depth_history[finger_id])
-                self.finger_depth_history[finger_id] = deque(old_data[-new_window:], maxlen=new_window)
+            self._allocate_history(new_window)
+            for finger_slot in range(MAX_FINGERS):
+                n = len(kept[finger_slot])
+                self.depth_history[finger_slot, :n] = depths[finger_slot]
+                self.time_history[finger_slot, :n] = times[finger_slot]
+                self.history_head[finger_slot] = n % new_window
+                self.history_count[finger_slot] = n
+    
+    def evict_fingers(self, slots):
+        """Vacía el historial de los dedos expirados."""
+        self.history_count[slots] = 0
+        self.history_head[slots] = 0
     
     def reset(self):
         """Limpia historial de profundidades."""
-        self.finger_depth_history.clear()
+        self._allocate_history(self.smoothing_window)
         self.stats['total_smoothed'] = 0
         self.stats['avg_smoothing_effect'] = 0.0
+        self._effect_sum = 0.0
+        self._effect_count = 0
     
     def get_config(self) -> Dict[str, Any]:
         return {
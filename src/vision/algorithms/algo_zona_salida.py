@@ -7,7 +7,11 @@ Previene titubeo cuando el dedo sale del borde inferior del teclado
 
 import time
 from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch, MAX_FINGERS, occurrence_rounds
 
 
 class ZonaSalidaAlgorithm(BaseAlgorithm):
@@ -26,9 +30,11 @@ class ZonaSalidaAlgorithm(BaseAlgorithm):
         self.exit_zone_margin = 30  # píxeles desde el borde
         self.exit_grace_time = 0.3  # segundos
         
-        # Estado interno
-        self.finger_last_valid = {}  # {finger_id: (key, timestamp, y_pos)}
-        self.finger_in_exit_zone = {}  # {finger_id: timestamp_entered}
+        # Estado interno (arrays por slot de dedo, nan = sin registro)
+        self.last_valid_key = np.full(MAX_FINGERS, -1, dtype=np.int64)
+        self.last_valid_time = np.full(MAX_FINGERS, np.nan)
+        self.last_valid_y = np.full(MAX_FINGERS, np.nan)
+        self.exit_zone_entered = np.full(MAX_FINGERS, np.nan)
         
         # Estadísticas
         self.stats = {
@@ -51,64 +57,74 @@ class ZonaSalidaAlgorithm(BaseAlgorithm):
         if not self.enabled:
             return detections
         
+        return self.process_batch(DetectionBatch.from_tuples(detections), context).to_tuples()
+    
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """Versión vectorizada con estado por dedo en arrays fijos."""
+        if not self.enabled or len(batch) == 0:
+            return batch
+        
         current_time = context.get('timestamp', time.time())
         virtual_keyboard = context.get('virtual_keyboard')
         
         if virtual_keyboard is None:
             # No hay teclado, no podemos calcular zona de salida
-            return detections
+            return batch
         
-        filtered = []
+        # Calcular límites del teclado (borde inferior en la x de cada punta,
+        # inclinado si el teclado está en perspectiva)
+        keyboard_bottom = virtual_keyboard.bottom_edge(batch.x)
+        exit_zone_start = keyboard_bottom - self.exit_zone_margin
         
-        for detection in detections:
-            finger_id, key, depth, velocity, x, y = detection
-            
-            self.stats['total_exit_checks'] += 1
-            
-            # Calcular límites del teclado
-            keyboard_bottom = virtual_keyboard.kb_y1
-            exit_zone_start = keyboard_bottom - self.exit_zone_margin
+        keep = np.ones(len(batch), dtype=bool)
+        
+        for idx in occurrence_rounds(batch.finger):
+            fingers = batch.finger[idx]
+            y = batch.y[idx]
             
             # Verificar si está en zona de salida
-            in_exit_zone = y >= exit_zone_start
+            in_exit_zone = y >= exit_zone_start[idx]
             
-            if not in_exit_zone:
-                # Fuera de zona de salida: permitir
-                self.finger_last_valid[finger_id] = (key, current_time, y)
-                if finger_id in self.finger_in_exit_zone:
-                    del self.finger_in_exit_zone[finger_id]
-                filtered.append(detection)
-                self.stats['exits_allowed'] += 1
-                continue
+            # Fuera de zona de salida: permitir y salir de la zona
+            self.exit_zone_entered[fingers[~in_exit_zone]] = np.nan
             
-            # Está en zona de salida
-            if finger_id not in self.finger_in_exit_zone:
-                # Primera vez en zona de salida
-                self.finger_in_exit_zone[finger_id] = current_time
+            if not in_exit_zone.any():
+                self.last_valid_key[fingers] = batch.key[idx]
+                self.last_valid_time[fingers] = current_time
+                self.last_valid_y[fingers] = y
+                self.stats['exits_allowed'] += len(idx)
+                continue
             
-            time_in_exit_zone = current_time - self.finger_in_exit_zone[finger_id]
+            # Primera vez en zona de salida
+            entering = in_exit_zone & np.isnan(self.exit_zone_entered[fingers])
+            self.exit_zone_entered[fingers[entering]] = current_time
+            time_in_exit_zone = current_time - self.exit_zone_entered[fingers]
             
-            # Calcular dirección de movimiento
-            if finger_id in self.finger_last_valid:
-                last_key, last_time, last_y = self.finger_last_valid[finger_id]
+            # Calcular dirección de movimiento (positivo = hacia abajo/saliendo)
+            dt = current_time - self.last_valid_time[fingers]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                y_velocity = (y - self.last_valid_y[fingers]) / dt
                 
-                dt = current_time - last_time
-                if dt > 0:
-                    # Calcular velocidad Y (positivo = hacia abajo/saliendo)
-                    y_velocity = (y - last_y) / dt
-                    
-                    # Si se mueve hacia abajo (saliendo) y pasó el tiempo de gracia
-                    if y_velocity > 10 and time_in_exit_zone > self.exit_grace_time:
-                        # Bloquear: está saliendo del teclado
-                        self.stats['exits_blocked'] += 1
-                        continue
+                # Si se mueve hacia abajo (saliendo) y pasó el tiempo de gracia
+                blocked = in_exit_zone & (dt > 0) & (y_velocity > 10) & \
+                    (time_in_exit_zone > self.exit_grace_time)
             
-            # Dentro del tiempo de gracia o moviéndose hacia arriba
-            self.finger_last_valid[finger_id] = (key, current_time, y)
-            filtered.append(detection)
-            self.stats['exits_allowed'] += 1
+            # Dentro del tiempo de gracia, fuera de zona o moviéndose hacia arriba
+            allowed = ~blocked
+            self.last_valid_key[fingers[allowed]] = batch.key[idx][allowed]
+            self.last_valid_time[fingers[allowed]] = current_time
+            self.last_valid_y[fingers[allowed]] = y[allowed]
+            keep[idx] = allowed
+            
+            n_blocked = int(np.count_nonzero(blocked))
+            self.stats['exits_blocked'] += n_blocked
+            self.stats['exits_allowed'] += len(idx) - n_blocked
+        
+        self.stats['total_exit_checks'] += len(batch)
         
-        return filtered
+        if keep.all():
+            return batch
+        return batch.select(keep)
     
     def configure(self, **params):
         """
@@ -123,10 +139,19 @@ class ZonaSalidaAlgorithm(BaseAlgorithm):
         if 'exit_grace_time' in params:
             self.exit_grace_time = float(params['exit_grace_time'])
     
+    def evict_fingers(self, slots):
+        """Olvida la última posición válida de los dedos expirados."""
+        self.last_valid_key[slots] = -1
+        self.last_valid_time[slots] = np.nan
+        self.last_valid_y[slots] = np.nan
+        self.exit_zone_entered[slots] = np.nan
+    
     def reset(self):
         """Limpia historial de zona de salida."""
-        self.finger_last_valid.clear()
-        self.finger_in_exit_zone.clear()
+        self.last_valid_key.fill(-1)
+        self.last_valid_time.fill(np.nan)
+        self.last_valid_y.fill(np.nan)
+        self.exit_zone_entered.fill(np.nan)
         self.stats['total_exit_checks'] = 0
         self.stats['exits_blocked'] = 0
         self.stats['exits_allowed'] = 0
@@ -6,8 +6,12 @@ Orquesta la ejecución de múltiples algoritmos en secuencia
 """
 
 import time
-from typing import Any, Dict, List, Tuple
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
 from .base_algorithm import BaseAlgorithm
+from .detection_batch import DetectionBatch
+from .finger_registry import FingerRegistry
+from .stage_profiler import StageProfiler
 
 
 class AlgorithmManager:
@@ -19,11 +23,33 @@ class AlgorithmManager:
     - Ejecutar algoritmos en orden
     - Recopilar estadísticas
     - Activar/desactivar algoritmos dinámicamente
+    - Perfilar el tiempo de cada etapa (opcional, ver enable_profiling)
+    
+    La cadena activa se precompila en una tupla (nombres, process_batch) que
+    solo se reconstruye al activar/desactivar o configurar un algoritmo.
+    Los cambios en vivo (panel de configuración) se encolan con
+    schedule_change y se aplican de una vez al inicio del siguiente frame,
+    sin locks en el camino caliente.
     """
     
-    def __init__(self):
+    def __init__(self, finger_registry: FingerRegistry = None):
+        """
+        Args:
+            finger_registry: Registro de dedos compartido (se crea uno si es None)
+        """
         self.algorithms: List[BaseAlgorithm] = []
         self.execution_order: List[str] = []
+        self.profiler: StageProfiler = None  # None = sin instrumentación
+        
+        # Dedos activos: expira el estado por dedo de todos los algoritmos
+        self.finger_registry = finger_registry if finger_registry is not None else FingerRegistry()
+        
+        # Índice por nombre y cadena activa precompilada
+        self._by_name: Dict[str, BaseAlgorithm] = {}
+        self._chain: Tuple[Tuple[str, ...], Tuple[Callable, ...]] = ((), ())
+        
+        # Cambios pendientes (deque.append/popleft son atómicos)
+        self._pending = deque()
         
     def register_algorithm(self, algorithm: BaseAlgorithm):
         """
@@ -34,6 +60,48 @@ class AlgorithmManager:
         """
         self.algorithms.append(algorithm)
         self.execution_order.append(algorithm.name)
+        self._by_name[algorithm.name] = algorithm
+        self.finger_registry.add_listener(algorithm.evict_fingers)
+        self.rebuild_chain()
+    
+    def rebuild_chain(self):
+        """
+        Recompila la tupla de etapas activas.
+        
+        Se llama automáticamente desde los métodos del gestor; solo hace
+        falta llamarla a mano si se activó/desactivó un algoritmo directamente.
+        """
+        active = [algorithm for algorithm in self.algorithms if algorithm.is_enabled()]
+        # Una sola asignación: el frame en curso ve la cadena vieja o la nueva completa
+        self._chain = (tuple(algorithm.name for algorithm in active),
+                       tuple(algorithm.process_batch for algorithm in active))
+    
+    def schedule_change(self, name: str, enabled: bool = None, **params):
+        """
+        Encola un cambio de algoritmo para aplicarlo entre frames.
+        
+        Args:
+            name: Nombre del algoritmo
+            enabled: True/False para activar/desactivar (None = sin cambio)
+            **params: Parámetros para configure()
+        """
+        self._pending.append((name, enabled, params))
+    
+    def _apply_pending(self):
+        """Aplica todos los cambios encolados y recompila la cadena una vez."""
+        while self._pending:
+            name, enabled, params = self._pending.popleft()
+            algorithm = self._by_name.get(name)
+            if algorithm is None:
+                print(f"⚠ Algoritmo desconocido: {name}")
+                continue
+            if params:
+                algorithm.configure(**params)
+            if enabled is True:
+                algorithm.enable()
+            elif enabled is False:
+                algorithm.disable()
+        self.rebuild_chain()
         
     def process_detections(self, 
                           detections: List[Tuple], 
@@ -48,18 +116,100 @@ class AlgorithmManager:
         Returns:
             Lista final de detecciones procesadas
         """
+        batch = self.process_batch(DetectionBatch.from_tuples(detections), context)
+        return batch.to_tuples()
+    
+    def process_batch(self,
+                      batch: DetectionBatch,
+                      context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Procesa un lote (struct-of-arrays) a través de todos los algoritmos activos.
+        
+        Args:
+            batch: DetectionBatch inicial
+            context: Contexto compartido entre algoritmos
+            
+        Returns:
+            DetectionBatch final procesado
+        """
         # Asegurar timestamp en contexto
         if 'timestamp' not in context:
             context['timestamp'] = time.time()
         
-        # Aplicar cada algoritmo en secuencia
-        current_detections = detections
+        # Cambios de configuración pendientes (entre frames)
+        if self._pending:
+            self._apply_pending()
         
-        for algorithm in self.algorithms:
-            if algorithm.is_enabled():
-                current_detections = algorithm.process(current_detections, context)
+        # Dedos vistos en el frame / expirar los que ya no se ven
+        self.finger_registry.touch(batch.finger, context['timestamp'])
+        self.finger_registry.evict(context['timestamp'])
+        
+        if self.profiler is not None:
+            return self._process_batch_profiled(batch, context)
+        
+        # Aplicar cada etapa activa en secuencia
+        current_batch = batch
+        
+        for stage in self._chain[1]:
+            current_batch = stage(current_batch, context)
+        
+        return current_batch
+    
+    def _process_batch_profiled(self,
+                                batch: DetectionBatch,
+                                context: Dict[str, Any]) -> DetectionBatch:
+        """Igual que process_batch, midiendo tiempo y detecciones por etapa."""
+        profiler = self.profiler
+        current_batch = batch
+        frame_start = time.perf_counter_ns()
+        
+        for name, stage in zip(*self._chain):
+            n_in = len(current_batch)
+            start = time.perf_counter_ns()
+            current_batch = stage(current_batch, context)
+            profiler.stage(name).record(time.perf_counter_ns() - start,
+                                        n_in, len(current_batch))
+        
+        profiler.total.record(time.perf_counter_ns() - frame_start, len(batch), len(current_batch))
+        return current_batch
+    
+    # ==================== PERFILADO ====================
+    
+    def enable_profiling(self):
+        """Activa la medición por etapa (descarta muestras anteriores)."""
+        self.profiler = StageProfiler()
+    
+    def disable_profiling(self):
+        """Desactiva la medición (costo cero en process_batch)."""
+        self.profiler = None
+    
+    def get_profile(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Reporte de tiempos por etapa.
+        
+        Returns:
+            {nombre_etapa: {p50_us, p95_us, p99_us, detections_in, ...}} o {} si está desactivado
+        """
+        if self.profiler is None:
+            return {}
+        return self.profiler.get_report()
+    
+    def export_profile(self, path):
+        """
+        Exporta el reporte de tiempos a JSON.
         
-        return current_detections
+        Args:
+            path: Ruta del archivo
+            
+        Returns:
+            Ruta escrita o None si el perfilado está desactivado
+        """
+        if self.profiler is None:
+            print("⚠ Perfilado desactivado, nada que exportar")
+            return None
+        path = self.profiler.export_json(path)
+        print(f"✓ Perfil de algoritmos guardado en: {path}")
+        return path
     
     def get_algorithm(self, name: str) -> BaseAlgorithm:
         """
@@ -71,22 +221,21 @@ class AlgorithmManager:
         Returns:
             Instancia del algoritmo o None si no existe
         """
-        for algorithm in self.algorithms:
-            if algorithm.name == name:
-                return algorithm
-        return None
+        return self._by_name.get(name)
     
     def enable_algorithm(self, name: str):
         """Activa un algoritmo por nombre."""
         algorithm = self.get_algorithm(name)
         if algorithm:
             algorithm.enable()
+            self.rebuild_chain()
     
     def disable_algorithm(self, name: str):
         """Desactiva un algoritmo por nombre."""
         algorithm = self.get_algorithm(name)
         if algorithm:
             algorithm.disable()
+            self.rebuild_chain()
     
     def configure_algorithm(self, name: str, **params):
         """
@@ -99,11 +248,15 @@ class AlgorithmManager:
         algorithm = self.get_algorithm(name)
         if algorithm:
             algorithm.configure(**params)
+            self.rebuild_chain()
     
     def reset_all(self):
         """Reinicia el estado de todos los algoritmos."""
         for algorithm in self.algorithms:
             algorithm.reset()
+        self.finger_registry.last_seen.fill(float('nan'))
+        if self.profiler is not None:
+            self.profiler.reset()
     
     def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -144,6 +297,10 @@ class AlgorithmManager:
             if config:
                 for key, value in config.items():
                     print(f"   - {key}: {value}")
+        if self.profiler is not None:
+            print("-"*60)
+            print("TIEMPOS POR ETAPA")
+            self.profiler.print_report()
         print("="*60 + "\n")
     
     def __repr__(self):
@@ -65,6 +65,19 @@ ALGORITHMS_CONFIG = {
             'exit_zone_margin': 30,    # Margen (px) desde borde inferior (20-50)
             'exit_grace_time': 0.3     # Tiempo de gracia (s) para confirmar salida (0.2-0.5)
         }
+    },
+    
+    # ALGORITMO 9: Predicción de pulsación
+    # Adelanta la pulsación estimando el tiempo hasta el contacto (rollback si no llega)
+    'Predicción': {
+        'enabled': False,  # ✓ Activar / ✗ Desactivar (OFF por defecto)
+        'params': {
+            'lookahead': 0.05,          # Anticipación máxima (s) (0.03-0.07)
+            'min_velocity': 20.0,       # Velocidad de bajada mínima (cm/s) (10-40)
+            'min_confidence': 0.6,      # Confianza mínima del ajuste (0.4-0.9)
+            'history_size': 4,          # Muestras para ajustar la trayectoria (3-6)
+            'confirm_tolerance': 0.05   # Margen (s) antes del rollback (0.03-0.10)
+        }
     }
 }
 
@@ -78,6 +91,7 @@ ALGORITHMS_CONFIG = {
 # 4. Filtro Espacial → Resuelve conflictos de dedos cercanos
 # 5. Zona Salida     → Previene titubeo en bordes
 # 6. Multi-nota      → Detecta acordes (no filtra, solo registra)
+# 7. Predicción      → Adelanta pulsaciones inminentes (va al final: no se filtra)
 
 EXECUTION_ORDER = [
     'Antirebote',
@@ -85,7 +99,8 @@ EXECUTION_ORDER = [
     'Suavizado',
     'Filtro Espacial',
     'Zona Salida',
-    'Multi-nota'
+    'Multi-nota',
+    'Predicción'
 ]
 
 # ==============================================================================
@@ -100,7 +115,8 @@ PRESETS = {
         'Suavizado': {'enabled': True, 'params': {'smoothing_window': 7}},
         'Multi-nota': {'enabled': True, 'params': {'simultaneous_window': 0.05}},
         'Filtro Espacial': {'enabled': True, 'params': {'min_finger_distance': 35, 'adjacent_keys_threshold': 2}},
-        'Zona Salida': {'enabled': False, 'params': {'exit_zone_margin': 30, 'exit_grace_time': 0.3}}
+        'Zona Salida': {'enabled': False, 'params': {'exit_zone_margin': 30, 'exit_grace_time': 0.3}},
+        'Predicción': {'enabled': False, 'params': {'lookahead': 0.05, 'min_velocity': 20.0, 'min_confidence': 0.6}}
     },
     
     'sensitive': {
@@ -110,7 +126,8 @@ PRESETS = {
         'Suavizado': {'enabled': True, 'params': {'smoothing_window': 5}},
         'Multi-nota': {'enabled': True, 'params': {'simultaneous_window': 0.04}},
         'Filtro Espacial': {'enabled': True, 'params': {'min_finger_distance': 30, 'adjacent_keys_threshold': 1}},
-        'Zona Salida': {'enabled': False, 'params': {'exit_zone_margin': 25, 'exit_grace_time': 0.2}}
+        'Zona Salida': {'enabled': False, 'params': {'exit_zone_margin': 25, 'exit_grace_time': 0.2}},
+        'Predicción': {'enabled': True, 'params': {'lookahead': 0.06, 'min_velocity': 15.0, 'min_confidence': 0.5}}
     },
     
     'stable': {
@@ -120,7 +137,8 @@ PRESETS = {
         'Suavizado': {'enabled': True, 'params': {'smoothing_window': 9}},
         'Multi-nota': {'enabled': True, 'params': {'simultaneous_window': 0.06}},
         'Filtro Espacial': {'enabled': True, 'params': {'min_finger_distance': 40, 'adjacent_keys_threshold': 2}},
-        'Zona Salida': {'enabled': True, 'params': {'exit_zone_margin': 35, 'exit_grace_time': 0.4}}
+        'Zona Salida': {'enabled': True, 'params': {'exit_zone_margin': 35, 'exit_grace_time': 0.4}},
+        'Predicción': {'enabled': False, 'params': {'lookahead': 0.04, 'min_velocity': 25.0, 'min_confidence': 0.8}}
     },
     
     'minimal': {
@@ -130,7 +148,8 @@ PRESETS = {
         'Suavizado': {'enabled': False, 'params': {}},
         'Multi-nota': {'enabled': False, 'params': {}},
         'Filtro Espacial': {'enabled': False, 'params': {}},
-        'Zona Salida': {'enabled': False, 'params': {}}
+        'Zona Salida': {'enabled': False, 'params': {}},
+        'Predicción': {'enabled': False, 'params': {}}
     }
 }
 
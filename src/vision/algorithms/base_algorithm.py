@@ -8,6 +8,8 @@ Define la interfaz común que todos los algoritmos deben implementar
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Tuple
 
+from .detection_batch import DetectionBatch
+
 
 class BaseAlgorithm(ABC):
     """
@@ -18,6 +20,10 @@ class BaseAlgorithm(ABC):
     2. Implementar los métodos abstractos
     3. Definir sus parámetros de configuración
     4. Mantener su propio estado interno
+    
+    Los algoritmos vectorizados sobrescriben process_batch (DetectionBatch)
+    y dejan process como adaptador de tuplas; los que solo implementan
+    process siguen funcionando a través del adaptador por defecto.
     """
     
     def __init__(self, name: str, enabled: bool = False):
@@ -44,6 +50,22 @@ class BaseAlgorithm(ABC):
         """
         pass
     
+    def process_batch(self, batch: DetectionBatch, context: Dict[str, Any]) -> DetectionBatch:
+        """
+        Procesa un lote de detecciones (struct-of-arrays).
+        
+        Por defecto adapta al API de tuplas (process); los algoritmos
+        vectorizados lo sobrescriben filtrando con máscaras booleanas.
+        
+        Args:
+            batch: DetectionBatch con las detecciones del frame
+            context: Diccionario con contexto adicional
+            
+        Returns:
+            DetectionBatch filtrado/modificado
+        """
+        return DetectionBatch.from_tuples(self.process(batch.to_tuples(), context))
+    
     @abstractmethod
     def configure(self, **params):
         """
@@ -61,6 +83,17 @@ class BaseAlgorithm(ABC):
         """
         pass
     
+    def evict_fingers(self, slots):
+        """
+        Descarta el estado de dedos que dejaron de verse (FingerRegistry).
+        
+        Por defecto no hace nada; lo sobrescriben los algoritmos con estado por dedo.
+        
+        Args:
+            slots: np.ndarray con los slots expirados (ver finger_slots)
+        """
+        pass
+    
     def enable(self):
         """Activa el algoritmo."""
         self.enabled = True
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lote de detecciones en formato struct-of-arrays
+Representa las detecciones de un frame como arrays NumPy paralelos
+para que los algoritmos filtren con máscaras booleanas
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+# Tamaños fijos del estado por tecla y por dedo
+MAX_KEYS = 128                      # Rango MIDI completo (el teclado usa 0-23)
+HAND_LANDMARKS = 21                 # Landmarks por mano (MediaPipe)
+MAX_HANDS = 4
+MAX_FINGERS = MAX_HANDS * HAND_LANDMARKS
+
+
+def finger_slots(hand_ids: np.ndarray, tip_ids: np.ndarray) -> np.ndarray:
+    """Índice fijo de cada dedo (hand_id, tip_id) en los arrays por dedo."""
+    return hand_ids * HAND_LANDMARKS + tip_ids
+
+
+def occurrence_rank(values: np.ndarray) -> np.ndarray:
+    """
+    Número de apariciones previas de cada valor dentro del lote.
+
+    Los algoritmos procesan primero todas las detecciones con rango 0
+    (primera vez que aparece esa tecla/dedo en el frame), luego las de
+    rango 1, etc. Así se respeta el orden secuencial original aun cuando
+    una tecla o dedo se repite en el mismo frame.
+
+    Un lote tiene como mucho unas decenas de detecciones: un recorrido con
+    diccionario es más barato que argsort + agrupado en NumPy.
+
+    Args:
+        values: Array de enteros (teclas o slots de dedo)
+
+    Returns:
+        Array con el rango de aparición de cada elemento
+    """
+    seen = {}
+    rank = []
+    for value in values.tolist():
+        r = seen.get(value, 0)
+        seen[value] = r + 1
+        rank.append(r)
+    return np.array(rank, dtype=np.int64)
+
+
+def occurrence_rounds(values: np.ndarray) -> List[np.ndarray]:
+    """
+    Índices del lote agrupados por rango de aparición (ver occurrence_rank).
+
+    En el caso habitual (sin repetidos) hay una sola ronda con todo el lote.
+
+    Args:
+        values: Array de enteros (teclas o slots de dedo)
+
+    Returns:
+        Lista de arrays de índices, uno por ronda
+    """
+    rank = occurrence_rank(values)
+    n_rounds = int(rank.max()) + 1 if len(rank) else 0
+    if n_rounds == 1:
+        return [np.arange(len(rank))]
+    return [np.flatnonzero(rank == r) for r in range(n_rounds)]
+
+
+class DetectionBatch:
+    """
+    Detecciones de un frame como arrays paralelos.
+
+    Equivale a la lista de tuplas [(finger_id, key, depth, velocity, x, y), ...]
+    con finger_id = (hand_id, tip_id).
+
+    Las columnas viven en dos bloques 2D (enteros y flotantes), así filtrar
+    el lote son dos indexaciones en lugar de una por columna.
+
+    Atributos (vistas de solo lectura sobre los bloques):
+        hand_id, tip_id: int64 - identificador del dedo
+        finger: int64 - slot fijo del dedo (ver finger_slots)
+        key: int64 - id de tecla
+        depth: float64 - profundidad (cm)
+        velocity: float64 - velocidad (cm/s, positiva = bajando)
+        x, y: float64 - posición en píxeles
+    """
+
+    __slots__ = ('ints', 'floats')
+
+    def __init__(self, hand_id, tip_id, key, depth, velocity, x, y):
+        hand_id = np.asarray(hand_id, dtype=np.int64)
+        tip_id = np.asarray(tip_id, dtype=np.int64)
+        self.ints = np.array([hand_id, tip_id, finger_slots(hand_id, tip_id), key],
+                             dtype=np.int64).reshape(4, -1)
+        self.floats = np.array([depth, velocity, x, y], dtype=np.float64).reshape(4, -1)
+
+    @classmethod
+    def _from_blocks(cls, ints: np.ndarray, floats: np.ndarray) -> 'DetectionBatch':
+        """Crea un lote desde bloques ya construidos (sin copiar)."""
+        batch = cls.__new__(cls)
+        batch.ints = ints
+        batch.floats = floats
+        return batch
+
+    hand_id = property(lambda self: self.ints[0])
+    tip_id = property(lambda self: self.ints[1])
+    finger = property(lambda self: self.ints[2])
+    key = property(lambda self: self.ints[3])
+    depth = property(lambda self: self.floats[0])
+    velocity = property(lambda self: self.floats[1])
+    x = property(lambda self: self.floats[2])
+    y = property(lambda self: self.floats[3])
+
+    @classmethod
+    def empty(cls) -> 'DetectionBatch':
+        """Lote sin detecciones."""
+        return cls._from_blocks(np.empty((4, 0), np.int64), np.empty((4, 0), np.float64))
+
+    @classmethod
+    def from_tuples(cls, detections: List[Tuple]) -> 'DetectionBatch':
+        """
+        Crea un lote desde la lista de tuplas del API clásico.
+
+        Args:
+            detections: [(finger_id, key, depth, velocity, x, y), ...]
+        """
+        if not detections:
+            return cls.empty()
+
+        ints = np.array([(hand_id, tip_id, hand_id * HAND_LANDMARKS + tip_id, key)
+                         for (hand_id, tip_id), key, *_ in detections], dtype=np.int64).T
+        floats = np.array([d[2:] for d in detections], dtype=np.float64).T
+        return cls._from_blocks(ints, floats)
+
+    def to_tuples(self) -> List[Tuple]:
+        """
+        Convierte el lote a la lista de tuplas del API clásico.
+
+        Returns:
+            [(finger_id, key, depth, velocity, x, y), ...]
+        """
+        return [
+            ((hand_id, tip_id), key, depth, velocity, x, y)
+            for (hand_id, tip_id, _, key), (depth, velocity, x, y) in zip(
+                self.ints.T.tolist(), self.floats.T.tolist())
+        ]
+
+    def select(self, mask: np.ndarray) -> 'DetectionBatch':
+        """
+        Sub-lote con las detecciones donde mask es True (mantiene el orden).
+
+        Args:
+            mask: Array booleano (o de índices) del tamaño del lote
+        """
+        return DetectionBatch._from_blocks(self.ints[:, mask], self.floats[:, mask])
+
+    def concat(self, other: 'DetectionBatch') -> 'DetectionBatch':
+        """Lote con las detecciones de self seguidas de las de other."""
+        return DetectionBatch._from_blocks(np.concatenate((self.ints, other.ints), axis=1),
+                                           np.concatenate((self.floats, other.floats), axis=1))
+
+    def with_velocity(self, velocity: np.ndarray) -> 'DetectionBatch':
+        """Copia del lote con otras velocidades."""
+        floats = self.floats.copy()
+        floats[1] = velocity
+        return DetectionBatch._from_blocks(self.ints, floats)
+
+    def finger_ids(self) -> List[Tuple[int, int]]:
+        """Lista de finger_id (hand_id, tip_id) en el orden del lote."""
+        return list(zip(*self.ints[:2].tolist()))
+
+    def __len__(self):
+        return self.ints.shape[1]
+
+    def __repr__(self):
+        return f"DetectionBatch({len(self)} detecciones)"
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro compartido de dedos activos
+Guarda la última vez que se vio cada dedo y descarta (TTL) el estado de los
+dedos que dejaron de verse, para que memoria y costo por frame no crezcan
+durante sesiones largas
+"""
+
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .detection_batch import HAND_LANDMARKS, MAX_FINGERS
+
+
+def slot_finger_id(slot: int) -> tuple:
+    """finger_id (hand_id, tip_id) de un slot (inversa de finger_slots)."""
+    return divmod(int(slot), HAND_LANDMARKS)
+
+
+class FingerRegistry:
+    """
+    Última aparición de cada dedo (por slot) con expiración por TTL.
+
+    Quien guarda estado por dedo se suscribe con add_listener (recibe los
+    slots expirados) o track_dict (diccionarios {finger_id: ...}).
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        """
+        Args:
+            ttl: Segundos sin ver un dedo antes de expirar su estado
+        """
+        self.ttl = ttl
+        self.last_seen = np.full(MAX_FINGERS, np.nan)  # NaN = inactivo
+        self._listeners: List[Callable[[np.ndarray], None]] = []
+        self.stats = {'evicted': 0}
+
+    def add_listener(self, callback: Callable[[np.ndarray], None]):
+        """
+        Suscribe una función que se llama con los slots expirados.
+
+        Args:
+            callback: f(slots: np.ndarray)
+        """
+        self._listeners.append(callback)
+
+    def track_dict(self, mapping: Dict):
+        """
+        Borra de mapping las entradas {finger_id: ...} de los dedos que expiran.
+
+        Args:
+            mapping: Diccionario indexado por (hand_id, tip_id)
+        """
+        def evict(slots):
+            for slot in slots.tolist():
+                mapping.pop(slot_finger_id(slot), None)
+        self.add_listener(evict)
+
+    def touch(self, slots: np.ndarray, now: float):
+        """Marca los dedos como vistos en este instante."""
+        self.last_seen[slots] = now
+
+    def evict(self, now: float) -> np.ndarray:
+        """
+        Expira los dedos que no se ven hace más de ttl y avisa a los suscriptores.
+
+        Returns:
+            Slots expirados (vacío casi siempre)
+        """
+        with np.errstate(invalid='ignore'):
+            expired = np.flatnonzero(now - self.last_seen > self.ttl)
+        if len(expired):
+            self.last_seen[expired] = np.nan
+            self.stats['evicted'] += len(expired)
+            for callback in self._listeners:
+                callback(expired)
+        return expired
+
+    def active_slots(self) -> np.ndarray:
+        """Slots de los dedos vistos dentro del TTL."""
+        return np.flatnonzero(~np.isnan(self.last_seen))
+
+    def clear(self):
+        """Expira todos los dedos (avisa a los suscriptores)."""
+        active = self.active_slots()
+        self.last_seen.fill(np.nan)
+        if len(active):
+            for callback in self._listeners:
+                callback(active)
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.last_seen)))
+
+    def __repr__(self):
+        return f"FingerRegistry({len(self)} dedos activos, ttl={self.ttl}s)"
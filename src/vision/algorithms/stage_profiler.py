@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfilador por etapa de la cadena de algoritmos
+Registra el tiempo de cada algoritmo por frame en histogramas de tamaño fijo
+(percentiles p50/p95/p99) y las detecciones que entran y salen de cada etapa
+"""
+
+import json
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+
+# Bins logarítmicos de 100 ns a 1 s (16 bins por década)
+BIN_EDGES_NS = np.logspace(2, 9, 7 * 16 + 1)
+
+
+class StageHistogram:
+    """
+    Histograma de tiempos de una etapa con memoria constante.
+
+    Los percentiles se interpolan dentro del bin, así que el error relativo
+    está acotado por el ancho del bin (~15%).
+    """
+
+    __slots__ = ('counts', 'frames', 'total_ns', 'max_ns', 'detections_in', 'detections_out')
+
+    _edges = BIN_EDGES_NS.tolist()
+
+    def __init__(self):
+        self.counts = [0] * (len(self._edges) + 1)
+        self.frames = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.detections_in = 0
+        self.detections_out = 0
+
+    def record(self, elapsed_ns: int, n_in: int, n_out: int):
+        """Agrega una muestra (un frame) a la etapa."""
+        self.counts[bisect_right(self._edges, elapsed_ns)] += 1
+        self.frames += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.detections_in += n_in
+        self.detections_out += n_out
+
+    def percentile(self, q: float) -> float:
+        """
+        Percentil aproximado en microsegundos.
+
+        Args:
+            q: Percentil en [0, 100]
+        """
+        if self.frames == 0:
+            return 0.0
+
+        counts = np.asarray(self.counts)
+        cumulative = np.cumsum(counts)
+        target = q / 100.0 * self.frames
+        b = int(np.searchsorted(cumulative, target))
+
+        # Límites del bin (los extremos abiertos usan el rango conocido)
+        lower = BIN_EDGES_NS[b - 1] if b > 0 else 0.0
+        upper = BIN_EDGES_NS[b] if b < len(BIN_EDGES_NS) else self.max_ns
+        before = cumulative[b - 1] if b > 0 else 0
+        fraction = (target - before) / counts[b] if counts[b] else 0.0
+
+        return float(min(lower + fraction * (upper - lower), self.max_ns) / 1e3)
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen de la etapa (tiempos en µs)."""
+        return {
+            'frames': self.frames,
+            'mean_us': self.total_ns / self.frames / 1e3 if self.frames else 0.0,
+            'p50_us': self.percentile(50),
+            'p95_us': self.percentile(95),
+            'p99_us': self.percentile(99),
+            'max_us': self.max_ns / 1e3,
+            'detections_in': self.detections_in,
+            'detections_out': self.detections_out,
+        }
+
+
+class StageProfiler:
+    """
+    Perfilador de la cadena: un histograma por algoritmo más el total del frame.
+    """
+
+    TOTAL = 'Total'
+
+    def __init__(self):
+        self.stages: Dict[str, StageHistogram] = {}
+        self.total = StageHistogram()
+
+    def stage(self, name: str) -> StageHistogram:
+        """Histograma de la etapa (se crea la primera vez)."""
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = StageHistogram()
+        return histogram
+
+    def reset(self):
+        """Descarta todas las muestras."""
+        self.stages.clear()
+        self.total = StageHistogram()
+
+    def get_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Reporte por etapa.
+
+        Returns:
+            Diccionario {nombre_etapa: resumen}, en orden de ejecución y con 'Total' al final
+        """
+        report = {name: histogram.summary() for name, histogram in self.stages.items()}
+        report[self.TOTAL] = self.total.summary()
+        return report
+
+    def export_json(self, path) -> Path:
+        """
+        Guarda el reporte en un archivo JSON.
+
+        Args:
+            path: Ruta del archivo
+
+        Returns:
+            Ruta escrita
+        """
+        path = Path(path)
+        with open(path, 'w') as f:
+            json.dump(self.get_report(), f, indent=4)
+        return path
+
+    def print_report(self):
+        """Imprime la tabla de tiempos por etapa."""
+        print(f"{'Etapa':20s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'máx':>8s}  {'entra':>7s} {'sale':>7s}")
+        for name, s in self.get_report().items():
+            print(f"{name:20s} {s['p50_us']:8.1f} {s['p95_us']:8.1f} {s['p99_us']:8.1f} "
+                  f"{s['max_us']:8.1f}  {s['detections_in']:7d} {s['detections_out']:7d}")
+        print(f"(tiempos en µs, {self.total.frames} frames)")
@@ -9,6 +9,7 @@ Created on Mon Aug 23 00:25:35 2021
 import os
 import math
 import cv2
+import numpy as np
 
 # ------------------------------
 # Frame Angles and Distance
@@ -32,6 +33,9 @@ class Frame_Angles:
     # If degrees is True, returned angles are in degrees, otherwise radians.
     # The returned x,y angles are always from the frame center, negative is left,down and positive is right,up.
 
+    # Use angles_from_center_array(x,y,...) and location_array(...) with numpy arrays to process all fingertips at once.
+    # With lookup=True, angles_from_center_array reads the per-pixel tables built by build_frame.
+
     # Use pixels_from_center(self,x,y,degrees=True) to convert angle x,y to pixel x,y (always from center).
     # This is the reverse of angles_from_center.
     # If degrees is True, input x,y should be in degrees, otherwise radians.
@@ -60,6 +64,12 @@ class Frame_Angles:
     x_adjacent = None
     x_adjacent = None
 
+    # per-pixel angle lookup tables (degrees, top_left pixel coordinates)
+    x_pixels = None
+    y_pixels = None
+    x_angle_table = None
+    y_angle_table = None
+
     # ------------------------------
     # Init Functions
     # ------------------------------
@@ -99,6 +109,20 @@ class Frame_Angles:
         self.x_adjacent = self.x_origin / math.tan(math.radians(self.angle_width/2))
         self.y_adjacent = self.y_origin / math.tan(math.radians(self.angle_height/2))
 
+        # per-pixel angle tables for the current resolution and FOV
+        self.build_angle_tables()
+
+    def build_angle_tables(self):
+
+        # angle (degrees) of every pixel column and row, measured from top_left
+        # same convention as angles_from_center: positive is right,up
+
+        self.x_pixels = np.arange(self.pixel_width, dtype=np.float64)
+        self.y_pixels = np.arange(self.pixel_height, dtype=np.float64)
+
+        self.x_angle_table = np.degrees(np.arctan((self.x_pixels-self.x_origin)/self.x_adjacent))
+        self.y_angle_table = np.degrees(np.arctan((self.y_origin-self.y_pixels)/self.y_adjacent))
+
     # ------------------------------
     # Pixels-to-Angles Functions
     # ------------------------------
@@ -129,6 +153,31 @@ class Frame_Angles:
 
         return math.degrees(xrad),math.degrees(yrad)
 
+    def angles_from_center_array(self,x,y,top_left=True,degrees=True,lookup=False):
+
+        # same as angles_from_center, but x,y can be numpy arrays (all fingertips at once)
+        # if lookup, read the per-pixel tables (only top_left and degrees)
+
+        x = np.asarray(x,dtype=np.float64)
+        y = np.asarray(y,dtype=np.float64)
+
+        if lookup and top_left and degrees:
+            # linear interpolation between neighbour pixels (fingertips are sub-pixel,
+            # and angle triangulation is too sensitive for nearest pixel)
+            return np.interp(x,self.x_pixels,self.x_angle_table),np.interp(y,self.y_pixels,self.y_angle_table)
+
+        if top_left:
+            x = x - self.x_origin
+            y = self.y_origin - y
+
+        xrad = np.arctan(x/self.x_adjacent)
+        yrad = np.arctan(y/self.y_adjacent)
+
+        if not degrees:
+            return xrad,yrad
+
+        return np.degrees(xrad),np.degrees(yrad)
+
     def pixels_from_center(self,x,y,degrees=True):
 
         # this is the reverse of angles_from_center
@@ -232,6 +281,40 @@ class Frame_Angles:
         # done
         return X,Y,Z,D
 
+    def location_array(self,pdistance,lcamera,rcamera,center=False,degrees=True):
+
+        # same as location, but angle values can be numpy arrays (all fingertips at once)
+        # returns X,Y,Z,D arrays
+
+        lxangle,lyangle = lcamera
+        rxangle,ryangle = rcamera
+
+        # yangle should be the same for both cameras (if aligned correctly)
+        yangle = np.add(lyangle,ryangle)/2
+
+        if degrees:
+            lxangle = np.radians(lxangle)
+            rxangle = np.radians(rxangle)
+            yangle  = np.radians( yangle)
+
+        # intersection (see intersection), with tan(pi/2-a) = 1/tan(a)
+        # and tan(pi/2+a) = -1/tan(a), so ( 1/ltan + 1/rtan ) = tan(l) - tan(r)
+        ltan_inv = np.tan(lxangle)
+
+        with np.errstate(divide='ignore',invalid='ignore'):
+            Z = pdistance / ( ltan_inv - np.tan(rxangle) )
+        X = Z*ltan_inv
+
+        # get Y (2D distance to target in the X,Z plane)
+        Y = np.tan(yangle) * np.hypot(X,Z)
+
+        if center:
+            X -= pdistance/2
+
+        D = np.sqrt(X*X + Y*Y + Z*Z)
+
+        return X,Y,Z,D
+
     # ------------------------------
     # Tertiary Functions
     # ------------------------------
@@ -54,6 +54,10 @@ class DepthEstimator:
         self.smoothing_window = 5  # Últimos N frames
         self.position_history = {}  # {landmark_id: deque([(x,y,z), ...], maxlen=N)}
         
+        # Ruta rápida rectificada: diferencia vertical máxima (px) entre los
+        # puntos rectificados de ambas cámaras para aceptar un par
+        self.rectified_y_tolerance = 6.0
+        
         # Parámetros de rectificación
         self.R1 = None
         self.R2 = None
@@ -61,6 +65,11 @@ class DepthEstimator:
         self.P2 = None
         self.Q = None
         
+        # Reproyección rectificado → mundo (precalculada para la ruta rápida)
+        self._Q_reproject = None
+        self._rect_to_world_R = None
+        self._rect_to_world_t = None
+        
         # Mapas de rectificación (calculados una sola vez)
         self.mapx_left = None
         self.mapy_left = None
@@ -75,6 +84,9 @@ class DepthEstimator:
         
         # Generar mapas de rectificación
         self._generate_rectification_maps()
+        
+        # Preparar matrices de la ruta rápida rectificada
+        self._prepare_rectified_projection()
     
     def _load_calibration(self):
         """Carga todos los parámetros desde calibration.json"""
@@ -187,7 +199,26 @@ class DepthEstimator:
         )
         
         print(f"✓ Mapas de rectificación generados")
-    
+
+    def _prepare_rectified_projection(self):
+        """
+        Precalcula las matrices de la ruta rápida rectificada
+
+        Q reproyecta (x, y, disparidad) al sistema de la cámara izquierda
+        rectificada; después se deshace R1 y la transformación al mundo para
+        devolver coordenadas en el mismo sistema que triangulate_point_DLT.
+        """
+        self._Q_reproject = self.Q.astype(np.float64)
+
+        # X_mundo = R_world_leftᵀ · (R1ᵀ · X_rect - T_world_left)
+        R1 = self.R1.astype(np.float64)
+        R_world = self.R_world_left.astype(np.float64)
+        T_world = self.T_world_left.astype(np.float64).reshape(3)
+
+        # Forma por filas: xyz_mundo = xyz_rect @ (R1 · R_world_left) + t
+        self._rect_to_world_R = R1 @ R_world
+        self._rect_to_world_t = -(R_world.T @ T_world)
+
     def rectify_images(self, img_left, img_right):
         """
         Rectifica un par de imágenes estéreo
@@ -345,13 +376,20 @@ class DepthEstimator:
         Args:
             point_left: (x, y) en imagen izquierda rectificada
             point_right: (x, y) en imagen derecha rectificada
-            method: 'DLT' (recomendado) o 'Q' (matriz de reproyección)
-        
+            method: 'DLT' (recomendado), 'RECT' (ruta rápida rectificada,
+                    recibe puntos de imagen ORIGINAL) o 'Q' (matriz de reproyección)
+
         Returns:
             tuple: (X, Y, Z) coordenadas 3D en cm, o None si falla
         """
         if method == 'DLT':
             return self.triangulate_point_DLT(point_left, point_right)
+
+        if method == 'RECT':
+            points_3d, valid = self.batch_triangulate_rectified([point_left], [point_right])
+            if not valid[0]:
+                return None
+            return tuple(points_3d[0])
         
         # Método original con matriz Q (menos robusto)
         x_left, y_left = point_left
@@ -426,9 +464,64 @@ class DepthEstimator:
         for pt_left, pt_right in zip(points_left, points_right):
             result = self.triangulate_point(pt_left, pt_right)
             results.append(result)
-        
+
         return results
-    
+
+    def batch_triangulate_rectified(self, points_left, points_right, y_tolerance=None):
+        """
+        Triangulación rápida de todos los puntos usando geometría rectificada
+
+        Con imágenes rectificadas la profundidad es Z = f·B/d, así que no hace
+        falta una SVD por punto: se rectifican las coordenadas, se rechazan los
+        pares cuya diferencia vertical supere la tolerancia y se reproyectan
+        todos con Q en una sola operación matricial.
+
+        Args:
+            points_left: Lista/array Nx2 de (x, y) en imagen izquierda ORIGINAL
+            points_right: Lista/array Nx2 de (x, y) en imagen derecha ORIGINAL
+            y_tolerance: Diferencia vertical máxima (px) tras rectificar
+                         (None = usar self.rectified_y_tolerance)
+
+        Returns:
+            tuple: (points_3d, valid)
+                - points_3d: np.ndarray Nx3 con (X, Y, Z) en cm, mismo sistema
+                  de coordenadas y corrección de profundidad que el método DLT
+                - valid: np.ndarray booleano de largo N (False = par rechazado)
+        """
+        if len(points_left) != len(points_right):
+            raise ValueError("Las listas deben tener la misma longitud")
+
+        if y_tolerance is None:
+            y_tolerance = self.rectified_y_tolerance
+
+        n_points = len(points_left)
+        points_3d = np.zeros((n_points, 3), dtype=np.float64)
+        if n_points == 0:
+            return points_3d, np.zeros(0, dtype=bool)
+
+        rect_left = self.rectify_points(points_left, is_left=True)
+        rect_right = self.rectify_points(points_right, is_left=False)
+
+        # Restricción epipolar: en rectificado ambos puntos están en la misma fila
+        disparity = rect_left[:, 0] - rect_right[:, 0]
+        valid = (np.abs(rect_left[:, 1] - rect_right[:, 1]) <= y_tolerance) & (disparity > 0)
+
+        # (x, y, d, 1) · Qᵀ → (X, Y, Z, W) en coordenadas homogéneas
+        homogeneous = np.column_stack((rect_left, disparity, np.ones(n_points))) @ self._Q_reproject.T
+        w = homogeneous[:, 3]
+        valid &= np.abs(w) > 1e-12
+
+        np.divide(homogeneous[:, :3], w[:, None], out=points_3d, where=valid[:, None])
+
+        # Sistema rectificado → sistema del mundo (igual que DLT), en cm
+        points_3d = (points_3d @ self._rect_to_world_R + self._rect_to_world_t) * 100
+        points_3d[:, 2] *= self.DEPTH_CORRECTION_FACTOR
+
+        valid &= points_3d[:, 2] > 0
+        points_3d[~valid] = 0.0
+
+        return points_3d, valid
+
     def rectify_point(self, point, is_left=True):
         """
         Rectifica un punto 2D de imagen original a imagen rectificada
@@ -452,7 +545,33 @@ class DepthEstimator:
         y_rect = mapy[int(y), int(x)]
         
         return (x_rect, y_rect)
-    
+
+    def rectify_points(self, points, is_left=True):
+        """
+        Rectifica varios puntos 2D de una sola vez
+
+        Usa cv2.undistortPoints con (R1, P1) o (R2, P2), que es la
+        transformación directa imagen original → imagen rectificada.
+
+        Args:
+            points: Lista/array Nx2 de (x, y) en imagen original
+            is_left: True si es cámara izquierda, False si derecha
+
+        Returns:
+            np.ndarray: Nx2 con (x_rect, y_rect) en imagen rectificada
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        if pts.shape[0] == 0:
+            return np.empty((0, 2), dtype=np.float64)
+
+        if is_left:
+            K, D, R, P = self.K_left, self.D_left, self.R1, self.P1
+        else:
+            K, D, R, P = self.K_right, self.D_right, self.R2, self.P2
+
+        rectified = cv2.undistortPoints(pts, K, D, R=R, P=P)
+        return rectified.reshape(-1, 2)
+
     def enable_smoothing(self, enabled=True, window_size=5):
         """
         Activa/desactiva el suavizado temporal de coordenadas 3D
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Máquina de estados por tecla
+Estado presionada/liberada, tiempos de presión/liberación y dedo dueño de
+cada tecla en arrays preasignados; calcula los flancos on/off de todas las
+teclas en una sola pasada, sin crear arrays nuevos por frame
+"""
+
+import numpy as np
+
+from src.vision.algorithms.detection_batch import MAX_KEYS
+from src.vision.velocity_curve import VelocityCurve
+
+
+class KeyStateMachine:
+    """
+    Estado de todas las teclas del teclado virtual.
+
+    Atributos (arrays de tamaño n_keys):
+        pressed: bool - tecla presionada en el último frame
+        press_time: float - instante de contacto de la última presión (NaN = nunca)
+        release_time: float - instante de la última liberación (NaN = nunca)
+        owner: int64 - slot del dedo que presiona la tecla (-1 = ninguno)
+        press_speed: float - rapidez del golpe de la última presión (cm/s)
+        press_velocity: int16 - velocidad MIDI de la última presión (curva de velocidad)
+    """
+
+    NO_OWNER = -1
+    DEFAULT_VELOCITY = 127 * 2 // 3    # sin rapidez medida
+    SPEED_HISTORY = 128                # golpes recientes para calibrar la curva
+
+    def __init__(self, n_keys: int = MAX_KEYS, velocity_curve=None):
+        """
+        Args:
+            n_keys: Número máximo de teclas
+            velocity_curve: VelocityCurve (None = AppConfig.VELOCITY_CURVE)
+        """
+        self.n_keys = n_keys
+        self.pressed = np.zeros(n_keys, dtype=bool)
+        self.press_time = np.full(n_keys, np.nan)
+        self.release_time = np.full(n_keys, np.nan)
+        self.owner = np.full(n_keys, self.NO_OWNER, dtype=np.int64)
+
+        self.velocity_curve = velocity_curve or VelocityCurve.from_config()
+        self.press_speed = np.full(n_keys, np.nan)
+        self.press_velocity = np.full(n_keys, self.DEFAULT_VELOCITY, dtype=np.int16)
+        self._speed_history = np.full(self.SPEED_HISTORY, np.nan)
+        self._speed_head = 0
+
+        # Buffers del frame (se reutilizan)
+        self._current = np.zeros(n_keys, dtype=bool)
+        self._times = np.zeros(n_keys)
+        self._speeds = np.zeros(n_keys)
+        self.on_edges = np.zeros(n_keys, dtype=bool)
+        self.off_edges = np.zeros(n_keys, dtype=bool)
+
+        self.stats = {'presses': 0, 'releases': 0}
+
+    def update(self, keys: np.ndarray, owners: np.ndarray, now: float, contact_times=None,
+               strike_speeds=None):
+        """
+        Avanza un frame con las teclas activas y calcula los flancos.
+
+        Args:
+            keys: Teclas activas en este frame (pueden repetirse)
+            owners: Slot del dedo de cada tecla (el último gana)
+            now: Timestamp del frame (s)
+            contact_times: Instante de contacto de cada tecla (interpolado entre
+                           frames); si es None las presiones usan now
+            strike_speeds: Rapidez del golpe de cada tecla (cm/s); en los flancos
+                           on se convierte a velocidad MIDI con la curva. Si es
+                           None, o la rapidez no es finita y positiva (fallback
+                           sin profundidad, primera muestra del dedo), la
+                           presión usa DEFAULT_VELOCITY
+
+        Returns:
+            tuple: (on_edges, off_edges) - vistas booleanas válidas hasta el próximo update
+        """
+        current = self._current
+        current.fill(False)
+        current[keys] = True
+
+        # on = activa y no presionada / off = presionada y ya no activa
+        np.greater(current, self.pressed, out=self.on_edges)
+        np.less(current, self.pressed, out=self.off_edges)
+
+        if contact_times is None:
+            self.press_time[self.on_edges] = now
+        else:
+            self._times[keys] = contact_times
+            self.press_time[self.on_edges] = self._times[self.on_edges]
+        if strike_speeds is None:
+            self.press_speed[self.on_edges] = np.nan
+            self.press_velocity[self.on_edges] = self.DEFAULT_VELOCITY
+        elif self.on_edges.any():
+            self._speeds[keys] = strike_speeds
+            speeds = self._speeds[self.on_edges]
+            self.press_speed[self.on_edges] = speeds
+            measured = np.isfinite(speeds) & (speeds > 0)
+            self.press_velocity[self.on_edges] = np.where(measured, self.velocity_curve(speeds),
+                                                          self.DEFAULT_VELOCITY)
+            slots = (self._speed_head + np.arange(len(speeds))) % self.SPEED_HISTORY
+            self._speed_history[slots] = speeds
+            self._speed_head = (self._speed_head + len(speeds)) % self.SPEED_HISTORY
+        self.release_time[self.off_edges] = now
+        self.owner[keys] = owners
+        self.owner[self.off_edges] = self.NO_OWNER
+        np.copyto(self.pressed, current)
+
+        self.stats['presses'] += int(np.count_nonzero(self.on_edges))
+        self.stats['releases'] += int(np.count_nonzero(self.off_edges))
+
+        return self.on_edges, self.off_edges
+
+    def on_keys(self) -> np.ndarray:
+        """Teclas que se presionaron en el último frame."""
+        return np.flatnonzero(self.on_edges)
+
+    def off_keys(self) -> np.ndarray:
+        """Teclas que se liberaron en el último frame."""
+        return np.flatnonzero(self.off_edges)
+
+    def pressed_keys(self) -> np.ndarray:
+        """Teclas presionadas actualmente."""
+        return np.flatnonzero(self.pressed)
+
+    def calibrate_velocity(self) -> bool:
+        """Ajusta la curva de velocidad a los últimos golpes registrados."""
+        return self.velocity_curve.calibrate(self._speed_history)
+
+    def held_time(self, now: float) -> np.ndarray:
+        """
+        Tiempo que lleva presionada cada tecla (0 si está liberada).
+
+        Args:
+            now: Timestamp actual (s)
+        """
+        return np.where(self.pressed, now - self.press_time, 0.0)
+
+    def release_all(self, now: float):
+        """
+        Libera todas las teclas (p. ej. al cambiar de modo).
+
+        Returns:
+            np.ndarray: Teclas liberadas (para enviar noteoff)
+        """
+        released = self.pressed_keys()
+        self.update(released[:0], released[:0], now)
+        return released
+
+    def reset(self):
+        """Vuelve todas las teclas a reposo sin generar flancos."""
+        self.pressed.fill(False)
+        self.press_time.fill(np.nan)
+        self.release_time.fill(np.nan)
+        self.owner.fill(self.NO_OWNER)
+        self.press_speed.fill(np.nan)
+        self.press_velocity.fill(self.DEFAULT_VELOCITY)
+        self.on_edges.fill(False)
+        self.off_edges.fill(False)
+        self.stats['presses'] = 0
+        self.stats['releases'] = 0
+
+    def __repr__(self):
+        return f"KeyStateMachine({int(np.count_nonzero(self.pressed))}/{self.n_keys} presionadas)"
@@ -14,12 +14,18 @@ from src.config.app_config import AppConfig
 
 # Sistema modular de algoritmos
 from src.vision.algorithms.algorithm_manager import AlgorithmManager
+from src.vision.algorithms.detection_batch import DetectionBatch, finger_slots
+from src.vision.algorithms.finger_registry import FingerRegistry
+from src.vision.key_state import KeyStateMachine
+from src.vision.velocity_curve import VelocityCurve
+from src.theory.chord_recognizer import ChordRecognizer
 from src.vision.algorithms.algo_antirebote import AntireboteAlgorithm
 from src.vision.algorithms.algo_histeresis import HisteresisAlgorithm
 from src.vision.algorithms.algo_suavizado import SuavizadoAlgorithm
 from src.vision.algorithms.algo_multinota import MultinotaAlgorithm
 from src.vision.algorithms.algo_filtro_espacial import FiltroEspacialAlgorithm
 from src.vision.algorithms.algo_zona_salida import ZonaSalidaAlgorithm
+from src.vision.algorithms.algo_prediccion import PrediccionAlgorithm
 from src.vision.algorithms.algorithms_config import ALGORITHMS_CONFIG, EXECUTION_ORDER
 
 
@@ -34,6 +40,9 @@ class KeyboardMapModular:
     - Activar/desactivar sin tocar código
     """
     
+    # Parámetros de detección que el panel de configuración cambia en vivo
+    LIVE_CONFIG = ('depth_threshold', 'velocity_threshold', 'velocity_enabled', 'velocity_history_size')
+    
     def __init__(self, depth_threshold=None, config_preset='default'):
         """
         Inicializa el mapeador con sistema modular.
@@ -42,7 +51,8 @@ class KeyboardMapModular:
             depth_threshold: Profundidad máxima (cm) para detectar contacto
             config_preset: Preset de configuración ('default', 'sensitive', 'stable', 'minimal')
         """
-        self.prev_map = np.empty(0, dtype=bool)
+        self.key_state = KeyStateMachine()
+        self.chord_recognizer = ChordRecognizer()
         self.depth_threshold = depth_threshold if depth_threshold is not None else AppConfig.DEPTH_THRESHOLD
         self.finger_depths = {}
         
@@ -52,8 +62,16 @@ class KeyboardMapModular:
         self.velocity_enabled = AppConfig.VELOCITY_ENABLED
         self.velocity_history_size = AppConfig.VELOCITY_HISTORY_SIZE
         
+        # Cambios en vivo del panel de configuración (se aplican entre frames)
+        self._pending_config = deque()
+        
+        # Dedos activos: el estado de los dedos que no se ven expira por TTL
+        self.finger_registry = FingerRegistry(ttl=AppConfig.FINGER_STATE_TTL)
+        self.finger_registry.track_dict(self.finger_depths)
+        self.finger_registry.track_dict(self.finger_depth_history)
+        
         # NUEVO: Sistema modular de algoritmos
-        self.algorithm_manager = AlgorithmManager()
+        self.algorithm_manager = AlgorithmManager(finger_registry=self.finger_registry)
         self._initialize_algorithms()
         
     def _initialize_algorithms(self):
@@ -66,7 +84,8 @@ class KeyboardMapModular:
             'Suavizado': SuavizadoAlgorithm(),
             'Multi-nota': MultinotaAlgorithm(),
             'Filtro Espacial': FiltroEspacialAlgorithm(),
-            'Zona Salida': ZonaSalidaAlgorithm()
+            'Zona Salida': ZonaSalidaAlgorithm(),
+            'Predicción': PrediccionAlgorithm()
         }
         
         # Registrar algoritmos en orden de ejecución
@@ -95,8 +114,31 @@ class KeyboardMapModular:
         """Actualiza el umbral de profundidad."""
         self.depth_threshold = threshold
     
+    def set_velocity_curve(self, name):
+        """Cambia la curva rapidez del golpe -> velocidad MIDI (AppConfig.VELOCITY_CURVES)."""
+        self.key_state.velocity_curve = VelocityCurve.from_config(name)
+    
+    def schedule_config(self, **values):
+        """
+        Encola parámetros de detección para aplicarlos al inicio del siguiente frame.
+        
+        Args:
+            **values: depth_threshold, velocity_threshold, velocity_enabled,
+                      velocity_history_size
+        """
+        self._pending_config.append(values)
+    
+    def _apply_pending_config(self):
+        """Aplica de una vez todos los parámetros encolados."""
+        while self._pending_config:
+            for name, value in self._pending_config.popleft().items():
+                if name in self.LIVE_CONFIG:
+                    setattr(self, name, value)
+                else:
+                    print(f"⚠ Parámetro de detección desconocido: {name}")
+    
     def get_kayboard_map(self, virtual_keyboard, fingertips_pos, 
-                        finger_depths=None, keyboard_n_key=13):
+                        finger_depths=None, keyboard_n_key=13, timestamp=None):
         """
         Genera el mapa de teclado usando el sistema modular de algoritmos.
         
@@ -105,37 +147,49 @@ class KeyboardMapModular:
             fingertips_pos: Lista de posiciones de dedos [(hand_id, tip_id, x, y), ...]
             finger_depths: Dict con profundidades {(hand_id, tip_id): depth_cm}
             keyboard_n_key: Número de teclas
+            timestamp: Instante de captura del frame (VideoThread.frame_timestamp);
+                       si es None se usa la hora actual
             
         Returns:
             tuple: (on_map, off_map) - Arrays booleanos de teclas presionadas/liberadas
+                   (vistas de key_state, válidas hasta el siguiente frame). El
+                   instante de contacto de cada presión queda en key_state.press_time
         """
-        curr_map = np.full(keyboard_n_key, False, dtype=bool)
-        on_map = np.full(keyboard_n_key, False, dtype=bool)
-        off_map = np.full(keyboard_n_key, False, dtype=bool)
-        
-        # Inicializar prev_map si es primera vez
-        if len(self.prev_map) == 0:
-            self.prev_map = np.full(keyboard_n_key, False, dtype=bool)
+        # Cambios del panel de configuración pendientes (entre frames)
+        if self._pending_config:
+            self._apply_pending_config()
         
         if finger_depths is None:
             finger_depths = {}
         
         # FASE 1: Recolectar detecciones brutas
         raw_detections = []
-        current_time = time.time()
+        tracked_fingers = []  # Todos los dedos sobre el teclado (para Predicción)
+        current_time = timestamp if timestamp is not None else time.time()
         
-        for fingertip_pos in fingertips_pos:
+        # Todas las puntas visibles siguen activas (aunque no presionen)
+        if fingertips_pos:
+            self.finger_registry.touch(
+                finger_slots(np.array([fingertip_pos[0] for fingertip_pos in fingertips_pos]),
+                             np.array([fingertip_pos[1] for fingertip_pos in fingertips_pos])),
+                current_time)
+        
+        # Tecla de todas las puntas en una sola lectura del raster (-1 = fuera)
+        tip_keys = virtual_keyboard.lookup_keys(
+            [fingertip_pos[2] for fingertip_pos in fingertips_pos],
+            [fingertip_pos[3] for fingertip_pos in fingertips_pos])
+        
+        for fingertip_pos, key in zip(fingertips_pos, tip_keys):
             hand_id = fingertip_pos[0]
             tip_id = fingertip_pos[1]
             x_pos = fingertip_pos[2]
             y_pos = fingertip_pos[3]
             
             finger_id = (hand_id, tip_id)
+            key = int(key)
             
             # Verificar intersección con teclado
-            if virtual_keyboard.intersect((x_pos, y_pos)):
-                key = virtual_keyboard.find_key(x_pos, y_pos)
-                
+            if key >= 0:
                 if 0 <= key < keyboard_n_key:
                     # Obtener profundidad
                     if finger_id in finger_depths:
@@ -144,13 +198,16 @@ class KeyboardMapModular:
                         # Actualizar historial de profundidad
                         if finger_id not in self.finger_depth_history:
                             self.finger_depth_history[finger_id] = deque(maxlen=self.velocity_history_size)
-                        self.finger_depth_history[finger_id].append(depth)
+                        self.finger_depth_history[finger_id].append((current_time, depth))
                         
-                        # Calcular velocidad
+                        # Calcular velocidad (cm/s con timestamps de captura)
                         velocity = 0.0
                         if len(self.finger_depth_history[finger_id]) >= 2:
-                            history = list(self.finger_depth_history[finger_id])
-                            velocity = history[-2] - history[-1]
+                            prev_time, prev_depth = self.finger_depth_history[finger_id][-2]
+                            if current_time > prev_time:
+                                velocity = (prev_depth - depth) / (current_time - prev_time)
+                        
+                        tracked_fingers.append((finger_id, key, depth, velocity, x_pos, y_pos))
                         
                         # Verificar condición básica de activación
                         should_activate = False
@@ -174,29 +231,110 @@ class KeyboardMapModular:
         context = {
             'timestamp': current_time,
             'virtual_keyboard': virtual_keyboard,
-            'keyboard_n_key': keyboard_n_key
+            'keyboard_n_key': keyboard_n_key,
+            'key_state': self.key_state,
+            'tracked_fingers': DetectionBatch.from_tuples(tracked_fingers),
+            'press_depth': self.depth_threshold
         }
         
-        # Aplicar cadena de algoritmos
-        filtered_detections = self.algorithm_manager.process_detections(raw_detections, context)
+        # Aplicar cadena de algoritmos (lote struct-of-arrays)
+        batch = self.algorithm_manager.process_batch(DetectionBatch.from_tuples(raw_detections), context)
         
         # FASE 3: Aplicar detecciones filtradas al mapa
-        for detection in filtered_detections:
-            finger_id, key, depth, velocity, x_pos, y_pos = detection
-            curr_map[key] = True
-            self.finger_depths[finger_id] = depth
+        self.finger_depths.update(zip(batch.finger_ids(), batch.depth.tolist()))
+        
+        # FASE 4: Calcular cambios (on/off) de todas las teclas en una pasada
+        # (con instante de contacto y velocidad MIDI de cada presión)
+        contact_times, strike_speeds = self._press_contacts(
+            batch, context.get('press_depth', self.depth_threshold), current_time)
+        on_map, off_map = self.key_state.update(batch.key, batch.finger, current_time,
+                                                contact_times, strike_speeds)
+        
+        # FASE 5: Acorde de las teclas presionadas (máscara de 12 bits + tabla)
+        if on_map.any() or off_map.any():
+            self.chord_recognizer.update(self.key_state.pressed_keys().tolist(), virtual_keyboard.note_from_key)
+        
+        return on_map[:keyboard_n_key], off_map[:keyboard_n_key]
+    
+    def _press_contacts(self, batch, press_depth, current_time):
+        """
+        Instante de contacto y rapidez del golpe de cada detección (para las
+        teclas que se presionan).
+        
+        Interpola linealmente entre las dos muestras del historial del dedo
+        donde la profundidad cruzó el umbral, con los timestamps de captura.
+        Las pulsaciones predichas (aún sobre el umbral) extrapolan con la
+        velocidad. La rapidez del golpe es la velocidad filtrada del lote o,
+        si es mayor, la del tramo que cruzó el umbral (el dedo frena al
+        llegar al fondo y la cadena puede retrasar el flanco). Las teclas
+        ya presionadas usan current_time (no se leen).
+        
+        Args:
+            batch: DetectionBatch filtrado por la cadena de algoritmos
+            press_depth: Profundidad de contacto efectiva (cm)
+            current_time: Timestamp de captura del frame
+            
+        Returns:
+            tuple: (contact_times, strike_speeds) por detección (s, cm/s)
+        """
+        contact_times = np.full(len(batch), current_time)
+        strike_speeds = batch.velocity
+        new_press = np.flatnonzero(~self.key_state.pressed[batch.key])
+        if len(new_press) == 0:
+            return contact_times, strike_speeds
         
-        # FASE 4: Calcular cambios (on/off)
-        on_map = np.logical_and(curr_map, np.logical_not(self.prev_map))
-        off_map = np.logical_and(self.prev_map, np.logical_not(curr_map))
+        strike_speeds = strike_speeds.copy()
         
-        # Actualizar prev_map
-        self.prev_map = curr_map.copy()
+        finger_ids = batch.finger_ids()
+        for i in new_press.tolist():
+            depth = batch.depth[i]
+            velocity = batch.velocity[i]
+            if depth > press_depth:
+                # Pulsación predicha: contacto por delante del frame
+                if velocity > 0:
+                    contact_times[i] = current_time + (depth - press_depth) / velocity
+                continue
+            
+            # Último cruce del umbral en el historial (la cadena puede retrasar el flanco)
+            history = self.finger_depth_history.get(finger_ids[i])
+            if not history or history[-1][0] != current_time:
+                continue
+            samples = list(history)
+            for (prev_time, prev_depth), (next_time, next_depth) in zip(samples[-2::-1], samples[:0:-1]):
+                if prev_depth > press_depth >= next_depth and next_time > prev_time:
+                    fraction = (prev_depth - press_depth) / (prev_depth - next_depth)
+                    contact_times[i] = prev_time + fraction * (next_time - prev_time)
+                    strike_speeds[i] = max(velocity, (prev_depth - next_depth) / (next_time - prev_time))
+                    break
         
-        return on_map, off_map
+        return contact_times, strike_speeds
+    
+    @property
+    def prev_map(self):
+        """Teclas presionadas en el último frame (vista del estado por tecla)."""
+        return self.key_state.pressed
+    
+    @property
+    def current_chord(self):
+        """Acorde que se está tocando (ChordInfo) o None."""
+        return self.chord_recognizer.current
     
     # ==================== MÉTODOS DE CONTROL ====================
     
+    def release_all(self, timestamp=None):
+        """
+        Libera todas las teclas y olvida el acorde actual (p. ej. al perder las manos).
+        
+        Args:
+            timestamp: Instante de la liberación (None = time.time())
+        
+        Returns:
+            np.ndarray: Teclas liberadas (para enviar noteoff)
+        """
+        released = self.key_state.release_all(timestamp if timestamp is not None else time.time())
+        self.chord_recognizer.reset()
+        return released
+    
     def enable_algorithm(self, name):
         """Activa un algoritmo específico."""
         self.algorithm_manager.enable_algorithm(name)
@@ -225,6 +363,18 @@ class KeyboardMapModular:
         """Imprime el estado actual de todos los algoritmos."""
         self.algorithm_manager.print_status()
     
+    def enable_profiling(self):
+        """Activa la medición de tiempos por algoritmo."""
+        self.algorithm_manager.enable_profiling()
+    
+    def disable_profiling(self):
+        """Desactiva la medición de tiempos por algoritmo."""
+        self.algorithm_manager.disable_profiling()
+    
+    def export_algorithm_profile(self, path):
+        """Exporta los tiempos por algoritmo a JSON."""
+        return self.algorithm_manager.export_profile(path)
+    
     def get_current_chord(self):
         """
         Obtiene el acorde actual detectado por el algoritmo Multi-nota.
@@ -236,6 +386,18 @@ class KeyboardMapModular:
         if multinota and multinota.is_enabled():
             return multinota.get_current_chord()
         return set()
+    
+    def get_predictions(self):
+        """
+        Pulsaciones adelantadas por el algoritmo Predicción (aún sin confirmar).
+        
+        Returns:
+            list: [{'finger_id', 'key', 'confidence', 'deadline'}, ...]
+        """
+        prediccion = self.algorithm_manager.get_algorithm('Predicción')
+        if prediccion and prediccion.is_enabled():
+            return prediccion.get_predictions()
+        return []
 
 
 # Alias para compatibilidad con código existente
@@ -9,6 +9,7 @@ Contiene todos los parámetros de hardware y calibración
 
 import json
 import os
+import sys
 from pathlib import Path
 
 
@@ -42,8 +43,8 @@ class StereoConfig:
                                      # Rango recomendado: 2.0-5.0 cm
     
     # Sistema de detección de movimiento (velocity-based triggering)
-    VELOCITY_THRESHOLD = 1.5        # Velocidad mínima hacia abajo (cm/frame) para activar tecla
-                                     # Valores típicos: 1.0-3.0 cm/frame
+    VELOCITY_THRESHOLD = 45.0       # Velocidad mínima hacia abajo (cm/s) para activar tecla
+                                     # Valores típicos: 30-90 cm/s
                                      # Mayor valor = requiere golpe más fuerte
     VELOCITY_ENABLED = True          # Activar detección por velocidad
     VELOCITY_HISTORY_SIZE = 3        # Número de frames para calcular velocidad
@@ -77,6 +78,8 @@ class StereoConfig:
     WHITE_KEY_WIDTH_RATIO = 0.93    # Ancho tecla blanca base
     BLACK_KEY_HEIGHT_RATIO = 2/3    # Altura tecla negra / altura tecla blanca
     KEYBOARD_ALPHA = 0.5            # Transparencia del teclado virtual
+    KEYBOARD_HIGHLIGHT_COLOR = (0, 200, 255)  # Color de teclas presionadas (BGR)
+    KEYBOARD_HIGHLIGHT_ALPHA = 0.5  # Opacidad del resaltado de teclas
     
     # ==================== CORRECCIÓN DE PROFUNDIDAD ====================
     # Coeficientes para corrección de profundidad (delta_y)
@@ -90,10 +93,14 @@ class StereoConfig:
     HIT_ZONE_HEIGHT = 40            # Altura de la zona de acierto
     PERFECT_WINDOW = 0.10           # Ventana de tiempo para PERFECT (±100ms)
     GOOD_WINDOW = 0.25              # Ventana de tiempo para GOOD (±250ms)
+    # Latencia del pipeline (s) restada al contacto. Se calibra en el juego de
+    # ritmo: tocar al ritmo de las notas y presionar [O] (o salir con [F]);
+    # el valor impreso se copia aquí para las próximas sesiones
+    INPUT_LATENCY_OFFSET = 0.0
     
     # ==================== AUDIO ====================
     NOTE_VELOCITY = 127 * 2 // 3    # Velocidad de notas MIDI (84)
-    AUDIO_DRIVER = 'dsound'         # Driver de audio (Windows)
+    AUDIO_DRIVER = 'dsound' if sys.platform == 'win32' else None  # Driver de audio (None = el de fluidsynth)
     
     # ==================== PROCESAMIENTO ====================
     QUEUE_LENGTH = 3                # Longitud de cola para estabilización
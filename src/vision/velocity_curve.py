@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Curva de velocidad: rapidez del golpe (cm/s) -> velocidad MIDI
+La rapidez de bajada de la punta en el contacto se convierte con una
+tabla precalculada (pasos de 0.5 cm/s), así el costo en el frame es una
+lectura por tecla presionada
+"""
+
+import numpy as np
+
+from src.config.app_config import AppConfig
+
+
+class VelocityCurve:
+    """
+    velocidad = min_velocity + (127 - min_velocity) * t ** gamma
+    con t = (rapidez - min_speed) / (max_speed - min_speed) acotado a [0, 1].
+
+    gamma < 1 facilita tocar fuerte, gamma > 1 pide golpes más rápidos;
+    `fixed` ignora la rapidez (comportamiento anterior, vel = 84).
+    """
+
+    STEP = 0.5                         # cm/s por entrada de la tabla
+
+    def __init__(self, min_speed=10.0, max_speed=120.0, gamma=1.0, min_velocity=20, fixed=None):
+        """
+        Args:
+            min_speed: Rapidez (cm/s) que da min_velocity
+            max_speed: Rapidez (cm/s) que da 127
+            gamma: Forma de la curva
+            min_velocity: Velocidad MIDI del golpe más suave
+            fixed: Velocidad constante (None = usar la curva)
+        """
+        self.min_speed = float(min_speed)
+        self.max_speed = float(max(max_speed, min_speed + self.STEP))
+        self.gamma = float(gamma)
+        self.min_velocity = int(min_velocity)
+        self.fixed = fixed
+        self._build_table()
+
+    @classmethod
+    def from_config(cls, name=None):
+        """Curva de AppConfig.VELOCITY_CURVES (None = AppConfig.VELOCITY_CURVE)."""
+        name = name or AppConfig.VELOCITY_CURVE
+        if name not in AppConfig.VELOCITY_CURVES:
+            raise ValueError(f"Curva de velocidad '{name}' no existe. "
+                             f"Disponibles: {list(AppConfig.VELOCITY_CURVES)}")
+        return cls(**AppConfig.VELOCITY_CURVES[name])
+
+    def _build_table(self):
+        speeds = np.arange(0.0, self.max_speed + self.STEP, self.STEP)
+        if self.fixed is not None:
+            self.table = np.full(len(speeds), int(self.fixed), dtype=np.int16)
+            return
+        t = np.clip((speeds - self.min_speed) / (self.max_speed - self.min_speed), 0.0, 1.0)
+        velocity = self.min_velocity + (127 - self.min_velocity) * t ** self.gamma
+        self.table = np.clip(np.rint(velocity), 1, 127).astype(np.int16)
+
+    def __call__(self, speeds):
+        """
+        Args:
+            speeds: Rapidez de bajada (cm/s, escalar o array; NaN/negativa = la más suave,
+                    KeyStateMachine usa DEFAULT_VELOCITY para las no medidas)
+
+        Returns:
+            Velocidad MIDI (int16, misma forma que speeds)
+        """
+        index = np.nan_to_num(np.asarray(speeds, dtype=np.float64), nan=0.0) / self.STEP
+        return self.table[np.clip(index, 0, len(self.table) - 1).astype(np.intp)]
+
+    def calibrate(self, speeds, low=5, high=95):
+        """
+        Ajusta min_speed/max_speed a los golpes del usuario (percentiles).
+
+        Args:
+            speeds: Rapideces observadas (cm/s)
+            low, high: Percentiles que dan la velocidad mínima y 127
+
+        Returns:
+            True si había suficientes golpes (>= 8)
+        """
+        speeds = np.asarray(speeds, dtype=np.float64)
+        speeds = speeds[np.isfinite(speeds) & (speeds > 0)]
+        if len(speeds) < 8:
+            return False
+        self.min_speed, self.max_speed = np.percentile(speeds, [low, high])
+        self.max_speed = max(self.max_speed, self.min_speed + self.STEP)
+        self._build_table()
+        print(f"✓ Curva de velocidad calibrada: {self.min_speed:.0f}-{self.max_speed:.0f} cm/s")
+        return True
+
+    def __repr__(self):
+        if self.fixed is not None:
+            return f"VelocityCurve(fija={self.fixed})"
+        return (f"VelocityCurve({self.min_speed:.0f}-{self.max_speed:.0f} cm/s, "
+                f"gamma={self.gamma}, mín={self.min_velocity})")
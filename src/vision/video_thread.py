@@ -59,6 +59,9 @@ class VideoThread:
         self.current_frame_rate = 0.0
         self.loop_start_time = 0
         self.last_try_reconnection_time = 0
+        
+        # instante de captura (time.time() tras grab) del último frame entregado por next()
+        self.frame_timestamp = None
 
         # buffer
         if self.buffer_all:
@@ -177,7 +180,7 @@ class VideoThread:
         # load start frame
         frame = self.black_frame
         if not self.buffer.full():
-            self.buffer.put(frame, False)
+            self.buffer.put((time.time(), frame), False)
 
         # status
         self.frame_grab_on = True
@@ -188,6 +191,9 @@ class VideoThread:
         local_loop_start_time = time.time()
 
         while self.resource.grab():
+            # capture timestamp (grab is when the sensor frame is taken)
+            capture_time = time.time()
+
             # external shut down
             if not self.frame_grab_run:
                 break
@@ -206,7 +212,7 @@ class VideoThread:
                     if not grabbed:
                         break
 
-                    self.buffer.put(frame, False)
+                    self.buffer.put((capture_time, frame), False)
                     self.frame_count += 1
                     local_loop_frame_counter += 1
             # false buffered mode (for camera, loss allowed)
@@ -220,7 +226,7 @@ class VideoThread:
                 if self.buffer.full():
                     self.buffer.get()
 
-                self.buffer.put(frame, False)
+                self.buffer.put((capture_time, frame), False)
                 self.frame_count += 1
                 local_loop_frame_counter += 1
 
@@ -261,7 +267,7 @@ class VideoThread:
             if self.is_available() or not self.buffer.empty(): 
                 try:
                     #print('\t########## self.buffer.qsize():{}'.format(self.buffer.qsize()))
-                    frame = self.buffer.get(timeout=wait)
+                    self.frame_timestamp, frame = self.buffer.get(timeout=wait)
                     self.frames_returned += 1
                 except queue.Empty:
                     # print('Queue Empty!')
@@ -6,6 +6,22 @@ Módulo de Tests y Herramientas de Diagnóstico
 
 __all__ = [
     'test_triangulation_dlt',
+    'test_rectified_depth',
+    'test_angles_vectorized',
+    'test_key_raster',
+    'test_detection_batch',
+    'test_key_state',
+    'test_prediccion',
+    'test_chord_recognizer',
+    'test_rhythm_draw',
+    'test_rhythm_timeline',
+    'test_chart_compiler',
+    'test_audio_engine',
+    'test_soundfont_subset',
+    'test_sample_mixer',
+    'test_voice_manager',
+    'test_midi_recorder',
+    'test_latency',
     'test_stereo_depth',
     'test_imports',
     'test_detection',
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de triangulación por ángulos vectorizada (Frame_Angles)
+
+Compara angles_from_center/location (un dedo a la vez, módulo math) contra
+angles_from_center_array/location_array (todas las puntas en una pasada,
+con y sin tablas de ángulo por píxel).
+
+Uso: python -m tests.test_angles_vectorized
+"""
+
+import time
+
+import numpy as np
+
+from src.vision.angles import Frame_Angles
+
+
+CAMERA_SEPARATION = 14.21  # cm
+
+
+def _synthetic_pairs(n_points=10, seed=1):
+    """Puntas sintéticas dentro del frame con disparidad positiva"""
+    rng = np.random.default_rng(seed)
+    xl = rng.uniform(200, 639, n_points)
+    yl = rng.uniform(0, 479, n_points)
+    xr = xl - rng.uniform(100, 200, n_points)
+    yr = np.clip(yl + rng.normal(0, 2, n_points), 0, 479)
+    return xl, yl, xr, yr
+
+
+def _scalar(angler, xl, yl, xr, yr):
+    out = []
+    for i in range(len(xl)):
+        left = angler.angles_from_center(xl[i], yl[i], top_left=True, degrees=True)
+        right = angler.angles_from_center(xr[i], yr[i], top_left=True, degrees=True)
+        out.append(angler.location(CAMERA_SEPARATION, left, right, center=True, degrees=True))
+    return np.array(out)
+
+
+def _vector(angler, xl, yl, xr, yr, lookup):
+    left = angler.angles_from_center_array(xl, yl, lookup=lookup)
+    right = angler.angles_from_center_array(xr, yr, lookup=lookup)
+    return np.column_stack(angler.location_array(CAMERA_SEPARATION, left, right,
+                                                 center=True, degrees=True))
+
+
+def test_array_matches_scalar(repetitions=2000):
+    """Los resultados vectorizados deben coincidir con el cálculo escalar"""
+    angler = Frame_Angles(640, 480, 60)
+    xl, yl, xr, yr = _synthetic_pairs()
+
+    scalar = _scalar(angler, xl, yl, xr, yr)
+    exact = _vector(angler, xl, yl, xr, yr, lookup=False)
+    table = _vector(angler, xl, yl, xr, yr, lookup=True)
+
+    print("\n" + "="*70)
+    print(f"ÁNGULOS: escalar vs vectorizado - {len(xl)} dedos")
+    print("="*70)
+    print(f"Máx |Δ| (arctan):  {np.abs(scalar - exact).max():.2e} cm")
+    print(f"Máx |Δ| (tablas):  {np.abs(scalar - table).max():.2e} cm")
+
+    for name, fn in (('escalar', lambda: _scalar(angler, xl, yl, xr, yr)),
+                     ('vectorizado', lambda: _vector(angler, xl, yl, xr, yr, False)),
+                     ('tablas', lambda: _vector(angler, xl, yl, xr, yr, True))):
+        t0 = time.perf_counter()
+        for _ in range(repetitions):
+            fn()
+        print(f"Tiempo por frame {name:12s}: {(time.perf_counter() - t0) / repetitions * 1e6:.1f} us")
+    print("="*70 + "\n")
+
+    assert np.allclose(scalar, exact, atol=1e-9)
+    assert np.abs(scalar - table).max() < 0.01
+
+
+def test_angle_tables_follow_frame():
+    """Las tablas se reconstruyen con build_frame (resolución/FOV nuevos)"""
+    angler = Frame_Angles(640, 480, 60)
+    angler.pixel_width, angler.pixel_height = 1280, 720
+    angler.angle_height = None
+    angler.build_frame()
+
+    assert angler.x_angle_table.shape == (1280,)
+    assert angler.y_angle_table.shape == (720,)
+    assert abs(angler.x_angle_table[angler.x_origin]) < 1e-12
+    assert np.allclose(angler.angles_from_center_array([0.0, 1279.0], [0.0, 719.0], lookup=True),
+                       angler.angles_from_center_array([0.0, 1279.0], [0.0, 719.0]))
+
+
+if __name__ == '__main__':
+    test_array_matches_scalar()
+    test_angle_tables_follow_frame()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del motor de audio en hilo propio (AudioEngine)
+
+Usa el backend nulo (registra los eventos con timestamp) para verificar
+que encolar eventos no bloquea, que las secuencias programadas se
+despachan en orden y a tiempo, que cancelar apaga las notas y que las
+lecciones ya no detienen el lazo de visión. Incluye la latencia exacta
+evento -> sintetizador y, si pyfluidsynth está instalado, evento ->
+muestra con el render offline.
+
+Uso: python -m tests.test_audio_engine
+"""
+
+import os
+import time
+
+from src.audio import AudioEngine, NullBackend, OfflineRenderBackend, create_backend
+from src.audio.backends import fluidsynth
+from src.config.app_config import AppConfig
+from src.theory.lessons.lesson_rhythm import RhythmLesson
+from src.theory.lessons.lesson_scales import ScalesLesson
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+def test_post_never_blocks():
+    """Encolar desde el lazo de visión cuesta microsegundos"""
+    synth = NullBackend()
+    audio = AudioEngine(synth).start()
+
+    t0 = time.perf_counter()
+    for key in range(1000):
+        audio.noteon(0, key % 24 + 60, 90)
+    post_us = (time.perf_counter() - t0) / 1000 * 1e6
+
+    deadline = time.time() + 2.0
+    while audio.pending_events() and time.time() < deadline:
+        time.sleep(0.01)
+    audio.stop()
+
+    print(f"\nEncolar evento: {post_us:.2f} us | lag máx: {audio.stats['max_lag'] * 1e3:.2f} ms")
+    assert audio.stats['dispatched'] == 1000
+    assert sum(1 for e in synth.events if e[1] == 'off') == 24  # stop() apaga lo que suena
+
+
+def test_sequence_timing():
+    """Secuencia programada: orden correcto y despacho puntual"""
+    synth = NullBackend()
+    audio = AudioEngine(synth).start()
+
+    start = time.time() + 0.05
+    end = audio.play_sequence([(i * 0.05, 60 + i, 100, 0.04) for i in range(6)], start=start)
+    time.sleep(end - time.time() + 0.05)
+    audio.stop()
+
+    ons = [e for e in synth.events if e[1] == 'on']
+    assert [e[3] for e in ons] == list(range(60, 66))
+    errors = [abs(e[0] - (start + i * 0.05)) for i, e in enumerate(ons)]
+    print(f"\nError de programación: máx {max(errors) * 1e3:.2f} ms")
+    if STRICT_TIMING:
+        assert max(errors) < 0.02
+    assert len(synth.events) == 12
+
+
+def test_cancel_scheduled():
+    """cancel_scheduled descarta lo pendiente y apaga lo que suena"""
+    synth = NullBackend()
+    audio = AudioEngine(synth).start()
+
+    audio.play_sequence([(i * 0.2, 60 + i, 100, 0.5) for i in range(8)])
+    time.sleep(0.05)
+    audio.cancel_scheduled()
+    time.sleep(0.05)
+    assert audio.pending_events() == 0
+    audio.stop()
+
+    assert [e[1:4] for e in synth.events] == [('on', 0, 60), ('off', 0, 60)]
+
+
+def test_lessons_do_not_block():
+    """Las lecciones programan la reproducción y vuelven de inmediato"""
+    synth = NullBackend()
+    audio = AudioEngine(synth).start()
+
+    for lesson, key in ((ScalesLesson(), ord('r')), (RhythmLesson(), ord('p'))):
+        t0 = time.perf_counter()
+        assert lesson.handle_key(key, audio, 60)
+        elapsed = time.perf_counter() - t0
+        print(f"\n{lesson.name}: handle_key {elapsed * 1e3:.2f} ms")
+        if STRICT_TIMING:
+            assert elapsed < 0.05
+
+    assert audio.pending_events() > 0
+    audio.cancel_scheduled()
+    audio.stop()
+
+
+def test_null_backend_latency():
+    """Latencia exacta evento (timestamp) -> sintetizador con el backend nulo"""
+    backend = create_backend('null')
+    audio = AudioEngine(backend).start()
+
+    posted = []
+    for i in range(50):
+        posted.append(time.time())
+        audio.noteon(0, 60 + i % 12, 100, at=posted[-1])
+        time.sleep(0.002)
+    time.sleep(0.05)
+    audio.stop()
+
+    lags = sorted(event[0] - t for event, t in zip(backend.events, posted))
+    print(f"\nEvento -> sintetizador: p50 {lags[25] * 1e3:.3f} ms | máx {lags[-1] * 1e3:.3f} ms")
+    assert all(lag >= 0 for lag in lags)
+
+
+def test_offline_render_latency():
+    """Render offline: la nota suena en la muestra del evento"""
+    if fluidsynth is None:
+        print("\n⚠ pyfluidsynth no instalado: render offline omitido")
+        return
+    soundfont = AppConfig.get_soundfont_path()
+    if soundfont is None:
+        return
+
+    backend = OfflineRenderBackend()
+    sfid = backend.load_soundfont(soundfont)
+    backend.program_select(0, sfid, 0, 0)
+    backend.render(0.1)
+    backend.noteon(0, 60, 100)
+    backend.render(0.2)
+    backend.noteoff(0, 60)
+    backend.render(0.2)
+    backend.delete()
+
+    event_sample = backend.events[0][0]
+    onset = backend.onset_after(event_sample)
+    print(f"\nEvento -> muestra: {(onset - event_sample) / backend.sample_rate * 1e3:.2f} ms")
+    assert onset is not None and onset - event_sample < backend.sample_rate * 0.02
+
+
+if __name__ == '__main__':
+    test_post_never_blocks()
+    test_sequence_timing()
+    test_cancel_scheduled()
+    test_lessons_do_not_block()
+    test_null_backend_latency()
+    test_offline_render_latency()
+    print("✅ AudioEngine OK")
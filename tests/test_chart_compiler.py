@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del compilador de charts
+
+Verifica que las tuplas de Song y los dicts de BaseSong producen el mismo
+array compilado (time, key, duration, group), los nombres de tecla, el
+cache en disco (ida y vuelta y archivo dañado), la ventana de acordes
+contra el recorrido completo y el tiempo de indexar un catálogo grande.
+
+Uso: python -m tests.test_chart_compiler
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from src.gameplay import RhythmGame, TUTORIAL_FACIL
+from src.gameplay.chart_compiler import (CHART_DTYPE, chart_cache_path, chord_window, compile_chart,
+                                         load_compiled_chart, parse_key)
+from src.songs.song_manager import get_all_songs
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+def test_formats_match():
+    """Tuplas (tecla, tiempo) y dicts {"time", "keys"} compilan igual; acordes agrupados"""
+    tuples = [(9, 1.0), (0, 2.0), (4, 2.0), (9, 2.0), (7, 3.0, 0.5)]
+    dicts = [{"time": 2.0, "keys": ["A", "C", "E"]}, {"time": 1.0, "keys": ["La"]},
+             {"time": 3.0, "keys": ["G"], "duration": 0.5}]
+    a, b = compile_chart(tuples), compile_chart(dicts)
+    print(f"\n{a.tolist()}")
+    assert a.dtype == CHART_DTYPE and np.array_equal(a, b)
+    assert a['group'].tolist() == [0, 1, 1, 1, 2]
+    assert a['duration'][-1] == np.float32(0.5)
+    assert compile_chart(a) is a
+
+
+def test_key_names():
+    """Nombres en inglés y solfeo, alteraciones y octava explícita"""
+    assert [parse_key(k) for k in ("C", "C#", "Db", "Bb", "Sol#", "Si", "C1", "A1", 14)] == \
+        [0, 1, 1, 10, 8, 11, 12, 21, 14]
+    for bad in ("H", "Cb", -1, ""):
+        try:
+            parse_key(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} debió fallar")
+
+
+def test_disk_cache():
+    """Primera carga compila y guarda; la segunda lee el .npy; un archivo dañado se recompila"""
+    cache_dir = tempfile.mkdtemp()
+    chart = [{"time": 0.5 * i, "keys": ["C", "E"] if i % 4 == 0 else ["G"]} for i in range(50)]
+    path = chart_cache_path(chart, cache_dir)
+    assert not path.exists()
+
+    first = load_compiled_chart(chart, cache_dir)
+    assert path.exists()
+    second = load_compiled_chart(chart, cache_dir)
+    assert np.array_equal(first, second)
+
+    path.write_bytes(b'no es un npy')
+    third = load_compiled_chart(chart, cache_dir)
+    assert np.array_equal(first, third)
+    assert chart_cache_path(chart[:-1], cache_dir) != path             # otro contenido, otro archivo
+
+
+def test_chord_window():
+    """Búsqueda binaria = recorrido completo con now - behind < t < now + ahead"""
+    rng = random.Random(0)
+    chart = [(rng.randrange(24), round(rng.uniform(0, 120), 1)) for _ in range(3000)]
+    compiled = compile_chart(chart)
+    for now in np.arange(-1.0, 122.0, 0.37):
+        window = chord_window(compiled, now - 0.2, now + 3.0)
+        expected = sorted({t for _, t in chart if now - 0.2 < t < now + 3.0})
+        assert [t for t, _ in window] == expected
+        for t, keys in window:
+            assert keys == sorted(k for k, tt in chart if tt == t)
+
+
+def test_consumers():
+    """RhythmGame y las canciones de chart_files usan el formato compilado"""
+    game = RhythmGame()
+    game.start_game(TUTORIAL_FACIL)
+    assert game.chart.dtype == CHART_DTYPE and len(game.notes) == len(TUTORIAL_FACIL.chart)
+    assert game.chart['time'].tolist() == sorted(t for _, t in TUTORIAL_FACIL.chart)
+
+    for name, song in get_all_songs().items():
+        assert song.compile().dtype == CHART_DTYPE
+        assert song.end_time == max(entry["time"] for entry in song.chart)
+        print(f"{name}: {len(song.compile())} notas, {song.compile()['group'][-1] + 1} acordes")
+    assert get_all_songs() is get_all_songs()                          # catálogo escaneado una vez
+
+
+def test_catalog_index_time():
+    """Catálogo de 200 canciones x 1000 notas: compilar vs leer del cache"""
+    cache_dir = tempfile.mkdtemp()
+    rng = random.Random(1)
+    catalog = [[{"time": round(0.25 * i, 2), "keys": rng.sample(["C", "D", "E", "F", "G", "A", "B"], rng.randint(1, 3))}
+                for i in range(500)] for _ in range(200)]
+
+    start = time.perf_counter()
+    compiled = [load_compiled_chart(chart, cache_dir) for chart in catalog]
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    cached = [load_compiled_chart(chart, cache_dir) for chart in catalog]
+    second = time.perf_counter() - start
+
+    notes = sum(len(c) for c in compiled)
+    print(f"{len(catalog)} canciones ({notes} notas): compilar {first * 1e3:.0f} ms, "
+          f"desde cache {second * 1e3:.0f} ms ({compiled[0].nbytes // len(compiled[0])} bytes por nota)")
+    assert all(np.array_equal(a, b) for a, b in zip(compiled, cached))
+    if STRICT_TIMING:
+        assert second < first
+
+
+if __name__ == '__main__':
+    test_formats_match()
+    test_key_names()
+    test_disk_cache()
+    test_chord_window()
+    test_consumers()
+    test_catalog_index_time()
+    print("✅ Compilador de charts OK")
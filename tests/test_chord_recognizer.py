@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del reconocimiento de acordes (máscara de 12 bits + tabla)
+
+Verifica tónica, tipo e inversión de todas las tríadas, séptimas y sus en
+las 12 tonalidades, los casos ambiguos (resueltos por el bajo), el costo
+por frame frente a un identificador por fuerza bruta y el acorde actual de
+KeyboardMapModular.
+
+Uso: python -m tests.test_chord_recognizer
+"""
+
+import itertools
+import time
+
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.theory.chord_recognizer import (CHORD_QUALITIES, ChordRecognizer, chord_notes,
+                                         identify_chord, pitch_class_mask)
+from src.vision.keyboard_mapper import KeyboardMapModular
+
+
+def _brute_force(notes):
+    """Identificador de referencia: prueba cada tónica y tipo"""
+    mask = pitch_class_mask(notes)
+    for quality, _, _, _ in CHORD_QUALITIES:
+        for root in range(12):
+            if pitch_class_mask(chord_notes(root, quality)) == mask:
+                return root, quality
+    return None
+
+
+def test_all_chords_and_inversions():
+    """Todas las tónicas, tipos e inversiones (en dos octavas)"""
+    for quality, _, _, intervals in CHORD_QUALITIES:
+        for root in range(12):
+            notes = chord_notes(60 + root, quality)
+            for inversion in range(len(intervals)):
+                voiced = notes[inversion:] + [n + 12 for n in notes[:inversion]]
+                chord = identify_chord(voiced + [voiced[0] + 12])  # bajo doblado
+
+                assert chord is not None
+                assert chord.mask == pitch_class_mask(notes)
+                if chord.root == root and chord.quality == quality:
+                    assert chord.inversion == inversion
+                else:
+                    # Ambiguo (aum, dim7, sus2/sus4...): el bajo gana como tónica
+                    assert pitch_class_mask(chord_notes(chord.root, chord.quality)) == chord.mask
+
+
+def test_examples():
+    """Nombres y cifrados"""
+    assert identify_chord([60, 64, 67]).name == "Do Mayor"
+    assert identify_chord([64, 67, 72]).symbol == "Do/Mi"
+    assert identify_chord([57, 60, 64, 67]).symbol == "Lam7"
+    assert identify_chord([67, 72, 74]).symbol == "Solsus4"   # no Dosus2/Sol
+    assert identify_chord([60, 62, 67]).symbol == "Dosus2"
+    assert identify_chord([60, 64]) is None
+    assert identify_chord([60, 61, 62]) is None
+
+
+def test_recognizer_per_frame(repetitions=20000):
+    """Costo por frame: tabla vs fuerza bruta"""
+    recognizer = ChordRecognizer()
+    note_from_key = {k: 60 + k for k in range(24)}.__getitem__
+    frames = [list(keys) for keys in itertools.islice(itertools.combinations(range(24), 4), repetitions)]
+
+    t0 = time.perf_counter()
+    for keys in frames:
+        recognizer.update(keys, note_from_key)
+    table_us = (time.perf_counter() - t0) / len(frames) * 1e6
+
+    t0 = time.perf_counter()
+    for keys in frames[:2000]:
+        _brute_force([60 + k for k in keys])
+    brute_us = (time.perf_counter() - t0) / 2000 * 1e6
+
+    print(f"\nAcorde por frame: tabla {table_us:.2f} us | fuerza bruta {brute_us:.2f} us")
+    assert recognizer.stats['chords_detected'] > 0
+
+
+def test_mapper_current_chord():
+    """KeyboardMapModular reconoce el acorde de las teclas presionadas"""
+    vk = VirtualKeyboard(640, 480, 14)
+    km = KeyboardMapModular()
+    y = vk.kb_y0 + 0.9 * (vk.kb_y1 - vk.kb_y0)   # zona de teclas blancas
+    white = vk.kb_len / 14
+    tips = [(0, tip, vk.kb_x0 + (i + 0.5) * white, y) for tip, i in ((4, 0), (8, 2), (12, 4))]
+    depths = {(0, tip): 1.0 for _, tip, _, _ in tips}
+
+    for frame in range(3):
+        km.get_kayboard_map(vk, tips, depths, 24, timestamp=1.0 + frame / 30)
+
+    print(f"\nTeclas {km.key_state.pressed_keys().tolist()} -> {km.current_chord.name}")
+    assert km.current_chord.symbol == "Do"
+
+    # Manos fuera del cuadro: se liberan las teclas y el acorde
+    pressed = km.key_state.pressed_keys().tolist()
+    assert km.release_all(2.0).tolist() == pressed
+    assert km.current_chord is None and len(km.key_state.pressed_keys()) == 0
+
+
+if __name__ == '__main__':
+    test_all_chords_and_inversions()
+    test_examples()
+    test_recognizer_per_frame()
+    test_mapper_current_chord()
+    print("✅ ChordRecognizer OK")
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del lote de detecciones (DetectionBatch) y de process_batch por algoritmo
+
+Verifica la conversión tuplas <-> arrays, el orden secuencial cuando una
+tecla o dedo se repite en el mismo frame, y que la cadena completa por
+lotes produce lo mismo que una copia congelada de los algoritmos
+originales por tupla. Incluye el perfilado por etapa de AlgorithmManager
+(percentiles y exportación JSON) y la cadena precompilada con cambios encolados entre frames, la expiración
+(TTL) del estado por dedo y la velocidad en cm/s independiente del FPS.
+
+Uso: python -m tests.test_detection_batch
+"""
+
+import json
+import math
+import random
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision.algorithms import AlgorithmManager, DetectionBatch
+from src.vision.algorithms.algo_antirebote import AntireboteAlgorithm
+from src.vision.algorithms.algo_histeresis import HisteresisAlgorithm
+from src.vision.algorithms.algo_suavizado import SuavizadoAlgorithm
+from src.vision.algorithms.algo_multinota import MultinotaAlgorithm
+from src.vision.algorithms.algo_filtro_espacial import FiltroEspacialAlgorithm
+from src.vision.algorithms.algo_zona_salida import ZonaSalidaAlgorithm
+from src.vision.algorithms.detection_batch import occurrence_rank
+from src.vision.algorithms.stage_profiler import StageHistogram
+
+
+def _build_manager():
+    """Cadena completa con todos los algoritmos activos"""
+    manager = AlgorithmManager()
+    for algorithm in (AntireboteAlgorithm(), HisteresisAlgorithm(), SuavizadoAlgorithm(),
+                      MultinotaAlgorithm(), FiltroEspacialAlgorithm(), ZonaSalidaAlgorithm()):
+        algorithm.enable()
+        manager.register_algorithm(algorithm)
+    return manager
+
+
+def _random_frames(vk, n_frames=200, seed=0):
+    """Secuencia de frames con dedos y teclas repetidas"""
+    rng = random.Random(seed)
+    t = 100.0
+    frames = []
+    for _ in range(n_frames):
+        t += rng.choice([0.0, 0.01, 0.033, 0.05, 0.2])
+        detections = []
+        for _ in range(rng.randint(0, 10)):
+            finger_id = (rng.randint(0, 1), rng.choice([4, 8, 12, 16, 20]))
+            detections.append((finger_id, rng.randint(0, 23), rng.uniform(0, 5),
+                               rng.uniform(-1, 1), rng.uniform(vk.kb_x0, vk.kb_x1),
+                               rng.uniform(vk.kb_y0 - 5, vk.kb_y1 + 5)))
+        frames.append((t, detections))
+    return frames
+
+
+def test_roundtrip():
+    """from_tuples/to_tuples conservan valores y orden"""
+    detections = [((0, 8), 3, 1.5, 0.2, 100.0, 200.0),
+                  ((1, 4), 7, 0.5, -0.1, 300.0, 210.0)]
+    batch = DetectionBatch.from_tuples(detections)
+
+    assert len(batch) == 2
+    assert batch.to_tuples() == detections
+    assert batch.finger_ids() == [(0, 8), (1, 4)]
+    assert DetectionBatch.from_tuples([]).to_tuples() == []
+    assert batch.select(np.array([False, True])).to_tuples() == detections[1:]
+
+
+def test_occurrence_rank():
+    """Rango de aparición: 0 la primera vez, 1 la segunda..."""
+    rank = occurrence_rank(np.array([5, 3, 5, 5, 3, 9]))
+    assert rank.tolist() == [0, 0, 1, 2, 1, 0]
+
+
+def test_duplicate_key_in_frame():
+    """Antirebote bloquea la segunda pulsación de la misma tecla en el frame"""
+    algorithm = AntireboteAlgorithm()
+    detections = [((0, 8), 4, 1.0, 0.0, 0.0, 0.0),
+                  ((1, 8), 4, 1.0, 0.0, 0.0, 0.0),
+                  ((0, 12), 5, 1.0, 0.0, 0.0, 0.0)]
+
+    result = algorithm.process(detections, {'timestamp': 10.0})
+
+    assert [d[0] for d in result] == [(0, 8), (0, 12)]
+    assert algorithm.stats['blocked_presses'] == 1
+
+
+class _TupleReference:
+    """
+    Referencia congelada: los algoritmos originales, tupla por tupla con dicts
+    (antes de DetectionBatch). Suavizado con la pendiente en cm/s.
+    """
+
+    def __init__(self):
+        self.last_press = {}          # Antirebote: {key: t}
+        self.key_pressed = {}         # Histéresis: {key: bool}
+        self.depth_history = {}       # Suavizado: {finger: deque((t, depth))}
+        self.press_times = {}         # Multi-nota: {key: t}
+        self.positions = {}           # Filtro espacial: {finger: (x, y, key, depth)}
+        self.last_valid = {}          # Zona salida: {finger: (t, y)}
+        self.in_exit_zone = {}        # Zona salida: {finger: t de entrada}
+
+    def process(self, detections, t, vk):
+        # Antirebote (50 ms por tecla)
+        kept = []
+        for d in detections:
+            if d[1] in self.last_press and t - self.last_press[d[1]] < 0.05:
+                continue
+            self.last_press[d[1]] = t
+            kept.append(d)
+
+        # Histéresis (presiona <= 3 cm, suelta > 4 cm)
+        detections, kept = kept, []
+        for d in detections:
+            if self.key_pressed.get(d[1], False):
+                if d[2] <= 4.0:
+                    kept.append(d)
+                else:
+                    self.key_pressed[d[1]] = False
+            elif d[2] <= 3.0:
+                self.key_pressed[d[1]] = True
+                kept.append(d)
+
+        # Suavizado (ventana de 7 muestras)
+        detections, kept = kept, []
+        for finger_id, key, depth, velocity, x, y in detections:
+            history = self.depth_history.setdefault(finger_id, deque(maxlen=7))
+            history.append((t, depth))
+            elapsed = history[-1][0] - history[0][0]
+            if len(history) >= 2 and elapsed > 0:
+                velocity = (history[0][1] - history[-1][1]) / elapsed
+            kept.append((finger_id, key, depth, velocity, x, y))
+
+        # Multi-nota (solo registra acordes; no filtra)
+        for d in kept:
+            self.press_times[d[1]] = t
+        self.press_times = {k: pt for k, pt in self.press_times.items() if t - pt <= 0.1}
+
+        # Filtro espacial (dedos a < 35 px en teclas a <= 2: queda el más profundo)
+        for finger_id, key, depth, _, x, y in kept:
+            self.positions[finger_id] = (x, y, key, depth)
+        fingers, removed = list(self.positions), set()
+        for i, f1 in enumerate(fingers):
+            for f2 in fingers[i + 1:]:
+                x1, y1, k1, d1 = self.positions[f1]
+                x2, y2, k2, d2 = self.positions[f2]
+                if math.hypot(x2 - x1, y2 - y1) < 35 and abs(k2 - k1) <= 2:
+                    removed.add(f2 if d1 < d2 else f1)
+        detections = [d for d in kept if d[0] not in removed]
+
+        # Zona salida (30 px sobre el borde inferior, 0.3 s de gracia)
+        kept = []
+        for d in detections:
+            finger_id, y = d[0], d[5]
+            if y < vk.kb_y1 - 30:
+                self.last_valid[finger_id] = (t, y)
+                self.in_exit_zone.pop(finger_id, None)
+                kept.append(d)
+                continue
+            entered = self.in_exit_zone.setdefault(finger_id, t)
+            if finger_id in self.last_valid:
+                last_t, last_y = self.last_valid[finger_id]
+                if t - last_t > 0 and (y - last_y) / (t - last_t) > 10 and t - entered > 0.3:
+                    continue
+            self.last_valid[finger_id] = (t, y)
+            kept.append(d)
+        return kept
+
+
+def test_batch_chain_matches_tuples():
+    """process_batch (arrays) == algoritmos originales por tupla en toda la cadena"""
+    vk = VirtualKeyboard(640, 480, 14)
+    reference = _TupleReference()
+    by_batch = _build_manager()
+
+    n_kept = 0
+    for t, detections in _random_frames(vk):
+        context = {'timestamp': t, 'virtual_keyboard': vk, 'keyboard_n_key': 24}
+        expected = reference.process(list(detections), t, vk)
+        batch = by_batch.process_batch(DetectionBatch.from_tuples(detections), dict(context))
+        n_kept += len(expected)
+
+        assert batch.finger_ids() == [d[0] for d in expected]
+        assert batch.key.tolist() == [d[1] for d in expected]
+        assert np.allclose(batch.velocity, [d[3] for d in expected])
+    assert n_kept > 100                                         # la cadena deja pasar detecciones
+
+
+def test_chain_throughput(repetitions=2000):
+    """Tiempo por frame de la cadena completa con 10 dedos"""
+    vk = VirtualKeyboard(640, 480, 14)
+    manager = _build_manager()
+    frames = _random_frames(vk, n_frames=repetitions, seed=1)
+
+    t0 = time.perf_counter()
+    for t, detections in frames:
+        context = {'timestamp': t, 'virtual_keyboard': vk, 'keyboard_n_key': 24}
+        manager.process_batch(DetectionBatch.from_tuples(detections), context)
+    elapsed = (time.perf_counter() - t0) / repetitions
+
+    print(f"\nCadena por lotes: {elapsed * 1e6:.1f} us/frame")
+
+
+
+def test_histogram_percentiles():
+    """Percentiles del histograma dentro del ancho de bin"""
+    histogram = StageHistogram()
+    samples = np.random.default_rng(0).lognormal(np.log(20000), 0.5, 5000)
+    for elapsed in samples.astype(np.int64):
+        histogram.record(int(elapsed), 1, 1)
+
+    for q in (50, 95, 99):
+        exact = np.percentile(samples, q) / 1e3
+        assert abs(histogram.percentile(q) - exact) / exact < 0.15
+
+
+def test_profiling_report():
+    """Con perfilado: reporte por etapa, conteos in/out y export JSON"""
+    vk = VirtualKeyboard(640, 480, 14)
+    manager = _build_manager()
+    assert manager.get_profile() == {}
+
+    manager.enable_profiling()
+    frames = _random_frames(vk)
+    for t, detections in frames:
+        context = {'timestamp': t, 'virtual_keyboard': vk, 'keyboard_n_key': 24}
+        manager.process_detections(detections, context)
+
+    report = manager.get_profile()
+    names = [algorithm.name for algorithm in manager.algorithms]
+    assert list(report) == names + ['Total']
+    assert report['Total']['frames'] == len(frames)
+    assert report['Total']['detections_in'] == sum(len(d) for _, d in frames)
+    for previous, current in zip(names, names[1:]):
+        assert report[previous]['detections_out'] == report[current]['detections_in']
+
+    manager.print_status()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = manager.export_profile(Path(tmp) / 'profile.json')
+        with open(path) as f:
+            assert json.load(f) == json.loads(json.dumps(report))
+
+    manager.disable_profiling()
+    assert manager.profiler is None
+
+
+
+def test_scheduled_changes_between_frames():
+    """schedule_change no toca la cadena hasta el siguiente frame"""
+    manager = _build_manager()
+    names = [algorithm.name for algorithm in manager.algorithms]
+    assert manager._chain[0] == tuple(names)
+    assert manager.get_algorithm('Suavizado') is manager.algorithms[2]
+
+    manager.disable_algorithm('Multi-nota')
+    assert 'Multi-nota' not in manager._chain[0]
+
+    manager.schedule_change('Antirebote', enabled=False)
+    manager.schedule_change('Histéresis', press_threshold=2.5)
+    assert manager._chain[0][0] == 'Antirebote'
+    assert manager.get_algorithm('Histéresis').press_threshold == 3.0
+
+    manager.process_batch(DetectionBatch.empty(), {'timestamp': 1.0})
+    assert manager._chain[0] == ('Histéresis', 'Suavizado', 'Filtro Espacial', 'Zona Salida')
+    assert manager.get_algorithm('Histéresis').press_threshold == 2.5
+
+
+
+def test_finger_state_ttl():
+    """Los dedos que no se ven por más del TTL se olvidan en todos los algoritmos"""
+    vk = VirtualKeyboard(640, 480, 14)
+    manager = _build_manager()
+    manager.finger_registry.ttl = 0.5
+    finger_depths = {(0, 8): 1.0, (1, 4): 2.0}
+    manager.finger_registry.track_dict(finger_depths)
+    context = {'virtual_keyboard': vk, 'keyboard_n_key': 24}
+
+    for t in (0.0, 0.1, 0.2):
+        manager.process_detections([((0, 8), 3, 1.0, 0.0, 200.0, 200.0),
+                                    ((1, 4), 4, 2.0, 0.0, 210.0, 200.0)],
+                                   dict(context, timestamp=t))
+    filtro = manager.get_algorithm('Filtro Espacial')
+    suavizado = manager.get_algorithm('Suavizado')
+    assert len(filtro.known_fingers) == 2
+    assert len(manager.finger_registry) == 2
+
+    # Solo (0, 8) sigue visible: (1, 4) expira pasado el TTL
+    for t in np.arange(0.3, 1.5, 0.1):
+        manager.process_detections([((0, 8), 3, 1.0, 0.0, 200.0, 200.0)],
+                                   dict(context, timestamp=t))
+
+    slot = 1 * 21 + 4
+    assert filtro.known_fingers.tolist() == [8]
+    assert suavizado.history_count[slot] == 0
+    assert len(manager.finger_registry) == 1
+    assert list(finger_depths) == [(0, 8)]
+    assert manager.finger_registry.stats['evicted'] == 1
+
+
+
+def test_velocity_is_frame_rate_independent():
+    """Mismo movimiento (30 cm/s hacia abajo) a 30 y 12 FPS -> misma velocidad"""
+    results = []
+    for fps in (30, 12):
+        algorithm = SuavizadoAlgorithm()
+        for frame in range(20):
+            t = 5.0 + frame / fps
+            depth = 10.0 - 30.0 * (t - 5.0)
+            batch = algorithm.process_batch(
+                DetectionBatch.from_tuples([((0, 8), 3, depth, 0.0, 0.0, 0.0)]),
+                {'timestamp': t})
+        results.append(batch.velocity[0])
+
+    print(f"\nVelocidad suavizada 30 FPS: {results[0]:.2f} cm/s | 12 FPS: {results[1]:.2f} cm/s")
+    assert np.allclose(results, 30.0)
+
+
+if __name__ == '__main__':
+    test_roundtrip()
+    test_occurrence_rank()
+    test_duplicate_key_in_frame()
+    test_batch_chain_matches_tuples()
+    test_chain_throughput()
+    test_histogram_percentiles()
+    test_profiling_report()
+    test_scheduled_changes_between_frames()
+    test_finger_state_ttl()
+    test_velocity_is_frame_rate_independent()
+    print("✅ DetectionBatch OK")
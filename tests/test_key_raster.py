@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del raster de teclas y del sprite del VirtualKeyboard
+
+Verifica que find_key/intersect (lectura del raster) coinciden con la
+geometría del teclado, que lookup_keys resuelve todas las puntas a la vez,
+que dibujar el teclado ya no hace crecer upper_zone_divisions y que el
+sprite cacheado produce la misma imagen que el dibujado completo por frame.
+Incluye el teclado en perspectiva (homografía desde 4 esquinas) y su
+borde inferior en la zona de salida.
+
+Uso: python -m tests.test_key_raster
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from src.calibration.keyboard_calibrator import KeyboardCalibrator
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision.algorithms import DetectionBatch
+from src.vision.algorithms.algo_zona_salida import ZonaSalidaAlgorithm
+from src.vision.stereo_config import StereoConfig
+
+
+WHITE_NOTES = [0, 2, 4, 5, 7, 9, 11, 12, 14, 16, 17, 19, 21, 23]
+
+
+def test_key_geometry():
+    """Centros de teclas blancas y negras devuelven la tecla esperada"""
+    vk = VirtualKeyboard(640, 480, 14)
+
+    y_white = int(vk.kb_y0 + vk.white_kb_height * 3 / 4)
+    for p, note in enumerate(WHITE_NOTES):
+        x = int(vk.kb_x0 + vk.white_key_width * (p + 0.5))
+        assert vk.intersect((x, y_white))
+        assert vk.find_key(x, y_white) == note
+
+    for p, ((x0, y0), (x1, y1)) in vk.upper_zone_divisions:
+        x, y = (x0 + x1) // 2, (y0 + y1) // 2
+        assert vk.find_key(x, y) == WHITE_NOTES[p] + 1
+
+    # Bordes exclusivos y fuera del canvas
+    assert not vk.intersect((vk.kb_x0, y_white))
+    assert not vk.intersect((vk.kb_x1, y_white))
+    assert vk.find_key(-5, 1000) == -1
+
+
+def test_lookup_matches_scalar():
+    """lookup_keys (todas las puntas) == find_key píxel a píxel"""
+    vk = VirtualKeyboard(640, 480, 14)
+    ys, xs = np.mgrid[0:480, 0:640]
+
+    batch = vk.lookup_keys(xs.ravel(), ys.ravel()).reshape(480, 640)
+    scalar = np.array([[vk.find_key(x, y) for x in range(640)] for y in range(480)])
+
+    assert np.array_equal(batch, scalar)
+
+
+def test_draw_does_not_grow_divisions(frames=300):
+    """Dibujar N frames no acumula divisiones ni ralentiza find_key"""
+    vk = VirtualKeyboard(640, 480, 14)
+    img = np.zeros((480, 640, 3), np.uint8)
+    n_divisions = len(vk.upper_zone_divisions)
+
+    for _ in range(frames):
+        vk.draw_virtual_keyboard(img)
+
+    t0 = time.perf_counter()
+    for _ in range(10000):
+        vk.find_key(300, 170)
+    t_find = (time.perf_counter() - t0) / 10000
+
+    print(f"\nDivisiones tras {frames} frames: {len(vk.upper_zone_divisions)} (inicial {n_divisions})")
+    print(f"find_key: {t_find * 1e6:.2f} us")
+
+    assert len(vk.upper_zone_divisions) == n_divisions
+
+
+def _draw_full_frame(vk, img):
+    """Dibujado de referencia: blending de todo el frame + formas"""
+    shapes = np.zeros_like(img, np.uint8)
+    cv2.rectangle(shapes, (vk.kb_x0, vk.kb_y0), (vk.kb_x1, vk.kb_y1),
+                  (255, 255, 255), cv2.FILLED)
+    alpha = StereoConfig.KEYBOARD_ALPHA
+    mask = shapes.astype(bool)
+    img[mask] = cv2.addWeighted(img, alpha, shapes, 1 - alpha, 0)[mask]
+    vk._draw_keyboard_shapes(img)
+
+
+def test_sprite_matches_full_frame(repetitions=300):
+    """El sprite con blending por ROI es idéntico al dibujado completo"""
+    vk = VirtualKeyboard(640, 480, 14)
+    img = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+    reference = img.copy()
+    _draw_full_frame(vk, reference)
+    cached = img.copy()
+    vk.draw_virtual_keyboard(cached)
+
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        _draw_full_frame(vk, img.copy())
+    t_full = (time.perf_counter() - t0) / repetitions
+
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        vk.draw_virtual_keyboard(img.copy())
+    t_sprite = (time.perf_counter() - t0) / repetitions
+
+    print(f"\nDibujado completo: {t_full * 1e3:.3f} ms | sprite: {t_sprite * 1e3:.3f} ms")
+
+    assert np.array_equal(reference, cached)
+
+
+def test_highlight_only_touches_key():
+    """El resaltado de una tecla solo modifica los píxeles de esa tecla"""
+    vk = VirtualKeyboard(640, 480, 14)
+    img = np.full((480, 640, 3), 90, np.uint8)
+
+    plain = img.copy()
+    vk.draw_virtual_keyboard(plain)
+    highlighted = img.copy()
+    vk.draw_virtual_keyboard(highlighted, pressed_keys=[1])
+
+    changed = (plain != highlighted).any(axis=2)
+    assert changed.any()
+    assert np.all(vk.key_raster[changed] == 1)
+
+
+CORNERS = [(150, 140), (500, 170), (560, 330), (90, 300)]
+
+
+def test_perspective_lookup():
+    """Con homografía, el centro de cada tecla proyectado sigue siendo esa tecla"""
+    vk = VirtualKeyboard(640, 480, 14)
+    flat = VirtualKeyboard(640, 480, 14)
+    vk.set_perspective(CORNERS)
+
+    ys, xs = np.nonzero(flat.key_raster != flat.NO_KEY)
+    sample = np.random.default_rng(0).choice(len(xs), 500, replace=False)
+    points = np.float32(np.column_stack((xs[sample], ys[sample]))).reshape(-1, 1, 2)
+    warped = cv2.perspectiveTransform(points + 0.5, vk.homography).reshape(-1, 2)
+
+    expected = flat.key_raster[ys[sample], xs[sample]]
+    found = vk.lookup_keys(warped[:, 0], warped[:, 1])
+    agreement = np.mean(found == expected)
+    print(f"\nCoincidencia teclas en perspectiva: {agreement * 100:.1f}%")
+
+    # Solo pueden fallar puntos en las divisiones entre teclas
+    assert agreement > 0.97
+    assert vk.find_key(5, 5) == -1
+
+    vk.clear_perspective()
+    assert np.array_equal(vk.key_raster, flat.key_raster)
+
+
+def test_perspective_sprite_roi():
+    """El sprite deformado solo cubre la caja envolvente del cuadrilátero"""
+    vk = VirtualKeyboard(640, 480, 14)
+    vk.set_perspective(CORNERS)
+    img = np.full((480, 640, 3), 90, np.uint8)
+    vk.draw_virtual_keyboard(img, pressed_keys=[1])
+
+    y0, y1, x0, x1 = vk.sprite_roi
+    assert x0 >= 85 and x1 <= 565
+    assert y0 >= 135 and y1 <= 335
+    assert np.all(img[:y0] == 90) and np.all(img[:, x1:] == 90)
+
+
+def test_perspective_exit_zone():
+    """Zona de salida medida desde el borde inferior deformado, no desde kb_y1"""
+    vk = VirtualKeyboard(640, 480, 14)
+    vk.set_perspective(CORNERS)
+    assert np.allclose(vk.bottom_edge([90, 560, 325]), [300, 330, 315])
+
+    def blocked(keyboard, x, y0):
+        # Dedo bajando 1 px por frame a 30 FPS durante 0.6 s
+        algorithm = ZonaSalidaAlgorithm(enabled=True)
+        n_blocked = 0
+        for frame in range(18):
+            batch = DetectionBatch.from_tuples([((0, 8), 3, 1.0, 0.0, float(x), float(y0 + frame))])
+            kept = algorithm.process_batch(batch, {'timestamp': 10.0 + frame / 30, 'virtual_keyboard': keyboard})
+            n_blocked += len(batch) - len(kept)
+        return n_blocked
+
+    # Lado izquierdo (borde ~300 px): y 250-268 sigue dentro del teclado
+    assert blocked(vk, 100, 250) == 0
+    assert blocked(VirtualKeyboard(640, 480, 14), 100, 250) > 0        # rectangular: kb_y1 = 276
+    # Lado derecho (borde ~329 px): y 300-318 ya está saliendo
+    assert blocked(vk, 550, 300) > 0
+
+
+class _NoGui:
+    """cv2 sin ventanas (headless): waitKey devuelve las teclas de la lista"""
+
+    def __init__(self, keys=()):
+        self.keys = list(keys)
+        self.waits = 0
+
+    def __getattr__(self, name):
+        return getattr(cv2, name)
+
+    def namedWindow(self, *args):
+        pass
+
+    setMouseCallback = destroyWindow = imshow = namedWindow
+
+    def waitKey(self, delay):
+        self.waits += 1
+        return self.keys.pop(0) if self.keys else 255
+
+
+class _NoFrameCamera:
+    """Cámara sin frames: terminada o reconectando (next devuelve None)"""
+
+    def __init__(self, finished):
+        self.finished = finished
+        self.calls = 0
+
+    def next(self, black=True, wait=0):
+        self.calls += 1
+        if self.calls > 100:
+            raise AssertionError("la calibración no sale sin frames")
+        return self.finished, None
+
+
+def test_calibration_without_frames():
+    """Sin frames: cámara terminada -> None; reconectando -> ESC sigue cancelando"""
+    from src.calibration import keyboard_calibrator
+    original = keyboard_calibrator.cv2
+    try:
+        keyboard_calibrator.cv2 = _NoGui()
+        assert KeyboardCalibrator(640, 480).run_keyboard_calibration(_NoFrameCamera(True)) is None
+
+        keyboard_calibrator.cv2 = gui = _NoGui(keys=[255, 255, 27])
+        assert KeyboardCalibrator(640, 480).run_keyboard_calibration(_NoFrameCamera(False)) is None
+        assert gui.waits == 3
+    finally:
+        keyboard_calibrator.cv2 = original
+
+
+def test_detect_corners():
+    """Detección automática de un cuadrilátero claro sobre fondo oscuro"""
+    frame = np.full((480, 640, 3), 40, np.uint8)
+    cv2.fillConvexPoly(frame, np.int32(CORNERS), (230, 230, 230))
+
+    detected = KeyboardCalibrator().detect_corners(frame)
+
+    assert detected is not None
+    assert np.abs(detected - np.float32(CORNERS)).max() < 6
+
+
+if __name__ == '__main__':
+    test_key_geometry()
+    test_lookup_matches_scalar()
+    test_draw_does_not_grow_divisions()
+    test_sprite_matches_full_frame()
+    test_highlight_only_touches_key()
+    test_perspective_lookup()
+    test_perspective_sprite_roi()
+    test_perspective_exit_zone()
+    test_calibration_without_frames()
+    test_detect_corners()
+    print("✅ Raster de teclas OK")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la máquina de estados por tecla (KeyStateMachine)
+
+Verifica flancos on/off, tiempos de presión/liberación y dedo dueño, y que
+KeyboardMapModular entrega los mismos flancos que el cálculo anterior con
+prev_map/curr_map nuevos por frame. Incluye el instante de contacto
+interpolado entre frames y su uso en la puntuación de RhythmGame.
+
+Uso: python -m tests.test_key_state
+"""
+
+import random
+
+import numpy as np
+
+from src.gameplay.rythm_game import RhythmGame
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision.key_state import KeyStateMachine
+from src.vision.keyboard_mapper import KeyboardMapModular
+from src.vision.velocity_curve import VelocityCurve
+
+
+def test_edges_and_times():
+    """Presión, mantenida y liberación de una tecla"""
+    machine = KeyStateMachine(24)
+
+    on, off = machine.update(np.array([3, 3, 5]), np.array([8, 12, 4]), 1.0)
+    assert np.flatnonzero(on).tolist() == [3, 5] and not off.any()
+    assert machine.owner[3] == 12  # el último gana
+
+    on, off = machine.update(np.array([3]), np.array([8]), 1.1)
+    assert not on.any() and machine.off_keys().tolist() == [5]
+    assert machine.release_time[5] == 1.1 and machine.owner[5] == KeyStateMachine.NO_OWNER
+    assert machine.held_time(1.5)[3] == 0.5
+
+    assert machine.release_all(2.0).tolist() == [3]
+    assert machine.pressed_keys().size == 0
+    assert machine.stats == {'presses': 2, 'releases': 2}
+
+
+def test_mapper_edges_match_prev_map():
+    """Flancos del mapper == lógica anterior (curr_map vs prev_map)"""
+    vk = VirtualKeyboard(640, 480, 14)
+    km = KeyboardMapModular()
+    rng = random.Random(0)
+    n_keys = 24
+    prev_map = np.zeros(n_keys, dtype=bool)
+
+    for _ in range(300):
+        tips = [(rng.randint(0, 1), tip, rng.uniform(vk.kb_x0, vk.kb_x1),
+                 rng.uniform(vk.kb_y0, vk.kb_y1)) for tip in rng.sample([4, 8, 12, 16, 20], 3)]
+        depths = {(h, t): rng.uniform(0, 6) for h, t, _, _ in tips}
+
+        on_map, off_map = km.get_kayboard_map(vk, tips, depths, n_keys)
+        curr_map = km.key_state.pressed[:n_keys].copy()
+
+        assert np.array_equal(on_map, curr_map & ~prev_map)
+        assert np.array_equal(off_map, prev_map & ~curr_map)
+        prev_map = curr_map
+
+
+def test_contact_time_interpolation():
+    """press_time = cruce real del umbral, no el frame en que se detecta"""
+    vk = VirtualKeyboard(640, 480, 14)
+    x = vk.kb_x0 + 0.3 * (vk.kb_x1 - vk.kb_x0)
+    y = vk.kb_y0 + 0.7 * (vk.kb_y1 - vk.kb_y0)
+
+    for phase in (0.0, 0.011, 0.027):
+        km = KeyboardMapModular()
+        press_depth = km.algorithm_manager.get_algorithm('Histéresis').press_threshold
+        start, speed = 2.0 + phase, 40.0     # baja a 40 cm/s desde 6 cm
+        contact = start + (6.0 - press_depth) / speed
+
+        for frame in range(12):
+            t = 2.0 + frame / 30.0
+            depth = max(0.5, 6.0 - speed * max(0.0, t - start))
+            on_map, _ = km.get_kayboard_map(vk, [(0, 8, x, y)], {(0, 8): depth}, 24, timestamp=t)
+            if on_map.any():
+                key = int(np.flatnonzero(on_map)[0])
+                break
+
+        print(f"\nFase {phase * 1e3:4.1f} ms: detectado {(t - contact) * 1e3:5.1f} ms tarde, "
+              f"contacto interpolado con error {(km.key_state.press_time[key] - contact) * 1e6:.3f} us")
+        assert t > contact
+        assert abs(km.key_state.press_time[key] - contact) < 1e-9
+
+
+def test_rhythm_scores_contact_time():
+    """RhythmGame puntúa con el instante de contacto y calibra la latencia"""
+    game = RhythmGame()
+    game.start_game([(3, 1.0 + 0.5 * i) for i in range(10)])
+    start = game.start_time
+
+    # Contacto 20 ms después de cada nota, pero procesado 150 ms más tarde
+    results = [game.check_hit(3, press_time=start + 1.0 + 0.5 * i + 0.02) for i in range(5)]
+    assert results == ['PERFECT'] * 5
+    assert game.calibrate_latency(min_samples=8) is None
+
+    for i in range(5, 10):
+        game.check_hit(3, press_time=start + 1.0 + 0.5 * i + 0.02)
+    offset = game.calibrate_latency(min_samples=8)
+    assert abs(offset - 0.02) < 1e-6
+
+
+def test_velocity_curve():
+    """Curva rapidez -> velocidad MIDI: monótona, acotada y calibrable"""
+    curve = VelocityCurve(min_speed=10, max_speed=120, gamma=1.0, min_velocity=20)
+    speeds = np.array([np.nan, -5.0, 0.0, 10.0, 65.0, 120.0, 500.0])
+    velocities = curve(speeds)
+    print(f"\n{curve}: {dict(zip(speeds.tolist(), velocities.tolist()))}")
+    assert velocities.tolist()[:4] == [20, 20, 20, 20]
+    assert velocities[-2] == velocities[-1] == 127
+    assert np.all(np.diff(curve(np.linspace(0, 150, 300))) >= 0)
+
+    assert np.all(VelocityCurve.from_config('fixed')(speeds) == KeyStateMachine.DEFAULT_VELOCITY)
+    assert VelocityCurve.from_config('soft')(40.0) > VelocityCurve.from_config('hard')(40.0)
+
+    assert not curve.calibrate([30.0] * 4)
+    assert curve.calibrate(np.linspace(30, 70, 50))
+    assert curve(30.0) <= 21 and curve(70.0) >= 126
+
+
+def test_strike_velocity():
+    """Golpe rápido -> nota fuerte; la velocidad sale del mismo paso que los flancos"""
+    vk = VirtualKeyboard(640, 480, 14)
+    x = vk.kb_x0 + 0.3 * (vk.kb_x1 - vk.kb_x0)
+    y = vk.kb_y0 + 0.7 * (vk.kb_y1 - vk.kb_y0)
+
+    results = {}
+    for speed in (15.0, 40.0, 100.0):
+        km = KeyboardMapModular()
+        for frame in range(30):
+            t = 1.0 + frame / 30.0
+            depth = max(0.5, 6.0 - speed * max(0.0, t - 1.1))
+            on_map, _ = km.get_kayboard_map(vk, [(0, 8, x, y)], {(0, 8): depth}, 24, timestamp=t)
+            if on_map.any():
+                key = int(np.flatnonzero(on_map)[0])
+                results[speed] = (km.key_state.press_speed[key], int(km.key_state.press_velocity[key]))
+                break
+
+    for speed, (measured, velocity) in results.items():
+        print(f"\nGolpe {speed:5.1f} cm/s -> medido {measured:5.1f} cm/s -> vel {velocity}")
+        assert abs(measured - speed) < 0.15 * speed
+    velocities = [results[s][1] for s in (15.0, 40.0, 100.0)]
+    assert velocities == sorted(velocities) and velocities[0] < velocities[-1]
+
+
+def test_unmeasured_speed_default_velocity():
+    """Rapidez desconocida (fallback sin profundidad, 1ª muestra) -> DEFAULT_VELOCITY, no la más suave"""
+    ks = KeyStateMachine(24, velocity_curve=VelocityCurve(min_speed=10, max_speed=120, min_velocity=20))
+    ks.update(np.array([1, 2, 3, 4]), np.array([0, 1, 2, 3]), 1.0, strike_speeds=[0.0, np.nan, -3.0, 200.0])
+    assert ks.press_velocity[[1, 2, 3]].tolist() == [KeyStateMachine.DEFAULT_VELOCITY] * 3
+    assert ks.press_velocity[4] == 127
+
+    # Fallback del mapper sin profundidad: detecciones con velocidad 0.0
+    vk = VirtualKeyboard(640, 480, 14)
+    x = vk.kb_x0 + 0.3 * (vk.kb_x1 - vk.kb_x0)
+    y = vk.kb_y0 + 0.7 * (vk.kb_y1 - vk.kb_y0)
+    km = KeyboardMapModular()
+    on_map, _ = km.get_kayboard_map(vk, [(0, 8, x, y)], None, 24, timestamp=1.0)
+    key = int(np.flatnonzero(on_map)[0])
+    print(f"\nFallback sin profundidad: tecla {key} -> vel {km.key_state.press_velocity[key]}")
+    assert km.key_state.press_velocity[key] == KeyStateMachine.DEFAULT_VELOCITY
+
+
+def test_velocity_calibration_from_mapper():
+    """[v]: la curva se ajusta a los golpes registrados; [V]: cambia de curva"""
+    km = KeyboardMapModular()
+    ks = km.key_state
+    assert not ks.calibrate_velocity()                                  # sin golpes
+    for i, speed in enumerate(np.linspace(30.0, 70.0, 20)):
+        ks.update(np.array([i % 24]), np.array([0]), 1.0 + i, strike_speeds=[speed])
+        ks.update(np.array([], dtype=int), np.array([], dtype=int), 1.5 + i)
+    assert ks.calibrate_velocity()
+    assert ks.velocity_curve(30.0) <= 25 and ks.velocity_curve(70.0) >= 125
+
+    km.set_velocity_curve('fixed')
+    assert ks.velocity_curve(100.0) == KeyStateMachine.DEFAULT_VELOCITY
+
+
+if __name__ == '__main__':
+    test_edges_and_times()
+    test_mapper_edges_match_prev_map()
+    test_contact_time_interpolation()
+    test_rhythm_scores_contact_time()
+    test_velocity_curve()
+    test_strike_velocity()
+    test_unmeasured_speed_default_velocity()
+    test_velocity_calibration_from_mapper()
+    print("✅ KeyStateMachine OK")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arnés de latencia extremo a extremo (captura -> sonido)
+
+Corre el mismo pipeline que main.py (cola de captura, detección de manos,
+triangulación, cadena de algoritmos + flancos, VoiceManager -> AudioEngine)
+con LatencyProbe y reporta la distribución de cada tramo:
+
+    captura -> next() -> detección -> triangulación -> flancos -> noteon
+    -> sintetizador (hilo de audio) -> 1ª muestra no silenciosa
+
+Fuentes:
+- Sintética (por defecto): cámaras simuladas a 30 FPS y un detector que
+  genera toques de un dedo; la triangulación por ángulos se ejecuta sobre
+  las puntas (mide su costo) pero la profundidad usada es la del guion.
+- Sesión grabada: dos videos (izquierda/derecha) con MediaPipe y la
+  triangulación de main (calibración estéreo si existe, si no ángulos).
+
+El tramo sintetizador -> 1ª muestra se mide con el render offline de
+fluidsynth (si pyfluidsynth y el soundfont están disponibles).
+
+Uso:
+    python -m tests.test_latency                       # sintético
+    python -m tests.test_latency left.avi right.avi    # sesión grabada
+"""
+
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from src.audio import AudioEngine, NullBackend, OfflineRenderBackend, VoiceManager
+from src.audio.backends import fluidsynth
+from src.common.latency_probe import FRAME_STAGES, LatencyProbe
+from src.config.app_config import AppConfig
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision import angles
+from src.vision.keyboard_mapper import KeyboardMapModular
+from src.vision.stereo_config import StereoConfig
+
+
+class SyntheticCamera:
+    """Cámara simulada: hilo que 'captura' a fps con la cola de 1 frame de VideoThread."""
+
+    def __init__(self, fps=30, width=640, height=480):
+        self.period = 1.0 / fps
+        self.black_frame = np.zeros((height, width, 3), np.uint8)
+        self.buffer = queue.Queue(1)
+        self.frame_timestamp = None
+        self._running = False
+
+    def start(self, t0):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, args=(t0,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+
+    def _loop(self, t0):
+        n = 0
+        while self._running:
+            n += 1
+            time.sleep(max(0.0, t0 + n * self.period - time.time()))
+            if self.buffer.full():
+                self.buffer.get()
+            self.buffer.put((time.time(), self.black_frame))
+
+    def next(self, black=True, wait=0):
+        try:
+            self.frame_timestamp, frame = self.buffer.get(timeout=wait)
+        except queue.Empty:
+            frame = self.black_frame.copy()
+        return False, frame
+
+
+class SyntheticDetector:
+    """
+    Detector simulado (misma interfaz que HandDetector): un índice toca una
+    tecla distinta cada `period` s, bajando a `speed` cm/s desde 6 cm.
+    """
+
+    def __init__(self, vk, side, period=0.4, speed=40.0, disparity=40):
+        self.vk, self.side = vk, side
+        self.period, self.speed, self.disparity = period, speed, disparity
+        self.t0 = 0.0
+        self.timestamp = None
+        self.depth = None
+
+    def findHands(self, frame):
+        return self.timestamp is not None
+
+    def getFingerTipsPos(self):
+        t = self.timestamp - self.t0
+        tap, phase = int(t // self.period), t % self.period
+        self.depth = max(0.5, 6.0 - self.speed * max(0.0, phase - 0.05))
+        if phase > 0.3:
+            self.depth = 6.0                                     # dedo arriba entre toques
+        white = tap % 14
+        x = self.vk.kb_x0 + (white + 0.5) * self.vk.kb_len / 14
+        y = self.vk.kb_y0 + 0.9 * (self.vk.kb_y1 - self.vk.kb_y0)
+        if self.side == 'right':
+            x -= self.disparity
+        return [0], [(0, 8, x, y)]
+
+
+def make_triangulator(use_calibration=True):
+    """
+    Triangulación de main.py para una lista de pares de puntas.
+
+    Returns:
+        función (fingers_left, fingers_right) -> {finger_id: profundidad}
+    """
+    config = StereoConfig()
+    if use_calibration:
+        try:
+            from src.calibration.calibration_config import CalibrationConfig
+            from src.vision import load_depth_estimator
+            estimator = load_depth_estimator(CalibrationConfig.CALIBRATION_FILE)
+
+            def triangulate(fingers_left, fingers_right):
+                points, valid = estimator.batch_triangulate_rectified(
+                    [(f[2], f[3]) for f in fingers_left], [(f[2], f[3]) for f in fingers_right])
+                return {(f[0], f[1]): float(p[2]) * 0.74
+                        for f, p, ok in zip(fingers_left, points, valid) if ok}
+            return triangulate
+        except (FileNotFoundError, ValueError, ImportError):
+            pass
+
+    angler = angles.Frame_Angles(config.PIXEL_WIDTH, config.PIXEL_HEIGHT,
+                                 config.ANGLE_WIDTH, config.ANGLE_HEIGHT)
+    angler.build_frame()
+
+    def triangulate(fingers_left, fingers_right):
+        a_left = angler.angles_from_center_array(
+            x=[f[2] for f in fingers_left], y=[f[3] for f in fingers_left], lookup=True)
+        a_right = angler.angles_from_center_array(
+            x=[f[2] for f in fingers_right], y=[f[3] for f in fingers_right], lookup=True)
+        X, Y, Z, D = angler.location_array(config.CAMERA_SEPARATION, a_left, a_right,
+                                           center=True, degrees=True)
+        depth = D - (0.006509695290859 * X * X + 0.039473684210526 * -1 * X)
+        return {(f[0], f[1]): float(d) for f, d in zip(fingers_left, depth)}
+    return triangulate
+
+
+def run_session(cam_left, cam_right, left_detector, right_detector, triangulate, probe,
+                duration, backend=None, depth_override=None):
+    """
+    Lazo de main.py reducido a las etapas que afectan la latencia.
+
+    Args:
+        depth_override: función () -> profundidad (detector sintético) o None
+
+    Returns:
+        (probe, audio) con las marcas y el motor de audio detenido
+    """
+    vk = VirtualKeyboard(640, 480, 14)
+    km = KeyboardMapModular()
+    audio = AudioEngine(backend or NullBackend()).start()
+    voices = VoiceManager(audio)
+    end, last = time.time() + duration, None
+
+    while time.time() < end:
+        finished_left, frame_left = cam_left.next(black=True, wait=0.1)
+        finished_right, frame_right = cam_right.next(black=True, wait=0.1)
+        if finished_left or finished_right:
+            break
+        if cam_left.frame_timestamp is None or cam_left.frame_timestamp == last:
+            continue
+        last = cam_left.frame_timestamp
+        probe.start_frame(cam_left.frame_timestamp)
+
+        fingers_left = fingers_right = []
+        for detector, frame, side in ((left_detector, frame_left, 'left'), (right_detector, frame_right, 'right')):
+            if isinstance(detector, SyntheticDetector):
+                detector.timestamp = cam_left.frame_timestamp
+            if detector.findHands(frame):
+                _, fingers = detector.getFingerTipsPos()
+                if side == 'left':
+                    fingers_left = fingers
+                else:
+                    fingers_right = fingers
+        probe.mark('inference')
+
+        if fingers_left and fingers_right:
+            depths = triangulate(fingers_left, fingers_right)
+            if depth_override is not None:
+                depths = {finger_id: depth_override() for finger_id in depths}
+            probe.mark('triangulation')
+
+            on_map, off_map = km.get_kayboard_map(vk, fingers_left, depths, 24,
+                                                  timestamp=cam_left.frame_timestamp)
+            probe.mark('key_state')
+            for k_pos in np.flatnonzero(on_map):
+                voices.noteon(0, vk.note_from_key(k_pos), int(km.key_state.press_velocity[k_pos]))
+                probe.note_on(k_pos)
+            for k_pos in np.flatnonzero(off_map):
+                voices.noteoff(0, vk.note_from_key(k_pos))
+        voices.update(hands_visible=bool(fingers_left and fingers_right))
+
+    time.sleep(0.05)
+    audio.stop()
+    probe.add_external('synth', audio.note_lags)
+    return probe, audio
+
+
+def measure_audio_onset(n_notes=20):
+    """
+    sintetizador -> 1ª muestra no silenciosa con el render offline de fluidsynth.
+
+    Returns:
+        Latencias (s); vacío si fluidsynth o el soundfont no están disponibles
+    """
+    soundfont = AppConfig.get_soundfont_path()
+    if fluidsynth is None or soundfont is None:
+        print("⚠ pyfluidsynth o soundfont no disponibles: tramo de audio omitido")
+        return []
+
+    synth = OfflineRenderBackend()
+    synth.program_select(0, synth.load_soundfont(soundfont), *AppConfig.SOUNDFONT_PRESETS[0])
+    latencies = []
+    for i in range(n_notes):
+        synth.render(0.05)
+        event = synth.samples_rendered
+        synth.noteon(0, 60 + i % 24, 90)
+        synth.render(0.1)
+        synth.noteoff(0, 60 + i % 24)
+        synth.render(0.3)
+        onset = synth.onset_after(event)
+        if onset is not None:
+            latencies.append((onset - event) / synth.sample_rate)
+    synth.delete()
+    return latencies
+
+
+def run_synthetic(duration=2.5):
+    vk = VirtualKeyboard(640, 480, 14)
+    cam_left, cam_right = SyntheticCamera(), SyntheticCamera()
+    left, right = SyntheticDetector(vk, 'left'), SyntheticDetector(vk, 'right')
+    t0 = time.time()
+    left.t0 = right.t0 = t0
+    cam_left.start(t0)
+    cam_right.start(t0)
+
+    probe = LatencyProbe()
+    try:
+        run_session(cam_left, cam_right, left, right, make_triangulator(use_calibration=False),
+                    probe, duration, depth_override=lambda: left.depth)
+    finally:
+        cam_left.stop()
+        cam_right.stop()
+    probe.add_external('audio', measure_audio_onset())
+    return probe
+
+
+def run_recorded(left_path, right_path, duration=600.0):
+    from src.vision.hand_detector import HandDetector
+    from src.vision.video_thread import VideoThread
+
+    config = StereoConfig()
+    cams = [VideoThread(video_source=path, video_width=config.PIXEL_WIDTH, video_height=config.PIXEL_HEIGHT,
+                        video_frame_rate=config.FRAME_RATE, buffer_all=True) for path in (left_path, right_path)]
+    detectors = [HandDetector(staticImageMode=False, detectionCon=config.HAND_DETECTION_CONFIDENCE,
+                              trackCon=config.HAND_TRACKING_CONFIDENCE) for _ in cams]
+    for cam in cams:
+        cam.start()
+
+    probe = LatencyProbe()
+    try:
+        run_session(cams[0], cams[1], detectors[0], detectors[1], make_triangulator(), probe, duration)
+    finally:
+        for cam in cams:
+            cam.stop()
+    probe.add_external('audio', measure_audio_onset())
+    return probe
+
+
+def test_synthetic_breakdown():
+    """Sesión sintética: todas las etapas del lazo tienen marcas y la suma cuadra"""
+    probe = run_synthetic(duration=2.5)
+    print("\n" + probe.report())
+
+    latencies = probe.stage_latencies()
+    assert probe.frame_count > 50
+    assert probe.note_count >= 4
+    for stage in ('dequeue', 'inference', 'triangulation', 'key_state', 'noteon', 'synth', 'total'):
+        assert len(latencies[stage]) > 0, stage
+        assert np.all(latencies[stage] >= 0), stage
+
+    # captura -> noteon = suma de los tramos del frame de cada nota
+    n = min(probe.note_count, probe.capacity)
+    parts = (probe.note_key_state[:n] - probe.note_capture[:n]) * 1e3 + latencies['noteon']
+    assert np.allclose(parts, latencies['total'])
+
+
+def test_ring_wrap():
+    """Notas anteriores a la vuelta del ring buffer conservan las marcas de su frame"""
+    clock = [100.0]
+    probe = LatencyProbe(capacity=8, clock=lambda: clock[0])
+    for frame in range(30):                                  # casi 4 vueltas del ring
+        capture = clock[0]
+        clock[0] += 0.010
+        probe.start_frame(capture)                           # dequeue: 10 ms
+        for stage in FRAME_STAGES[2:]:
+            clock[0] += 0.002
+            probe.mark(stage)                                # 2 ms por etapa
+        if frame % 3 == 0:
+            clock[0] += 0.001
+            probe.note_on(frame % 24)                        # flanco -> noteon: 1 ms
+        clock[0] += 0.020
+
+    latencies = probe.stage_latencies()
+    print(f"\nRing de 8: noteon {latencies['noteon']} ms | total {latencies['total']} ms")
+    assert len(latencies['noteon']) == 8
+    assert np.allclose(latencies['noteon'], 1.0)
+    assert np.allclose(latencies['total'], 10.0 + 2.0 * 3 + 1.0)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        print(run_recorded(sys.argv[1], sys.argv[2]).report())
+    else:
+        test_synthetic_breakdown()
+        test_ring_wrap()
+        print("✅ Arnés de latencia OK")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la grabación de sesiones en .mid (MidiRecorder)
+
+Verifica la codificación de longitudes variables, el ida y vuelta
+grabar -> read_midi con un reloj simulado (instantes exactos al tick),
+la pérdida acotada cuando el escritor se atrasa y el costo del noteon
+en el lazo con y sin grabación.
+
+Uso: python -m tests.test_midi_recorder
+"""
+
+import os
+import tempfile
+import time
+
+from src.audio import MidiRecorder, NullBackend, VoiceManager, read_midi
+from src.audio.midi_recorder import _vlq
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+class _ClockNs:
+    def __init__(self, t=10 ** 12):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def test_vlq():
+    """Valores de ejemplo de la especificación SMF"""
+    for value, encoded in ((0, b'\x00'), (0x40, b'\x40'), (0x7F, b'\x7F'), (0x80, b'\x81\x00'),
+                           (0x2000, b'\xC0\x00'), (0x3FFF, b'\xFF\x7F'), (0x0FFFFFFF, b'\xFF\xFF\xFF\x7F')):
+        assert _vlq(value) == encoded, (value, _vlq(value))
+
+
+def test_roundtrip():
+    """Notas grabadas a través de VoiceManager se leen con sus instantes y velocidades"""
+    clock, backend = _ClockNs(), NullBackend()
+    path = os.path.join(tempfile.mkdtemp(), 'sesion.mid')
+    recorder = MidiRecorder(backend, flush_interval=0.01, clock=clock).start(path)
+    voices = VoiceManager(recorder, clock=lambda: clock.t / 1e9)
+
+    expected = []
+    for i, key in enumerate((60, 64, 67, 72)):
+        clock.t += 250_000_000                                 # 0.25 s
+        voices.noteon(0, key, 40 + 20 * i)
+        expected.append((0.25 * (2 * i + 1), 'on', 0, key, 40 + 20 * i))
+        clock.t += 250_000_000
+        voices.noteoff(0, key)
+        expected.append((0.25 * (2 * i + 2), 'off', 0, key, 0))
+    time.sleep(0.05)                                           # pasa el escritor
+    assert recorder.stop() == path
+
+    events = read_midi(path)
+    print(f"\n{len(events)} eventos en {os.path.getsize(path)} bytes")
+    assert len(events) == len(expected)
+    resolution = recorder.tempo / 1e6 / recorder.ticks_per_beat
+    for (t, kind, chan, key, vel), (t_exp, *rest) in zip(events, expected):
+        assert abs(t - t_exp) <= resolution and [kind, chan, key, vel] == rest
+    # El backend recibió lo mismo que se grabó
+    assert [e[1:] for e in backend.events] == [e[1:] for e in expected]
+
+
+def test_overflow():
+    """Con el buffer lleno se pierden los más antiguos, el archivo sigue siendo válido"""
+    clock = _ClockNs()
+    path = os.path.join(tempfile.mkdtemp(), 'lleno.mid')
+    recorder = MidiRecorder(capacity=16, flush_interval=60, clock=clock).start(path)
+    for i in range(40):
+        clock.t += 1_000_000
+        recorder.noteon(0, 60 + i % 12, 90)
+    recorder.stop()
+
+    events = read_midi(path)
+    assert recorder.stats['dropped'] == 24 and len(events) == 16
+    assert events[0][3] == 60 + 24 % 12                        # sobreviven los últimos 16
+
+
+def test_split_sessions():
+    """split() cierra la sesión (libre) y empieza otra (juego) con su propio reloj y conteo"""
+    clock, folder = _ClockNs(), tempfile.mkdtemp()
+    free, game = os.path.join(folder, 'free.mid'), os.path.join(folder, 'game.mid')
+    recorder = MidiRecorder(flush_interval=0.01, clock=clock).start(free)
+    for key in (60, 62):
+        clock.t += 500_000_000
+        recorder.noteon(0, key, 90)
+
+    clock.t += 1_000_000_000
+    assert recorder.split(game) == free
+    clock.t += 250_000_000
+    recorder.noteon(0, 72, 100)
+    assert recorder.stop() == game
+
+    assert [e[3] for e in read_midi(free)] == [60, 62]
+    events = read_midi(game)
+    assert [e[3] for e in events] == [72] and recorder.stats['events'] == 1
+    assert abs(events[0][0] - 0.25) < 0.01                     # relativo al inicio de la partida
+
+
+def test_hot_path_cost():
+    """noteon del lazo: costo agregado por la grabación"""
+    n = 20000
+    results = {}
+    for label, record in (('sin grabación', False), ('con grabación', True)):
+        backend = NullBackend()
+        recorder = MidiRecorder(backend, capacity=n * 2)
+        if record:
+            recorder.start(os.path.join(tempfile.mkdtemp(), 'costo.mid'))
+        target = recorder if record else backend
+        start = time.perf_counter()
+        for i in range(n):
+            target.noteon(0, 60 + i % 24, 90)
+            target.noteoff(0, 60 + i % 24)
+        results[label] = (time.perf_counter() - start) / (2 * n) * 1e6
+        if record:
+            recorder.stop()
+        print(f"\n{label}: {results[label]:.2f} µs por evento")
+
+    overhead = results['con grabación'] - results['sin grabación']
+    print(f"Costo de la grabación: {overhead:.2f} µs por evento (frame de 33 ms)")
+    if STRICT_TIMING:
+        assert overhead < 20
+
+
+if __name__ == '__main__':
+    test_vlq()
+    test_roundtrip()
+    test_overflow()
+    test_split_sessions()
+    test_hot_path_cost()
+    print("✅ MidiRecorder OK")
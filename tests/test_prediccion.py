@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del algoritmo de Predicción de pulsación
+
+Simula sesiones de toques a 30 FPS (trayectorias de profundidad con ruido,
+velocidades de bajada variadas y fase de captura aleatoria) y mide la
+latencia desde el contacto real hasta el flanco on de KeyboardMapModular,
+con y sin Predicción. También verifica el rollback cuando el dedo frena
+antes de tocar.
+
+Uso: python -m tests.test_prediccion
+"""
+
+import numpy as np
+
+from src.piano.virtual_keyboard import VirtualKeyboard
+from src.vision.keyboard_mapper import KeyboardMapModular
+
+FPS = 30.0
+REST_DEPTH = 8.0       # cm sobre la superficie
+NOISE = 0.08           # cm (ruido de la profundidad estéreo)
+
+
+def _tap_depth(t, speed, bottom):
+    """Profundidad real de un toque que empieza a bajar en t=0."""
+    descend = (REST_DEPTH - bottom) / speed
+    if t < 0:
+        return REST_DEPTH
+    if t < descend:
+        return REST_DEPTH - speed * t
+    if t < descend + 0.15:
+        return bottom
+    return min(REST_DEPTH, bottom + 60.0 * (t - descend - 0.15))
+
+
+def _run_session(km, vk, taps, seed=0):
+    """
+    Reproduce los toques en el mapper.
+
+    Returns:
+        (latencias de los toques que llegan a contacto, flancos on de los que no)
+    """
+    rng = np.random.default_rng(seed)
+    x = vk.kb_x0 + 0.3 * (vk.kb_x1 - vk.kb_x0)
+    y = vk.kb_y0 + 0.7 * (vk.kb_y1 - vk.kb_y0)
+    press_depth = min(km.depth_threshold, km.algorithm_manager.get_algorithm('Histéresis').press_threshold)
+
+    latencies, false_presses = [], 0
+    t0 = 10.0
+    for speed, bottom in taps:
+        start = t0 + rng.uniform(0, 1 / FPS)       # fase aleatoria respecto al frame
+        contact = start + (REST_DEPTH - press_depth) / speed if bottom < press_depth else None
+        onset = None
+        for frame in range(int(1.2 * FPS)):
+            t = t0 + frame / FPS
+            depth = _tap_depth(t - start, speed, bottom) + rng.normal(0, NOISE)
+            on_map, _ = km.get_kayboard_map(vk, [(0, 8, x, y)], {(0, 8): depth}, 24, timestamp=t)
+            if onset is None and on_map.any():
+                onset = t
+        if contact is None:
+            false_presses += onset is not None
+        elif onset is not None:
+            latencies.append(onset - contact)
+        t0 += 1.2
+    return np.array(latencies), false_presses
+
+
+def _sessions(seed=0, n_taps=60):
+    rng = np.random.default_rng(seed)
+    taps = [(rng.uniform(30, 120), 1.0) for _ in range(n_taps)]
+    hovers = [(rng.uniform(30, 120), rng.uniform(4.5, 6.0)) for _ in range(n_taps // 3)]
+    return taps, hovers
+
+
+def test_latency_gain():
+    """Predicción adelanta el flanco on respecto al umbral solo"""
+    vk = VirtualKeyboard(640, 480, 14)
+    taps, hovers = _sessions()
+
+    results = {}
+    for predict in (False, True):
+        km = KeyboardMapModular()
+        if predict:
+            km.enable_algorithm('Predicción')
+        latencies, _ = _run_session(km, vk, taps)
+        _, false_presses = _run_session(km, vk, hovers, seed=1)
+        results[predict] = (latencies, false_presses, km)
+
+    base, predicted = results[False][0], results[True][0]
+    stats = results[True][2].algorithm_manager.get_algorithm('Predicción').stats
+    print(f"\nLatencia contacto -> on (30 FPS, {len(taps)} toques):")
+    print(f"  Solo umbral: media {base.mean() * 1e3:6.1f} ms | p95 {np.percentile(base, 95) * 1e3:6.1f} ms")
+    print(f"  Predicción : media {predicted.mean() * 1e3:6.1f} ms | p95 {np.percentile(predicted, 95) * 1e3:6.1f} ms")
+    print(f"  Ganancia media: {(base.mean() - predicted.mean()) * 1e3:.1f} ms")
+    print(f"  Estadísticas: {stats}")
+    print(f"  Falsas pulsaciones sin contacto: {results[False][1]} -> {results[True][1]} "
+          f"(de {len(hovers)})")
+
+    assert len(predicted) == len(base) == len(taps)
+    assert predicted.mean() < base.mean()
+    assert stats['confirmed'] > 0
+    assert results[True][1] <= len(hovers) // 4
+
+
+def test_rollback_without_contact():
+    """Bajada rápida que frena sobre la tecla: se predice y luego se suelta"""
+    vk = VirtualKeyboard(640, 480, 14)
+    km = KeyboardMapModular()
+    km.enable_algorithm('Predicción')
+    prediccion = km.algorithm_manager.get_algorithm('Predicción')
+    x = vk.kb_x0 + 0.3 * (vk.kb_x1 - vk.kb_x0)
+    y = vk.kb_y0 + 0.7 * (vk.kb_y1 - vk.kb_y0)
+
+    pressed, released = [], []
+    for frame, depth in enumerate([8.0, 7.0, 6.0, 5.0, 4.0, 4.0, 4.0, 4.0, 4.0]):
+        on_map, off_map = km.get_kayboard_map(vk, [(0, 8, x, y)], {(0, 8): depth}, 24,
+                                              timestamp=1.0 + frame / FPS)
+        pressed += np.flatnonzero(on_map).tolist()
+        released += np.flatnonzero(off_map).tolist()
+        if on_map.any():
+            assert km.get_predictions()[0]['finger_id'] == (0, 8)
+
+    assert (prediccion.stats['predictions'], prediccion.stats['confirmed'],
+            prediccion.stats['rolled_back']) == (1, 0, 1)
+    assert pressed == released and len(pressed) == 1
+    assert km.get_predictions() == []
+
+
+if __name__ == '__main__':
+    test_latency_gain()
+    test_rollback_without_contact()
+    print("✅ Predicción OK")
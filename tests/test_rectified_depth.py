@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de triangulación: DLT (SVD por punto) vs ruta rápida rectificada (f·B/d)
+
+Genera puntos 3D sintéticos delante de las cámaras, los proyecta con la
+calibración real (K, D, R, T) y compara ambos métodos contra la verdad
+conocida, tanto en precisión como en velocidad.
+
+Uso: python -m tests.test_rectified_depth
+"""
+
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.vision.depth_estimator import DepthEstimator
+
+
+CALIB_FILE = Path('camcalibration/calibration.json')
+
+
+def _synthetic_tips(estimator, n_points=10, seed=0):
+    """Proyecta N puntos 3D (en metros, sistema cámara izquierda) en ambas cámaras"""
+    rng = np.random.default_rng(seed)
+    points_3d = np.column_stack((
+        rng.uniform(-0.10, 0.10, n_points),   # X
+        rng.uniform(-0.06, 0.06, n_points),   # Y
+        rng.uniform(0.30, 0.55, n_points),    # Z (30-55 cm, zona del teclado)
+    ))
+
+    zero = np.zeros(3)
+    pts_left, _ = cv2.projectPoints(points_3d, zero, zero,
+                                    estimator.K_left.astype(np.float64),
+                                    estimator.D_left.astype(np.float64))
+    rvec, _ = cv2.Rodrigues(estimator.R.astype(np.float64))
+    pts_right, _ = cv2.projectPoints(points_3d, rvec,
+                                     estimator.T.astype(np.float64).reshape(3),
+                                     estimator.K_right.astype(np.float64),
+                                     estimator.D_right.astype(np.float64))
+    return points_3d * 100, pts_left.reshape(-1, 2), pts_right.reshape(-1, 2)
+
+
+def test_rectified_vs_dlt(n_points=10, repetitions=200):
+    """Compara precisión y throughput de ambos métodos"""
+    if not CALIB_FILE.exists():
+        print("❌ No se encontró calibration.json")
+        return
+
+    estimator = DepthEstimator(CALIB_FILE)
+    truth_cm, pts_left, pts_right = _synthetic_tips(estimator, n_points)
+    truth_cm[:, 2] *= estimator.DEPTH_CORRECTION_FACTOR
+
+    print("\n" + "="*70)
+    print(f"DLT vs RECTIFICADO - {n_points} dedos, {repetitions} frames")
+    print("="*70)
+
+    # ---------- Precisión ----------
+    dlt = np.array([estimator.triangulate_point_DLT(tuple(l), tuple(r))
+                    for l, r in zip(pts_left, pts_right)], dtype=np.float64)
+    rect, valid = estimator.batch_triangulate_rectified(pts_left, pts_right)
+
+    err_dlt = np.linalg.norm(dlt - truth_cm, axis=1)
+    err_rect = np.linalg.norm(rect - truth_cm, axis=1)
+
+    print(f"\nPares válidos (rectificado): {int(valid.sum())}/{n_points}")
+    print(f"Error 3D DLT:         medio {err_dlt.mean():.3f} cm | máx {err_dlt.max():.3f} cm")
+    print(f"Error 3D rectificado: medio {err_rect.mean():.3f} cm | máx {err_rect.max():.3f} cm")
+    print(f"|ΔZ| DLT vs rect:     máx {np.abs(dlt[:, 2] - rect[:, 2]).max():.3f} cm")
+
+    # ---------- Throughput ----------
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        for l, r in zip(pts_left, pts_right):
+            estimator.triangulate_point_DLT(l, r)
+    t_dlt = (time.perf_counter() - t0) / repetitions
+
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        estimator.batch_triangulate_rectified(pts_left, pts_right)
+    t_rect = (time.perf_counter() - t0) / repetitions
+
+    print(f"\nTiempo por frame DLT:         {t_dlt * 1e3:.3f} ms")
+    print(f"Tiempo por frame rectificado: {t_rect * 1e3:.3f} ms")
+    print(f"Aceleración: x{t_dlt / t_rect:.1f}")
+    print("="*70 + "\n")
+
+    assert valid.all()
+    assert err_rect.max() < 0.5
+
+
+def test_rectified_rejects_epipolar_mismatch():
+    """Un par con filas rectificadas muy distintas debe rechazarse"""
+    if not CALIB_FILE.exists():
+        return
+
+    estimator = DepthEstimator(CALIB_FILE)
+    _, pts_left, pts_right = _synthetic_tips(estimator, n_points=2)
+    pts_right[1, 1] += 40  # desalinear verticalmente el segundo par
+
+    points_3d, valid = estimator.batch_triangulate_rectified(pts_left, pts_right)
+
+    assert valid[0] and not valid[1]
+    assert np.all(points_3d[1] == 0)
+
+
+if __name__ == '__main__':
+    test_rectified_vs_dlt()
+    test_rectified_rejects_epipolar_mismatch()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del compositor de RhythmGame.draw
+
+Verifica que la zona de acierto cacheada coincide con el gradiente
+línea por línea mezclado al 30%, que el dibujo es en el mismo frame
+(sin copias completas) y que el costo por frame no crece con la
+cantidad de notas en pantalla.
+
+Uso: python -m tests.test_rhythm_draw
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+from src.gameplay.rythm_game import RhythmGame
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+KEYBOARD_X0, KEYBOARD_X1, KEY_WIDTH = 20, 620, 25
+
+
+def _game_with_notes(n_notes, at=6.0):
+    """Juego con n_notes visibles en el instante `at` de la canción"""
+    game = RhythmGame(num_keys=24)
+    game.start_game([(k % 24, at + 0.5 + 0.12 * (k // 24)) for k in range(n_notes)])
+    game.start_time = time.time() - at
+    game.update()
+    return game
+
+
+def test_hit_zone_gradient():
+    """Gradiente cacheado = líneas de color interpoladas, mezcla 0.7/0.3"""
+    game = _game_with_notes(0)
+    game.is_playing = True
+    frame = np.full((480, 640, 3), 80, np.uint8)
+    out = game.draw(frame, KEYBOARD_X0, KEYBOARD_X1, KEY_WIDTH)
+    assert out is frame
+
+    reference = frame.copy()
+    reference[:] = 80
+    for i in range(game.num_keys + 1):                         # carriles debajo de la zona
+        x = KEYBOARD_X0 + i * KEY_WIDTH
+        cv2.line(reference, (x, 0), (x, game.hit_zone_y + game.hit_zone_height), game.LANE_DIVIDER, 1)
+    overlay = reference.copy()
+    for i in range(game.hit_zone_height):
+        ratio = i / game.hit_zone_height
+        color = tuple(int(game.HIT_ZONE_PRIMARY[j] + (game.HIT_ZONE_SECONDARY[j] - game.HIT_ZONE_PRIMARY[j]) * ratio)
+                      for j in range(3))
+        cv2.line(overlay, (KEYBOARD_X0, game.hit_zone_y + i), (KEYBOARD_X1, game.hit_zone_y + i), color, 1)
+    reference = cv2.addWeighted(reference, 0.7, overlay, 0.3, 0)
+
+    # Interior de la zona (sin el borde ni la línea de timing)
+    rows = slice(game.hit_zone_y + 3, game.hit_zone_y + game.hit_zone_height // 2 - 2)
+    cols = slice(KEYBOARD_X0 + 3, KEYBOARD_X1 - 3)
+    diff = np.abs(frame[rows, cols].astype(int) - reference[rows, cols].astype(int))
+    print(f"\nDiferencia máxima con el gradiente de referencia: {diff.max()}")
+    assert diff.max() <= 1
+
+    # Fuera de la región del teclado el frame no se toca
+    assert np.all(frame[game.hit_zone_y + 200:] == 80)
+
+
+def test_notes_in_layer():
+    """Cada nota visible queda mezclada con su color y borde blanco"""
+    game = _game_with_notes(24)
+    frame = np.zeros((480, 640, 3), np.uint8)
+    game.draw(frame, KEYBOARD_X0, KEYBOARD_X1, KEY_WIDTH)
+
+    note = game.notes[5]
+    x_mid = int(KEYBOARD_X0 + (note.key + 0.5) * KEY_WIDTH)
+    inside = frame[note.y_pos + 15, x_mid]
+    expected = np.rint(np.array(game.NOTE_COLOR) * 0.3)
+    print(f"Centro de la nota: {inside} (esperado {expected})")
+    assert np.all(np.abs(inside.astype(int) - expected) <= 1)
+    assert np.all(frame[note.y_pos, x_mid] == 255)
+
+
+def test_cost_independent_of_notes():
+    """Tiempo de draw con 2 y con 48 notas en pantalla"""
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    times = {}
+    for n_notes in (2, 48):
+        game = _game_with_notes(n_notes)
+        work = frame.copy()
+        game.draw(work, KEYBOARD_X0, KEYBOARD_X1, KEY_WIDTH)      # crea la capa
+        start = time.perf_counter()
+        for _ in range(100):
+            work[:] = frame
+            game.draw(work, KEYBOARD_X0, KEYBOARD_X1, KEY_WIDTH)
+        times[n_notes] = (time.perf_counter() - start) / 100 * 1e3
+        print(f"{n_notes:3d} notas: {times[n_notes]:.2f} ms por frame")
+    if STRICT_TIMING:
+        assert times[48] < times[2] * 2 + 0.5
+
+
+if __name__ == '__main__':
+    test_hit_zone_gradient()
+    test_notes_in_layer()
+    test_cost_independent_of_notes()
+    print("✅ Compositor de RhythmGame OK")
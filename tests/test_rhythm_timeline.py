@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la línea de tiempo de RhythmGame
+
+Compara update / check_hit / is_game_finished (cursores y colas por
+tecla) con el recorrido completo de self.notes en una partida simulada
+con reloj controlado, y mide una canción de 10k notas a 30 FPS.
+
+Uso: python -m tests.test_rhythm_timeline
+"""
+
+import os
+import random
+import time
+
+from src.gameplay import rythm_game
+from src.gameplay.rythm_game import RhythmGame
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+class _Clock:
+    """Sustituye a time.time() dentro de rythm_game"""
+
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def time(self):
+        return self.t
+
+
+class _FullScanGame(RhythmGame):
+    """Referencia: recorre todas las notas en cada llamada (versión anterior)"""
+
+    def update(self):
+        if not self.is_playing:
+            return
+        current_time = rythm_game.time.time() - self.start_time
+        for note in self.notes:
+            if not note.hit and not note.missed:
+                time_since_spawn = current_time - note.spawn_time
+                if time_since_spawn < 0:
+                    continue
+                note.y_pos = int(time_since_spawn * self.note_speed)
+                if current_time > note.hit_time + self.good_window * 1.5:
+                    note.missed = True
+                    self.miss_count += 1
+                    self.combo = 0
+
+    def check_hit(self, key_pressed, press_time=None):
+        current_time = press_time - self.latency_offset - self.start_time
+        best_note, best_diff = None, float('inf')
+        for note in self.notes:
+            if note.key == key_pressed and not note.hit and not note.missed:
+                time_to_hit = note.hit_time - current_time
+                if -self.good_window <= time_to_hit <= self.good_window and abs(time_to_hit) < best_diff:
+                    best_diff, best_note = abs(time_to_hit), note
+        if best_note:
+            best_note.hit = True
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+            if best_diff <= self.perfect_window:
+                self.score += 100 * self.combo
+                self.perfect_count += 1
+                return "PERFECT"
+            self.score += 50 * self.combo
+            self.good_count += 1
+            return "GOOD"
+        return None
+
+    def is_game_finished(self):
+        current_time = rythm_game.time.time() - self.start_time
+        return all(note.hit or note.missed or current_time >= note.hit_time + self.good_window * 2
+                   for note in self.notes)
+
+
+def _random_chart(n_notes, seed=0, num_keys=24):
+    """Chart desordenado con acordes (misma hora en varias teclas)"""
+    rng = random.Random(seed)
+    chart, t = [], 2.0
+    while len(chart) < n_notes:
+        t += rng.choice((0.0, 0.1, 0.25, 0.5))
+        chart.append((rng.randrange(num_keys), round(t, 3)))
+    rng.shuffle(chart)
+    return chart[:n_notes]
+
+
+def _play(game, clock, chart, seed=1):
+    """Partida a 30 FPS con toques cerca del hit_time (o sin tocar)"""
+    rng = random.Random(seed)
+    game.start_game(chart)
+    end = max(t for _, t in chart) + 1.0
+    presses = sorted((t + rng.uniform(-0.25, 0.25), key) for key, t in chart if rng.random() < 0.8)
+    results, finished_at, i = [], None, 0
+    t = 0.0
+    while t < end:
+        clock.t = game.start_time + t
+        game.update()
+        while i < len(presses) and presses[i][0] <= t:
+            press, key = presses[i]
+            results.append(game.check_hit(key, press_time=game.start_time + press + game.latency_offset))
+            i += 1
+        if finished_at is None and game.is_game_finished():
+            finished_at = round(t, 4)
+        t += 1 / 30
+    return results, finished_at
+
+
+def test_matches_full_scan():
+    """Mismos aciertos, fallos, puntaje, posiciones y fin de juego que el recorrido completo"""
+    clock = _Clock()
+    original = rythm_game.time
+    rythm_game.time = clock
+    try:
+        chart = _random_chart(400)
+        fast, reference = RhythmGame(), _FullScanGame()
+        fast_results, fast_end = _play(fast, clock, chart)
+        ref_results, ref_end = _play(reference, clock, chart)
+    finally:
+        rythm_game.time = original
+
+    print(f"\nAciertos: {fast.perfect_count} perfect, {fast.good_count} good, "
+          f"{fast.miss_count} miss | fin a los {fast_end} s")
+    assert fast_results == ref_results
+    assert fast.get_final_score() == reference.get_final_score()
+    assert fast_end == ref_end is not None
+    ref_state = sorted((n.hit_time, n.key, n.hit, n.missed) for n in reference.notes)
+    assert sorted((n.hit_time, n.key, n.hit, n.missed) for n in fast.notes) == ref_state
+
+
+def test_long_chart_frame_rate():
+    """Canción de 10k notas: costo por frame de update + check_hit + fin de juego"""
+    clock = _Clock()
+    original = rythm_game.time
+    rythm_game.time = clock
+    try:
+        chart = _random_chart(10000, seed=2)
+        timings = {}
+        for label, game in (('línea de tiempo', RhythmGame()), ('recorrido completo', _FullScanGame())):
+            game.start_game(chart)
+            frames, start = 0, time.perf_counter()
+            t = 0.0
+            while t < 60.0:                                    # primer minuto de la canción
+                clock.t = game.start_time + t
+                game.update()
+                for key in range(0, 24, 6):                    # 4 teclas por frame
+                    game.check_hit(key, press_time=clock.t + game.latency_offset)
+                game.is_game_finished()
+                frames += 1
+                t += 1 / 30
+            timings[label] = (time.perf_counter() - start) / frames * 1e3
+            print(f"{label}: {timings[label]:.3f} ms por frame ({1000 / timings[label]:.0f} FPS de lógica)")
+    finally:
+        rythm_game.time = original
+
+    if STRICT_TIMING:
+        assert timings['línea de tiempo'] < 1000 / 30 / 10           # < 10% del frame a 30 FPS
+        assert timings['línea de tiempo'] < timings['recorrido completo']
+
+
+if __name__ == '__main__':
+    test_matches_full_scan()
+    test_long_chart_frame_rate()
+    print("✅ Línea de tiempo de RhythmGame OK")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del mezclador de muestras pre-renderizadas (MixerBackend)
+
+Sin dispositivo de audio: usa un banco sintético para verificar que la
+salida es la suma exacta de las muestras con su ganancia, el fundido al
+soltar, el robo de voces al superar la polifonía y que el costo por
+bloque no crece con las notas pulsadas. Si pyfluidsynth y el soundfont
+están disponibles compara el mezclador con el render de fluidsynth.
+
+Uso: python -m tests.test_sample_mixer
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.audio import MixerBackend, OfflineRenderBackend, SampleBank
+from src.audio.backends import fluidsynth
+from src.config.app_config import AppConfig
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+def _synthetic_bank(notes=range(60, 84), velocities=(40, 80, 120), seconds=0.5, sample_rate=44100):
+    """Senoidales con decaimiento, una por nota y capa"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = []
+    for note in notes:
+        freq = 440.0 * 2 ** ((note - 69) / 12)
+        for vel in velocities:
+            wave = (vel / 127) * 20000 * np.sin(2 * np.pi * freq * t) * np.exp(-3 * t)
+            samples.append(np.repeat(wave[:, None], 2, axis=1).astype(np.int16))
+    return SampleBank(list(notes), velocities, samples, sample_rate)
+
+
+def test_mix_matches_samples():
+    """Una nota = su muestra; dos notas = la suma (en la capa exacta)"""
+    bank = _synthetic_bank()
+    mixer = MixerBackend(bank, block_size=256, start=False)
+
+    mixer.noteon(0, 60, 80)
+    out = mixer.render(0.2)
+    expected = bank.samples[bank.lookup(60, 80)[0]][:len(out)]
+    assert np.array_equal(out, expected)
+
+    mixer = MixerBackend(bank, block_size=256, start=False)
+    mixer.noteon(0, 60, 120)
+    mixer.noteon(0, 67, 120)
+    out = mixer.render(0.2).astype(np.int32)
+    a, b = (bank.samples[bank.lookup(k, 120)[0]][:len(out)].astype(np.int32) for k in (60, 67))
+    assert np.abs(out - np.clip(a + b, -32768, 32767)).max() <= 1
+
+    # Velocidad entre capas: capa superior con ganancia (vel/capa)^2
+    sample, gain = bank.lookup(60, 100)
+    print(f"\nvel 100 -> capa {bank.velocities[sample % 3]} ganancia {gain:.3f}")
+    assert sample % 3 == 2 and np.isclose(gain, (100 / 120) ** 2)
+
+    # Sobre la capa más alta (120): misma capa sin amplificar
+    assert bank.lookup(60, 127)[1] == 1.0
+    assert np.all(bank.layer_gain <= 1.0)
+
+
+def test_release_envelope():
+    """noteoff: fundido lineal y la voz se libera"""
+    bank = _synthetic_bank()
+    mixer = MixerBackend(bank, block_size=256, release=0.05, start=False)
+
+    mixer.noteon(0, 69, 120)
+    mixer.render(0.05)
+    assert mixer.active_voices() == 1
+    mixer.noteoff(0, 69)
+    tail = mixer.render(0.1)
+
+    ramp = int(0.05 * 44100)
+    assert np.abs(tail[ramp:]).max() == 0
+    assert np.abs(tail[:ramp // 4]).max() > 4 * np.abs(tail[3 * ramp // 4:ramp]).max()
+    assert mixer.active_voices() == 0
+
+
+def test_polyphony_cap():
+    """Más notas que voces: se roba la más antigua y el costo por bloque se mantiene"""
+    bank = _synthetic_bank(seconds=2.0)
+    block_ms = 256 / 44100 * 1e3
+
+    for polyphony in (4, 16):
+        mixer = MixerBackend(bank, block_size=256, polyphony=polyphony, start=False)
+        for key in range(60, 84):
+            mixer.noteon(0, key, 100)
+        mixer.render(0.3)
+        t0 = time.perf_counter()
+        mixer.render(1.0)
+        per_block = (time.perf_counter() - t0) / np.ceil(44100 / 256) * 1e3
+
+        print(f"\nPolifonía {polyphony}: {mixer.stats['max_voices']} voces, "
+              f"{mixer.stats['stolen']} robadas | {per_block:.3f} ms/bloque "
+              f"(presupuesto {block_ms:.1f} ms)")
+        assert mixer.stats['max_voices'] == polyphony
+        assert mixer.stats['stolen'] == 24 - polyphony
+        assert set(mixer.voice_key[mixer.voice_key >= 0]) == set(range(84 - polyphony, 84))
+        if STRICT_TIMING:
+            assert per_block < block_ms
+
+
+def test_bank_cache_roundtrip():
+    """save/load conserva las muestras"""
+    bank = _synthetic_bank(notes=(60, 61))
+    with tempfile.TemporaryDirectory() as tmp:
+        bank.save(f"{tmp}/bank.npz")
+        loaded = SampleBank.load(f"{tmp}/bank.npz")
+    assert all(np.array_equal(a, b) for a, b in zip(bank.samples, loaded.samples))
+    assert loaded.lookup(61, 40) == bank.lookup(61, 40)
+
+
+def test_against_fluidsynth():
+    """Mezclador vs render offline de fluidsynth (si está disponible)"""
+    soundfont = AppConfig.get_soundfont_path()
+    if fluidsynth is None or soundfont is None:
+        print("\n⚠ pyfluidsynth o soundfont no disponibles: comparación omitida")
+        return
+
+    bank = SampleBank.render(soundfont, [60, 64], [100], hold=0.5, tail=0.3)
+    mixer = MixerBackend(bank, start=False)
+    mixer.noteon(0, 64, 100)
+    mixed = mixer.render(0.4).astype(np.float64)
+
+    synth = OfflineRenderBackend()
+    synth.program_select(0, synth.load_soundfont(soundfont), 0, 0)
+    synth.noteon(0, 64, 100)
+    reference = synth.render(0.4)[:len(mixed)].astype(np.float64)
+    synth.delete()
+
+    corr = np.corrcoef(mixed[:len(reference)].ravel(), reference.ravel())[0, 1]
+    print(f"\nCorrelación mezclador vs fluidsynth: {corr:.4f}")
+    assert corr > 0.99
+
+
+if __name__ == '__main__':
+    test_mix_matches_samples()
+    test_release_envelope()
+    test_polyphony_cap()
+    test_bank_cache_roundtrip()
+    test_against_fluidsynth()
+    print("✅ MixerBackend OK")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del soundfont reducido y la carga en segundo plano
+
+Genera un .sf2 sintético (3 presets, uno con muestras estéreo), extrae
+solo el piano y verifica tablas, índices renumerados y datos de audio.
+Luego mide que SoundfontLoader no bloquea el arranque. Si pyfluidsynth y
+el FluidR3_GM.sf2 están disponibles compara tiempo de carga y tamaño del
+banco completo contra el reducido.
+
+Uso: python -m tests.test_soundfont_subset
+"""
+
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.audio import AudioEngine, NullBackend, SoundfontLoader, extract_presets, get_subset_soundfont
+from src.audio.backends import fluidsynth
+from src.audio.soundfont_subset import (GEN_INSTRUMENT, GEN_SAMPLE_ID, SAMPLE_PADDING,
+                                        read_soundfont, write_soundfont)
+from src.config.app_config import AppConfig
+
+
+# Aserciones de tiempo de reloj solo con STRICT_TIMING=1 (máquina sin carga);
+# sin la variable los tiempos solo se imprimen
+STRICT_TIMING = os.environ.get('STRICT_TIMING') == '1'
+
+
+def _name(text):
+    return text.encode('latin-1').ljust(20, b'\0')
+
+
+def _make_soundfont(path, sample_len=20000):
+    """
+    Banco sintético:
+    - 000-000 Piano -> inst 'Piano' -> muestra estéreo L/R
+    - 000-001 Bright -> inst 'Bright' -> muestra mono
+    - 128-000 Drums -> inst 'Drums' -> muestra mono
+    """
+    rng = np.random.default_rng(0)
+    waves = [rng.integers(-2000, 2000, sample_len, dtype=np.int16) for _ in range(4)]
+    smpl = bytearray()
+    shdr = []
+    # kinds: 1 mono, 2 right, 4 left
+    for i, (wave, kind, link) in enumerate(zip(waves, (1, 4, 1, 2), (0, 3, 0, 1))):
+        start = len(smpl) // 2
+        smpl += wave.tobytes() + bytes(2 * SAMPLE_PADDING)
+        end = start + sample_len
+        shdr.append((_name(f"s{i}"), start, end, start + 100, end - 100, 44100, 60, 0, link, kind))
+    shdr.append((_name('EOS'), 0, 0, 0, 0, 0, 0, 0, 0, 0))
+
+    # Drums -> muestra 0, Piano -> muestra 1 (izquierda, enlazada a 3), Bright -> 2
+    instruments = [('Drums', [0]), ('Piano', [1]), ('Bright', [2])]
+    inst, ibag, igen, imod = [], [], [], []
+    for name, samples in instruments:
+        inst.append((_name(name), len(ibag)))
+        for sample in samples:
+            ibag.append((len(igen), len(imod)))
+            igen.append((43, 0x7F00))                  # keyRange 0-127
+            igen.append((GEN_SAMPLE_ID, sample))
+            imod.append((0x0502, 48, 960, 0, 0))
+    inst.append((_name('EOI'), len(ibag)))
+    ibag.append((len(igen), len(imod)))
+    igen.append((0, 0))
+    imod.append((0, 0, 0, 0, 0))
+
+    presets = [('Drums', 128, 0, 0), ('Piano', 0, 0, 1), ('Bright', 0, 1, 2)]
+    phdr, pbag, pgen, pmod = [], [], [], []
+    for name, bank, preset, instrument in presets:
+        phdr.append((_name(name), preset, bank, len(pbag), 0, 0, 0))
+        pbag.append((len(pgen), len(pmod)))            # zona global vacía
+        pbag.append((len(pgen), len(pmod)))
+        pgen.append((GEN_INSTRUMENT, instrument))
+    phdr.append((_name('EOP'), 0, 0, len(pbag), 0, 0, 0))
+    pbag.append((len(pgen), len(pmod)))
+    pgen.append((0, 0))
+    pmod.append((0, 0, 0, 0, 0))
+
+    info = [('ifil', struct.pack('<HH', 2, 1)), ('isng', b'EMU8000\0'), ('INAM', b'Test Bank\0\0')]
+    pdta = {'phdr': phdr, 'pbag': pbag, 'pmod': pmod, 'pgen': pgen,
+            'inst': inst, 'ibag': ibag, 'imod': imod, 'igen': igen, 'shdr': shdr}
+    write_soundfont(path, info, smpl, pdta)
+    return waves
+
+
+def _sample_data(path, sf, index):
+    _, start, end, *_ = sf.pdta['shdr'][index]
+    with open(path, 'rb') as f:
+        f.seek(sf.smpl_offset + 2 * start)
+        return np.frombuffer(f.read(2 * (end - start)), dtype=np.int16)
+
+
+def test_extract_piano():
+    """Extraer 000-000: solo su instrumento y el par estéreo de muestras"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source, subset = Path(tmp) / 'bank.sf2', Path(tmp) / 'piano.sf2'
+        waves = _make_soundfont(source)
+        result = extract_presets(source, subset, [(0, 0)])
+
+        sf = read_soundfont(subset)
+        print(f"\nPresets {sf.presets} | {result['samples']} muestras | "
+              f"{result['source_size'] / 1e3:.0f} KB -> {result['size'] / 1e3:.0f} KB")
+        assert sf.presets == [(0, 0, 'Piano')]
+        assert sf.sample_count == 2
+        assert result['size'] < result['source_size'] * 0.6
+
+        # Índices renumerados: preset -> inst 0 -> muestra 0, enlazada con 1
+        assert (GEN_INSTRUMENT, 0) in sf.pdta['pgen']
+        assert (GEN_SAMPLE_ID, 0) in sf.pdta['igen']
+        left, right = sf.pdta['shdr'][0], sf.pdta['shdr'][1]
+        assert (left[8], left[9], right[8], right[9]) == (1, 4, 0, 2)
+        assert left[3] - left[1] == 100 and left[2] - left[4] == 100   # loops desplazados
+
+        # Moduladores y datos de audio intactos
+        assert sf.pdta['imod'][0] == (0x0502, 48, 960, 0, 0)
+        assert np.array_equal(_sample_data(subset, sf, 0), waves[1])
+        assert np.array_equal(_sample_data(subset, sf, 1), waves[3])
+
+
+def test_subset_cache():
+    """La caché se genera una vez y cambia con la lista de presets"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'bank.sf2'
+        _make_soundfont(source)
+
+        first = get_subset_soundfont(source, [(0, 0)], Path(tmp) / 'cache')
+        mtime = os.path.getmtime(first)
+        again = get_subset_soundfont(source, [(0, 0)], Path(tmp) / 'cache')
+        other = get_subset_soundfont(source, [(0, 0), (128, 0)], Path(tmp) / 'cache')
+
+        assert again == first and os.path.getmtime(again) == mtime
+        assert other != first
+        assert [p[:2] for p in read_soundfont(other).presets] == [(128, 0), (0, 0)]
+
+
+def test_loader_does_not_block():
+    """SoundfontLoader retorna de inmediato y selecciona el preset al terminar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'bank.sf2'
+        _make_soundfont(source)
+        backend = NullBackend()
+
+        t0 = time.perf_counter()
+        loader = SoundfontLoader(backend, str(source), presets=[(0, 0)], cache_dir=Path(tmp) / 'cache').start()
+        start_ms = (time.perf_counter() - t0) * 1e3
+        assert loader.wait(5.0)
+
+        print(f"\nstart(): {start_ms:.2f} ms | subconjunto {loader.stats['subset_time'] * 1e3:.1f} ms")
+        if STRICT_TIMING:
+            assert start_ms < 50
+        assert loader.loaded_path != str(source)
+        assert [e[1:] for e in backend.events] == [('program', 0, 0, 0)]
+
+
+class _ThreadCheckBackend(NullBackend):
+    """Registra el hilo que llama al sintetizador"""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def load_soundfont(self, path):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)                                   # sfload lento mientras suenan notas
+        return super().load_soundfont(path)
+
+    def noteon(self, chan, key, vel):
+        self.threads.add(threading.current_thread().name)
+        super().noteon(chan, key, vel)
+
+
+def test_loader_uses_audio_thread():
+    """Con AudioEngine, sfload corre en el hilo de audio (único que toca el synth)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'bank.sf2'
+        _make_soundfont(source)
+        backend = _ThreadCheckBackend()
+        audio = AudioEngine(backend).start()
+
+        loader = SoundfontLoader(audio, str(source), presets=[(0, 0)], cache_dir=Path(tmp) / 'cache').start()
+        for key in range(60, 72):
+            audio.noteon(0, key, 100)
+            time.sleep(0.005)
+        assert loader.wait(5.0) and loader.sfid == 1
+        audio.stop()
+
+        print(f"\nHilos que llamaron al sintetizador: {backend.threads}")
+        assert backend.threads == {'AudioEngine'}
+        assert ('program', 0, 0, 0) in [e[1:] for e in backend.events]
+
+        # Motor detenido: la llamada corre en el hilo que llama
+        assert audio.call(backend.load_soundfont, str(source)).result() == 1
+
+
+def test_fluidsynth_load_time():
+    """Banco completo vs reducido con fluidsynth (si está disponible)"""
+    soundfont = AppConfig.get_soundfont_path()
+    if fluidsynth is None or soundfont is None:
+        print("\n⚠ pyfluidsynth o FluidR3_GM.sf2 no disponibles: comparación omitida")
+        return
+
+    subset = get_subset_soundfont(soundfont, AppConfig.SOUNDFONT_PRESETS, AppConfig.SOUNDFONT_CACHE_DIR)
+    for path in (soundfont, subset):
+        synth = fluidsynth.Synth()
+        t0 = time.perf_counter()
+        sfid = synth.sfload(str(path))
+        elapsed = time.perf_counter() - t0
+        synth.delete()
+        print(f"\n{Path(path).name}: {os.path.getsize(path) / 1e6:.1f} MB cargado en {elapsed:.2f}s")
+        assert sfid >= 0
+
+
+if __name__ == '__main__':
+    test_extract_piano()
+    test_subset_cache()
+    test_loader_does_not_block()
+    test_loader_uses_audio_thread()
+    test_fluidsynth_load_time()
+    print("✅ Soundfont reducido OK")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del administrador de voces (VoiceManager)
+
+Con el backend nulo y un reloj simulado verifica que ninguna nota queda
+sonando: duración máxima (modo juego sin noteoff), pérdida de manos
+(modo libre sin flancos off), robo de la voz más antigua y re-ataque.
+Al final simula una sesión larga y compara las voces activas con y sin
+administrador.
+
+Uso: python -m tests.test_voice_manager
+"""
+
+import random
+
+from src.audio import NullBackend, VoiceManager
+
+
+class _Clock:
+    def __init__(self, t=100.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def _sounding(backend):
+    """Notas encendidas y no apagadas según el registro del backend"""
+    on = set()
+    for _, kind, chan, key, _ in backend.events:
+        if kind == 'on':
+            on.add((chan, key))
+        elif kind == 'off':
+            on.discard((chan, key))
+    return on
+
+
+def test_max_duration():
+    """Modo juego: noteon sin noteoff se apaga a max_duration"""
+    clock, backend = _Clock(), NullBackend()
+    voices = VoiceManager(backend, max_duration=2.0, clock=clock)
+
+    voices.noteon(0, 60, 90)
+    clock.t += 1.0
+    voices.noteon(0, 64, 90)
+    clock.t += 1.0
+    voices.update()
+    assert _sounding(backend) == {(0, 64)}
+    clock.t += 1.0
+    voices.update()
+    assert _sounding(backend) == set() and voices.stats['released_timeout'] == 2
+
+
+def test_hand_loss():
+    """Modo libre: sin manos por más de hand_loss_timeout se apaga todo (una vez)"""
+    clock, backend = _Clock(), NullBackend()
+    voices = VoiceManager(backend, hand_loss_timeout=0.2, clock=clock)
+    voices.noteon(0, 60, 90)
+    voices.noteon(0, 67, 90)
+
+    # Un frame suelto sin detección no corta las notas
+    clock.t += 1 / 30
+    assert not voices.update(hands_visible=False)
+    clock.t += 1 / 30
+    assert not voices.update(hands_visible=True)
+    assert voices.active_voices() == 2
+
+    released = []
+    for _ in range(10):
+        clock.t += 1 / 30
+        released.append(voices.update(hands_visible=False))
+    print(f"\nPérdida de manos: liberado en el frame {released.index(True) + 1} sin manos")
+    assert released.count(True) == 1
+    assert _sounding(backend) == set() and voices.stats['released_hand_loss'] == 2
+
+
+def test_polyphony_and_retrigger():
+    """Robo de la más antigua y re-ataque de la misma tecla"""
+    clock, backend = _Clock(), NullBackend()
+    voices = VoiceManager(backend, polyphony=3, clock=clock)
+
+    for key in (60, 62, 64):
+        voices.noteon(0, key, 90)
+        clock.t += 0.1
+    voices.noteon(0, 60, 100)                    # re-ataque: no roba
+    assert voices.stats['stolen'] == 0
+    voices.noteon(0, 65, 90)                     # roba la más antigua (62)
+    assert voices.stats['stolen'] == 1
+    assert _sounding(backend) == {(0, 60), (0, 64), (0, 65)}
+
+    voices.noteoff(0, 60)
+    voices.noteoff(0, 60)                        # flanco repetido: ignorado
+    assert sum(1 for e in backend.events if e[1] == 'off' and e[3] == 60) == 2
+
+
+def test_release_all_on_mode_change():
+    """Cambio de modo con teclas sostenidas: release_all apaga todo y el noteoff tardío se ignora"""
+    clock, backend = _Clock(), NullBackend()
+    voices = VoiceManager(backend, clock=clock)
+    for key in (60, 64, 67):
+        voices.noteon(0, key, 90)
+    voices.release_all()
+    assert _sounding(backend) == set() and voices.active_voices() == 0
+
+    n_events = len(backend.events)
+    voices.noteoff(0, 64)                        # flanco off al levantar el dedo
+    assert len(backend.events) == n_events
+
+
+def test_long_session():
+    """Sesión simulada con flancos off perdidos: voces activas acotadas"""
+    random.seed(1)
+    clock = _Clock()
+    raw, managed = NullBackend(), NullBackend()
+    voices = VoiceManager(managed, clock=clock)
+
+    for frame in range(30 * 600):                # 10 minutos a 30 FPS
+        clock.t += 1 / 30
+        hands_visible = (frame // 90) % 5 != 0   # manos fuera 3 s de cada 15
+        if hands_visible and random.random() < 0.1:
+            key = random.randrange(60, 84)
+            raw.noteon(0, key, 90)
+            voices.noteon(0, key, 90)
+            if random.random() < 0.7:            # el resto pierde su flanco off
+                raw.noteoff(0, key)
+                voices.noteoff(0, key)
+        voices.update(hands_visible=hands_visible)
+
+    print(f"\nVoces colgadas sin administrador: {len(_sounding(raw))} | "
+          f"con administrador: {len(_sounding(managed))} (máx {voices.stats['max_voices']})")
+    print(f"Liberadas: duración {voices.stats['released_timeout']}, "
+          f"manos {voices.stats['released_hand_loss']}, robadas {voices.stats['stolen']}")
+    assert voices.stats['max_voices'] <= voices.polyphony
+    assert len(_sounding(managed)) == voices.active_voices() <= voices.polyphony
+
+
+if __name__ == '__main__':
+    test_max_duration()
+    test_hand_loss()
+    test_polyphony_and_retrigger()
+    test_release_all_on_mode_change()
+    test_long_session()
+    print("✅ VoiceManager OK")